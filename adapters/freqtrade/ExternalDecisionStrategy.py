@@ -173,6 +173,13 @@ class ExternalDecisionStrategy(IStrategy):
             "pgm": pgm
         }
     
+    def create_enter_both_request(self, dataframe: DataFrame, metadata: dict) -> dict:
+        """创建双假说入场决策请求（只获取一次市场快照）"""
+        # 多空两侧的强平缓冲对称（均为10%），共享同一份特征
+        request = self.create_enter_request(dataframe, metadata, "long")
+        request.pop("side_hint")
+        return request
+    
     def call_decision_api(self, endpoint: str, payload: dict) -> Optional[dict]:
         """调用决策API"""
         try:
@@ -204,9 +211,15 @@ class ExternalDecisionStrategy(IStrategy):
         if len(dataframe) < 2:
             return dataframe
         
+        # 一次调用同时评估多空两个假说（共享同一份FeatureHub快照）
+        both_request = self.create_enter_both_request(dataframe, metadata)
+        both_decision = self.call_decision_api("decide/enter/both", both_request)
+        
+        if not both_decision:
+            return dataframe
+        
         # 检查多头信号
-        long_request = self.create_enter_request(dataframe, metadata, "long")
-        long_decision = self.call_decision_api("decide/enter", long_request)
+        long_decision = both_decision.get("long")
         
         if long_decision and long_decision.get("allow") and long_decision.get("side") == "long":
             dataframe.loc[dataframe.index[-1], 'enter_long'] = 1
@@ -214,8 +227,7 @@ class ExternalDecisionStrategy(IStrategy):
             self.log(f"Long signal: {long_decision.get('reason_chain', [])}")
         
         # 检查空头信号
-        short_request = self.create_enter_request(dataframe, metadata, "short")
-        short_decision = self.call_decision_api("decide/enter", short_request)
+        short_decision = both_decision.get("short")
         
         if short_decision and short_decision.get("allow") and short_decision.get("side") == "short":
             dataframe.loc[dataframe.index[-1], 'enter_short'] = 1
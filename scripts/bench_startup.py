@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""Decision Service 启动基准：从进程启动到首个决策的耗时
+
+每轮启动一个新的服务进程并记录（毫秒）：
+- import_ms：新解释器中 import services.decision.app 的耗时（单独测量）
+- ready_ms：进程启动到 /health 返回200（导入、模型加载与预热）
+- first_decision_ms：进程启动到首个 /decide/enter 响应返回
+- first_latency_ms / warm_latency_ms：首个与第二个决策请求的往返耗时
+
+用法：python scripts/bench_startup.py [--runs 5] [--no-warmup] [--prefork] [--json]
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import requests
+import yaml
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from services.decision.schemas.examples import EXAMPLE_ENTER_BULL  # noqa: E402
+
+METRICS = ("import_ms", "ready_ms", "first_decision_ms", "first_latency_ms", "warm_latency_ms")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_import(env: Dict[str, str]) -> float:
+    """新解释器中导入应用模块的耗时"""
+    code = (
+        "import time; start = time.perf_counter(); import services.decision.app; "
+        "print((time.perf_counter() - start) * 1000)"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure_once(env: Dict[str, str], prefork: bool = False, timeout_s: float = 60) -> Dict[str, float]:
+    """启动一个服务进程，测量就绪与首个决策的时间"""
+    port = free_port()
+    base = f"http://127.0.0.1:{port}"
+    if prefork:
+        command = [sys.executable, "-m", "services.decision.serve", "--host", "127.0.0.1",
+                   "--port", str(port), "--workers", "1"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "services.decision.app:app", "--host", "127.0.0.1",
+                   "--port", str(port), "--log-level", "warning"]
+
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        deadline = start + timeout_s
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError(f"service exited with {process.returncode}")
+            if time.perf_counter() > deadline:
+                raise TimeoutError("service not ready")
+            try:
+                if requests.get(f"{base}/health", timeout=1).status_code == 200:
+                    break
+            except requests.ConnectionError:
+                pass
+            time.sleep(0.005)
+        ready = time.perf_counter()
+
+        response = requests.post(f"{base}/decide/enter", json=EXAMPLE_ENTER_BULL, timeout=10)
+        response.raise_for_status()
+        first = time.perf_counter()
+
+        # 换一个时间戳避开决策缓存
+        warm_payload = {**EXAMPLE_ENTER_BULL, "ts": "2025-09-14T10:40:00Z"}
+        requests.post(f"{base}/decide/enter", json=warm_payload, timeout=10).raise_for_status()
+        warm = time.perf_counter()
+    finally:
+        process.terminate()
+        process.wait(timeout=30)
+
+    return {
+        "ready_ms": (ready - start) * 1000,
+        "first_decision_ms": (first - start) * 1000,
+        "first_latency_ms": (first - ready) * 1000,
+        "warm_latency_ms": (warm - first) * 1000,
+    }
+
+
+def bench_env(warmup: bool) -> Dict[str, str]:
+    """子进程环境；warmup=False 时写入关闭预热的临时配置"""
+    env = {**os.environ, "LOG_LEVEL": "WARNING"}
+    if not warmup:
+        path = env.get("CONFIG_PATH") or os.path.join(ROOT, "configs", "default.yaml")
+        with open(path, "r", encoding="utf-8") as f:
+            config = yaml.safe_load(f) or {}
+        config["warmup"] = {**config.get("warmup", {}), "enabled": False}
+        handle, temp_path = tempfile.mkstemp(suffix=".yaml")
+        with os.fdopen(handle, "w", encoding="utf-8") as f:
+            yaml.safe_dump(config, f)
+        env["CONFIG_PATH"] = temp_path
+    return env
+
+
+def run(runs: int = 5, warmup: bool = True, prefork: bool = False) -> Dict[str, Dict[str, float]]:
+    """多轮测量，返回各指标的中位数与最大值"""
+    env = bench_env(warmup)
+    samples: List[Dict[str, float]] = []
+    for _ in range(runs):
+        sample = measure_once(env, prefork)
+        sample["import_ms"] = measure_import(env)
+        samples.append(sample)
+    return {
+        metric: {
+            "median": round(statistics.median(s[metric] for s in samples), 1),
+            "max": round(max(s[metric] for s in samples), 1),
+        }
+        for metric in METRICS
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Decision Service time-to-first-decision benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-warmup", action="store_true", help="关闭启动预热（对照组）")
+    parser.add_argument("--prefork", action="store_true", help="以预fork模式（1个worker）启动")
+    parser.add_argument("--json", action="store_true", help="输出JSON")
+    args = parser.parse_args()
+
+    results = run(args.runs, warmup=not args.no_warmup, prefork=args.prefork)
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return 0
+
+    mode = f"{'prefork' if args.prefork else 'uvicorn'}, warm-up {'off' if args.no_warmup else 'on'}"
+    print(f"⏱️  Startup benchmark ({args.runs} runs, {mode})")
+    for metric in METRICS:
+        print(f"   {metric:<20} median {results[metric]['median']:>8.1f}   max {results[metric]['max']:>8.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
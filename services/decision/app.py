@@ -1,14 +1,25 @@
 """Decision Service FastAPI应用主文件"""
+import asyncio
+import math
+import os
+import time
 from contextlib import asynccontextmanager
 from datetime import datetime
 
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from loguru import logger
 
+from .core import prefork
+from .core.admission import PoolSaturated
+from .core.ratelimit import RateLimited
 from .core.config import config_manager
+from .core.shared_state import shared_state
 from .core.logging import setup_logging
-from .routes import decide_enter, decide_exit, health
+from .decision.trace import trace_store
+from .decision.warmup import warm_up
+from .routes import decide_enter, decide_exit, health, traces
 
 
 @asynccontextmanager
@@ -20,21 +31,28 @@ async def lifespan(app: FastAPI):
     # 设置日志
     setup_logging()
     
-    # 加载模型（当前为stub）
-    try:
-        from .models.ctfg import ctfg_model
-        from .models.quantile import quantile_predictor
-        
-        ctfg_model.load_model()
-        quantile_predictor.load_model()
-        
-        logger.info("✅ Models loaded successfully")
-    except Exception as e:
-        logger.warning(f"⚠️  Model loading warning: {e}")
+    # 加载模型（当前为stub）；预fork模式下已由主进程加载，worker 写时复制共享
+    if prefork.preloaded:
+        logger.info(f"♻️  Worker {os.getpid()} using models preloaded by master")
+    else:
+        prefork.load_models()
     
     # 验证配置
     gates_config = config_manager.get_gates_config()
-    logger.info(f"📋 Gates config loaded: {len(gates_config)} parameters")
+    logger.info(f"📋 Gates config loaded: {len(gates_config)} parameters ({config_manager.version})")
+    
+    # 配置热加载：SIGHUP 与文件监视
+    loop = asyncio.get_running_loop()
+    if config_manager.install_sighup(loop):
+        logger.info("🔁 SIGHUP reloads config")
+    config_manager.start_watching()
+    
+    # 预热：合成请求走一遍各决策路径，完成后才开始接收请求
+    await warm_up()
+    
+    # 多worker共享状态：在各 worker 进程内启动同步线程
+    if shared_state is not None:
+        shared_state.start()
     
     logger.info("✅ Decision Service startup completed")
     
@@ -42,6 +60,18 @@ async def lifespan(app: FastAPI):
     
     # 关闭时的清理
     logger.info("🛑 Shutting down P1 Decision Service...")
+    
+    config_manager.stop_watching()
+    config_manager.remove_sighup(loop)
+    
+    # 落盘剩余追踪
+    trace_store.close()
+    
+    if shared_state is not None:
+        shared_state.stop()
+    
+    # 等待日志队列写完
+    await logger.complete()
 
 
 # 创建FastAPI应用
@@ -63,10 +93,69 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+class ServerTimingMiddleware:
+    """
+    在 Server-Timing 响应头末尾追加 app 总耗时
+    
+    app 与各决策阶段之和的差值即请求解析、pydantic 校验/序列化与路由开销。
+    纯ASGI实现，不引入 BaseHTTPMiddleware 的额外任务开销。
+    """
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        start = time.perf_counter_ns()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                app_ms = round((time.perf_counter_ns() - start) / 1e6, 3)
+                headers = list(message.get("headers", []))
+                existing = [v for k, v in headers if k.lower() == b"server-timing"]
+                headers = [(k, v) for k, v in headers if k.lower() != b"server-timing"]
+                entries = existing + [f"app;dur={app_ms}".encode("latin-1")]
+                headers.append((b"server-timing", b", ".join(entries)))
+                message = {**message, "headers": headers}
+            await send(message)
+        
+        await self.app(scope, receive, send_with_timing)
+
+
+app.add_middleware(ServerTimingMiddleware)
+
+
+@app.exception_handler(PoolSaturated)
+async def pool_saturated_handler(request: Request, exc: PoolSaturated) -> JSONResponse:
+    """决策线程池已满：快速返回503和重试提示"""
+    logger.warning(f"Rejected {request.url.path}: {exc}")
+    return JSONResponse(
+        status_code=503,
+        content={"detail": "Decision service overloaded, retry later", "retry_after_s": exc.retry_after_s},
+        headers={"Retry-After": str(exc.retry_after_s)}
+    )
+
+
+@app.exception_handler(RateLimited)
+async def rate_limited_handler(request: Request, exc: RateLimited) -> JSONResponse:
+    """客户端超出接口限额：快速返回429和重试提示"""
+    retry_after_s = max(1, math.ceil(exc.retry_after_s))
+    logger.debug("Rate limited {path}: {error}", path=request.url.path, error=str(exc))
+    return JSONResponse(
+        status_code=429,
+        content={"detail": f"Rate limit exceeded for {exc.endpoint}", "retry_after_s": retry_after_s},
+        headers={"Retry-After": str(retry_after_s)}
+    )
+
+
 # 注册路由
 app.include_router(health.router, tags=["Health"])
 app.include_router(decide_enter.router, tags=["Enter Decision"])
 app.include_router(decide_exit.router, tags=["Exit Decision"])
+app.include_router(traces.router, tags=["Traces"])
 
 
 @app.get("/")
@@ -81,7 +170,10 @@ async def root():
             "health": "/health",
             "docs": "/docs", 
             "enter_decision": "/decide/enter",
-            "exit_decision": "/decide/exit"
+            "enter_batch_decision": "/decide/enter/batch",
+            "enter_both_decision": "/decide/enter/both",
+            "exit_decision": "/decide/exit",
+            "traces": "/traces"
         },
         "features": [
             "🔒 4-Gate Safety System (Vol/Consensus/LiqBuffer/Event)",
@@ -122,6 +214,8 @@ async def api_info():
         },
         "configuration": {
             "environment": config_manager.settings.app_env,
+            "config_version": config_manager.version,
+            "gate_plan_version": config_manager.gate_plan.version,
             "latency_slo_ms": config_manager.get_latency_slo(),
             "gates_enabled": 4
         }
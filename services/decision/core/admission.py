@@ -0,0 +1,175 @@
+"""准入控制模块 - 有界决策线程池
+
+决策中的CPU密集步骤（Gate检查、脆弱性测试、退出决策）在线程池中执行，
+不阻塞FastAPI事件循环。执行中+排队的请求数超过 max_workers + queue_depth 时
+立即拒绝，由应用返回 503 + Retry-After，而不是让延迟无限增长。
+
+大脑组件（CTFG / xLSTM / LLM）在独立的 BrainPool 中执行：不排队，线程全部占用时
+（含超过截止时间被丢弃但仍在运行的推理）新的组件调用直接跳过，不会堆积在超时任务之后。
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+from . import metrics
+from .config import config_manager
+
+
+class PoolSaturated(Exception):
+    """决策线程池已满，请求被准入控制拒绝"""
+
+    def __init__(self, retry_after_s: int, in_flight: int):
+        super().__init__(f"Decision pool saturated ({in_flight} in flight)")
+        self.retry_after_s = retry_after_s
+        self.in_flight = in_flight
+
+
+class DecisionPool:
+    """带准入控制的有界决策线程池"""
+
+    def __init__(self, max_workers: int = 4, queue_depth: int = 32, retry_after_s: int = 1):
+        self.max_workers = max_workers
+        self.queue_depth = queue_depth
+        self.retry_after_s = retry_after_s
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="decision")
+        self._capacity = max_workers + queue_depth
+        self._in_flight = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        """尝试占用一个名额，池满时返回False"""
+        with self._lock:
+            if self._in_flight >= self._capacity:
+                self._rejected += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        """释放名额"""
+        with self._lock:
+            self._in_flight -= 1
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator["DecisionPool"]:
+        """
+        准入上下文：占用一个名额直到请求结束
+
+        Raises:
+            PoolSaturated: 执行中+排队请求已达上限
+        """
+        if not self.try_acquire():
+            raise PoolSaturated(self.retry_after_s, self._in_flight)
+        try:
+            yield self
+        finally:
+            self.release()
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """在决策线程池中执行同步函数"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
+
+    @property
+    def in_flight(self) -> int:
+        """执行中+排队的请求数"""
+        return self._in_flight
+
+    @property
+    def queued(self) -> int:
+        """排队等待线程的请求数"""
+        return max(0, self._in_flight - self.max_workers)
+
+    def stats(self) -> Dict[str, int]:
+        """获取线程池状态"""
+        return {
+            "max_workers": self.max_workers,
+            "queue_depth": self.queue_depth,
+            "in_flight": self._in_flight,
+            "queued": self.queued,
+            "rejected_total": self._rejected,
+        }
+
+
+class BrainPool:
+    """
+    不排队的大脑组件线程池
+
+    名额在组件函数真正结束时才释放，超时被放弃的推理继续占用名额，
+    同时运行的推理数不超过 max_workers。
+    """
+
+    def __init__(self, max_workers: int = 8):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="brain")
+        self._busy = 0
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def _release(self, _future: Any = None) -> None:
+        with self._lock:
+            self._busy -= 1
+
+    def submit(self, fn: Callable[..., Any], *args: Any) -> Optional["asyncio.Future"]:
+        """在空闲线程上执行同步函数；没有空闲线程时返回None（调用方按组件缺失处理）"""
+        with self._lock:
+            if self._busy >= self.max_workers:
+                self._skipped += 1
+                return None
+            self._busy += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return asyncio.wrap_future(future)
+
+    @property
+    def busy(self) -> int:
+        """运行中（含已被放弃）的组件推理数"""
+        return self._busy
+
+    def stats(self) -> Dict[str, int]:
+        """获取线程池状态"""
+        return {
+            "max_workers": self.max_workers,
+            "busy": self._busy,
+            "skipped_total": self._skipped,
+        }
+
+
+# 全局决策线程池
+decision_pool = DecisionPool(
+    max_workers=config_manager.get("admission.max_workers", 4),
+    queue_depth=config_manager.get("admission.queue_depth", 32),
+    retry_after_s=config_manager.get("admission.retry_after_s", 1),
+)
+
+# 全局大脑组件线程池
+brain_pool = BrainPool(max_workers=config_manager.get("brains.max_workers", 8))
+
+metrics.registry.register(metrics.Callback(
+    "p1_admission_in_flight", "Decisions running or queued in the decision pool", "gauge",
+    lambda: {(): decision_pool.in_flight}
+))
+metrics.registry.register(metrics.Callback(
+    "p1_admission_queued", "Decisions waiting for a pool thread", "gauge",
+    lambda: {(): decision_pool.queued}
+))
+metrics.registry.register(metrics.Callback(
+    "p1_admission_rejected_total", "Requests rejected by admission control", "counter",
+    lambda: {(): decision_pool.stats()["rejected_total"]}
+))
+metrics.registry.register(metrics.Callback(
+    "p1_brain_pool_busy", "Brain inferences running in the brain pool, including abandoned ones", "gauge",
+    lambda: {(): brain_pool.busy}
+))
+metrics.registry.register(metrics.Callback(
+    "p1_brain_pool_skipped_total", "Brain calls skipped because every brain thread was busy", "counter",
+    lambda: {(): brain_pool.stats()["skipped_total"]}
+))
@@ -1,17 +1,50 @@
-"""配置管理模块"""
+"""配置管理模块
+
+配置加载后编译为不可变的 ConfigSnapshot（原始配置、Gate计划、事件日历与版本号），
+读取方每次只读取一次当前快照引用，无需加锁。
+
+热加载：SIGHUP 或文件监视（config_reload.watch）触发 reload()，新配置先完整校验
+并编译，成功后整体替换快照；校验失败保留旧快照并记录错误。
+"""
+import asyncio
+import copy
+import hashlib
+import json
+import numbers
 import os
-from typing import Any, Dict, List
+import signal
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Mapping, Optional
 
 import yaml
 from loguru import logger
 from pydantic import BaseSettings
 
+from .event_calendar import EventCalendar
+from .gate_plan import (
+    OVERRIDABLE_SECTIONS, GatePlan, PlanTable, compile_plan_table, override_keys, resolve_overrides
+)
+
+# 与 _get_default_config 保持一致的缺省值
+DEFAULT_CONFIG_RELOAD = {
+    "watch": True,
+    "poll_interval_s": 2.0,
+}
+
+# 取值必须落在 [0, 1] 的Gate阈值
+_UNIT_GATES = ("C_align_min", "C_of_min", "C_vision_min", "p_hit_min")
+_NON_NEGATIVE_GATES = ("epsilon", "slip_q95_max", "spread_bp_max", "min_depth_px")
+
 
 class Settings(BaseSettings):
     """应用设置"""
     app_env: str = "dev"
     log_level: str = "INFO"
+    log_format: str = "text"  # text | json
     redis_url: str = "redis://localhost:6379/0"
+    shared_state_backend: str = ""  # 非空时覆盖 shared_state.backend
     config_path: str = "/app/configs/default.yaml"
     decision_port: int = 8000
     featurehub_port: int = 8010
@@ -21,28 +54,297 @@ class Settings(BaseSettings):
         env_file = ".env"
 
 
+class ConfigError(ValueError):
+    """配置校验失败"""
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """编译后的配置快照（不可变，config 视为只读）"""
+    version: str
+    config: Dict[str, Any]
+    gate_plan: GatePlan
+    plans: PlanTable
+    event_calendar: EventCalendar
+    source: str
+    loaded_at: float
+
+
+def config_version(config: Dict[str, Any]) -> str:
+    """根据完整配置内容计算稳定的配置版本号"""
+    payload = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return "cfg-" + hashlib.sha1(payload).hexdigest()[:12]
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, numbers.Real) and not isinstance(value, bool)
+
+
+def _validate_sections(config: Dict[str, Any], where: str, errors: List[str]) -> None:
+    """校验 gates 与 vol_sweet_spot 的取值"""
+    gates = config.get("gates") or {}
+    if not isinstance(gates, dict):
+        errors.append(f"{where}gates must be a mapping")
+        gates = {}
+    for key in _UNIT_GATES:
+        if key in gates and not (_is_number(gates[key]) and 0 <= gates[key] <= 1):
+            errors.append(f"{where}gates.{key} must be a number in [0, 1], got {gates[key]!r}")
+    for key in _NON_NEGATIVE_GATES:
+        if key in gates and not (_is_number(gates[key]) and gates[key] >= 0):
+            errors.append(f"{where}gates.{key} must be a non-negative number, got {gates[key]!r}")
+
+    vol_cfg = config.get("vol_sweet_spot") or {}
+    for side in ("bull", "bear"):
+        band = vol_cfg.get(side) if isinstance(vol_cfg, dict) else None
+        if not band:
+            continue
+        sigma_min, sigma_max = band.get("sigma_min"), band.get("sigma_max")
+        if not (_is_number(sigma_min) and _is_number(sigma_max) and 0 <= sigma_min < sigma_max):
+            errors.append(
+                f"{where}vol_sweet_spot.{side} needs 0 <= sigma_min < sigma_max, got {sigma_min!r}, {sigma_max!r}"
+            )
+
+
+def _validate_overrides(config: Dict[str, Any], errors: List[str]) -> None:
+    """校验 overrides 的结构，以及每个 (symbol, tf) 组合合并后的取值"""
+    overrides = config.get("overrides") or {}
+    if not isinstance(overrides, dict):
+        errors.append("overrides must be a mapping")
+        return
+
+    # (位置, 覆盖项映射, 允许的键)
+    layers = [
+        ("overrides.timeframes", overrides.get("timeframes"), OVERRIDABLE_SECTIONS),
+        ("overrides.symbols", overrides.get("symbols"), OVERRIDABLE_SECTIONS + ("timeframes",)),
+    ]
+    symbols = overrides.get("symbols")
+    if isinstance(symbols, dict):
+        for symbol, override in symbols.items():
+            if isinstance(override, dict):
+                layers.append(
+                    (f"overrides.symbols.{symbol}.timeframes", override.get("timeframes"), OVERRIDABLE_SECTIONS)
+                )
+
+    for where, layer, allowed in layers:
+        if not layer:
+            continue
+        if not isinstance(layer, dict):
+            errors.append(f"{where} must be a mapping")
+            return
+        for key, override in layer.items():
+            if not isinstance(override, (dict, type(None))) or set(override or {}) - set(allowed):
+                errors.append(f"{where}.{key} may only contain {', '.join(allowed)}")
+                return
+
+    for symbol, tf in override_keys(config):
+        _validate_sections(resolve_overrides(config, symbol, tf), f"overrides[{symbol}/{tf}] ", errors)
+
+
+def validate_config(config: Any) -> None:
+    """
+    校验配置中会直接影响决策的字段
+
+    Raises:
+        ConfigError: 列出全部不合法的字段
+    """
+    if not isinstance(config, dict):
+        raise ConfigError(f"Config root must be a mapping, got {type(config).__name__}")
+
+    errors: List[str] = []
+    _validate_sections(config, "", errors)
+    if not errors:
+        _validate_overrides(config, errors)
+
+    latency_slo_ms = config.get("latency_slo_ms", 70)
+    if not (_is_number(latency_slo_ms) and latency_slo_ms > 0):
+        errors.append(f"latency_slo_ms must be a positive number, got {latency_slo_ms!r}")
+
+    samples = (config.get("fragility") or {}).get("samples", 1)
+    if not (isinstance(samples, int) and not isinstance(samples, bool) and samples > 0):
+        errors.append(f"fragility.samples must be a positive integer, got {samples!r}")
+
+    if errors:
+        raise ConfigError("; ".join(errors))
+
+
+def build_snapshot(config: Dict[str, Any], source: str) -> ConfigSnapshot:
+    """
+    校验并编译配置快照
+
+    Raises:
+        ConfigError: 校验或编译失败
+    """
+    validate_config(config)
+    config = copy.deepcopy(config)
+    try:
+        plans = compile_plan_table(config)
+        event_calendar = EventCalendar.from_config(config)
+    except (KeyError, TypeError, ValueError) as e:
+        raise ConfigError(f"Failed to compile config: {e}") from e
+    return ConfigSnapshot(
+        version=config_version(config),
+        config=config,
+        gate_plan=plans.default,
+        plans=plans,
+        event_calendar=event_calendar,
+        source=source,
+        loaded_at=time.time(),
+    )
+
+
 class ConfigManager:
     """配置管理器"""
     
     def __init__(self, config_path: str = None):
         self.settings = Settings()
         self.config_path = config_path or self.settings.config_path
-        self._config: Dict[str, Any] = {}
-        self._load_config()
+        self._listeners: List[Callable[[ConfigSnapshot], None]] = []
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._watch_stop = threading.Event()
+        self._file_stamp = None
+        self.reload_total: Dict[str, int] = {"ok": 0, "error": 0}
+        self._snapshot: ConfigSnapshot = self._load_config()
+        self._log_snapshot(self._snapshot)
+    
+    def _file_state(self):
+        """配置文件的 (mtime_ns, size)，不存在时为None"""
+        try:
+            stat = os.stat(self.config_path)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+    
+    def _read_file(self) -> Any:
+        with open(self.config_path, "r", encoding="utf-8") as f:
+            return yaml.safe_load(f) or {}
     
-    def _load_config(self) -> None:
-        """加载YAML配置文件"""
+    def _load_config(self) -> ConfigSnapshot:
+        """启动时加载YAML配置文件，不可用时退回默认配置"""
+        self._file_stamp = self._file_state()
         try:
-            if os.path.exists(self.config_path):
-                with open(self.config_path, "r", encoding="utf-8") as f:
-                    self._config = yaml.safe_load(f) or {}
+            if self._file_stamp is not None:
+                snapshot = build_snapshot(self._read_file(), self.config_path)
                 logger.info(f"Loaded config from {self.config_path}")
-            else:
-                logger.warning(f"Config file not found: {self.config_path}, using defaults")
-                self._config = self._get_default_config()
+                return snapshot
+            logger.warning(f"Config file not found: {self.config_path}, using defaults")
         except Exception as e:
             logger.error(f"Error loading config: {e}")
-            self._config = self._get_default_config()
+        return build_snapshot(self._get_default_config(), "defaults")
+    
+    @staticmethod
+    def _log_snapshot(snapshot: ConfigSnapshot) -> None:
+        logger.info(f"Compiled gate plan {snapshot.gate_plan.version} with {len(snapshot.plans)} overrides")
+        logger.info(f"Compiled event calendar with {len(snapshot.event_calendar)} event windows")
+    
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前配置快照；一次决策内应只读取一次并沿用"""
+        return self._snapshot
+    
+    @property
+    def version(self) -> str:
+        return self._snapshot.version
+    
+    @property
+    def gate_plan(self) -> GatePlan:
+        """当前编译好的Gate计划，热路径直接读取其属性"""
+        return self._snapshot.gate_plan
+    
+    @property
+    def event_calendar(self) -> EventCalendar:
+        """当前编译好的黑名单事件日历（含循环事件与日历文件）"""
+        return self._snapshot.event_calendar
+    
+    @property
+    def _config(self) -> Dict[str, Any]:
+        return self._snapshot.config
+    
+    def reload(self) -> bool:
+        """
+        重新读取配置文件并原子替换快照
+        
+        Returns:
+            是否切换到了新版本；文件缺失、校验或编译失败时保留当前快照
+        """
+        with self._reload_lock:
+            self._file_stamp = self._file_state()
+            try:
+                snapshot = build_snapshot(self._read_file(), self.config_path)
+            except (OSError, yaml.YAMLError, ConfigError) as e:
+                self.reload_total["error"] += 1
+                logger.error(f"Config reload rejected, keeping {self.version}: {e}")
+                return False
+            
+            self.reload_total["ok"] += 1
+            if snapshot.version == self.version:
+                logger.info(f"Config unchanged ({snapshot.version})")
+                return False
+            
+            previous, self._snapshot = self._snapshot, snapshot
+            logger.info(f"Config reloaded: {previous.version} -> {snapshot.version}")
+            self._log_snapshot(snapshot)
+        
+        for listener in list(self._listeners):
+            try:
+                listener(snapshot)
+            except Exception as e:
+                logger.error(f"Config reload listener {listener!r} failed: {e}")
+        return True
+    
+    def subscribe(self, listener: Callable[[ConfigSnapshot], None]) -> None:
+        """注册快照切换后的回调（在触发 reload 的线程中执行）"""
+        self._listeners.append(listener)
+    
+    def start_watching(self, poll_interval_s: float = None) -> bool:
+        """
+        启动配置文件监视线程：文件 mtime/大小变化时触发 reload
+        
+        Returns:
+            是否启动（config_reload.watch 关闭或已在运行时为False）
+        """
+        cfg = {**DEFAULT_CONFIG_RELOAD, **(self.get("config_reload") or {})}
+        if not cfg["watch"] or (self._watcher is not None and self._watcher.is_alive()):
+            return False
+        interval_s = poll_interval_s or cfg["poll_interval_s"]
+        self._watch_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval_s,), name="config-watcher", daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Watching {self.config_path} every {interval_s}s")
+        return True
+    
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+    
+    def _watch(self, interval_s: float) -> None:
+        while not self._watch_stop.wait(interval_s):
+            stamp = self._file_state()
+            if stamp is not None and stamp != self._file_stamp:
+                self.reload()
+    
+    def install_sighup(self, loop: asyncio.AbstractEventLoop) -> bool:
+        """
+        在事件循环上注册 SIGHUP → reload（在线程池执行，不阻塞事件循环）
+        
+        Returns:
+            是否注册成功（平台不支持或不在主线程时为False）
+        """
+        try:
+            loop.add_signal_handler(signal.SIGHUP, lambda: loop.run_in_executor(None, self.reload))
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            return False
+        return True
+    
+    def remove_sighup(self, loop: asyncio.AbstractEventLoop) -> None:
+        try:
+            loop.remove_signal_handler(signal.SIGHUP)
+        except (AttributeError, NotImplementedError, RuntimeError, ValueError):
+            pass
     
     def _get_default_config(self) -> Dict[str, Any]:
         """获取默认配置"""
@@ -71,14 +373,107 @@ class ConfigManager:
                 "mode": "post_only_limit_or_mpo",
                 "reduce_only_fallback": True
             },
+            "brains": {
+                "ctfg_deadline_pct": 0.6,
+                "xlstm_deadline_pct": 0.6,
+                "llm_deadline_pct": 0.85,
+                "max_workers": 8
+            },
+            "admission": {
+                "max_workers": 4,
+                "queue_depth": 32,
+                "retry_after_s": 1
+            },
+            "decision_cache": {
+                "enabled": True,
+                "max_entries": 4096,
+                "sig_digits": 4
+            },
+            "fragility": {
+                "samples": 512,
+                "flip_rate_max": 0.2,
+                "seed": 20250914,
+                "sigma_rel": 0.10,
+                "skew_abs": 0.10,
+                "depth_rel": 0.20,
+                "dCVD_abs": 0.30,
+                "c_abs": 0.03,
+                "p_hit_abs": 0.02,
+                "factor_drop_prob": 0.5,
+                "factor_drop_scale": 0.1
+            },
+            "traces": {
+                "capacity": 1000,
+                "persist": True,
+                "dir": "logs/traces",
+                "batch_size": 256,
+                "flush_interval_s": 1.0,
+                "queue_capacity": 10000,
+                "format": "parquet",
+                "segment_rows": 100000,
+                "flush_rows": 4096,
+                "segment_flush_s": 5.0,
+                "retention": {
+                    "keep_allowed": True,
+                    "keep_errors": True,
+                    "keep_slow": True,
+                    "keep_borderline": True,
+                    "keep_fragility": True,
+                    "reject_sample_rate": 0.1
+                }
+            },
+            "rate_limits": {
+                "enabled": True,
+                "max_keys": 10000,
+                "client": {
+                    "enter": {"rate_per_s": 50, "burst": 100},
+                    "enter_batch": {"rate_per_s": 5, "burst": 10},
+                    "enter_both": {"rate_per_s": 50, "burst": 100},
+                    "exit": {"rate_per_s": 100, "burst": 200}
+                },
+                "symbol": {
+                    "enter": {"rate_per_s": 20, "burst": 100}
+                }
+            },
             "blacklist_events": [],
+            "event_calendar": {
+                "pre_buffer_min": 0,
+                "post_buffer_min": 0,
+                "horizon_days": 30,
+                "file": None,
+                "recurring": []
+            },
+            "shared_state": {
+                "backend": "local",
+                "sync_interval_s": 1.0,
+                "key_prefix": "p1",
+                "trace_capacity": 1000
+            },
+            "warmup": {
+                "enabled": True,
+                "rounds": 3
+            },
+            "prefork": {
+                "workers": 4,
+                "weights_dir": None,
+                "gc_freeze": True,
+                "graceful_timeout_s": 30
+            },
+            "overrides": {
+                "timeframes": {},
+                "symbols": {}
+            },
+            "config_reload": {
+                "watch": True,
+                "poll_interval_s": 2.0
+            },
             "latency_slo_ms": 70
         }
     
     def get(self, key: str, default: Any = None) -> Any:
         """获取配置值，支持点号分隔的嵌套键"""
         keys = key.split(".")
-        value = self._config
+        value = self._snapshot.config
         
         for k in keys:
             if isinstance(value, dict) and k in value:
@@ -88,14 +483,13 @@ class ConfigManager:
         
         return value
     
-    def get_vol_config(self, side: str) -> Dict[str, float]:
-        """获取波动率配置"""
-        if side.lower() in ["bull", "long"]:
-            return self.get("vol_sweet_spot.bull", {})
-        elif side.lower() in ["bear", "short"]:
-            return self.get("vol_sweet_spot.bear", {})
-        else:
-            return {}
+    def get_vol_config(self, side: str, symbol: str = None, tf: str = None) -> Mapping[str, float]:
+        """获取波动率配置（已合并 symbol/tf 覆盖，只读）"""
+        return self._snapshot.plans.resolve(symbol, tf).vol_band(side)
+    
+    def get_gate_plan(self, symbol: str = None, tf: str = None) -> GatePlan:
+        """获取当前编译好的Gate计划；给出 symbol/tf 时返回合并覆盖后的计划"""
+        return self._snapshot.plans.resolve(symbol, tf)
     
     def get_gates_config(self) -> Dict[str, Any]:
         """获取Gate配置"""
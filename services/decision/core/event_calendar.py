@@ -0,0 +1,310 @@
+"""黑名单事件日历 - 配置加载时编译的区间索引
+
+一次性事件（blacklist_events）、循环宏观事件（FOMC / CPI / 资金费率结算等，
+event_calendar.recurring）与批量导入的日历文件（event_calendar.file）在加载时
+统一展开为带前后缓冲的时间窗口，再按作用标的编译为互不重叠的有序区间：
+查询时对区间起点二分，O(log n)。
+
+循环事件只在 [加载时刻 - 1天, 加载时刻 + horizon_days] 内展开，查询时刻
+超出覆盖范围时按该时刻重新展开。
+"""
+import bisect
+import csv
+import heapq
+import itertools
+import json
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import yaml
+from loguru import logger
+
+ALL_SYMBOLS = "*"
+
+_DAY_S = 86400.0
+_WEEKDAYS = {"mon": 0, "tue": 1, "wed": 2, "thu": 3, "fri": 4, "sat": 5, "sun": 6}
+
+# 与 ConfigManager._get_default_config 保持一致的缺省值
+DEFAULT_CALENDAR = {
+    "pre_buffer_min": 0,
+    "post_buffer_min": 0,
+    "horizon_days": 30,
+    "file": None,
+    "recurring": [],
+}
+
+
+class CalendarEvent(NamedTuple):
+    """单个事件实例（时间为UTC epoch秒，不含缓冲）"""
+    name: str
+    start: float
+    end: float
+
+    def describe(self) -> str:
+        return f"{self.name} ({format_ts(self.start)} to {format_ts(self.end)})"
+
+
+def parse_ts(value: Any) -> float:
+    """ISO时间字符串 / datetime / epoch秒 → UTC epoch秒；无时区按UTC处理"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        dt = value
+    else:
+        dt = datetime.fromisoformat(str(value).strip().replace("Z", "+00:00"))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt.timestamp()
+
+
+def format_ts(ts: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(ts))
+
+
+def _symbols(value: Any) -> Tuple[str, ...]:
+    """作用标的：缺省或 '*' 为全部标的；字符串可用 ; / | 分隔"""
+    if not value:
+        return (ALL_SYMBOLS,)
+    if isinstance(value, str):
+        value = value.replace("|", ";").split(";")
+    symbols = tuple(s.strip().upper() for s in value if s and s.strip())
+    return symbols or (ALL_SYMBOLS,)
+
+
+class _Window(NamedTuple):
+    """带缓冲的事件窗口 [start, end)"""
+    start: float
+    end: float
+    event: CalendarEvent
+    symbols: Tuple[str, ...]
+
+
+def _window(event: CalendarEvent, symbols: Tuple[str, ...], spec: Dict, pre_s: float, post_s: float) -> _Window:
+    pre_s = spec.get("pre_buffer_min", pre_s / 60) * 60
+    post_s = spec.get("post_buffer_min", post_s / 60) * 60
+    # 事件结束时刻本身仍在窗口内
+    return _Window(event.start - pre_s, math.nextafter(event.end + post_s, math.inf), event, symbols)
+
+
+def _one_off(spec: Dict, pre_s: float, post_s: float) -> Optional[_Window]:
+    """一次性事件：name / start_time / end_time / symbols"""
+    start, end = spec.get("start_time"), spec.get("end_time")
+    if not start or not end:
+        return None
+    event = CalendarEvent(spec.get("name", "Unknown"), parse_ts(start), parse_ts(end))
+    if event.end < event.start:
+        raise ValueError(f"end_time before start_time: {spec}")
+    return _window(event, _symbols(spec.get("symbols")), spec, pre_s, post_s)
+
+
+def _occurrences(spec: Dict, since: float, until: float) -> Iterable[float]:
+    """
+    循环事件在 [since, until) 内的开始时刻
+
+    支持三种写法（均为UTC）：
+    - every_hours + anchor: 自锚点起固定周期，如资金费率每8小时
+    - weekdays + time: 每周固定星期与时刻
+    - dates + time: 显式日期列表，如FOMC/CPI公布日
+    """
+    if "every_hours" in spec:
+        period = float(spec["every_hours"]) * 3600
+        anchor = parse_ts(spec.get("anchor", "1970-01-01T00:00:00Z"))
+        ts = anchor + math.ceil((since - anchor) / period) * period
+        while ts < until:
+            yield ts
+            ts += period
+        return
+
+    hour, minute = (int(part) for part in str(spec.get("time", "00:00")).split(":")[:2])
+    if "dates" in spec:
+        for day in spec["dates"]:
+            ts = parse_ts(f"{day}T{hour:02d}:{minute:02d}:00Z")
+            if since <= ts < until:
+                yield ts
+        return
+
+    if "weekdays" in spec:
+        weekdays = {_WEEKDAYS[str(day).lower()[:3]] for day in spec["weekdays"]}
+        day = datetime.fromtimestamp(since, timezone.utc).replace(hour=hour, minute=minute, second=0, microsecond=0)
+        while day.timestamp() < until:
+            if day.weekday() in weekdays and day.timestamp() >= since:
+                yield day.timestamp()
+            day += timedelta(days=1)
+        return
+
+    raise ValueError(f"Recurring event needs every_hours, weekdays or dates: {spec}")
+
+
+def _recurring(spec: Dict, since: float, until: float, pre_s: float, post_s: float) -> List[_Window]:
+    duration_s = float(spec.get("duration_min", 0)) * 60
+    symbols = _symbols(spec.get("symbols"))
+    name = spec.get("name", "Unknown")
+    return [
+        _window(CalendarEvent(name, ts, ts + duration_s), symbols, spec, pre_s, post_s)
+        for ts in _occurrences(spec, since, until)
+    ]
+
+
+def load_calendar_file(path: str) -> List[Dict[str, Any]]:
+    """
+    批量读取日历文件中的一次性事件
+
+    .csv: 表头含 name,start_time,end_time，可选 symbols(; 分隔)、pre_buffer_min、post_buffer_min
+    .jsonl: 每行一个事件对象；.yaml/.yml: 事件列表
+    """
+    ext = os.path.splitext(path)[1].lower()
+    with open(path, "r", encoding="utf-8") as f:
+        if ext == ".csv":
+            rows = []
+            for row in csv.DictReader(f):
+                spec = {key: value for key, value in row.items() if value not in (None, "")}
+                for key in ("pre_buffer_min", "post_buffer_min"):
+                    if key in spec:
+                        spec[key] = float(spec[key])
+                rows.append(spec)
+            return rows
+        if ext == ".jsonl":
+            return [json.loads(line) for line in f if line.strip()]
+        return yaml.safe_load(f) or []
+
+
+def _disjoint(windows: Sequence[_Window]) -> Tuple[List[float], List[float], List[CalendarEvent]]:
+    """
+    把可能重叠的窗口扫描为互不重叠的有序区间
+
+    每段区间记录覆盖它的、开始最早的事件；相邻且事件相同的区间合并。
+    """
+    ordered = sorted(windows, key=lambda w: (w.start, w.end))
+    bounds = sorted({w.start for w in ordered} | {w.end for w in ordered})
+    starts: List[float] = []
+    ends: List[float] = []
+    events: List[CalendarEvent] = []
+
+    active: List[Tuple[float, int, float]] = []  # (窗口开始, 序号, 窗口结束)
+    i = 0
+    for lo, hi in itertools.pairwise(bounds):
+        while i < len(ordered) and ordered[i].start <= lo:
+            heapq.heappush(active, (ordered[i].start, i, ordered[i].end))
+            i += 1
+        while active and active[0][2] <= lo:
+            heapq.heappop(active)
+        if not active:
+            continue
+        event = ordered[active[0][1]].event
+        if ends and ends[-1] == lo and events[-1] is event:
+            ends[-1] = hi
+        else:
+            starts.append(lo)
+            ends.append(hi)
+            events.append(event)
+    return starts, ends, events
+
+
+class IntervalIndex:
+    """互不重叠的有序区间索引，O(log n) 查询"""
+
+    __slots__ = ("starts", "ends", "events")
+
+    def __init__(self, windows: Sequence[_Window]):
+        self.starts, self.ends, self.events = _disjoint(windows)
+
+    def lookup(self, ts: float) -> Optional[CalendarEvent]:
+        i = bisect.bisect_right(self.starts, ts) - 1
+        if i >= 0 and ts < self.ends[i]:
+            return self.events[i]
+        return None
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+
+class EventCalendar:
+    """按标的编译的黑名单事件日历"""
+
+    def __init__(
+        self,
+        events: Sequence[Dict[str, Any]] = (),
+        recurring: Sequence[Dict[str, Any]] = (),
+        pre_buffer_min: float = 0,
+        post_buffer_min: float = 0,
+        horizon_days: float = 30,
+        now: float = None
+    ):
+        self.pre_s = pre_buffer_min * 60
+        self.post_s = post_buffer_min * 60
+        self.horizon_s = horizon_days * _DAY_S
+        self.recurring = [dict(spec) for spec in recurring]
+
+        self._fixed: List[_Window] = []
+        for spec in events:
+            try:
+                window = _one_off(spec, self.pre_s, self.post_s)
+            except (TypeError, ValueError) as e:
+                logger.warning("Skipping invalid blacklist event {}: {}", spec, e)
+                continue
+            if window is not None:
+                self._fixed.append(window)
+
+        self._lock = threading.Lock()
+        self._compile(time.time() if now is None else now)
+
+    @classmethod
+    def from_config(cls, config: Dict[str, Any], now: float = None) -> "EventCalendar":
+        """由 blacklist_events 与 event_calendar 配置编译"""
+        cfg = {**DEFAULT_CALENDAR, **(config.get("event_calendar") or {})}
+        events = list(config.get("blacklist_events") or [])
+        if cfg["file"]:
+            try:
+                events.extend(load_calendar_file(cfg["file"]))
+            except (OSError, ValueError, yaml.YAMLError) as e:
+                logger.error("Failed to load event calendar {}: {}", cfg["file"], e)
+        return cls(
+            events=events,
+            recurring=cfg["recurring"] or (),
+            pre_buffer_min=cfg["pre_buffer_min"],
+            post_buffer_min=cfg["post_buffer_min"],
+            horizon_days=cfg["horizon_days"],
+            now=now
+        )
+
+    def _compile(self, now: float) -> None:
+        """展开循环事件并按标的编译区间索引"""
+        since, until = now - _DAY_S, now + self.horizon_s
+        windows = list(self._fixed)
+        for spec in self.recurring:
+            try:
+                windows.extend(_recurring(spec, since, until, self.pre_s, self.post_s))
+            except (KeyError, TypeError, ValueError) as e:
+                logger.warning("Skipping invalid recurring event {}: {}", spec, e)
+
+        # 每个标的的索引包含全局事件，查询只需一次二分
+        global_windows = [w for w in windows if ALL_SYMBOLS in w.symbols]
+        symbols = {s for w in windows for s in w.symbols if s != ALL_SYMBOLS}
+        indexes = {ALL_SYMBOLS: IntervalIndex(global_windows)}
+        for symbol in symbols:
+            indexes[symbol] = IntervalIndex([w for w in windows if ALL_SYMBOLS in w.symbols or symbol in w.symbols])
+
+        # 没有循环事件时索引对任意时刻有效
+        if not self.recurring:
+            since, until = -math.inf, math.inf
+        # 整体替换，查询线程无需加锁
+        self._state = (since, until, indexes, len(windows))
+
+    def lookup(self, ts: float, symbol: str = None) -> Optional[CalendarEvent]:
+        """ts 时刻对 symbol 生效的事件；不在任何事件窗口内返回None"""
+        since, until, indexes, _ = self._state
+        if not since <= ts < until:
+            with self._lock:
+                if not self._state[0] <= ts < self._state[1]:
+                    self._compile(ts)
+            since, until, indexes, _ = self._state
+        index = indexes.get(symbol.upper(), indexes[ALL_SYMBOLS]) if symbol else indexes[ALL_SYMBOLS]
+        return index.lookup(ts)
+
+    def __len__(self) -> int:
+        """已展开的事件窗口数"""
+        return self._state[3]
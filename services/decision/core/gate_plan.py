@@ -0,0 +1,269 @@
+"""Gate计划 - 配置加载时编译的不可变阈值快照
+
+热路径上的Gate检查、脆弱性测试与MPC退出直接读取 GatePlan 的属性，
+不再每次调用 config_manager.get() 拆分点号键、逐层遍历嵌套字典。
+
+overrides 按 全局 → 时间框架 → 标的 → 标的×时间框架 逐层覆盖 gates 与
+vol_sweet_spot，加载时对每个组合合并编译为独立的 GatePlan 并放入 PlanTable；
+请求路径只按 (symbol, tf) 查表，不做任何合并。
+"""
+import hashlib
+import json
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, Mapping, Optional, Tuple
+
+_EMPTY: Mapping[str, Any] = MappingProxyType({})
+
+# 与 ConfigManager._get_default_config 保持一致的缺省值
+DEFAULT_GATES = {
+    "C_align_min": 0.85,
+    "C_of_min": 0.80,
+    "C_vision_min": 0.75,
+    "p_hit_min": 0.75,
+    "epsilon": 0.0005,
+    "slip_q95_max": 0.0005,
+    "spread_bp_max": 5,
+    "min_depth_px": 1000000,
+}
+
+DEFAULT_EXIT = {
+    "hazard_thresh": 0.30,
+    "phit_floor": 0.50,
+    "t_hit_grace_bars": 3,
+    "reduce_pct": 0.5,
+}
+
+DEFAULT_EXEC = {
+    "mode": "post_only_limit_or_mpo",
+    "reduce_only_fallback": True,
+}
+
+# 大脑组件截止时间占 latency_slo_ms 的比例
+DEFAULT_BRAINS = {
+    "ctfg_deadline_pct": 0.6,
+    "xlstm_deadline_pct": 0.6,
+    "llm_deadline_pct": 0.85,
+}
+
+# 蒙特卡洛脆弱性测试：样本数与扰动幅度
+DEFAULT_FRAGILITY = {
+    "samples": 512,
+    "flip_rate_max": 0.2,
+    "seed": 20250914,
+    "sigma_rel": 0.10,
+    "skew_abs": 0.10,
+    "depth_rel": 0.20,
+    "dCVD_abs": 0.30,
+    "c_abs": 0.03,
+    "p_hit_abs": 0.02,
+    "factor_drop_prob": 0.5,
+    "factor_drop_scale": 0.1,
+}
+
+_SIDE_ALIASES = {"bull": "bull", "long": "bull", "bear": "bear", "short": "bear"}
+
+# 可按时间框架/标的覆盖的配置段
+OVERRIDABLE_SECTIONS = ("gates", "vol_sweet_spot")
+
+ANY = "*"
+
+
+@dataclass(frozen=True)
+class GatePlan:
+    """编译后的Gate计划（不可变）"""
+    version: str
+
+    # 共识Gate
+    C_align_min: float
+    C_of_min: float
+    C_vision_min: float
+
+    # PGM / 流动性缓冲Gate
+    p_hit_min: float
+    epsilon: float
+    slip_q95_max: float
+    spread_bp_max: float
+    min_depth_px: float
+
+    # 波动率甜蜜点: bull/bear -> 只读配置
+    vol_bands: Mapping[str, Mapping[str, float]]
+
+    # 退出阈值（只读映射，可直接作为 mpc_exit 的 config 使用）
+    exit: Mapping[str, Any]
+
+    # 蒙特卡洛脆弱性测试参数（只读映射）
+    fragility: Mapping[str, Any]
+
+    # 执行配置
+    exec_mode: str
+    reduce_only_fallback: bool
+
+    latency_slo_ms: int
+
+    # 大脑组件截止时间(毫秒，自决策开始计): ctfg / xlstm / llm
+    brain_deadlines_ms: Mapping[str, float]
+
+    def gate_thresholds(self) -> Dict[str, float]:
+        """gates 段的有效阈值"""
+        return {key: getattr(self, key) for key in DEFAULT_GATES}
+
+    def vol_band(self, side: str) -> Mapping[str, float]:
+        """获取方向对应的波动率甜蜜点配置，未知方向返回空映射"""
+        key = _SIDE_ALIASES.get(side.lower())
+        if key is None:
+            return _EMPTY
+        return self.vol_bands.get(key, _EMPTY)
+
+
+def plan_version(config: Dict[str, Any]) -> str:
+    """根据配置内容计算稳定的计划版本号"""
+    payload = json.dumps(config, sort_keys=True, default=str).encode("utf-8")
+    return "gp-" + hashlib.sha1(payload).hexdigest()[:12]
+
+
+def compile_gate_plan(config: Dict[str, Any]) -> GatePlan:
+    """把原始配置字典编译为 GatePlan"""
+    gates = {**DEFAULT_GATES, **(config.get("gates") or {})}
+    exit_cfg = {**DEFAULT_EXIT, **(config.get("exit") or {})}
+    exec_cfg = {**DEFAULT_EXEC, **(config.get("exec") or {})}
+    vol_cfg = config.get("vol_sweet_spot") or {}
+    brains_cfg = {**DEFAULT_BRAINS, **(config.get("brains") or {})}
+    fragility_cfg = {**DEFAULT_FRAGILITY, **(config.get("fragility") or {})}
+    latency_slo_ms = config.get("latency_slo_ms", 70)
+
+    vol_bands = MappingProxyType({
+        side: MappingProxyType(dict(vol_cfg[side]))
+        for side in ("bull", "bear")
+        if vol_cfg.get(side)
+    })
+
+    return GatePlan(
+        version=plan_version({
+            "gates": gates,
+            "exit": exit_cfg,
+            "exec": exec_cfg,
+            "vol_sweet_spot": vol_cfg,
+            "brains": brains_cfg,
+            "fragility": fragility_cfg,
+            "latency_slo_ms": latency_slo_ms,
+        }),
+        C_align_min=gates["C_align_min"],
+        C_of_min=gates["C_of_min"],
+        C_vision_min=gates["C_vision_min"],
+        p_hit_min=gates["p_hit_min"],
+        epsilon=gates["epsilon"],
+        slip_q95_max=gates["slip_q95_max"],
+        spread_bp_max=gates["spread_bp_max"],
+        min_depth_px=gates["min_depth_px"],
+        vol_bands=vol_bands,
+        exit=MappingProxyType(exit_cfg),
+        fragility=MappingProxyType(fragility_cfg),
+        exec_mode=exec_cfg["mode"],
+        reduce_only_fallback=exec_cfg["reduce_only_fallback"],
+        latency_slo_ms=latency_slo_ms,
+        brain_deadlines_ms=MappingProxyType({
+            name: latency_slo_ms * brains_cfg[f"{name}_deadline_pct"]
+            for name in ("ctfg", "xlstm", "llm")
+        }),
+    )
+
+
+def _merge(base: Mapping[str, Any], override: Mapping[str, Any]) -> Dict[str, Any]:
+    """递归合并字典，override 优先"""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, Mapping) and isinstance(merged.get(key), Mapping):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _sections(override: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """覆盖项中可覆盖的配置段"""
+    return {key: override[key] for key in OVERRIDABLE_SECTIONS if override and key in override}
+
+
+def symbol_overrides(config: Dict[str, Any]) -> Dict[str, Mapping[str, Any]]:
+    """overrides.symbols，键统一为大写"""
+    symbols = (config.get("overrides") or {}).get("symbols") or {}
+    return {str(symbol).upper(): override or {} for symbol, override in symbols.items()}
+
+
+def override_keys(config: Dict[str, Any]) -> Iterator[Tuple[str, str]]:
+    """
+    需要预编译的 (symbol, tf) 组合（ANY 表示不限）
+
+    已配置的标的（含 ANY）与已配置的时间框架（含 ANY）两两组合，除 (ANY, ANY) 外全部展开，
+    任一请求归一化后只需一次查表。
+    """
+    timeframes = {str(tf) for tf in ((config.get("overrides") or {}).get("timeframes") or {})}
+    symbols = symbol_overrides(config)
+    for override in symbols.values():
+        timeframes.update(str(tf) for tf in (override.get("timeframes") or {}))
+    for tf in sorted(timeframes):
+        yield ANY, tf
+    for symbol in sorted(symbols):
+        yield symbol, ANY
+        for tf in sorted(timeframes):
+            yield symbol, tf
+
+
+def resolve_overrides(config: Dict[str, Any], symbol: str = ANY, tf: str = ANY) -> Dict[str, Any]:
+    """按 全局 → 时间框架 → 标的 → 标的×时间框架 合并得到 (symbol, tf) 的有效配置"""
+    overrides = config.get("overrides") or {}
+    symbol_override = symbol_overrides(config).get(symbol) if symbol != ANY else None
+    layers = [
+        (overrides.get("timeframes") or {}).get(tf) if tf != ANY else None,
+        symbol_override,
+        (symbol_override.get("timeframes") or {}).get(tf) if symbol_override and tf != ANY else None,
+    ]
+    resolved = dict(config)
+    for layer in layers:
+        for key, value in _sections(layer).items():
+            resolved[key] = _merge(resolved.get(key) or {}, value or {})
+    return resolved
+
+
+class PlanTable:
+    """
+    (symbol, tf) → GatePlan 的预编译查找表
+
+    编译时展开全部 (symbol, tf) 组合（含 ANY 通配），未配置覆盖的标的或时间框架
+    归一化为 ANY 后与已配置的组合一样一次查表，不做逐级回退。
+    """
+
+    __slots__ = ("default", "_plans", "_symbols", "_timeframes")
+
+    def __init__(self, default: GatePlan, plans: Dict[Tuple[str, str], GatePlan] = None):
+        self.default = default
+        self._plans = plans or {}
+        self._symbols = frozenset(symbol for symbol, _ in self._plans)
+        self._timeframes = frozenset(tf for _, tf in self._plans)
+
+    def resolve(self, symbol: str = None, tf: str = None) -> GatePlan:
+        """请求对应的Gate计划"""
+        key = (
+            symbol if symbol in self._symbols else ANY,
+            tf if tf in self._timeframes else ANY,
+        )
+        return self._plans.get(key, self.default)
+
+    def items(self) -> Iterator[Tuple[Tuple[str, str], GatePlan]]:
+        return iter(self._plans.items())
+
+    def __len__(self) -> int:
+        """覆盖组合数（不含全局计划）"""
+        return len(self._plans)
+
+
+def compile_plan_table(config: Dict[str, Any]) -> PlanTable:
+    """为全局配置与每个覆盖组合编译 GatePlan，阈值相同的组合共用同一计划"""
+    default = compile_gate_plan(config)
+    compiled = {default.version: default}
+    plans = {}
+    for symbol, tf in override_keys(config):
+        plan = compile_gate_plan(resolve_overrides(config, symbol, tf))
+        plans[(symbol, tf)] = compiled.setdefault(plan.version, plan)
+    return PlanTable(default, plans)
@@ -1,4 +1,9 @@
-"""日志配置模块"""
+"""日志配置模块
+
+所有sink使用 enqueue=True：请求路径上的日志调用只把记录放入队列，
+格式化输出与文件I/O由loguru的后台线程完成。LOG_FORMAT=json 时输出
+结构化JSON（日志调用的关键字参数位于 record.extra）。
+"""
 import sys
 from loguru import logger
 from .config import config_manager
@@ -11,19 +16,24 @@ def setup_logging() -> None:
     
     # 获取日志级别
     log_level = config_manager.settings.log_level
+    structured = config_manager.settings.log_format == "json"
     
     # 添加控制台输出
-    logger.add(
-        sys.stdout,
-        level=log_level,
-        format=(
-            "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
-            "<level>{level: <8}</level> | "
-            "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
-            "<level>{message}</level>"
-        ),
-        colorize=True,
-    )
+    if structured:
+        logger.add(sys.stdout, level=log_level, serialize=True, enqueue=True)
+    else:
+        logger.add(
+            sys.stdout,
+            level=log_level,
+            format=(
+                "<green>{time:YYYY-MM-DD HH:mm:ss}</green> | "
+                "<level>{level: <8}</level> | "
+                "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan> | "
+                "<level>{message}</level>"
+            ),
+            colorize=True,
+            enqueue=True,
+        )
     
     # 添加文件输出（在生产环境）
     if config_manager.settings.app_env == "prod":
@@ -33,6 +43,8 @@ def setup_logging() -> None:
             rotation="1 day",
             retention="30 days",
             compression="zip",
+            serialize=structured,
+            enqueue=True,
             format=(
                 "{time:YYYY-MM-DD HH:mm:ss} | "
                 "{level: <8} | "
@@ -41,7 +53,7 @@ def setup_logging() -> None:
             ),
         )
     
-    logger.info(f"Logging initialized with level: {log_level}")
+    logger.info("Logging initialized with level: {}", log_level)
 
 
 def get_logger(name: str = __name__):
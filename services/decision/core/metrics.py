@@ -0,0 +1,225 @@
+"""指标模块 - Prometheus 文本格式导出
+
+计数器与直方图在热路径上增量维护，/metrics 抓取时只按指标数量格式化输出，
+与追踪记录数量无关。队列深度、缓存命中等已有状态以回调指标在抓取时读取。
+多worker部署时 core.shared_state 把全部 worker 的合并值写入 shared，导出时优先使用。
+"""
+import bisect
+import math
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# 阶段耗时直方图的桶上界(秒)
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.07, 0.1, 0.25, 0.5, 1.0,
+)
+
+LabelKey = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    """标签值转义"""
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values, strict=True)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """带标签的指标基类"""
+    kind = "untyped"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelKey:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> Iterable[str]:
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """清零本进程的值（Callback 读取外部状态，无需清零）"""
+
+    def render(self) -> List[str]:
+        return self.header() + list(self.samples())
+
+
+class Counter(Metric):
+    """单调递增计数器"""
+    kind = "counter"
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help_text, labelnames)
+        self._values: Dict[LabelKey, float] = {}
+        # 全部 worker 的合并值（由共享状态同步线程整体替换）
+        self.shared: Optional[Dict[LabelKey, float]] = None
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._values.clear()
+
+    def samples(self) -> Iterable[str]:
+        values = self._values if self.shared is None else self.shared
+        for key, value in list(values.items()):
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Histogram(Metric):
+    """固定桶直方图（桶内计数增量维护，导出时再累加）"""
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help_text: str, labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelKey, List[float]] = {}
+        self.shared: Optional[Dict[LabelKey, List[float]]] = None
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                # [各桶计数..., +Inf桶计数, sum]
+                series = self._series[key] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def count(self, **labels: str) -> int:
+        series = self._series.get(self._key(labels))
+        return int(sum(series[:-1])) if series else 0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+
+    def samples(self) -> Iterable[str]:
+        series_by_key = self._series if self.shared is None else self.shared
+        for key, series in list(series_by_key.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (math.inf,), series[:-1], strict=True):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(series[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class Callback(Metric):
+    """抓取时读取已有状态的指标（gauge或counter）"""
+
+    def __init__(
+        self, name: str, help_text: str, kind: str,
+        fn: Callable[[], Dict[LabelKey, float]], labelnames: Sequence[str] = ()
+    ):
+        super().__init__(name, help_text, labelnames)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> Iterable[str]:
+        for key, value in self.fn().items():
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Registry:
+    """指标注册表"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def metrics(self) -> List[Metric]:
+        return list(self._metrics.values())
+
+    def reset(self) -> None:
+        """清零全部计数器与直方图（启动预热结束后调用）"""
+        for metric in self.metrics():
+            metric.reset()
+
+    def render(self) -> str:
+        """导出 Prometheus 文本格式(0.0.4)"""
+        lines: List[str] = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+# 全局注册表与热路径指标
+registry = Registry()
+
+decisions_total = registry.register(Counter(
+    "p1_decisions_total", "Decisions by kind and outcome", ("kind", "outcome")
+))
+gate_checks_total = registry.register(Counter(
+    "p1_gate_checks_total", "Gate evaluations by gate and result", ("gate", "result")
+))
+stage_latency_seconds = registry.register(Histogram(
+    "p1_stage_latency_seconds", "Decision stage latency", ("kind", "stage")
+))
+
+
+def gate_label(message: str) -> str:
+    """Gate说明 → 指标标签，如 'Liq-Buffer Gate PASS: ...' → 'liq_buffer'"""
+    name = message.split(" Gate", 1)[0]
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def record_gate_outcomes(outcomes: Iterable[Tuple[str, bool]]) -> None:
+    """记录一次Gate检查中各Gate的通过/失败（标签, 是否通过）"""
+    for label, ok in outcomes:
+        gate_checks_total.inc(gate=label, result="pass" if ok else "fail")
+
+
+def enter_outcome(response) -> str:
+    """入场决策结果标签: allow / deny / error"""
+    if response.allow:
+        return "allow"
+    if response.reason_chain and response.reason_chain[0].startswith("Decision error"):
+        return "error"
+    return "deny"
+
+
+def record_decision(kind: str, outcome: str) -> None:
+    """记录一次决策结果"""
+    decisions_total.inc(kind=kind, outcome=outcome)
+
+
+def observe_stages(kind: str, timings_ms: Dict[str, float]) -> None:
+    """记录一次决策的阶段耗时"""
+    for stage, duration_ms in timings_ms.items():
+        stage_latency_seconds.observe(duration_ms / 1000, kind=kind, stage=stage)
@@ -0,0 +1,276 @@
+"""预fork服务模式 - 主进程预加载，worker 写时复制共享
+
+`uvicorn --workers N` 在每个 worker 进程内各自导入应用并加载模型，内存随
+worker 数线性增长。预fork模式（python -m services.decision.serve）：
+
+- 主进程绑定监听端口，导入应用（编译配置快照、Gate计划与事件日历，构建
+  pydantic schema），调用模型的 load_model()，并把 prefork.weights_dir 下的
+  .npy 权重以只读内存映射（np.load(mmap_mode="r")）载入 weight_store
+- gc.freeze() 把预加载的对象移出GC追踪，避免 worker 中的GC扫描写脏共享页
+- 随后 fork 出 N 个 worker，在继承的监听 socket 上运行 uvicorn；权重页由内核
+  页缓存共享，其余预加载对象按写时复制共享；worker 异常退出时主进程补起
+
+后台线程（追踪写线程、共享状态同步、配置文件监视）均在 fork 之后由各 worker
+的 lifespan 启动。各 worker 通过 memory_usage() 报告自身 RSS/PSS 与共享/私有页。
+"""
+import gc
+import os
+import signal
+import socket
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from loguru import logger
+
+from .config import config_manager
+
+# 与 ConfigManager._get_default_config 保持一致的缺省值
+DEFAULT_PREFORK = {
+    "workers": 4,
+    "weights_dir": None,
+    "gc_freeze": True,
+    "graceful_timeout_s": 30,
+}
+
+# smaps_rollup 字段 → memory_usage() 键
+_SMAPS_FIELDS = {
+    "Rss": "rss",
+    "Pss": "pss",
+    "Shared_Clean": "shared",
+    "Shared_Dirty": "shared",
+    "Private_Clean": "private",
+    "Private_Dirty": "private",
+}
+
+# 主进程是否已完成预加载（fork 后由 worker 继承）
+preloaded = False
+
+
+class WeightStore:
+    """
+    只读内存映射的模型权重
+
+    数组以 np.load(mmap_mode="r") 打开，不可写；多个 worker 映射同一文件时
+    共享页缓存中的同一份物理页。
+    """
+
+    def __init__(self):
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._spill_dir: Optional[str] = None
+
+    def load_dir(self, directory: str) -> int:
+        """载入目录下的全部 .npy 文件，名称为去掉后缀的相对路径"""
+        loaded = 0
+        for root, _, files in os.walk(directory):
+            for filename in sorted(files):
+                if not filename.endswith(".npy"):
+                    continue
+                path = os.path.join(root, filename)
+                name = os.path.relpath(path, directory)[:-len(".npy")].replace(os.sep, "/")
+                self._map(name, path)
+                loaded += 1
+        return loaded
+
+    def add(self, name: str, array: np.ndarray) -> np.ndarray:
+        """把进程内计算出的权重写入临时文件并改为只读映射（供 fork 前调用）"""
+        if self._spill_dir is None:
+            self._spill_dir = tempfile.mkdtemp(prefix="p1-weights-")
+        path = os.path.join(self._spill_dir, name.replace("/", "__") + ".npy")
+        np.save(path, np.ascontiguousarray(array))
+        return self._map(name, path)
+
+    def _map(self, name: str, path: str) -> np.ndarray:
+        array = np.load(path, mmap_mode="r", allow_pickle=False)
+        self._arrays[name] = array
+        return array
+
+    def get(self, name: str) -> np.ndarray:
+        return self._arrays[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._arrays
+
+    def names(self) -> List[str]:
+        return sorted(self._arrays)
+
+    def nbytes(self) -> int:
+        return sum(array.nbytes for array in self._arrays.values())
+
+    def stats(self) -> Dict[str, Any]:
+        return {"arrays": len(self._arrays), "bytes": self.nbytes()}
+
+
+# 全局权重存储
+weight_store = WeightStore()
+
+
+def memory_usage(pid: int = None) -> Dict[str, int]:
+    """
+    进程内存（字节）：rss、pss（按共享进程数均摊）、shared、private
+
+    读取 /proc/<pid>/smaps_rollup；不可用时（非Linux）只返回峰值 rss。
+    """
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    try:
+        with open(path) as f:
+            lines = f.readlines()
+    except OSError:
+        import resource
+        # Linux 上 ru_maxrss 单位为KB，macOS 为字节
+        maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return {"rss": maxrss if os.uname().sysname == "Darwin" else maxrss * 1024}
+
+    usage = {"rss": 0, "pss": 0, "shared": 0, "private": 0}
+    for line in lines:
+        field, _, rest = line.partition(":")
+        key = _SMAPS_FIELDS.get(field)
+        if key is not None:
+            usage[key] += int(rest.split()[0]) * 1024
+    return usage
+
+
+def process_stats() -> Dict[str, Any]:
+    """本 worker 的进程与内存状态（/status 使用）"""
+    return {
+        "pid": os.getpid(),
+        "preloaded": preloaded,
+        "memory_bytes": memory_usage(),
+        "weights": weight_store.stats(),
+    }
+
+
+def load_models() -> None:
+    """加载模型（预fork模式下在主进程调用一次，否则在各 worker 的 lifespan 中调用）"""
+    try:
+        from ..models.ctfg import ctfg_model
+        from ..models.quantile import quantile_predictor
+
+        ctfg_model.load_model()
+        quantile_predictor.load_model()
+
+        logger.info("✅ Models loaded successfully")
+    except Exception as e:
+        logger.warning(f"⚠️  Model loading warning: {e}")
+
+
+def preload(cfg: Dict[str, Any] = None) -> Dict[str, Any]:
+    """在主进程 fork 之前加载模型与权重，并冻结GC追踪"""
+    global preloaded
+    cfg = cfg or {**DEFAULT_PREFORK, **(config_manager.get("prefork") or {})}
+    start = time.perf_counter()
+
+    load_models()
+    if cfg["weights_dir"]:
+        count = weight_store.load_dir(cfg["weights_dir"])
+        logger.info(f"📦 Mapped {count} weight arrays read-only ({weight_store.nbytes()} bytes)")
+
+    gc.collect()
+    if cfg["gc_freeze"]:
+        gc.freeze()
+    preloaded = True
+
+    stats = {
+        "preload_ms": round((time.perf_counter() - start) * 1000, 1),
+        "config_version": config_manager.version,
+        "weights": weight_store.stats(),
+        "memory_bytes": memory_usage(),
+    }
+    logger.info(f"✅ Preloaded in master: {stats}")
+    return stats
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    """在主进程绑定监听 socket，由 worker 继承"""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def _run_worker(app: Any, sock: socket.socket) -> None:
+    """worker 进程：恢复默认信号处理后在继承的 socket 上运行 uvicorn"""
+    import uvicorn
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+    server = uvicorn.Server(uvicorn.Config(app, log_config=None, lifespan="on"))
+    server.run(sockets=[sock])
+
+
+def _fork_worker(app: Any, sock: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        code = 0
+        try:
+            _run_worker(app, sock)
+        except BaseException as e:
+            logger.exception(f"Worker {os.getpid()} crashed: {e}")
+            code = 1
+        finally:
+            os._exit(code)
+    return pid
+
+
+def serve(host: str = "0.0.0.0", port: int = 8000, workers: int = None) -> int:
+    """
+    预fork主进程：预加载后 fork worker 并看护
+
+    SIGTERM/SIGINT 转发给全部 worker 并等待退出（超过 graceful_timeout_s 后
+    SIGKILL）；SIGHUP 转发给 worker，由各自重新加载配置。
+    """
+    cfg = {**DEFAULT_PREFORK, **(config_manager.get("prefork") or {})}
+    workers = workers or cfg["workers"]
+
+    sock = bind_socket(host, port)
+    from ..app import app  # 导入即编译路由、schema 与配置快照
+    preload(cfg)
+
+    children: Dict[int, float] = {}
+    deadline: Optional[float] = None
+
+    def forward(signum, frame):
+        nonlocal deadline
+        if signum != signal.SIGHUP and deadline is None:
+            deadline = time.time() + cfg["graceful_timeout_s"]
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM if signum == signal.SIGINT else signum)
+            except ProcessLookupError:
+                pass
+
+    for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+        signal.signal(signum, forward)
+
+    for _ in range(workers):
+        children[_fork_worker(app, sock)] = time.time()
+    logger.info(f"🚀 Pre-fork master {os.getpid()} serving {host}:{port} with {workers} workers")
+
+    while children:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            break
+        if pid == 0:
+            if deadline is not None and time.time() > deadline:
+                for pid in children:
+                    logger.warning(f"Worker {pid} did not exit in time, killing")
+                    os.kill(pid, signal.SIGKILL)
+                deadline = float("inf")
+            time.sleep(0.1)
+            continue
+        started = children.pop(pid)
+        if deadline is not None:
+            continue
+        logger.warning(f"Worker {pid} exited with {os.waitstatus_to_exitcode(status)}, restarting")
+        if time.time() - started < 1:
+            time.sleep(1)  # 避免启动即崩溃时忙循环
+        children[_fork_worker(app, sock)] = time.time()
+
+    sock.close()
+    logger.info("🛑 Pre-fork master stopped")
+    return 0
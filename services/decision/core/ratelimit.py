@@ -0,0 +1,201 @@
+"""限流模块 - 令牌桶
+
+按接口分别配置两类令牌桶：
+- client: 每个客户端（X-Client-Id 请求头，缺省为来源IP），在HTTP入口检查，
+  超限直接返回 429 + Retry-After，不进入决策线程池
+- symbol: 每个交易标的，在 Event & Latency Gate 中检查，超限拒单
+
+各接口的桶相互独立，入场扫描的突发流量不会挤占退出决策的额度。
+每次检查只做一次按时间补充令牌的计算，O(1)，每个桶各自加锁。
+"""
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from fastapi import Request
+
+from . import metrics
+from .config import config_manager
+
+# 与 ConfigManager._get_default_config 保持一致的缺省值
+DEFAULT_RATE_LIMITS = {
+    "enabled": True,
+    "max_keys": 10000,
+    "client": {
+        "enter": {"rate_per_s": 50, "burst": 100},
+        "enter_batch": {"rate_per_s": 5, "burst": 10},
+        "enter_both": {"rate_per_s": 50, "burst": 100},
+        "exit": {"rate_per_s": 100, "burst": 200},
+    },
+    "symbol": {
+        "enter": {"rate_per_s": 20, "burst": 100},
+    },
+}
+
+
+class RateLimited(Exception):
+    """客户端请求超出限流额度"""
+
+    def __init__(self, endpoint: str, retry_after_s: float):
+        super().__init__(f"Rate limit exceeded for {endpoint}")
+        self.endpoint = endpoint
+        self.retry_after_s = retry_after_s
+
+
+class TokenBucket:
+    """令牌桶：以 rate 个/秒补充，最多 burst 个"""
+
+    __slots__ = ("rate", "burst", "tokens", "updated", "_lock")
+
+    def __init__(self, rate: float, burst: float, now: float = None):
+        self.rate = float(rate)
+        self.burst = float(burst)
+        self.tokens = float(burst)
+        self.updated = time.monotonic() if now is None else now
+        self._lock = threading.Lock()
+
+    def acquire(self, cost: float = 1.0, now: float = None) -> float:
+        """
+        尝试取出 cost 个令牌
+
+        Returns:
+            0 表示成功；否则为令牌足够前需等待的秒数（本次不扣减）
+        """
+        with self._lock:
+            now = time.monotonic() if now is None else now
+            tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if tokens >= cost:
+                self.tokens = tokens - cost
+                return 0.0
+            self.tokens = tokens
+            return (cost - tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def idle_full(self, now: float) -> bool:
+        """按当前时间已补满（与新建的桶等价，可回收）"""
+        return self.tokens + (now - self.updated) * self.rate >= self.burst
+
+
+class RateLimiter:
+    """按 (类别, 接口, 键) 管理的令牌桶集合"""
+
+    def __init__(self, config: Dict = None):
+        self._buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+        self._lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+        self.limited_total: Dict[Tuple[str, str], int] = {}
+        self.limits: Dict[Tuple[str, str], Tuple[float, float]] = {}
+        self.configure(config)
+
+    def configure(self, config: Dict = None) -> None:
+        """
+        应用限额配置；额度变化时清空已有的桶（配置热加载时调用）
+
+        按 类别 → 接口 → 字段 与缺省值逐层合并，只覆盖部分接口时其余接口保留缺省额度；
+        接口设为None时取消该接口的限额。
+        """
+        config = config or {}
+        cfg = {**DEFAULT_RATE_LIMITS, **config}
+        limits = {}
+        for scope in ("client", "symbol"):
+            endpoints = {**DEFAULT_RATE_LIMITS[scope], **(config.get(scope) or {})}
+            for endpoint, limit in endpoints.items():
+                if limit is None:
+                    continue
+                limit = {**DEFAULT_RATE_LIMITS[scope].get(endpoint, {}), **limit}
+                limits[(scope, endpoint)] = (float(limit["rate_per_s"]), float(limit["burst"]))
+        with self._lock:
+            self.enabled = bool(cfg["enabled"])
+            self.max_keys = int(cfg["max_keys"])
+            if limits != self.limits:
+                self.limits = limits
+                self._buckets.clear()
+
+    def _bucket(self, scope: str, endpoint: str, key: str) -> Optional[TokenBucket]:
+        bucket_key = (scope, endpoint, key)
+        bucket = self._buckets.get(bucket_key)
+        if bucket is not None:
+            return bucket
+        limit = self.limits.get((scope, endpoint))
+        if limit is None:
+            return None
+        with self._lock:
+            if len(self._buckets) >= self.max_keys:
+                self._evict_idle()
+            return self._buckets.setdefault(bucket_key, TokenBucket(*limit))
+
+    def _evict_idle(self) -> None:
+        """回收已补满的桶；仍超出上限时清空（偶发，O(n)）"""
+        now = time.monotonic()
+        for key in [key for key, bucket in self._buckets.items() if bucket.idle_full(now)]:
+            del self._buckets[key]
+        if len(self._buckets) >= self.max_keys:
+            self._buckets.clear()
+
+    def acquire(self, scope: str, endpoint: str, key: str, cost: float = 1.0) -> float:
+        """
+        为 key 在 (scope, endpoint) 的桶中取令牌
+
+        Returns:
+            0 表示放行；否则为建议的重试等待秒数。未配置该接口的限额时总是放行。
+        """
+        if not self.enabled:
+            return 0.0
+        bucket = self._bucket(scope, endpoint, key)
+        if bucket is None:
+            return 0.0
+        wait_s = bucket.acquire(cost)
+        if wait_s:
+            counter_key = (scope, endpoint)
+            with self._counter_lock:
+                self.limited_total[counter_key] = self.limited_total.get(counter_key, 0) + 1
+        return wait_s
+
+    def limit(self, scope: str, endpoint: str) -> Optional[Tuple[float, float]]:
+        """(rate_per_s, burst)，未配置时为None"""
+        return self.limits.get((scope, endpoint))
+
+    def reset(self) -> None:
+        """清空所有桶"""
+        with self._lock:
+            self._buckets.clear()
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "buckets": len(self._buckets),
+            "limited_total": {f"{scope}:{endpoint}": count for (scope, endpoint), count in self.limited_total.items()},
+        }
+
+
+def client_id(request: Request) -> str:
+    """客户端标识：X-Client-Id 请求头，缺省为来源IP"""
+    header = request.headers.get("x-client-id")
+    if header:
+        return header
+    return request.client.host if request.client else "unknown"
+
+
+def rate_limit(endpoint: str):
+    """
+    FastAPI依赖：按客户端检查接口限额
+
+    Raises:
+        RateLimited: 超出限额，由应用返回 429
+    """
+    # async：在事件循环内直接执行，不经过线程池
+    async def dependency(request: Request) -> None:
+        wait_s = rate_limiter.acquire("client", endpoint, client_id(request))
+        if wait_s:
+            raise RateLimited(endpoint, wait_s)
+    return dependency
+
+
+# 全局限流器
+rate_limiter = RateLimiter(config_manager.get("rate_limits", {}))
+config_manager.subscribe(lambda snapshot: rate_limiter.configure(snapshot.config.get("rate_limits", {})))
+
+metrics.registry.register(metrics.Callback(
+    "p1_rate_limited_total", "Requests or decisions rejected by rate limiting", "counter",
+    lambda: dict(list(rate_limiter.limited_total.items())), ("scope", "endpoint")
+))
@@ -0,0 +1,396 @@
+"""多worker共享状态 - 计数器、延迟直方图与追踪环
+
+uvicorn 以多个 worker 进程运行时，各进程的 metrics、perf_monitor 与追踪环
+互不相通。启用共享后端（shared_state.backend: redis，使用 REDIS_URL）时：
+
+- 热路径只写本进程：计数器照常累加，延迟样本额外记入按时间片划分的本地增量
+- 每个 worker 的后台线程按 sync_interval_s 把增量批量写入后端（HINCRBYFLOAT），
+  再读回全部 worker 的合并视图，挂到 Counter/Histogram.shared 与
+  perf_monitor.shared 上；/metrics、/status 与延迟Gate读取合并视图
+  （最多滞后一个同步周期），请求路径不访问网络
+- 通过保留策略的追踪记录由追踪写线程推入共享列表（LPUSH + LTRIM），
+  /traces 在该列表上查询，任一 worker 都能看到全部 worker 的最近追踪
+
+后端不可用时同步失败只记录日志，各 worker 继续使用最近一次的合并视图。
+"""
+import json
+import os
+import socket
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from loguru import logger
+
+from . import metrics
+from .config import config_manager
+from .utils import PerformanceMonitor, StreamingHistogram, perf_monitor
+
+# 与 ConfigManager._get_default_config 保持一致的缺省值
+DEFAULT_SHARED_STATE = {
+    "backend": "local",
+    "sync_interval_s": 1.0,
+    "key_prefix": "p1",
+    "trace_capacity": 1000,
+}
+
+# 延迟序列键中 标的 为空时的占位
+_NO_SYMBOL = ""
+
+
+def _default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class MemoryBackend:
+    """进程内后端（单进程部署与测试），接口与 RedisBackend 相同"""
+
+    def __init__(self):
+        self._hashes: Dict[str, Dict[str, float]] = {}
+        self._lists: Dict[str, List[str]] = {}
+        self._sets: Dict[str, set] = {}
+        self._lock = threading.Lock()
+
+    def increment(self, updates: Sequence[Tuple[str, Dict[str, float]]], ttl_s: float = None) -> None:
+        """批量 HINCRBYFLOAT"""
+        with self._lock:
+            for key, fields in updates:
+                target = self._hashes.setdefault(key, {})
+                for field, amount in fields.items():
+                    target[field] = target.get(field, 0.0) + amount
+
+    def set_fields(self, updates: Sequence[Tuple[str, Dict[str, float]]], ttl_s: float = None) -> None:
+        """批量 HSET"""
+        with self._lock:
+            for key, fields in updates:
+                self._hashes.setdefault(key, {}).update(fields)
+
+    def read(self, keys: Sequence[str]) -> List[Dict[str, float]]:
+        """批量 HGETALL"""
+        with self._lock:
+            return [dict(self._hashes.get(key, {})) for key in keys]
+
+    def add_members(self, key: str, members: Iterable[str]) -> None:
+        with self._lock:
+            self._sets.setdefault(key, set()).update(members)
+
+    def members(self, key: str) -> List[str]:
+        with self._lock:
+            return list(self._sets.get(key, ()))
+
+    def push(self, key: str, values: Sequence[str], capacity: int) -> None:
+        """LPUSH + LTRIM：新记录在前，最多保留 capacity 条"""
+        with self._lock:
+            items = self._lists.setdefault(key, [])
+            items[:0] = reversed(values)
+            del items[capacity:]
+
+    def range(self, key: str) -> List[str]:
+        with self._lock:
+            return list(self._lists.get(key, ()))
+
+
+class RedisBackend:
+    """Redis 后端，每次调用一个 pipeline 往返"""
+
+    def __init__(self, url: str):
+        import redis  # 仅在启用共享状态时需要
+
+        self.client = redis.Redis.from_url(url, decode_responses=True, socket_timeout=1.0)
+
+    def increment(self, updates: Sequence[Tuple[str, Dict[str, float]]], ttl_s: float = None) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, fields in updates:
+            for field, amount in fields.items():
+                pipe.hincrbyfloat(key, field, amount)
+            if ttl_s:
+                pipe.expire(key, int(ttl_s) + 1)
+        pipe.execute()
+
+    def set_fields(self, updates: Sequence[Tuple[str, Dict[str, float]]], ttl_s: float = None) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        for key, fields in updates:
+            pipe.hset(key, mapping=fields)
+            if ttl_s:
+                pipe.expire(key, int(ttl_s) + 1)
+        pipe.execute()
+
+    def read(self, keys: Sequence[str]) -> List[Dict[str, float]]:
+        pipe = self.client.pipeline(transaction=False)
+        for key in keys:
+            pipe.hgetall(key)
+        return [{field: float(value) for field, value in fields.items()} for fields in pipe.execute()]
+
+    def add_members(self, key: str, members: Iterable[str]) -> None:
+        members = list(members)
+        if members:
+            self.client.sadd(key, *members)
+
+    def members(self, key: str) -> List[str]:
+        return list(self.client.smembers(key))
+
+    def push(self, key: str, values: Sequence[str], capacity: int) -> None:
+        pipe = self.client.pipeline(transaction=False)
+        pipe.lpush(key, *values)
+        pipe.ltrim(key, 0, capacity - 1)
+        pipe.execute()
+
+    def range(self, key: str) -> List[str]:
+        return self.client.lrange(key, 0, -1)
+
+
+class _LatencyDelta:
+    """一个 (序列, 时间片) 尚未同步的延迟样本"""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+
+class SharedState:
+    """多worker共享状态同步器（每个 worker 进程一个实例）"""
+
+    def __init__(
+        self,
+        backend: Any,
+        monitor: PerformanceMonitor = None,
+        registry: metrics.Registry = None,
+        key_prefix: str = "p1",
+        sync_interval_s: float = 1.0,
+        trace_capacity: int = 1000,
+        worker_id: str = None
+    ):
+        self.backend = backend
+        self.monitor = monitor or perf_monitor
+        self.registry = registry or metrics.registry
+        self.prefix = key_prefix
+        self.sync_interval_s = sync_interval_s
+        self.trace_capacity = trace_capacity
+        self._fixed_worker_id = worker_id
+        self.worker_id = worker_id or _default_worker_id()
+
+        # 直方图分桶与本进程 perf_monitor 一致
+        self._template = StreamingHistogram()
+        self._latency: Dict[Tuple[str, str, int], _LatencyDelta] = {}
+        self._latency_lock = threading.Lock()
+        self._published: Dict[Tuple[str, str], float] = {}
+        self._series: set = set()
+
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.syncs = 0
+        self.sync_errors = 0
+        self.last_sync_ts: Optional[float] = None
+
+    def observe_latency(self, name: str, duration_ms: float, symbol: str = None, now: float = None) -> None:
+        """记录一个延迟样本的增量（perf_monitor.record 调用，O(1)）：计入阶段序列与阶段×标的序列"""
+        now = time.time() if now is None else now
+        slot_id = int(now // self.monitor.slot_s)
+        keys = ((name, _NO_SYMBOL, slot_id), (name, symbol, slot_id)) if symbol else ((name, _NO_SYMBOL, slot_id),)
+        index = self._template.bucket_index(duration_ms)
+        with self._latency_lock:
+            for key in keys:
+                delta = self._latency.get(key)
+                if delta is None:
+                    delta = self._latency[key] = _LatencyDelta()
+                delta.counts[index] = delta.counts.get(index, 0) + 1
+                delta.count += 1
+                delta.total += duration_ms
+                if duration_ms > delta.max:
+                    delta.max = duration_ms
+
+    def push_traces(self, rows: Sequence[Dict[str, Any]]) -> None:
+        """追加追踪记录到共享列表（追踪写线程调用）"""
+        if rows:
+            self.backend.push(self._key("traces"), [json.dumps(row, default=str) for row in rows],
+                              self.trace_capacity)
+
+    def trace_items(self) -> List[str]:
+        """共享列表中未解析的追踪记录（JSON，由新到旧）"""
+        return self.backend.range(self._key("traces"))
+
+    def trace_rows(self) -> List[Dict[str, Any]]:
+        """共享列表中的追踪记录（由新到旧）"""
+        return [json.loads(item) for item in self.trace_items()]
+
+    def _key(self, *parts: Any) -> str:
+        return ":".join((self.prefix,) + tuple(str(part) for part in parts))
+
+    def _series_key(self, name: str, symbol: str, slot_id: int) -> str:
+        return self._key("lat", name, symbol, slot_id)
+
+    def sync(self, now: float = None) -> None:
+        """推送本进程增量，再拉取全部 worker 的合并视图"""
+        now = time.time() if now is None else now
+        self._publish_metrics()
+        self._publish_latency()
+        self._pull_metrics()
+        self._pull_latency(now)
+        self.syncs += 1
+        self.last_sync_ts = now
+
+    def _counter_fields(self) -> Iterable[Tuple[metrics.Metric, str, float]]:
+        """(指标, 字段, 本进程累计值)：Counter 每个标签组合一个字段，Histogram 每个桶一个字段"""
+        for metric in self.registry.metrics():
+            if isinstance(metric, metrics.Counter):
+                for key, value in list(metric._values.items()):
+                    yield metric, json.dumps(list(key)), value
+            elif isinstance(metric, metrics.Histogram):
+                for key, series in list(metric._series.items()):
+                    for i, value in enumerate(list(series)):
+                        yield metric, json.dumps([list(key), i]), value
+
+    def _publish_metrics(self) -> None:
+        updates: Dict[str, Dict[str, float]] = {}
+        published = {}
+        for metric, field, value in self._counter_fields():
+            delta = value - self._published.get((metric.name, field), 0)
+            if delta:
+                updates.setdefault(self._key("metric", metric.name), {})[field] = delta
+                published[(metric.name, field)] = value
+        if updates:
+            self.backend.increment(list(updates.items()))
+            self._published.update(published)
+
+    def _pull_metrics(self) -> None:
+        shared_metrics = [
+            metric for metric in self.registry.metrics()
+            if isinstance(metric, (metrics.Counter, metrics.Histogram))
+        ]
+        rows = self.backend.read([self._key("metric", metric.name) for metric in shared_metrics])
+        for metric, fields in zip(shared_metrics, rows, strict=True):
+            if isinstance(metric, metrics.Counter):
+                metric.shared = {tuple(json.loads(field)): value for field, value in fields.items()}
+            else:
+                size = len(metric.buckets) + 2
+                view: Dict[metrics.LabelKey, List[float]] = {}
+                for field, value in fields.items():
+                    key, i = json.loads(field)
+                    # 各桶为计数，最后一项为 sum
+                    view.setdefault(tuple(key), [0] * size)[i] = value if i == size - 1 else int(value)
+                metric.shared = view
+
+    def _publish_latency(self) -> None:
+        with self._latency_lock:
+            pending, self._latency = self._latency, {}
+        if not pending:
+            return
+        ttl_s = self.monitor.window_s * 2
+        increments = []
+        maxima = []
+        series = set()
+        for (name, symbol, slot_id), delta in pending.items():
+            key = self._series_key(name, symbol, slot_id)
+            fields = {f"b{index}": count for index, count in delta.counts.items()}
+            fields["count"] = delta.count
+            fields["total"] = delta.total
+            increments.append((key, fields))
+            # 最大值不能累加，每个 worker 单独一个字段，读取时取最大
+            maxima.append((key, {f"max:{self.worker_id}": delta.max}))
+            series.add(json.dumps([name, symbol]))
+        self.backend.increment(increments, ttl_s)
+        self.backend.set_fields(maxima, ttl_s)
+        if series - self._series:
+            self.backend.add_members(self._key("lat", "series"), series - self._series)
+            self._series |= series
+
+    def _pull_latency(self, now: float) -> None:
+        monitor = self.monitor
+        current = int(now // monitor.slot_s)
+        slot_ids = range(current - monitor.slots + 1, current + 1)
+        series = [tuple(json.loads(member)) for member in self.backend.members(self._key("lat", "series"))]
+        keys = [self._series_key(name, symbol, slot_id) for name, symbol in series for slot_id in slot_ids]
+        rows = self.backend.read(keys)
+
+        views: Dict[Tuple[str, Optional[str]], StreamingHistogram] = {}
+        per_series = len(slot_ids)
+        for i, (name, symbol) in enumerate(series):
+            histogram = StreamingHistogram()
+            for fields in rows[i * per_series:(i + 1) * per_series]:
+                for field, value in fields.items():
+                    if field[0] == "b":
+                        histogram.counts[int(field[1:])] += int(value)
+                    elif field == "count":
+                        histogram.count += int(value)
+                    elif field == "total":
+                        histogram.total += value
+                    elif field.startswith("max:"):
+                        histogram.max = max(histogram.max, value)
+            if histogram.count:
+                views[(name, symbol or None)] = histogram
+        monitor.shared = views
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.sync_interval_s):
+            self.sync_safely()
+
+    def sync_safely(self) -> bool:
+        try:
+            self.sync()
+            return True
+        except Exception as e:
+            self.sync_errors += 1
+            # 后端不可用时每分钟最多记录一次
+            if self.sync_errors == 1 or self.sync_errors % max(int(60 / self.sync_interval_s), 1) == 0:
+                logger.error(f"Shared state sync failed ({self.sync_errors} errors): {e}")
+            return False
+
+    def start(self) -> None:
+        """在当前 worker 进程内启动同步线程（应在 fork 之后调用）"""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        # 预fork模式下实例在主进程创建，worker 标识按实际进程重新生成
+        self.worker_id = self._fixed_worker_id or _default_worker_id()
+        self._thread = threading.Thread(target=self._run, name="shared-state-sync", daemon=True)
+        self._thread.start()
+        logger.info(f"Shared state sync started for worker {self.worker_id}")
+
+    def stop(self) -> None:
+        """停止同步线程并做最后一次推送"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.sync_safely()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker_id": self.worker_id,
+            "syncs_total": self.syncs,
+            "sync_errors_total": self.sync_errors,
+            "last_sync_age_s": None if self.last_sync_ts is None else round(time.time() - self.last_sync_ts, 3),
+            "latency_series": len(self.monitor.shared or ()),
+        }
+
+
+def _build_shared_state() -> Optional[SharedState]:
+    """按配置创建共享状态；backend 为 local 时返回None（单进程，不同步）"""
+    cfg = {**DEFAULT_SHARED_STATE, **(config_manager.get("shared_state") or {})}
+    backend_name = config_manager.settings.shared_state_backend or cfg["backend"]
+    if backend_name == "local":
+        return None
+    if backend_name != "redis":
+        logger.error(f"Unknown shared_state.backend {backend_name!r}, using process-local state")
+        return None
+    try:
+        backend = RedisBackend(config_manager.settings.redis_url)
+    except ImportError as e:
+        logger.error(f"Shared state backend unavailable ({e}), using process-local state")
+        return None
+    state = SharedState(
+        backend,
+        key_prefix=cfg["key_prefix"],
+        sync_interval_s=cfg["sync_interval_s"],
+        trace_capacity=cfg["trace_capacity"],
+    )
+    perf_monitor.publisher = state.observe_latency
+    return state
+
+
+# 全局共享状态（未启用时为None）
+shared_state = _build_shared_state()
@@ -1,21 +1,58 @@
 """工具函数模块"""
+import threading
 import time
 from contextlib import contextmanager
-from typing import Any, Dict, Generator, Tuple
+from typing import Any, Callable, Dict, Generator, List, MutableMapping, Optional, Set, Tuple, TypeVar
 
 import numpy as np
 from loguru import logger
 
+from . import metrics
+
 
 @contextmanager
 def timer() -> Generator[Dict[str, Any], None, None]:
-    """计时器上下文管理器"""
-    result = {"start_time": time.time()}
+    """
+    计时器上下文管理器
+    
+    除毫秒级的 duration_ms 外，还以 perf_counter_ns 计时，
+    并提供 spans 字典供 span() 记录各阶段耗时(纳秒)。
+    """
+    result = {"start_time": time.time(), "start_ns": time.perf_counter_ns(), "spans": {}}
     try:
         yield result
     finally:
         result["end_time"] = time.time()
-        result["duration_ms"] = int((result["end_time"] - result["start_time"]) * 1000)
+        result["duration_ns"] = time.perf_counter_ns() - result["start_ns"]
+        result["duration_ms"] = int(result["duration_ns"] // 1_000_000)
+
+
+def elapsed_ms(timing: Dict[str, Any]) -> int:
+    """计时器运行期间的已耗时(毫秒)，用于在with块内部构建响应"""
+    return int((time.perf_counter_ns() - timing["start_ns"]) // 1_000_000)
+
+
+@contextmanager
+def span(timing: Dict[str, Any], name: str) -> Generator[None, None, None]:
+    """记录一个阶段的耗时(纳秒)，同名阶段累加；可在工作线程中使用"""
+    start = time.perf_counter_ns()
+    try:
+        yield
+    finally:
+        spans = timing["spans"]
+        spans[name] = spans.get(name, 0) + time.perf_counter_ns() - start
+
+
+def spans_ms(timing: Dict[str, Any]) -> Dict[str, float]:
+    """各阶段耗时(毫秒，保留3位小数)，附加截至当前的 total"""
+    result = {name: round(ns / 1e6, 3) for name, ns in list(timing["spans"].items())}
+    result["total"] = round((time.perf_counter_ns() - timing["start_ns"]) / 1e6, 3)
+    return result
+
+
+def server_timing_header(timings_ms: Dict[str, float]) -> str:
+    """生成 Server-Timing 响应头，如 `gates;dur=0.412, ctfg;dur=1.905`"""
+    return ", ".join(f"{name};dur={duration}" for name, duration in timings_ms.items())
 
 
 def validate_symbol(symbol: str) -> bool:
@@ -89,44 +126,316 @@ def format_reason_chain(reasons: list) -> str:
     return " → ".join(reasons)
 
 
+class StreamingHistogram:
+    """
+    HDR风格的对数-线性直方图（常量内存）
+    
+    以微秒为单位分桶：小于 2^sub_bucket_bits 的值逐一分桶，更大的值按2的幂分段，
+    每段再线性细分，相对误差不超过 2^-(sub_bucket_bits-1)。record 为O(1)；
+    分位数读取扫描固定数量的桶并按写入版本缓存。
+    另可登记阈值(watch)，维护"超过阈值的样本数"计数，使SLA判断为O(1)。
+    """
+    
+    def __init__(self, max_value_ms: float = 60000, sub_bucket_bits: int = 7):
+        self.sub_bucket_bits = sub_bucket_bits
+        self._sub_count = 1 << sub_bucket_bits
+        self._half = self._sub_count >> 1
+        self._max_us = int(max_value_ms * 1000)
+        self.n_buckets = self._index(self._max_us) + 1
+        self.counts = np.zeros(self.n_buckets, dtype=np.int64)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._above: Dict[float, int] = {}
+        self._version = 0
+        self._cache: Dict[float, float] = {}
+        self._cache_version = -1
+    
+    def _index(self, value_us: int) -> int:
+        """值(微秒) → 桶下标"""
+        if value_us < self._sub_count:
+            return value_us
+        exponent = value_us.bit_length() - self.sub_bucket_bits
+        return self._sub_count + (exponent - 1) * self._half + ((value_us >> exponent) - self._half)
+    
+    def _bounds_ms(self, index: int) -> Tuple[float, float]:
+        """桶下标 → (下界, 上界) 毫秒"""
+        if index < self._sub_count:
+            return index / 1000, (index + 1) / 1000
+        exponent = (index - self._sub_count) // self._half + 1
+        mantissa = (index - self._sub_count) % self._half + self._half
+        return (mantissa << exponent) / 1000, ((mantissa + 1) << exponent) / 1000
+    
+    def bucket_index(self, value_ms: float) -> int:
+        """值(毫秒) → 桶下标（超出量程的值计入最后一个桶）"""
+        return self._index(min(max(int(value_ms * 1000), 0), self._max_us))
+    
+    def record(self, value_ms: float) -> None:
+        """记录一个样本（超出量程的值计入最后一个桶）"""
+        self.counts[self.bucket_index(value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        if value_ms > self.max:
+            self.max = value_ms
+        for threshold in self._above:
+            if value_ms > threshold:
+                self._above[threshold] += 1
+        self._version += 1
+    
+    def watch(self, threshold_ms: float) -> None:
+        """登记阈值；已有样本按桶下界近似计入"""
+        if threshold_ms in self._above:
+            return
+        first = self._index(min(max(int(threshold_ms * 1000), 0), self._max_us)) + 1
+        self._above[threshold_ms] = int(self.counts[first:].sum())
+    
+    def count_above(self, threshold_ms: float) -> int:
+        """超过阈值的样本数（未登记的阈值先登记）"""
+        self.watch(threshold_ms)
+        return self._above[threshold_ms]
+    
+    def quantile(self, q: float) -> float:
+        """分位数（返回所在桶的中点，毫秒）"""
+        if self.count == 0:
+            return 0.0
+        if self._cache_version != self._version:
+            self._cache = {}
+            self._cache_version = self._version
+        if q not in self._cache:
+            rank = max(int(np.ceil(q * self.count)), 1)
+            index = int(np.searchsorted(np.cumsum(self.counts), rank))
+            low, high = self._bounds_ms(index)
+            self._cache[q] = min((low + high) / 2, self.max)
+        return self._cache[q]
+    
+    def add(self, other: "StreamingHistogram") -> None:
+        """合并另一个同构直方图"""
+        self._combine(other, 1)
+    
+    def subtract(self, other: "StreamingHistogram") -> None:
+        """扣除另一个同构直方图（用于窗口滑出）"""
+        self._combine(other, -1)
+    
+    def _combine(self, other: "StreamingHistogram", sign: int) -> None:
+        self.counts += sign * other.counts
+        self.count += sign * other.count
+        self.total += sign * other.total
+        for threshold in self._above:
+            self._above[threshold] += sign * other.count_above(threshold)
+        if sign > 0:
+            self.max = max(self.max, other.max)
+        elif self.count == 0:
+            self.max = 0.0
+        else:
+            # 最大值取剩余样本最高桶的上界
+            self.max = min(self._bounds_ms(int(np.flatnonzero(self.counts)[-1]))[1], self.max)
+        self._version += 1
+    
+    def clear(self) -> None:
+        """清空样本（保留已登记的阈值）"""
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._above = dict.fromkeys(self._above, 0)
+        self._version += 1
+
+
+_T = TypeVar("_T")
+
+
+class WindowedHistogram:
+    """
+    滑动时间窗口直方图
+    
+    窗口划分为 slots 个时间片，每片一个 StreamingHistogram；另维护一个合并视图，
+    写入时同时累加，时间片滑出时整体扣除，读取无需再合并。
+    样本来自事件循环与决策线程池，写入、滑出与读取都在窗口锁内进行。
+    """
+    
+    def __init__(self, window_s: float = 300, slots: int = 10, **histogram_kwargs: Any):
+        self.window_s = window_s
+        self.slot_s = window_s / slots
+        self._slots = [StreamingHistogram(**histogram_kwargs) for _ in range(slots)]
+        self._slot_ids = [None] * slots
+        self.merged = StreamingHistogram(**histogram_kwargs)
+        self._lock = threading.Lock()
+    
+    def _advance(self, now: float) -> int:
+        """滑出过期时间片，返回当前时间片下标（调用方持有锁）"""
+        slot_id = int(now // self.slot_s)
+        position = slot_id % len(self._slots)
+        oldest = slot_id - len(self._slots) + 1
+        for i, sid in enumerate(self._slot_ids):
+            if sid is not None and sid < oldest:
+                self.merged.subtract(self._slots[i])
+                self._slots[i].clear()
+                self._slot_ids[i] = None
+        self._slot_ids[position] = slot_id
+        return position
+    
+    def record(self, value_ms: float, now: float = None) -> None:
+        """记录样本"""
+        now = time.time() if now is None else now
+        with self._lock:
+            position = self._advance(now)
+            self._slots[position].record(value_ms)
+            self.merged.record(value_ms)
+    
+    def read(self, fn: Callable[[StreamingHistogram], _T], now: float = None) -> _T:
+        """在锁内对窗口合并视图求值（读取期间不会有并发写入）"""
+        now = time.time() if now is None else now
+        with self._lock:
+            self._advance(now)
+            return fn(self.merged)
+    
+    def view(self, now: float = None) -> StreamingHistogram:
+        """窗口内样本的合并视图（返回后不再受锁保护，仅用于单线程检查）"""
+        return self.read(lambda merged: merged, now)
+    
+    def watch(self, threshold_ms: float) -> None:
+        """在所有时间片与合并视图上登记阈值"""
+        with self._lock:
+            for histogram in self._slots:
+                histogram.watch(threshold_ms)
+            self.merged.watch(threshold_ms)
+
+
 class PerformanceMonitor:
-    """性能监控器"""
+    """
+    性能监控器
+    
+    按阶段(name)与阶段×标的分别维护滑动窗口直方图；record 为O(1)，
+    check_sla 通过阈值计数判断 p95 是否超限，同样为O(1)。SLA阈值首次检查时
+    登记到已有窗口，之后新建的窗口创建时即登记，检查路径上不再重复登记。
+    
+    多worker部署时样本同时交给 publisher（core.shared_state），读取优先使用
+    shared 中全部 worker 的合并窗口视图。
+    """
+    
+    def __init__(self, window_s: float = 300, slots: int = 10):
+        self.window_s = window_s
+        self.slots = slots
+        self.slot_s = window_s / slots
+        self.metrics: Dict[str, WindowedHistogram] = {}
+        self.by_symbol: Dict[Tuple[str, str], WindowedHistogram] = {}
+        self.thresholds: Set[float] = set()
+        self._lock = threading.Lock()
+        self.publisher: Optional[Callable[[str, float, Optional[str]], None]] = None
+        # (name, symbol或None) → 全部 worker 的窗口视图（由同步线程整体替换）
+        self.shared: Optional[Dict[Tuple[str, Optional[str]], StreamingHistogram]] = None
     
-    def __init__(self):
-        self.metrics = {}
+    def _window(self, table: Dict, key: Any) -> WindowedHistogram:
+        window = table.get(key)
+        if window is None:
+            with self._lock:
+                window = table.get(key)
+                if window is None:
+                    window = WindowedHistogram(self.window_s, self.slots)
+                    for threshold in self.thresholds:
+                        window.watch(threshold)
+                    table[key] = window
+        return window
     
-    def record(self, name: str, duration_ms: int) -> None:
+    def record(self, name: str, duration_ms: float, symbol: str = None) -> None:
         """记录性能指标"""
-        if name not in self.metrics:
-            self.metrics[name] = []
-        self.metrics[name].append(duration_ms)
-        
-        # 保持最近100条记录
-        if len(self.metrics[name]) > 100:
-            self.metrics[name] = self.metrics[name][-100:]
-    
-    def get_stats(self, name: str) -> Dict[str, float]:
-        """获取性能统计"""
-        if name not in self.metrics or not self.metrics[name]:
-            return {}
-        
-        values = self.metrics[name]
+        self._window(self.metrics, name).record(duration_ms)
+        if symbol:
+            self._window(self.by_symbol, (name, symbol)).record(duration_ms)
+        if self.publisher is not None:
+            self.publisher(name, duration_ms, symbol)
+    
+    def reset(self) -> None:
+        """清空本进程的全部窗口（启动预热结束后调用）"""
+        with self._lock:
+            self.metrics = {}
+            self.by_symbol = {}
+    
+    def _read(self, name: str, symbol: Optional[str], fn: Callable[[StreamingHistogram], _T], default: _T) -> _T:
+        """对 (name, symbol) 的窗口视图求值；无样本时返回 default。本进程窗口在其锁内读取"""
+        shared = self.shared
+        if shared is not None:
+            view = shared.get((name, symbol or None))
+            return fn(view) if view is not None else default
+        table, key = (self.by_symbol, (name, symbol)) if symbol else (self.metrics, name)
+        window = table.get(key)
+        if window is None:
+            return default
+        return window.read(lambda view: fn(view) if view.count > 0 else default)
+    
+    def get_stats(self, name: str, symbol: str = None) -> Dict[str, float]:
+        """获取性能统计（窗口内）"""
+        return self._read(name, symbol, lambda view: {
+            "count": view.count,
+            "avg_ms": view.total / view.count,
+            "p50_ms": view.quantile(0.50),
+            "p95_ms": view.quantile(0.95),
+            "p99_ms": view.quantile(0.99),
+            "max_ms": view.max
+        }, {})
+    
+    def quantile(self, name: str, q: float, symbol: str = None) -> float:
+        """窗口内的分位数，无数据时为0"""
+        return self._read(name, symbol, lambda view: view.quantile(q), 0.0)
+    
+    def watch(self, threshold_ms: float) -> None:
+        """登记SLA阈值：已有窗口立即登记，之后新建的窗口创建时登记"""
+        with self._lock:
+            if threshold_ms in self.thresholds:
+                return
+            self.thresholds.add(threshold_ms)
+            windows = list(self.metrics.values()) + list(self.by_symbol.values())
+        for window in windows:
+            window.watch(threshold_ms)
+    
+    def check_sla(self, name: str, sla_ms: float, symbol: str = None, q: float = 0.95) -> bool:
+        """检查是否违反SLA：超过 sla_ms 的样本占比不超过 1-q 即 q 分位数满足SLA"""
+        if sla_ms not in self.thresholds:
+            self.watch(sla_ms)
+        return self._read(name, symbol, lambda view: view.count_above(sla_ms) <= (1 - q) * view.count, True)
+    
+    def record_stages(self, prefix: str, timings_ms: Dict[str, float]) -> None:
+        """按阶段记录一次决策的耗时分解，名称为 `{prefix}.{阶段}`"""
+        for stage, duration_ms in timings_ms.items():
+            self.record(f"{prefix}.{stage}", duration_ms)
+    
+    def stage_stats(self, prefix: str) -> Dict[str, Dict[str, float]]:
+        """某类决策各阶段的耗时统计"""
+        head = f"{prefix}."
         return {
-            "count": len(values),
-            "avg_ms": np.mean(values),
-            "p50_ms": np.percentile(values, 50),
-            "p95_ms": np.percentile(values, 95),
-            "p99_ms": np.percentile(values, 99),
-            "max_ms": np.max(values)
+            name[len(head):]: self.get_stats(name)
+            for name in self._names()
+            if name.startswith(head)
         }
     
-    def check_sla(self, name: str, sla_ms: int) -> bool:
-        """检查是否违反SLA"""
-        stats = self.get_stats(name)
-        if not stats:
-            return True
-        return stats.get("p95_ms", 0) <= sla_ms
+    def _names(self) -> List[str]:
+        shared = self.shared
+        if shared is not None:
+            return [name for name, symbol in list(shared) if symbol is None]
+        return list(self.metrics)
+    
+    def symbols(self, name: str) -> List[str]:
+        """有记录的标的列表"""
+        shared = self.shared
+        keys = list(shared) if shared is not None else list(self.by_symbol)
+        return [symbol for stage, symbol in keys if stage == name and symbol]
 
 
 # 全局性能监控器
 perf_monitor = PerformanceMonitor()
+
+
+def publish_timings(response: Any, headers: MutableMapping[str, str], prefix: str, include: bool) -> Any:
+    """
+    发布决策响应的阶段耗时
+    
+    写入 Server-Timing 响应头并聚合到 perf_monitor 与 /metrics 直方图；include 为False时
+    返回去掉 timings_ms 的副本（不修改原响应，原响应可能被缓存）。
+    """
+    if response.timings_ms:
+        headers["Server-Timing"] = server_timing_header(response.timings_ms)
+        perf_monitor.record_stages(prefix, response.timings_ms)
+        metrics.observe_stages(prefix, response.timings_ms)
+    if include or response.timings_ms is None:
+        return response
+    return response.model_copy(update={"timings_ms": None})
@@ -0,0 +1,206 @@
+"""入场决策缓存 - 同一根K线内重复请求的记忆化
+
+Freqtrade 在同一根K线内会多次调用 populate_entry_trend，发送完全相同的请求。
+缓存键为 (symbol, side_hint, tf, K线开盘时间, 量化后的 Features/PGMMetrics 向量, Gate计划版本)，
+条目按LRU淘汰，并在所属K线收盘时过期。
+
+事件与延迟Gate随墙钟时间变化（黑名单窗口、延迟SLA），不进入缓存键；
+每次命中都重新检查黑名单与SLA，不通过时按未命中处理，由完整决策给出拒绝。
+缓存命中不消耗限频令牌。
+"""
+import calendar
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Tuple
+
+from ..core import metrics
+from ..core.config import config_manager
+from ..gates import event_latency
+from ..gates.codes import GATE_BITS, GateId
+from ..schemas.features import EnterRequest
+from ..schemas.responses import EnterResponse
+
+# 时间框架 → 秒
+TF_SECONDS = {
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+}
+
+
+def quantize(value: float, sig_digits: int) -> float:
+    """按有效数字量化，吸收浮点噪声"""
+    return float(f"{value:.{sig_digits}g}")
+
+
+def feature_vector(request: EnterRequest) -> Tuple[float, ...]:
+    """把 Features 与 PGMMetrics 展开为定长数值向量"""
+    f = request.features
+    pgm = request.pgm
+    return (
+        f.sigma_1m, f.skew_1m, f.Z_4H, f.Z_1H, f.Z_15m,
+        f.C_align, f.C_of, f.C_vision, float(f.pine_match),
+        f.OF.obi, f.OF.dCVD, f.OF.replenish,
+        f.onchain.oi_roc, f.onchain.gas_z,
+        f.market.mark, f.market.liq_price, f.market.spread_bp, f.market.depth_px,
+        pgm.p_hit, pgm.mae_q999, pgm.slip_q95, float(pgm.t_hit_q50_bars),
+    )
+
+
+def bar_window(request: EnterRequest) -> Tuple[int, int]:
+    """计算请求所属K线的 (开盘时间, 收盘时间)，单位为epoch秒"""
+    tf_seconds = TF_SECONDS[request.tf]
+    # 无时区的时间戳按UTC处理
+    ts = calendar.timegm(request.ts.utctimetuple())
+    bar_open = ts - ts % tf_seconds
+    return bar_open, bar_open + tf_seconds
+
+
+class DecisionCache:
+    """线程安全的LRU入场决策缓存"""
+
+    def __init__(self, max_entries: int = 4096, sig_digits: int = 4, enabled: bool = True):
+        self.enabled = enabled
+        self.max_entries = max_entries
+        self.sig_digits = sig_digits
+        self._entries: "OrderedDict[Hashable, Tuple[float, EnterResponse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def make_key(self, request: EnterRequest, plan_version: str) -> Tuple[Hashable, int]:
+        """
+        生成缓存键
+
+        Returns:
+            (缓存键, K线收盘时间)
+        """
+        bar_open, bar_close = bar_window(request)
+        quantized = tuple(quantize(v, self.sig_digits) for v in feature_vector(request))
+        factors = tuple((name, quantize(weight, self.sig_digits)) for name, weight in request.pgm.factors)
+        tokens = tuple(sorted(
+            (name, quantize(conf, self.sig_digits))
+            for name, conf in request.features.vision_tokens.tokens.items()
+        ))
+        key = (
+            request.symbol, request.side_hint, request.tf, bar_open,
+            quantized, factors, tokens, plan_version,
+        )
+        return key, bar_close
+
+    def get(
+        self, key: Hashable, now: float = None, valid: Callable[[EnterResponse], bool] = None
+    ) -> Optional[EnterResponse]:
+        """
+        查询缓存，过期条目在命中检查时删除
+
+        valid 不为None时对命中条目复核，不通过按未命中计（条目保留，条件恢复后可再次命中）
+        """
+        if not self.enabled:
+            return None
+        now = time.time() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, response = entry
+            if now >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            if valid is not None and not valid(response):
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return response
+
+    def put(self, key: Hashable, response: EnterResponse, expires_at: float, now: float = None) -> None:
+        """写入缓存；已收盘K线的决策不缓存"""
+        now = time.time() if now is None else now
+        if not self.enabled or now >= expires_at:
+            return
+
+        with self._lock:
+            self._entries[key] = (expires_at, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """清空缓存与命中统计"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """获取缓存统计"""
+        total = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total > 0 else 0.0,
+        }
+
+
+def is_cacheable(response: EnterResponse) -> bool:
+    """
+    只缓存确定性的决策：出错、有大脑组件超时被丢弃，或被事件与延迟Gate拒绝
+    （黑名单窗口、延迟SLA、限流均随时间变化）的结果不缓存
+    """
+    if response._gate_failures & GATE_BITS[GateId.EVENT_LATENCY]:
+        return False
+    return not any(
+        reason.startswith("Decision error") or " dropped: " in reason
+        for reason in response.reason_chain
+    )
+
+
+def lookup(request: EnterRequest) -> Tuple[Optional[EnterResponse], Hashable, int]:
+    """
+    查询请求对应的缓存决策
+
+    Returns:
+        (命中的响应副本或None, 缓存键, K线收盘时间)
+    """
+    key, expires_at = decision_cache.make_key(request, config_manager.get_gate_plan(request.symbol, request.tf).version)
+    cached = decision_cache.get(key, valid=lambda _: event_latency.evaluate(symbol=request.symbol, rate_limit=False).ok)
+    if cached is None:
+        return None, key, expires_at
+    return cached.model_copy(update={"cache_hit": True, "runtime_ms": 0, "timings_ms": None}), key, expires_at
+
+
+def remember(key: Hashable, expires_at: int, response: EnterResponse) -> None:
+    """缓存可复用的决策（决策所用的Gate计划须与缓存键一致）"""
+    if is_cacheable(response) and response.plan_version == key[-1]:
+        decision_cache.put(key, response, expires_at)
+
+
+# 全局决策缓存
+decision_cache = DecisionCache(
+    enabled=config_manager.get("decision_cache.enabled", True),
+    max_entries=config_manager.get("decision_cache.max_entries", 4096),
+    sig_digits=config_manager.get("decision_cache.sig_digits", 4),
+)
+
+metrics.registry.register(metrics.Callback(
+    "p1_decision_cache_lookups_total", "Decision cache lookups by result", "counter",
+    lambda: {("hit",): decision_cache.hits, ("miss",): decision_cache.misses},
+    labelnames=("result",)
+))
+metrics.registry.register(metrics.Callback(
+    "p1_decision_cache_entries", "Entries held in the decision cache", "gauge",
+    lambda: {(): len(decision_cache._entries)}
+))
@@ -0,0 +1,99 @@
+"""决策上下文 - 每个请求只计算一次的派生量
+
+强平缓冲、风险预算、方向信号均值以及各阈值的余量在请求进入时计算一次，
+Gate检查、脆弱性测试与分配/风险指标直接读取，不再各自重复计算。
+风险预算依赖PGM指标：Gate阶段使用请求自带的PGM，CTFG推理后以
+with_pgm() 替换为模型结果，其余派生量沿用。
+"""
+from dataclasses import dataclass, replace
+
+from ..core.gate_plan import GatePlan
+from ..core.utils import calculate_liq_buffer
+from ..schemas.base import RiskMetrics
+from ..schemas.features import EnterRequest, Features, PGMMetrics
+
+
+def risk_budget(pgm: PGMMetrics, epsilon: float) -> float:
+    """风险预算 = MAE_Q999 + Slip_Q95 + ε"""
+    return pgm.mae_q999 + pgm.slip_q95 + epsilon
+
+
+@dataclass(frozen=True)
+class DecisionContext:
+    """单次决策的派生量与阈值余量（不可变）"""
+    plan: GatePlan
+
+    # 流动性缓冲
+    liq_buffer: float       # |mark - liq_price| / mark
+    risk_budget: float      # MAE_Q999 + Slip_Q95 + ε
+    mae_q999: float
+    slip_q95: float
+
+    # 方向信号
+    avg_z: float            # (Z_4H + Z_1H + Z_15m) / 3
+
+    # 阈值余量（>= 0 表示满足）
+    align_margin: float     # C_align - C_align_min
+    of_margin: float        # C_of - C_of_min
+    vision_margin: float    # C_vision - C_vision_min
+    depth_margin: float     # depth_px - min_depth_px
+    spread_margin: float    # spread_bp_max - spread_bp
+
+    @classmethod
+    def build(cls, request: EnterRequest, plan: GatePlan, pgm: PGMMetrics = None) -> "DecisionContext":
+        """由请求与Gate计划计算；pgm 为空时使用请求自带的PGM指标"""
+        return cls.from_features(request.features, pgm or request.pgm, plan)
+
+    @classmethod
+    def from_features(cls, features: Features, pgm: PGMMetrics, plan: GatePlan) -> "DecisionContext":
+        """由特征、PGM指标与Gate计划计算"""
+        market = features.market
+        return cls(
+            plan=plan,
+            liq_buffer=calculate_liq_buffer(market.mark, market.liq_price),
+            risk_budget=risk_budget(pgm, plan.epsilon),
+            mae_q999=pgm.mae_q999,
+            slip_q95=pgm.slip_q95,
+            avg_z=(features.Z_4H + features.Z_1H + features.Z_15m) / 3,
+            align_margin=features.C_align - plan.C_align_min,
+            of_margin=features.C_of - plan.C_of_min,
+            vision_margin=features.C_vision - plan.C_vision_min,
+            depth_margin=market.depth_px - plan.min_depth_px,
+            spread_margin=plan.spread_bp_max - market.spread_bp,
+        )
+
+    def with_pgm(self, pgm: PGMMetrics) -> "DecisionContext":
+        """换用模型推理得到的PGM指标，仅重算风险预算"""
+        if pgm.mae_q999 == self.mae_q999 and pgm.slip_q95 == self.slip_q95:
+            return self
+        return replace(
+            self,
+            risk_budget=risk_budget(pgm, self.plan.epsilon),
+            mae_q999=pgm.mae_q999,
+            slip_q95=pgm.slip_q95,
+        )
+
+    @property
+    def safety_margin(self) -> float:
+        """强平缓冲 - 风险预算"""
+        return self.liq_buffer - self.risk_budget
+
+    @property
+    def buffer_ok(self) -> bool:
+        return self.liq_buffer > 0 and self.risk_budget <= self.liq_buffer
+
+    def risk_details(self) -> dict:
+        """风险指标详情（与 liq_buffer.check_liq_buffer_adequate 相同字段）"""
+        return {
+            "liq_buffer_pct": self.liq_buffer,
+            "mae_q999": self.mae_q999,
+            "slip_q95": self.slip_q95,
+            "epsilon": self.plan.epsilon,
+            "risk_budget": self.risk_budget,
+            "safety_margin": self.safety_margin,
+            "utilization_pct": self.risk_budget / self.liq_buffer if self.liq_buffer > 0 else float('inf')
+        }
+
+    def risk_metrics(self) -> RiskMetrics:
+        """允许响应中的风险指标"""
+        return RiskMetrics(liq_buffer_pct=self.liq_buffer, lhs_pct=self.risk_budget)
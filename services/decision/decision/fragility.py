@@ -0,0 +1,185 @@
+"""蒙特卡洛脆弱性测试 - 擾動特徵/拔最強因子，檢查決策是否翻盤
+
+一次抽取 K 个特征向量扰动（σ、skew、深度、dCVD、C_*、p_hit，并在部分样本中
+拔掉最强PGM因子），复用批量Gate的列运算掩码与方向判定逻辑对整批样本重评估，
+统计相对原始决策的翻盘率。K 由Gate计划的 fragility.samples 配置，
+随机种子固定，同一请求在任一worker、任一次启动中的结果都相同。
+"""
+from dataclasses import dataclass
+from typing import Dict, Mapping, Tuple
+
+import numpy as np
+from ..core.gate_plan import GatePlan
+from ..gates import batch as batch_gates
+from ..schemas.features import EnterRequest
+from .context import DecisionContext
+
+# 与 reasoner.determine_allocation_and_side 保持一致的信号阈值
+Z_SIGNAL = 0.5
+SKEW_SIGNAL = 0.5
+DCVD_SIGNAL = 1.0
+
+# 翻盘原因（按检查顺序）
+FLIP_CAUSES = ("vol", "consensus", "liq_buffer", "p_hit", "side")
+
+
+@dataclass(frozen=True)
+class FragilityReport:
+    """脆弱性测试结果"""
+    ok: bool
+    flip_rate: float
+    samples: int
+    causes: Mapping[str, float]
+    message: str
+
+
+def _strongest_factor_weight(pgm_result) -> float:
+    """最强因子（按绝对权重）的带符号权重，无因子时为0"""
+    if not pgm_result.factors:
+        return 0.0
+    return max((weight for _, weight in pgm_result.factors), key=abs)
+
+
+def _suggested_long(cols: Dict[str, np.ndarray], avg_z: float, side_hint: str) -> np.ndarray:
+    """向量化的方向判定，返回建议方向是否为多头"""
+    signals_long = (
+        int(avg_z > Z_SIGNAL)
+        + (cols["skew"] > SKEW_SIGNAL).astype(np.int8)
+        + (cols["dCVD"] > DCVD_SIGNAL).astype(np.int8)
+    )
+    signals_short = (
+        int(avg_z < -Z_SIGNAL)
+        + (cols["skew"] < -SKEW_SIGNAL).astype(np.int8)
+        + (cols["dCVD"] < -DCVD_SIGNAL).astype(np.int8)
+    )
+    return np.where(
+        signals_long == signals_short,
+        side_hint == "long",
+        signals_long > signals_short,
+    )
+
+
+class FragilityEngine:
+    """向量化蒙特卡洛脆弱性引擎"""
+
+    def perturb(
+        self, request: EnterRequest, pgm_result, ctx: DecisionContext, k: int
+    ) -> Dict[str, np.ndarray]:
+        """
+        生成 k 个扰动样本的列数组
+
+        第0行为未扰动的原始特征，列名与 batch.build_columns 一致，另含 dCVD / p_hit。
+        强平缓冲与风险预算不受扰动，直接取自决策上下文。
+        """
+        cfg = ctx.plan.fragility
+        rng = np.random.default_rng(cfg["seed"])
+        f = request.features
+        n = k + 1
+
+        def noisy(value: float, scale: float) -> np.ndarray:
+            col = value + rng.standard_normal(n) * scale
+            col[0] = value
+            return col
+
+        def scaled(value: float, rel: float) -> np.ndarray:
+            col = value * (1.0 + rng.standard_normal(n) * rel)
+            col[0] = value
+            return np.maximum(col, 0.0)
+
+        p_hit = noisy(pgm_result.p_hit, cfg["p_hit_abs"])
+        drop = rng.random(n) < cfg["factor_drop_prob"]
+        drop[0] = False
+        p_hit -= drop * (_strongest_factor_weight(pgm_result) * cfg["factor_drop_scale"])
+
+        return {
+            "sigma": scaled(f.sigma_1m, cfg["sigma_rel"]),
+            "skew": noisy(f.skew_1m, cfg["skew_abs"]),
+            "is_long": np.full(n, request.side_hint == "long"),
+            "C_align": np.clip(noisy(f.C_align, cfg["c_abs"]), 0.0, 1.0),
+            "C_of": np.clip(noisy(f.C_of, cfg["c_abs"]), 0.0, 1.0),
+            "C_vision": np.clip(noisy(f.C_vision, cfg["c_abs"]), 0.0, 1.0),
+            "pine_match": np.full(n, f.pine_match),
+            "liq_buffer": np.full(n, ctx.liq_buffer),
+            "risk_budget": np.full(n, ctx.risk_budget),
+            "spread_bp": np.full(n, f.market.spread_bp),
+            "depth_px": scaled(f.market.depth_px, cfg["depth_rel"]),
+            "dCVD": noisy(f.OF.dCVD, cfg["dCVD_abs"]),
+            "p_hit": np.clip(p_hit, 0.0, 1.0),
+        }
+
+    def outcomes(
+        self, request: EnterRequest, cols: Dict[str, np.ndarray], ctx: DecisionContext
+    ) -> Dict[str, np.ndarray]:
+        """对整批样本重评估Gate与方向判定，返回各原因的失败掩码"""
+        plan = ctx.plan
+        vol = batch_gates.vol_masks(cols, plan)
+        consensus = batch_gates.consensus_masks(cols, plan)
+        liq = batch_gates.liq_buffer_columns(cols, plan)
+
+        suggested_long = _suggested_long(cols, ctx.avg_z, request.side_hint)
+
+        return {
+            "vol": np.logical_or.reduce(list(vol.values())),
+            "consensus": ~np.logical_and.reduce(list(consensus.values())),
+            "liq_buffer": ~(liq["buffer_valid"] & liq["budget_ok"] & liq["depth_ok"] & liq["spread_ok"]),
+            "p_hit": cols["p_hit"] < plan.p_hit_min,
+            "side": suggested_long != suggested_long[0],
+        }
+
+    @staticmethod
+    def sample_count(plan: GatePlan) -> int:
+        """样本数K：取自Gate计划，不在请求路径上按耗时校准，保证各worker判定一致"""
+        return int(plan.fragility["samples"])
+
+    def evaluate(
+        self, request: EnterRequest, pgm_result, plan: GatePlan, ctx: DecisionContext = None
+    ) -> FragilityReport:
+        """运行蒙特卡洛脆弱性测试；ctx 为以 pgm_result 计算的决策上下文"""
+        ctx = ctx or DecisionContext.build(request, plan, pgm_result)
+        k = self.sample_count(plan)
+        cols = self.perturb(request, pgm_result, ctx, k)
+        failures = self.outcomes(request, cols, ctx)
+        flip_rate_max = plan.fragility["flip_rate_max"]
+
+        # 原始特征本身就不成立（如 p_hit 低于门槛）
+        base_causes = [name for name in FLIP_CAUSES if failures[name][0]]
+        if base_causes:
+            return FragilityReport(
+                ok=False,
+                flip_rate=1.0,
+                samples=k,
+                causes=dict.fromkeys(base_causes, 1.0),
+                message=f"Fragility issues: base decision fails {', '.join(base_causes)} "
+                        f"(p_hit={pgm_result.p_hit:.2f}, min {plan.p_hit_min})",
+            )
+
+        flipped = np.logical_or.reduce([failures[name][1:] for name in FLIP_CAUSES])
+        flip_rate = float(flipped.mean())
+        causes = {name: float(failures[name][1:].mean()) for name in FLIP_CAUSES}
+
+        if flip_rate > flip_rate_max:
+            top = sorted(
+                ((name, rate) for name, rate in causes.items() if rate > 0),
+                key=lambda item: item[1], reverse=True
+            )[:3]
+            top_str = ", ".join(f"{name} {rate:.0%}" for name, rate in top)
+            message = (
+                f"Fragility issues: flip rate {flip_rate:.1%} > {flip_rate_max:.0%} "
+                f"over K={k} (top causes: {top_str})"
+            )
+            return FragilityReport(False, flip_rate, k, causes, message)
+
+        message = f"Fragility test PASSED: flip rate {flip_rate:.1%} ≤ {flip_rate_max:.0%} (K={k})"
+        return FragilityReport(True, flip_rate, k, causes, message)
+
+
+# 全局脆弱性引擎
+fragility_engine = FragilityEngine()
+
+
+def run(
+    request: EnterRequest, pgm_result, plan: GatePlan, ctx: DecisionContext = None
+) -> Tuple[bool, str]:
+    """运行脆弱性测试，返回 (是否稳健, 说明)"""
+    report = fragility_engine.evaluate(request, pgm_result, plan, ctx)
+    return report.ok, report.message
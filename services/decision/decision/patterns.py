@@ -0,0 +1,132 @@
+"""决策模式在线统计模块
+
+追踪记录入库时增量更新 1m/5m/1h 翻滚窗口内的聚合量：决策数、通过率、
+各Gate通过率与延迟直方图，按全部标的与单个标的分别维护。
+读取只汇总固定大小的聚合量，与追踪条数无关。
+"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.utils import StreamingHistogram
+
+# 窗口名 → 窗口长度(秒)
+WINDOWS: Dict[str, int] = {"1m": 60, "5m": 300, "1h": 3600}
+
+ALL_SYMBOLS = "*"
+
+
+class WindowAggregate:
+    """单个翻滚窗口内的聚合量"""
+
+    __slots__ = ("start", "total", "approved", "gates", "latency")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.total = 0
+        self.approved = 0
+        self.gates: Dict[str, list] = {}  # gate → [总数, 通过数]
+        self.latency = StreamingHistogram()
+
+    def add(self, record) -> None:
+        self.total += 1
+        if record.decision == "ALLOW":
+            self.approved += 1
+        for gate_name, passed in record.gates:
+            counts = self.gates.get(gate_name)
+            if counts is None:
+                counts = self.gates[gate_name] = [0, 0]
+            counts[0] += 1
+            if passed:
+                counts[1] += 1
+        self.latency.record(record.duration_ms)
+
+    def summary(self, length_s: int) -> Dict[str, Any]:
+        """与 analyze_decision_patterns 相同字段的汇总"""
+        if not self.total:
+            return {}
+        latency = self.latency
+        return {
+            "window_start": self.start,
+            "window_s": length_s,
+            "total_decisions": self.total,
+            "approval_rate": self.approved / self.total,
+            "avg_processing_time_ms": latency.total / latency.count,
+            "gate_pass_rates": {name: passed / total for name, (total, passed) in self.gates.items()},
+            "performance_percentiles": {
+                "p50_ms": latency.quantile(0.50),
+                "p95_ms": latency.quantile(0.95),
+                "p99_ms": latency.quantile(0.99)
+            }
+        }
+
+
+class TumblingWindow:
+    """翻滚窗口：保留当前窗口与上一个完整窗口"""
+
+    __slots__ = ("length_s", "current", "previous")
+
+    def __init__(self, length_s: int):
+        self.length_s = length_s
+        self.current: Optional[WindowAggregate] = None
+        self.previous: Optional[WindowAggregate] = None
+
+    def _roll(self, now: float) -> None:
+        start = now - now % self.length_s
+        current = self.current
+        if current is None or start > current.start:
+            # 相邻窗口保留为上一窗口，跨越多个窗口则上一窗口为空
+            adjacent = current is not None and start - current.start == self.length_s
+            self.previous = current if adjacent else None
+            self.current = WindowAggregate(start)
+
+    def add(self, record, now: float) -> None:
+        self._roll(now)
+        if now >= self.current.start:
+            self.current.add(record)
+        elif self.previous is not None and now >= self.previous.start:
+            self.previous.add(record)  # 迟到一个窗口以内的记录
+
+    def snapshot(self, now: float) -> Dict[str, Any]:
+        """当前窗口与上一个完整窗口的汇总"""
+        self._roll(now)
+        return {
+            "current": self.current.summary(self.length_s),
+            "previous": self.previous.summary(self.length_s) if self.previous else {}
+        }
+
+
+class DecisionPatterns:
+    """按标的与窗口增量维护的决策模式统计"""
+
+    def __init__(self, windows: Dict[str, int] = None):
+        self.windows = dict(windows or WINDOWS)
+        self._series: Dict[Tuple[str, str], TumblingWindow] = {}
+        self._lock = threading.Lock()
+
+    def _window(self, symbol: str, name: str) -> TumblingWindow:
+        key = (symbol, name)
+        window = self._series.get(key)
+        if window is None:
+            window = self._series[key] = TumblingWindow(self.windows[name])
+        return window
+
+    def observe(self, record) -> None:
+        """写入一条追踪记录（由后台写线程调用）"""
+        with self._lock:
+            for name in self.windows:
+                self._window(ALL_SYMBOLS, name).add(record, record.ts)
+                if record.symbol:
+                    self._window(record.symbol, name).add(record, record.ts)
+
+    def snapshot(self, now: float, symbol: str = None) -> Dict[str, Any]:
+        """各窗口的汇总；symbol 为空时为全部标的"""
+        key = symbol or ALL_SYMBOLS
+        with self._lock:
+            return {
+                name: self._window(key, name).snapshot(now) if (key, name) in self._series else {}
+                for name in self.windows
+            }
+
+    def symbols(self) -> list:
+        with self._lock:
+            return sorted({symbol for symbol, _ in self._series if symbol != ALL_SYMBOLS})
@@ -1,70 +1,55 @@
 """鏈式推理主流程 - Decision Agent"""
+import asyncio
 import time
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 from loguru import logger
 
+from ..core import metrics
+from ..core.admission import brain_pool, decision_pool
 from ..core.config import config_manager
-from ..core.utils import perf_monitor, timer
-from ..gates import consensus, event_latency, liq_buffer, vol
+from ..core.gate_plan import GatePlan
+from ..core.utils import elapsed_ms, perf_monitor, span, spans_ms, timer
+from . import fragility
+from .context import DecisionContext
+from ..gates import batch as batch_gates
+from ..gates import codes, consensus, event_latency, liq_buffer, vol
+from ..gates.codes import GateResult
 from ..models.ctfg import ctfg_model
 from ..models.quantile import quantile_predictor
-from ..brains.xlstm import infer_sequence as xlstm_infer_sequence
-from ..brains.llm_reasoner import reason as llm_reason
-from ..schemas.features import EnterRequest
-from ..schemas.responses import EnterResponse
-from ..schemas.base import ExecutionConfig, RiskMetrics
+from ..schemas.features import EnterBothRequest, EnterRequest
+from ..schemas.responses import EnterBothResponse, EnterResponse
+from ..schemas.base import ExecutionConfig
 
-
-def run_gate_checks(request: EnterRequest) -> Tuple[bool, List[str], List[str]]:
+def run_gate_checks(
+    request: EnterRequest, plan: GatePlan = None, context: DecisionContext = None
+) -> Tuple[bool, List[GateResult], List[GateResult]]:
     """
     运行所有Gate检查
     
     Returns:
-        (是否通过所有Gates, 通过的检查, 失败的检查)
+        (是否通过所有Gates, 通过的Gate结果, 失败的Gate结果)
+        结果为原因码记录，说明文本只在组装拒绝推理链时渲染。
     """
-    passed_checks = []
-    failed_checks = []
-    
-    # 1. 事件与延迟Gate
-    event_ok, event_msg = event_latency.passes()
-    if event_ok:
-        passed_checks.append(event_msg)
-    else:
-        failed_checks.append(event_msg)
-    
-    # 2. 波动率Gate
-    vol_ok, vol_msg = vol.check_vol_gate(request.features, request.side_hint)
-    if vol_ok:
-        passed_checks.append(vol_msg)
-    else:
-        failed_checks.append(vol_msg)
-    
-    # 3. 共识Gate
-    consensus_ok, consensus_msg = consensus.passes(request.features)
-    if consensus_ok:
-        passed_checks.append(consensus_msg)
-    else:
-        failed_checks.append(consensus_msg)
-    
-    # 4. 流动性缓冲Gate
-    liq_ok, liq_msg, risk_details = liq_buffer.passes(request.features, request.pgm)
-    if liq_ok:
-        passed_checks.append(liq_msg)
-    else:
-        failed_checks.append(liq_msg)
+    plan = plan or config_manager.get_gate_plan(request.symbol, request.tf)
+    context = context or DecisionContext.build(request, plan)
+    results = (
+        event_latency.evaluate(symbol=request.symbol),                          # 1. 事件与延迟Gate
+        vol.evaluate(request.features, request.side_hint, plan),                # 2. 波动率Gate
+        consensus.evaluate(request.features, plan, context),                    # 3. 共识Gate
+        liq_buffer.evaluate(request.features, request.pgm, plan, context),      # 4. 流动性缓冲Gate
+    )
+    metrics.record_gate_outcomes((result.label, result.ok) for result in results)
     
     # 所有Gate都必须通过
-    all_passed = len(failed_checks) == 0
-    
-    return all_passed, passed_checks, failed_checks
+    return codes.split(results)
 
 
 def generate_reason_chain(
     request: EnterRequest, 
     gates_passed: bool, 
-    passed_checks: List[str], 
-    failed_checks: List[str],
+    passed_checks: List[GateResult], 
+    failed_checks: List[GateResult],
     pgm_result = None
 ) -> List[str]:
     """生成推理链"""
@@ -91,75 +76,41 @@ def generate_reason_chain(
         
     else:
         reason_chain.append("✗ Gate FAILURE:")
-        reason_chain.extend(failed_checks)
+        reason_chain.extend(codes.render_all(failed_checks))
     
     return reason_chain
 
 
-def run_fragility_test(request: EnterRequest, pgm_result) -> Tuple[bool, str]:
+def run_fragility_test(
+    request: EnterRequest, pgm_result, plan: GatePlan = None, context: DecisionContext = None
+) -> Tuple[bool, str]:
     """
     脆弱性测试 - 擾動最強因子/參數，檢查決策是否翻盤
     
-    简化实现：检查关键指标的边界情况
+    向量化蒙特卡洛：一次抽取K个扰动样本（σ/skew/深度/dCVD/C_*/p_hit，部分样本
+    拔掉最强因子），整批重评估Gate与方向判定，翻盘率超过 fragility.flip_rate_max 即拒单。
     """
+    plan = plan or config_manager.get_gate_plan(request.symbol, request.tf)
     try:
-        # 检查关键指标是否接近阈值边界
-        fragility_issues = []
-        
-        # 1. 检查C指标的稳定性
-        c_align_margin = request.features.C_align - config_manager.get("gates.C_align_min", 0.85)
-        if c_align_margin < 0.05:  # 5%的安全边距
-            fragility_issues.append(f"C_align margin only {c_align_margin:.3f}")
-        
-        c_of_margin = request.features.C_of - config_manager.get("gates.C_of_min", 0.80)
-        if c_of_margin < 0.05:
-            fragility_issues.append(f"C_of margin only {c_of_margin:.3f}")
-        
-        # 2. 检查P_hit的稳定性
-        p_hit_margin = pgm_result.p_hit - config_manager.get("gates.p_hit_min", 0.75)
-        if p_hit_margin < 0.05:
-            fragility_issues.append(f"p_hit margin only {p_hit_margin:.3f}")
-        
-        # 3. 检查流动性缓冲的稳定性
-        liq_buffer = abs(request.features.market.mark - request.features.market.liq_price) / request.features.market.mark
-        risk_budget = pgm_result.mae_q999 + pgm_result.slip_q95 + config_manager.get("gates.epsilon", 0.0005)
-        safety_margin = liq_buffer - risk_budget
-        
-        if safety_margin < 0.005:  # 50bp的安全边距
-            fragility_issues.append(f"LiqBuffer safety margin only {safety_margin:.4f}")
-        
-        # 4. 检查波动率的稳定性
-        sigma = request.features.sigma_1m
-        vol_config = config_manager.get_vol_config(request.side_hint)
-        
-        if vol_config:
-            sigma_min = vol_config.get("sigma_min", 0)
-            sigma_max = vol_config.get("sigma_max", float("inf"))
-            
-            if sigma - sigma_min < 0.0002:  # 接近下界
-                fragility_issues.append(f"Sigma close to lower bound: {sigma:.4f}")
-            if sigma_max - sigma < 0.0002:  # 接近上界
-                fragility_issues.append(f"Sigma close to upper bound: {sigma:.4f}")
-        
-        # 判断脆弱性
-        if fragility_issues:
-            return False, f"Fragility issues: {'; '.join(fragility_issues)}"
-        else:
-            return True, "Fragility test PASSED"
-            
+        return fragility.run(request, pgm_result, plan, context)
     except Exception as e:
         logger.warning(f"Fragility test error: {e}")
         return True, "Fragility test skipped due to error"
 
 
-def determine_allocation_and_side(request: EnterRequest, pgm_result) -> Tuple[str, float]:
+def determine_allocation_and_side(
+    request: EnterRequest, pgm_result, context: DecisionContext = None
+) -> Tuple[str, float]:
     """确定方向和分配"""
     # 基于多个信号确定最终方向
     signals_long = 0
     signals_short = 0
     
     # Z-score信号
-    avg_z = (request.features.Z_4H + request.features.Z_1H + request.features.Z_15m) / 3
+    if context is not None:
+        avg_z = context.avg_z
+    else:
+        avg_z = (request.features.Z_4H + request.features.Z_1H + request.features.Z_15m) / 3
     if avg_z > 0.5:
         signals_long += 1
     elif avg_z < -0.5:
@@ -195,142 +146,477 @@ def determine_allocation_and_side(request: EnterRequest, pgm_result) -> Tuple[st
     return suggested_side, allocation
 
 
-def decide_enter(request: EnterRequest, config: Dict = None) -> EnterResponse:
+def _deny_response(
+    reason_chain: List[str], timing: Dict, plan: GatePlan = None, failed_checks: Sequence[GateResult] = ()
+) -> EnterResponse:
+    """构建拒绝响应；Gate拒绝时记录失败原因码"""
+    response = EnterResponse(
+        allow=False,
+        side=None,
+        alloc_equity_pct=None,
+        exec=None,
+        risk=None,
+        reason_chain=reason_chain,
+        runtime_ms=elapsed_ms(timing),
+        plan_version=plan.version if plan else None,
+        timings_ms=spans_ms(timing)
+    )
+    response._gate_failures = codes.pack(failed_checks)
+    return response
+
+
+def xlstm_infer_sequence(**kwargs: Any) -> Dict:
+    """xLSTM 推理；可选大脑在首次调用时才导入（不在服务启动路径上）"""
+    from ..brains.xlstm import infer_sequence
+    return infer_sequence(**kwargs)
+
+
+def llm_reason(payload: Dict[str, Any]) -> Dict:
+    """LLM 仲裁；可选大脑在首次调用时才导入（不在服务启动路径上）"""
+    from ..brains.llm_reasoner import reason
+    return reason(payload)
+
+
+def _is_borderline(pgm_result) -> bool:
+    """邊界單判定：P(hit)落在LLM仲裁区间"""
+    return 0.72 <= pgm_result.p_hit <= 0.78
+
+
+def _infer_xlstm(request: EnterRequest) -> Dict:
+    """xLSTM 長序推斷（v2 升級），失败时返回空上下文"""
+    xlstm_meta = {"tf": request.tf, "symbol": request.symbol}
+    try:
+        return xlstm_infer_sequence(token_seq=[], of_seq=[], tv_seq=[], meta=xlstm_meta)
+    except Exception:
+        return {}
+
+
+def _arbitrate_llm(request: EnterRequest, pgm_result, xlstm_ctx: Dict) -> Optional[Dict]:
+    """LLM仲裁，失败时返回None"""
+    try:
+        return llm_reason(
+            {
+                "symbol": request.symbol,
+                "tf": request.tf,
+                "features": request.features.model_dump(),
+                "pgm": pgm_result.model_dump(),
+                "xlstm": xlstm_ctx,
+            }
+        )
+    except Exception:
+        return None
+
+
+def _fragility_deny_response(
+    request: EnterRequest,
+    passed_checks: List[GateResult],
+    failed_checks: List[GateResult],
+    timing: Dict,
+    plan: GatePlan,
+    pgm_result,
+    fragility_msg: str,
+    notes: Sequence[str] = ()
+) -> EnterResponse:
+    """脆弱性测试失败时的拒绝响应"""
+    reason_chain = generate_reason_chain(request, True, passed_checks, failed_checks, pgm_result)
+    reason_chain.append(f"FRAGILITY FAIL: {fragility_msg}")
+    reason_chain.extend(notes)
+    return _deny_response(reason_chain, timing, plan)
+
+
+def _allow_response(
+    request: EnterRequest,
+    passed_checks: List[GateResult],
+    failed_checks: List[GateResult],
+    timing: Dict,
+    plan: GatePlan,
+    pgm_result,
+    fragility_msg: str,
+    xlstm_ctx: Dict,
+    llm_out: Optional[Dict],
+    context: DecisionContext,
+    notes: Sequence[str] = ()
+) -> EnterResponse:
+    """生成允许响应：方向/分配、执行配置、风险指标与推理链"""
+    suggested_side, allocation = determine_allocation_and_side(request, pgm_result, context)
+    
+    # 构建执行配置
+    exec_config = ExecutionConfig(
+        type=plan.exec_mode,
+        reduce_only_fallback=plan.reduce_only_fallback
+    )
+    
+    # 风险指标取自决策上下文（已按CTFG的PGM指标计算风险预算）
+    risk_metrics = context.risk_metrics()
+    
+    # 生成推理链
+    reason_chain = generate_reason_chain(request, True, passed_checks, failed_checks, pgm_result)
+    reason_chain.append(fragility_msg)
+    if xlstm_ctx:
+        reason_chain.append(
+            f"xLSTM: p_up_1pct={xlstm_ctx.get('p_up_1pct', 0):.2f}/t50={xlstm_ctx.get('t_hit50', 0)}"
+        )
+    if isinstance(llm_out, dict):
+        reason_chain.append(
+            f"LLM_arb: meta={llm_out.get('meta_tag','-')}, c_llm={llm_out.get('c_llm',0):.2f}"
+        )
+    reason_chain.extend(notes)
+    
+    return EnterResponse(
+        allow=True,
+        side=suggested_side,
+        alloc_equity_pct=allocation,
+        exec=exec_config,
+        risk=risk_metrics,
+        reason_chain=reason_chain,
+        runtime_ms=elapsed_ms(timing),
+        plan_version=plan.version,
+        timings_ms=spans_ms(timing)
+    )
+
+
+def _decide_after_gates(
+    request: EnterRequest,
+    passed_checks: List[GateResult],
+    failed_checks: List[GateResult],
+    timing: Dict,
+    plan: GatePlan,
+    context: DecisionContext
+) -> EnterResponse:
+    """Gate全部通过后的决策流程：模型推理 → 脆弱性测试 → LLM仲裁 → 分配"""
+    # 2. PGM模型推理
+    with span(timing, "ctfg"):
+        pgm_result = ctfg_model.predict(request.features)
+
+    # 2.1 xLSTM 長序推斷：估計時序上下文
+    with span(timing, "xlstm"):
+        xlstm_ctx = _infer_xlstm(request)
+    
+    return _decide_with_brains(
+        request, passed_checks, failed_checks, timing, plan, pgm_result, xlstm_ctx, context
+    )
+
+
+def _decide_with_brains(
+    request: EnterRequest,
+    passed_checks: List[GateResult],
+    failed_checks: List[GateResult],
+    timing: Dict,
+    plan: GatePlan,
+    pgm_result,
+    xlstm_ctx: Dict,
+    context: DecisionContext
+) -> EnterResponse:
+    """已有模型推理结果时的决策流程：脆弱性测试 → LLM仲裁 → 分配"""
+    context = context.with_pgm(pgm_result)
+    
+    # 3. 脆弱性测试
+    with span(timing, "fragility"):
+        fragility_ok, fragility_msg = run_fragility_test(request, pgm_result, plan, context)
+    
+    # 4. 最终决策
+    if not fragility_ok:
+        return _fragility_deny_response(
+            request, passed_checks, failed_checks, timing, plan, pgm_result, fragility_msg
+        )
+    
+    # 4.1 邊界單 → 啟用 LLM 仲裁（僅在邊界區間介入）
+    llm_out = None
+    if _is_borderline(pgm_result):
+        with span(timing, "llm"):
+            llm_out = _arbitrate_llm(request, pgm_result, xlstm_ctx)
+
+    # 5. 生成允许响应
+    return _allow_response(
+        request, passed_checks, failed_checks, timing, plan,
+        pgm_result, fragility_msg, xlstm_ctx, llm_out, context
+    )
+
+
+def _timed(timing: Dict, name: str, fn, *args) -> Any:
+    """在工作线程中执行大脑组件并记录其耗时"""
+    with span(timing, name):
+        return fn(*args)
+
+
+async def _await_brain(
+    name: str,
+    future: Optional["asyncio.Future"],
+    deadline_ms: float,
+    timing: Dict,
+    notes: List[str]
+) -> Any:
     """
-    主入场决策函数
+    在截止时间内等待大脑组件结果
     
-    决策流程：
-    1. 先驗拒單（Event/Latency/Vol）
-    2. 多假說：H_long / H_short / H_wait
-    3. 證據鏈：TV、YOLO、HTF/LTF、OF、OI/Gas 支持/反證
-    4. 融合：CTFG → P(hit)；xLSTM → Q(MAE)/Q(Slip)/T_hit；Conformal 校準
-    5. 邊界：Liq-Buffer 檢核
-    6. 脆弱性：拔最強因子/擾動 σ/深度/OF，不可翻盤
-    7. 行動：允許/拒絕、side、alloc、exec；輸出 reason_chain
+    截止时间从决策开始计时；超时的组件被丢弃（线程继续运行但结果作废，
+    运行结束前占用大脑线程池名额），并在推理链中记录。
+    future 为None表示大脑线程池已满、组件未启动，同样按丢弃处理。
+    """
+    if future is None:
+        notes.append(f"{name} dropped: brain pool saturated")
+        return None
+    remaining_s = max(deadline_ms - (time.perf_counter_ns() - timing["start_ns"]) / 1e6, 0) / 1000
+    try:
+        return await asyncio.wait_for(future, timeout=remaining_s)
+    except asyncio.TimeoutError:
+        notes.append(f"{name} dropped: missed {deadline_ms:.0f}ms deadline")
+        return None
+
+
+async def decide_enter_async(request: EnterRequest) -> EnterResponse:
+    """
+    并发版入场决策
+    
+    Gate通过后，CTFG 与 xLSTM 在大脑线程池中并发推理；CTFG的P(hit)落入邊界區間时，
+    LLM仲裁以与同步路径相同的输入（CTFG结果与xLSTM上下文）启动，与脆弱性测试并发执行。
+    每个组件的截止时间由 latency_slo_ms 按 brains.*_deadline_pct 推得：
+    - CTFG 超时：无法得到P(hit)，拒绝入场
+    - xLSTM / LLM 超时：丢弃该组件，推理链记录后继续决策
     """
+    plan = config_manager.get_gate_plan(request.symbol, request.tf)
+    deadlines = plan.brain_deadlines_ms
     
     with timer() as timing:
         try:
-            # 获取配置
-            if config is None:
-                config = config_manager.get_gates_config()
+            context = DecisionContext.build(request, plan)
             
-            # 1. Gate检查
-            gates_passed, passed_checks, failed_checks = run_gate_checks(request)
+            # 1. Gate检查（在决策线程池中执行，不阻塞事件循环）
+            with span(timing, "gates"):
+                gates_passed, passed_checks, failed_checks = await decision_pool.run(
+                    run_gate_checks, request, plan, context
+                )
             
-            # 如果Gate失败，直接拒绝
             if not gates_passed:
                 reason_chain = generate_reason_chain(request, False, passed_checks, failed_checks)
-                
-                return EnterResponse(
-                    allow=False,
-                    side=None,
-                    alloc_equity_pct=None,
-                    exec=None,
-                    risk=None,
-                    reason_chain=reason_chain,
-                    runtime_ms=timing["duration_ms"]
-                )
+                return _deny_response(reason_chain, timing, plan, failed_checks)
             
-            # 2. PGM模型推理
-            pgm_result = ctfg_model.predict(request.features)
-
-            # 2.1 xLSTM 長序推斷（v2 升級）：併行估計時序上下文
-            xlstm_meta = {"tf": request.tf, "symbol": request.symbol}
-            try:
-                xlstm_ctx = xlstm_infer_sequence(token_seq=[], of_seq=[], tv_seq=[], meta=xlstm_meta)
-            except Exception:
-                xlstm_ctx = {}
+            # 2. 并发启动 CTFG / xLSTM
+            ctfg_future = brain_pool.submit(_timed, timing, "ctfg", ctfg_model.predict, request.features)
+            xlstm_future = brain_pool.submit(_timed, timing, "xlstm", _infer_xlstm, request)
+            
+            notes: List[str] = []
+            pgm_result = await _await_brain("CTFG", ctfg_future, deadlines["ctfg"], timing, notes)
+            
+            if pgm_result is None:
+                if xlstm_future is not None:
+                    xlstm_future.cancel()
+                reason_chain = generate_reason_chain(request, True, passed_checks, failed_checks)
+                reason_chain.extend(notes)
+                return _deny_response(reason_chain, timing, plan)
+            
+            xlstm_ctx = await _await_brain("xLSTM", xlstm_future, deadlines["xlstm"], timing, notes) or {}
+            context = context.with_pgm(pgm_result)
+            
+            # 2.1 邊界單启动LLM仲裁，与脆弱性测试并发
+            borderline = _is_borderline(pgm_result)
+            llm_future = None
+            if borderline:
+                llm_future = brain_pool.submit(_timed, timing, "llm", _arbitrate_llm, request, pgm_result, xlstm_ctx)
             
             # 3. 脆弱性测试
-            fragility_ok, fragility_msg = run_fragility_test(request, pgm_result)
+            with span(timing, "fragility"):
+                fragility_ok, fragility_msg = await decision_pool.run(
+                    run_fragility_test, request, pgm_result, plan, context
+                )
             
-            # 4. 最终决策
             if not fragility_ok:
-                reason_chain = generate_reason_chain(request, True, passed_checks, failed_checks, pgm_result)
-                reason_chain.append(f"FRAGILITY FAIL: {fragility_msg}")
-                
-                return EnterResponse(
-                    allow=False,
-                    side=None,
-                    alloc_equity_pct=None,
-                    exec=None,
-                    risk=None,
-                    reason_chain=reason_chain,
-                    runtime_ms=timing["duration_ms"]
+                if llm_future is not None:
+                    llm_future.cancel()
+                return _fragility_deny_response(
+                    request, passed_checks, failed_checks, timing, plan,
+                    pgm_result, fragility_msg, notes
                 )
             
-            # 4.1 邊界單 → 啟用 LLM 仲裁（僅在邊界區間介入）
-            used_llm = False
+            # 4. 邊界單等待LLM仲裁结果
             llm_out = None
-            borderline = 0.72 <= pgm_result.p_hit <= 0.78
             if borderline:
-                try:
-                    llm_out = llm_reason(
-                        {
-                            "symbol": request.symbol,
-                            "tf": request.tf,
-                            "features": request.features.model_dump(),
-                            "pgm": pgm_result.model_dump(),
-                            "xlstm": xlstm_ctx,
-                        }
-                    )
-                    used_llm = True
-                except Exception:
-                    used_llm = False
-
-            # 5. 生成允许响应
-            suggested_side, allocation = determine_allocation_and_side(request, pgm_result)
+                llm_out = await _await_brain("LLM", llm_future, deadlines["llm"], timing, notes)
             
-            # 构建执行配置
-            exec_config = ExecutionConfig(
-                type=config_manager.get("exec.mode", "post_only_limit_or_mpo"),
-                reduce_only_fallback=config_manager.get("exec.reduce_only_fallback", True)
+            # 5. 生成允许响应
+            response = _allow_response(
+                request, passed_checks, failed_checks, timing, plan,
+                pgm_result, fragility_msg, xlstm_ctx, llm_out, context, notes
             )
+            perf_monitor.record("decision", response.runtime_ms, request.symbol)
             
-            # 构建风险指标
-            liq_buffer_pct = abs(request.features.market.mark - request.features.market.liq_price) / request.features.market.mark
-            risk_budget = pgm_result.mae_q999 + pgm_result.slip_q95 + config_manager.get("gates.epsilon", 0.0005)
+            return response
             
-            risk_metrics = RiskMetrics(
-                liq_buffer_pct=liq_buffer_pct,
-                lhs_pct=risk_budget
-            )
+        except Exception as e:
+            logger.error(f"Error in async enter decision: {e}")
+            return _deny_response([f"Decision error: {str(e)}"], timing, plan)
+
+
+def decide_enter(request: EnterRequest, config: Dict = None) -> EnterResponse:
+    """
+    主入场决策函数
+    
+    决策流程：
+    1. 先驗拒單（Event/Latency/Vol）
+    2. 多假說：H_long / H_short / H_wait
+    3. 證據鏈：TV、YOLO、HTF/LTF、OF、OI/Gas 支持/反證
+    4. 融合：CTFG → P(hit)；xLSTM → Q(MAE)/Q(Slip)/T_hit；Conformal 校準
+    5. 邊界：Liq-Buffer 檢核
+    6. 脆弱性：拔最強因子/擾動 σ/深度/OF，不可翻盤
+    7. 行動：允許/拒絕、side、alloc、exec；輸出 reason_chain
+    """
+    
+    # 整个决策过程固定使用同一份Gate计划（已合并该标的/时间框架的覆盖）
+    plan = config_manager.get_gate_plan(request.symbol, request.tf)
+    
+    with timer() as timing:
+        try:
+            # 派生量只计算一次，供Gate、脆弱性测试与分配共用
+            context = DecisionContext.build(request, plan)
             
-            # 生成推理链
-            reason_chain = generate_reason_chain(request, True, passed_checks, failed_checks, pgm_result)
-            reason_chain.append(fragility_msg)
-            if xlstm_ctx:
-                reason_chain.append(
-                    f"xLSTM: p_up_1pct={xlstm_ctx.get('p_up_1pct', 0):.2f}/t50={xlstm_ctx.get('t_hit50', 0)}"
-                )
-            if used_llm and isinstance(llm_out, dict):
-                reason_chain.append(
-                    f"LLM_arb: meta={llm_out.get('meta_tag','-')}, c_llm={llm_out.get('c_llm',0):.2f}"
-                )
+            # 1. Gate检查
+            with span(timing, "gates"):
+                gates_passed, passed_checks, failed_checks = run_gate_checks(request, plan, context)
+            
+            # 如果Gate失败，直接拒绝
+            if not gates_passed:
+                reason_chain = generate_reason_chain(request, False, passed_checks, failed_checks)
+                return _deny_response(reason_chain, timing, plan, failed_checks)
+            
+            response = _decide_after_gates(request, passed_checks, failed_checks, timing, plan, context)
             
             # 记录性能
-            perf_monitor.record("decision", timing["duration_ms"])
+            if response.allow:
+                perf_monitor.record("decision", response.runtime_ms, request.symbol)
             
-            return EnterResponse(
-                allow=True,
-                side=suggested_side,
-                alloc_equity_pct=allocation,
-                exec=exec_config,
-                risk=risk_metrics,
-                reason_chain=reason_chain,
-                runtime_ms=timing["duration_ms"]
-            )
+            return response
             
         except Exception as e:
             logger.error(f"Error in enter decision: {e}")
-            
-            return EnterResponse(
-                allow=False,
-                side=None,
-                alloc_equity_pct=None,
-                exec=None,
-                risk=None,
-                reason_chain=[f"Decision error: {str(e)}"],
-                runtime_ms=timing.get("duration_ms", 0)
+            return _deny_response([f"Decision error: {str(e)}"], timing, plan)
+
+
+def decide_enter_batch(requests: List[EnterRequest]) -> List[EnterResponse]:
+    """
+    批量入场决策
+    
+    Vol/Consensus/Liq-Buffer三个Gate对整批请求做列运算，Event/Latency Gate
+    每个标的只评估一次；通过Gate的请求再逐个进入模型推理与脆弱性测试。
+    每条请求的推理链与 decide_enter 单独调用的结果一致。
+    """
+    responses: List[EnterResponse] = []
+    plans = batch_gates.resolve_plans(requests)
+    
+    with timer() as timing:
+        try:
+            with span(timing, "gates"):
+                gate_results = batch_gates.run_gate_checks_batch(requests, plans=plans)
+        except Exception as e:
+            logger.error(f"Error in batch gate evaluation: {e}")
+            return [_deny_response([f"Decision error: {str(e)}"], timing, plan) for plan in plans]
+        
+        for request, plan, (gates_passed, passed_checks, failed_checks) in zip(requests, plans, gate_results, strict=True):
+            try:
+                if not gates_passed:
+                    reason_chain = generate_reason_chain(request, False, passed_checks, failed_checks)
+                    responses.append(_deny_response(reason_chain, timing, plan, failed_checks))
+                    continue
+                
+                context = DecisionContext.build(request, plan)
+                responses.append(_decide_after_gates(request, passed_checks, failed_checks, timing, plan, context))
+                
+            except Exception as e:
+                logger.error(f"Error in batch enter decision for {request.symbol}: {e}")
+                responses.append(_deny_response([f"Decision error: {str(e)}"], timing, plan))
+        
+        perf_monitor.record("decision_batch", elapsed_ms(timing))
+    
+    return responses
+
+
+# 双假说评估的方向顺序
+SIDES = ("long", "short")
+
+
+def select_hypothesis(long_response: EnterResponse, short_response: EnterResponse) -> str:
+    """
+    从两个方向的决策中选出胜出假说
+    
+    仅当恰好一个方向被允许且建议方向与假说一致时选该方向，否则为 H_wait。
+    """
+    winners = [
+        side for side, response in zip(SIDES, (long_response, short_response), strict=True)
+        if response.allow and response.side == side
+    ]
+    return winners[0] if len(winners) == 1 else "wait"
+
+
+def decide_enter_both(request: EnterBothRequest) -> EnterBothResponse:
+    """
+    双假说入场决策：一份特征同时评估 H_long / H_short / H_wait
+    
+    Event/Latency、Consensus、Liq-Buffer Gate 与方向无关，只评估一次；
+    仅 Vol Gate 与脆弱性测试按方向分别评估。CTFG 与 xLSTM 推理只依赖
+    共享特征，至多运行一次。每个方向的结果与以对应 side_hint 单独调用
+    decide_enter 一致。
+    """
+    plan = config_manager.get_gate_plan(request.symbol, request.tf)
+    side_requests = {side: request.for_side(side) for side in SIDES}
+    
+    with timer() as timing:
+        try:
+            # 1. 与方向无关的派生量与Gate：只计算一次
+            context = DecisionContext.from_features(request.features, request.pgm, plan)
+            with span(timing, "gates"):
+                event_result = event_latency.evaluate(symbol=request.symbol)
+                consensus_result = consensus.evaluate(request.features, plan, context)
+                liq_result = liq_buffer.evaluate(request.features, request.pgm, plan, context)
+        except Exception as e:
+            logger.error(f"Error in shared gate evaluation: {e}")
+            deny = _deny_response([f"Decision error: {str(e)}"], timing, plan)
+            return EnterBothResponse(
+                long=deny, short=deny, hypothesis="wait",
+                runtime_ms=elapsed_ms(timing), plan_version=plan.version
             )
+        
+        brains: Dict[str, Any] = {}
+        responses: Dict[str, EnterResponse] = {}
+        
+        for side, side_request in side_requests.items():
+            try:
+                # 2. 按方向评估Vol Gate，检查顺序与 run_gate_checks 一致
+                with span(timing, "gates"):
+                    vol_result = vol.evaluate(request.features, side, plan)
+                results = (event_result, vol_result, consensus_result, liq_result)
+                _, passed_checks, failed_checks = codes.split(results)
+                
+                metrics.record_gate_outcomes((result.label, result.ok) for result in results)
+                
+                if failed_checks:
+                    reason_chain = generate_reason_chain(side_request, False, passed_checks, failed_checks)
+                    responses[side] = _deny_response(reason_chain, timing, plan, failed_checks)
+                    continue
+                
+                # 3. 共享的模型推理（首个通过Gate的方向触发）
+                if not brains:
+                    with span(timing, "ctfg"):
+                        brains["pgm"] = ctfg_model.predict(request.features)
+                    with span(timing, "xlstm"):
+                        brains["xlstm"] = _infer_xlstm(side_request)
+                
+                responses[side] = _decide_with_brains(
+                    side_request, passed_checks, failed_checks, timing, plan,
+                    brains["pgm"], brains["xlstm"], context
+                )
+                
+            except Exception as e:
+                logger.error(f"Error in {side} hypothesis for {request.symbol}: {e}")
+                responses[side] = _deny_response([f"Decision error: {str(e)}"], timing, plan)
+        
+        hypothesis = select_hypothesis(responses["long"], responses["short"])
+        runtime_ms = elapsed_ms(timing)
+        perf_monitor.record("decision_both", runtime_ms, request.symbol)
+        
+        return EnterBothResponse(
+            long=responses["long"],
+            short=responses["short"],
+            hypothesis=hypothesis,
+            runtime_ms=runtime_ms,
+            plan_version=plan.version,
+            timings_ms=spans_ms(timing)
+        )
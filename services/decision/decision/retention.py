@@ -0,0 +1,63 @@
+"""追踪保留策略模块
+
+决策完成后按结果判断是否保留完整追踪：允许入场、出错、超出延迟SLO、
+邊界單(LLM仲裁)与脆弱性失败的追踪总是保留，普通的Gate拒绝按比例采样。
+采样按 request_id 哈希决定，同一追踪的判断可复现。
+"""
+import zlib
+from typing import Dict, Optional
+
+_SAMPLE_SCALE = 10000
+
+
+class RetentionPolicy:
+    """尾部采样保留策略"""
+
+    def __init__(
+        self,
+        keep_allowed: bool = True,
+        keep_errors: bool = True,
+        keep_slow: bool = True,
+        keep_borderline: bool = True,
+        keep_fragility: bool = True,
+        reject_sample_rate: float = 0.1,
+        slo_ms: float = 70
+    ):
+        self.keep_allowed = keep_allowed
+        self.keep_errors = keep_errors
+        self.keep_slow = keep_slow
+        self.keep_borderline = keep_borderline
+        self.keep_fragility = keep_fragility
+        self.reject_sample_rate = reject_sample_rate
+        self.slo_ms = slo_ms
+        self._threshold = int(reject_sample_rate * _SAMPLE_SCALE)
+
+    @classmethod
+    def from_config(cls, config: Dict, slo_ms: float) -> "RetentionPolicy":
+        """由 traces.retention 配置创建"""
+        return cls(
+            keep_allowed=config.get("keep_allowed", True),
+            keep_errors=config.get("keep_errors", True),
+            keep_slow=config.get("keep_slow", True),
+            keep_borderline=config.get("keep_borderline", True),
+            keep_fragility=config.get("keep_fragility", True),
+            reject_sample_rate=config.get("reject_sample_rate", 0.1),
+            slo_ms=slo_ms
+        )
+
+    def reason(self, record) -> Optional[str]:
+        """返回保留原因；返回None表示采样丢弃"""
+        if self.keep_errors and (record.decision == "ERROR" or record.error):
+            return "error"
+        if self.keep_allowed and record.decision == "ALLOW":
+            return "allowed"
+        if self.keep_slow and (record.duration_ms or 0) > self.slo_ms:
+            return "slow"
+        chain = record.reason_chain or ()
+        if self.keep_borderline and any(message.startswith("LLM") for message in chain):
+            return "borderline"
+        if self.keep_fragility and any(message.startswith("FRAGILITY FAIL") for message in chain):
+            return "fragility"
+        if zlib.crc32((record.request_id or "").encode()) % _SAMPLE_SCALE < self._threshold:
+            return "sampled"
+        return None
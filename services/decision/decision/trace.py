@@ -1,20 +1,45 @@
 """推理链生成和追踪模块"""
-from datetime import datetime
-from typing import Any, Dict, List, Optional
+import base64
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
 
 from loguru import logger
 
+from ..core import metrics
+from ..core.config import config_manager
+from ..core.shared_state import SharedState, shared_state
 from ..schemas.features import EnterRequest, Features
+from . import trace_logger
+from .patterns import DecisionPatterns
+from .retention import RetentionPolicy
 from ..schemas.responses import EnterResponse
 
 
+_trace_ids = itertools.count(1)
+
+
 class ReasoningTrace:
     """推理过程追踪器"""
     
     def __init__(self, request_id: str = None):
-        self.request_id = request_id or f"req_{int(datetime.utcnow().timestamp())}"
+        # 秒级时间戳 + 进程号 + 进程内序号，保证同一秒内的多条追踪可区分
+        self.request_id = request_id or (
+            f"req_{int(datetime.utcnow().timestamp())}_{os.getpid()}_{next(_trace_ids)}"
+        )
         self.steps: List[Dict[str, Any]] = []
         self.start_time = datetime.utcnow()
+        self.plan_version: Optional[str] = None
+        # 决策本身的耗时；追踪在决策完成后才创建时（批量/双假说）由调用方给出
+        self.runtime_ms: Optional[float] = None
+        # 追踪开始时生效的配置快照版本（配置可热加载）
+        self.config_version: str = config_manager.version
     
     def add_step(self, step_name: str, result: Any, details: Dict = None) -> None:
         """添加推理步骤"""
@@ -25,7 +50,7 @@ class ReasoningTrace:
             "details": details or {}
         }
         self.steps.append(step)
-        logger.debug(f"Trace {self.request_id}: {step_name} -> {result}")
+        logger.debug("Trace {}: {} -> {}", self.request_id, step_name, result)
     
     def add_gate_check(self, gate_name: str, passed: bool, message: str, details: Dict = None) -> None:
         """添加Gate检查记录"""
@@ -43,22 +68,29 @@ class ReasoningTrace:
             {"confidence": confidence}
         )
     
-    def add_decision(self, decision: EnterResponse) -> None:
-        """添加最终决策"""
+    def add_decision(self, decision: EnterResponse, runtime_ms: Optional[float] = None) -> None:
+        """添加最终决策；runtime_ms 为决策耗时，未给出时以追踪存续时间计"""
+        self.plan_version = decision.plan_version
+        if runtime_ms is not None:
+            self.runtime_ms = runtime_ms
         self.add_step(
             "Final_Decision",
             "ALLOW" if decision.allow else "DENY",
             {
                 "side": decision.side,
                 "allocation": decision.alloc_equity_pct,
-                "reason_chain": decision.reason_chain
+                "reason_chain": decision.reason_chain,
+                "plan_version": decision.plan_version
             }
         )
     
     def get_summary(self) -> Dict[str, Any]:
         """获取推理摘要"""
         end_time = datetime.utcnow()
-        duration_ms = int((end_time - self.start_time).total_seconds() * 1000)
+        if self.runtime_ms is not None:
+            duration_ms = int(self.runtime_ms)
+        else:
+            duration_ms = int((end_time - self.start_time).total_seconds() * 1000)
         
         gate_results = [s for s in self.steps if s["step"].startswith("Gate_")]
         model_results = [s for s in self.steps if s["step"].startswith("Model_")]
@@ -72,7 +104,9 @@ class ReasoningTrace:
             "gates_passed": sum(1 for g in gate_results if g["result"] == "PASS"),
             "gates_total": len(gate_results),
             "models_used": len(model_results),
-            "final_decision": self.steps[-1]["result"] if self.steps else None
+            "final_decision": self.steps[-1]["result"] if self.steps else None,
+            "plan_version": self.plan_version,
+            "config_version": self.config_version
         }
     
     def get_detailed_trace(self) -> Dict[str, Any]:
@@ -98,6 +132,8 @@ class ReasoningTrace:
         lines.append(f"Duration: {summary['duration_ms']}ms")
         lines.append(f"Gates: {summary['gates_passed']}/{summary['gates_total']}")
         lines.append(f"Final: {summary['final_decision']}")
+        lines.append(f"Plan: {summary['plan_version']}")
+        lines.append(f"Config: {summary['config_version']}")
         
         return "\n".join(lines)
 
@@ -143,10 +179,7 @@ def generate_human_readable_reasoning(request: EnterRequest, response: EnterResp
     lines.append("")
     
     # 推理过程
-    lines.append("🧠 **Reasoning Chain:**")
-    for i, reason in enumerate(response.reason_chain, 1):
-        emoji = "✓" if not reason.startswith("✗") and not "FAIL" in reason else "✗"
-        lines.append(f"  {i}. {emoji} {reason}")
+    lines.extend(_reason_chain_lines(response.reason_chain))
     
     # 风险评估
     if response.risk:
@@ -168,30 +201,72 @@ def generate_human_readable_reasoning(request: EnterRequest, response: EnterResp
     return "\n".join(lines)
 
 
-def analyze_decision_patterns(traces: List[ReasoningTrace]) -> Dict[str, Any]:
+def _reason_chain_lines(reason_chain: Sequence[str]) -> List[str]:
+    """推理链的逐条说明"""
+    lines = ["🧠 **Reasoning Chain:**"]
+    for i, reason in enumerate(reason_chain, 1):
+        emoji = "✓" if not reason.startswith("✗") and not "FAIL" in reason else "✗"
+        lines.append(f"  {i}. {emoji} {reason}")
+    return lines
+
+
+def explain_record(record: "TraceRecord") -> str:
+    """由紧凑追踪记录生成人类可读的推理说明（/traces/{id}/explain）"""
+    ts = datetime.fromtimestamp(record.ts, tz=timezone.utc)
+    lines = [
+        f"🤖 Trading Decision for {record.symbol} ({(record.side_hint or '-').upper()})",
+        f"📅 {ts.strftime('%Y-%m-%d %H:%M:%S UTC')} | ⚡ {record.duration_ms}ms | 🆔 {record.request_id}",
+        ""
+    ]
+    
+    if record.decision == "ALLOW":
+        lines.append(f"✅ **APPROVED** - {(record.side or '-').upper()} position")
+        if record.allocation is not None:
+            lines.append(f"💰 Allocation: {record.allocation:.1%} of equity")
+    elif record.decision == "ERROR":
+        lines.append(f"💥 **ERROR** - {record.error}")
+    else:
+        lines.append("❌ **REJECTED**")
+    if record.cache_hit:
+        lines.append("♻️  Served from decision cache")
+    lines.append("")
+    
+    lines.extend(_reason_chain_lines(record.reason_chain or ()))
+    
+    if record.gates:
+        lines.append("")
+        lines.append("🚦 **Gates:**")
+        for name, passed in record.gates:
+            lines.append(f"  • {name}: {'PASS' if passed else 'FAIL'}")
+    
+    lines.append("")
+    lines.append(f"📋 Gate plan: {record.plan_version}")
+    lines.append(f"⚙️  Config: {record.config_version}")
+    return "\n".join(lines)
+
+
+def analyze_decision_patterns(records: Sequence["TraceRecord"]) -> Dict[str, Any]:
     """分析决策模式，用于系统监控"""
-    if not traces:
+    if not records:
         return {}
     
     # 统计基础信息
-    total_decisions = len(traces)
-    approved_decisions = sum(1 for t in traces if t.steps and t.steps[-1]["result"] == "ALLOW")
+    total_decisions = len(records)
+    approved_decisions = sum(1 for r in records if r.decision == "ALLOW")
     
     # 性能统计
-    durations = [s["duration_ms"] for s in [t.get_summary() for t in traces]]
+    durations = [r.duration_ms for r in records]
     avg_duration = sum(durations) / len(durations) if durations else 0
     
     # Gate通过率
     gate_stats = {}
-    for trace in traces:
-        for step in trace.steps:
-            if step["step"].startswith("Gate_"):
-                gate_name = step["step"].replace("Gate_", "")
-                if gate_name not in gate_stats:
-                    gate_stats[gate_name] = {"total": 0, "passed": 0}
-                gate_stats[gate_name]["total"] += 1
-                if step["result"] == "PASS":
-                    gate_stats[gate_name]["passed"] += 1
+    for record in records:
+        for gate_name, passed in record.gates:
+            if gate_name not in gate_stats:
+                gate_stats[gate_name] = {"total": 0, "passed": 0}
+            gate_stats[gate_name]["total"] += 1
+            if passed:
+                gate_stats[gate_name]["passed"] += 1
     
     # 计算通过率
     gate_pass_rates = {
@@ -212,21 +287,534 @@ def analyze_decision_patterns(traces: List[ReasoningTrace]) -> Dict[str, Any]:
     }
 
 
-# 全局追踪存储（生产环境中应使用数据库）
-_global_traces: List[ReasoningTrace] = []
+class TraceRecord:
+    """紧凑的追踪记录（__slots__，不保留逐步的 datetime 与字典）"""
+    __slots__ = (
+        "request_id", "ts", "symbol", "side_hint", "tf", "decision", "side",
+        "allocation", "plan_version", "config_version", "reason_chain", "duration_ms", "gates",
+        "cache_hit", "error",
+    )
+    
+    def __init__(self, **fields: Any):
+        for name in self.__slots__:
+            setattr(self, name, fields.get(name))
+    
+    @classmethod
+    def from_trace(cls, trace: ReasoningTrace) -> "TraceRecord":
+        """由 ReasoningTrace 压缩生成"""
+        request: Dict[str, Any] = {}
+        final: Dict[str, Any] = {}
+        decision = None
+        error = None
+        cache_hit = False
+        gates = []
+        
+        for step in trace.steps:
+            name = step["step"]
+            if name == "Request_Received":
+                request = step["details"]
+            elif name == "Final_Decision":
+                decision = step["result"]
+                final = step["details"]
+            elif name == "Decision_Cache":
+                cache_hit = step["result"] == "HIT"
+            elif name == "Error":
+                decision, error = "ERROR", str(step["result"])
+            elif name.startswith("Gate_"):
+                gates.append((name[len("Gate_"):], step["result"] == "PASS"))
+        
+        reason_chain = tuple(final.get("reason_chain") or ())
+        if not gates:
+            gates = _failed_gates(reason_chain)
+        
+        if trace.runtime_ms is not None:
+            duration_ms = int(trace.runtime_ms)
+        else:
+            last = trace.steps[-1]["timestamp"] if trace.steps else trace.start_time
+            duration_ms = int((last - trace.start_time).total_seconds() * 1000)
+        return cls(
+            request_id=trace.request_id,
+            ts=trace.start_time.replace(tzinfo=timezone.utc).timestamp(),
+            symbol=request.get("symbol"),
+            side_hint=request.get("side_hint"),
+            tf=request.get("tf"),
+            decision=decision,
+            side=final.get("side"),
+            allocation=final.get("allocation"),
+            plan_version=trace.plan_version,
+            config_version=trace.config_version,
+            reason_chain=reason_chain,
+            duration_ms=duration_ms,
+            gates=tuple(gates),
+            cache_hit=cache_hit,
+            error=error,
+        )
+    
+    @classmethod
+    def from_row(cls, row: Dict[str, Any]) -> "TraceRecord":
+        """由落盘的列式行还原"""
+        fields = dict(row)
+        fields["reason_chain"] = tuple(row.get("reason_chain") or ())
+        fields["gates"] = tuple(zip(row.get("gate_names") or (), row.get("gate_passed") or (), strict=True))
+        return cls(**fields)
+    
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TraceRecord":
+        """由 to_dict 的结果还原"""
+        fields = dict(data)
+        fields["reason_chain"] = tuple(data.get("reason_chain") or ())
+        fields["gates"] = tuple((name, passed) for name, passed in data.get("gates") or ())
+        return cls(**fields)
+    
+    @property
+    def key(self) -> Tuple[float, str]:
+        """分页排序键（新→旧）"""
+        return (self.ts, self.request_id)
+    
+    @property
+    def failed_gates(self) -> List[str]:
+        return [name for name, passed in self.gates or () if not passed]
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """转为可序列化的字典"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data["reason_chain"] = list(self.reason_chain)
+        data["gates"] = [list(g) for g in self.gates]
+        return data
+
 
+def _failed_gates(reason_chain: Sequence[str]) -> List[Tuple[str, bool]]:
+    """从推理链中提取失败的Gate（含脆弱性测试）"""
+    gates = []
+    for message in reason_chain:
+        if " Gate FAIL:" in message:
+            gates.append((metrics.gate_label(message), False))
+        elif message.startswith("FRAGILITY FAIL"):
+            gates.append(("fragility", False))
+    return gates
 
-def store_trace(trace: ReasoningTrace) -> None:
-    """存储推理追踪"""
-    global _global_traces
-    _global_traces.append(trace)
+
+def encode_cursor(key: Tuple[float, str]) -> str:
+    """分页游标：上一页最后一条记录的 (ts, request_id)"""
+    return base64.urlsafe_b64encode(json.dumps(list(key)).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    ts, request_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return float(ts), str(request_id)
+
+
+@dataclass(frozen=True)
+class TraceQuery:
+    """追踪查询条件，结果按 (ts, request_id) 由新到旧排列"""
+    symbol: Optional[str] = None
+    side: Optional[str] = None
+    outcome: Optional[str] = None       # allow / deny / error
+    failed_gate: Optional[str] = None   # Gate标签，如 vol / liq_buffer / fragility
+    start_ts: Optional[float] = None
+    end_ts: Optional[float] = None
+    min_duration_ms: Optional[int] = None
+    before: Optional[Tuple[float, str]] = None
+    limit: int = 50
+    
+    def matches(self, record: TraceRecord) -> bool:
+        if self.symbol is not None and record.symbol != self.symbol:
+            return False
+        if self.side is not None and self.side not in (record.side_hint, record.side):
+            return False
+        if self.outcome is not None and (record.decision or "").lower() != self.outcome:
+            return False
+        if self.failed_gate is not None and self.failed_gate not in record.failed_gates:
+            return False
+        if self.start_ts is not None and record.ts < self.start_ts:
+            return False
+        if self.end_ts is not None and record.ts > self.end_ts:
+            return False
+        if self.min_duration_ms is not None and (record.duration_ms or 0) < self.min_duration_ms:
+            return False
+        if self.before is not None and record.key >= self.before:
+            return False
+        return True
+    
+    def select(self, records: Iterable[TraceRecord]) -> List[TraceRecord]:
+        """筛选并取由新到旧的前 limit 条"""
+        matched = [record for record in records if self.matches(record)]
+        matched.sort(key=lambda record: record.key, reverse=True)
+        return matched[:self.limit]
+
+
+class TraceRing:
+    """
+    定长环形缓冲区，写入O(1)，满后覆盖最旧的记录
     
-    # 保持最近1000条记录
-    if len(_global_traces) > 1000:
-        _global_traces = _global_traces[-1000:]
+    同时维护按标的、失败Gate与 request_id 的内存索引；
+    被覆盖的记录总是各索引队列中最旧的一条，淘汰同样为O(1)。
+    """
+    
+    def __init__(self, capacity: int = 1000):
+        self.capacity = capacity
+        self._items: List[Optional[TraceRecord]] = [None] * capacity
+        self._next = 0
+        self._size = 0
+        self._lock = threading.Lock()
+        self._by_symbol: Dict[str, Deque[TraceRecord]] = {}
+        self._by_failed_gate: Dict[str, Deque[TraceRecord]] = {}
+        self._by_id: Dict[str, TraceRecord] = {}
+    
+    def append(self, record: TraceRecord) -> None:
+        with self._lock:
+            evicted = self._items[self._next]
+            if evicted is not None:
+                self._unindex(evicted)
+            self._items[self._next] = record
+            self._next = (self._next + 1) % self.capacity
+            self._size = min(self._size + 1, self.capacity)
+            self._index(record)
+    
+    def _index(self, record: TraceRecord) -> None:
+        self._by_symbol.setdefault(record.symbol, deque()).append(record)
+        for gate in record.failed_gates:
+            self._by_failed_gate.setdefault(gate, deque()).append(record)
+        self._by_id[record.request_id] = record
+    
+    def _unindex(self, record: TraceRecord) -> None:
+        self._evict(self._by_symbol, record.symbol)
+        for gate in record.failed_gates:
+            self._evict(self._by_failed_gate, gate)
+        if self._by_id.get(record.request_id) is record:
+            del self._by_id[record.request_id]
+    
+    @staticmethod
+    def _evict(index: Dict[str, Deque[TraceRecord]], key: str) -> None:
+        entries = index[key]
+        entries.popleft()
+        if not entries:
+            del index[key]
+    
+    def recent(self, n: int = None) -> List[TraceRecord]:
+        """最近n条记录（由旧到新）"""
+        with self._lock:
+            n = self._size if n is None else min(n, self._size)
+            start = self._next - n
+            return [self._items[i % self.capacity] for i in range(start, self._next)]
+    
+    def get(self, request_id: str) -> Optional[TraceRecord]:
+        return self._by_id.get(request_id)
+    
+    def oldest_ts(self) -> Optional[float]:
+        with self._lock:
+            if not self._size:
+                return None
+            return self._items[(self._next - self._size) % self.capacity].ts
+    
+    def query(self, query: TraceQuery) -> List[TraceRecord]:
+        """按索引取候选（标的/失败Gate中较小的一组），再逐条过滤"""
+        with self._lock:
+            candidates: Optional[Sequence[TraceRecord]] = None
+            if query.symbol is not None:
+                candidates = self._by_symbol.get(query.symbol, ())
+            if query.failed_gate is not None:
+                by_gate = self._by_failed_gate.get(query.failed_gate, ())
+                if candidates is None or len(by_gate) < len(candidates):
+                    candidates = by_gate
+            if candidates is None:
+                candidates = [record for record in self._items if record is not None]
+            candidates = list(candidates)
+        return query.select(candidates)
+    
+    def __len__(self) -> int:
+        return self._size
+
+
+class TraceStore:
+    """
+    追踪存储
+    
+    请求路径上 put() 只做一次 deque 追加；后台线程按 flush_interval_s 批量取出，
+    压缩为 TraceRecord 并更新决策模式窗口统计；通过保留策略的记录写入环形缓冲区，
+    并分批交给 sink 落盘。积压超过 queue_capacity 时丢弃最旧的待处理追踪。
+    
+    多worker部署时通过保留策略的记录同时推入共享追踪环，查询在共享环的本地索引副本上进行。
+    """
+    
+    def __init__(
+        self,
+        capacity: int = 1000,
+        sink: Callable[[List[TraceRecord]], None] = None,
+        batch_size: int = 256,
+        flush_interval_s: float = 1.0,
+        queue_capacity: int = 10000,
+        closer: Callable[[], None] = None,
+        patterns: DecisionPatterns = None,
+        archive_dir: str = None,
+        retention: RetentionPolicy = None,
+        shared: SharedState = None
+    ):
+        self.ring = TraceRing(capacity)
+        self.shared = shared
+        self.retention = retention
+        self.archive_dir = archive_dir
+        self.patterns = patterns
+        self.sink = sink
+        self.closer = closer
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self._pending: Deque[ReasoningTrace] = deque(maxlen=queue_capacity)
+        self._drain_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.stored = 0
+        self.written = 0
+        self.dropped = 0
+        self.sink_errors = 0
+        self.shared_errors = 0
+        self.sampled_out = 0
+        self.retained: Dict[str, int] = {}
+        self._shared_ring: Optional[TraceRing] = None
+        self._shared_head: Optional[str] = None
+        self._shared_lock = threading.Lock()
+    
+    def put(self, trace: ReasoningTrace) -> None:
+        """入队（请求路径）"""
+        if len(self._pending) == self._pending.maxlen:
+            self.dropped += 1
+        self._pending.append(trace)
+        if self._thread is None:
+            self._start()
+    
+    def _start(self) -> None:
+        # 首次写入时才启动线程（gunicorn preload 后在各worker内启动）
+        with self._drain_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+                self._thread.start()
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval_s):
+            self.drain()
+        self.drain()
+    
+    def drain(self) -> int:
+        """取出全部待处理追踪：压缩入环形缓冲区并批量落盘，返回处理条数"""
+        with self._drain_lock:
+            batch: List[TraceRecord] = []
+            processed = 0
+            while self._pending:
+                try:
+                    trace = self._pending.popleft()
+                except IndexError:
+                    break
+                record = TraceRecord.from_trace(trace)
+                processed += 1
+                # 采样丢弃的追踪同样计入窗口统计
+                if self.patterns is not None:
+                    self.patterns.observe(record)
+                if self.retention is not None:
+                    reason = self.retention.reason(record)
+                    if reason is None:
+                        self.sampled_out += 1
+                        continue
+                    self.retained[reason] = self.retained.get(reason, 0) + 1
+                self.ring.append(record)
+                batch.append(record)
+                if len(batch) >= self.batch_size:
+                    self._write(batch)
+                    batch = []
+            if batch:
+                self._write(batch)
+            self.stored += processed
+            return processed
+    
+    def _write(self, batch: List[TraceRecord]) -> None:
+        if self.shared is not None:
+            try:
+                self.shared.push_traces([record.to_dict() for record in batch])
+            except Exception as e:
+                self.shared_errors += 1
+                logger.error(f"Shared trace ring error ({len(batch)} records not shared): {e}")
+        if self.sink is None:
+            return
+        try:
+            self.sink(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.sink_errors += 1
+            logger.error(f"Trace sink error ({len(batch)} records dropped): {e}")
+    
+    def close(self) -> None:
+        """停止后台线程并落盘剩余追踪"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.drain()
+        if self.closer is not None:
+            # 关闭当前段文件，使其写入段索引
+            self.closer()
+    
+    def recent(self, n: int = None) -> List[TraceRecord]:
+        """最近n条已处理的追踪记录"""
+        return self.ring.recent(n)
+    
+    def get(self, request_id: str) -> Optional[TraceRecord]:
+        """按 request_id 查找追踪：环形缓冲区、共享追踪环，再由新到旧扫描落盘段"""
+        record = self.ring.get(request_id)
+        if record is None and self.shared is not None:
+            record = self._shared_view().get(request_id)
+        if record is None and self.archive_dir is not None:
+            record = self._get_archived(request_id)
+        return record
+    
+    def _shared_view(self) -> TraceRing:
+        """
+        共享追踪环的本地索引副本
+        
+        每次读取共享列表，只解析上次读取后新推入的条目并追加到本地 TraceRing
+        （容量与共享环相同，淘汰顺序一致）；上次的最新条目已被裁掉时整体重建。
+        """
+        items = self.shared.trace_items()
+        with self._shared_lock:
+            ring = self._shared_ring
+            try:
+                new = items.index(self._shared_head) if ring is not None else len(items)
+            except ValueError:
+                ring, new = None, len(items)
+            if ring is None:
+                ring = TraceRing(self.shared.trace_capacity)
+            for item in reversed(items[:new]):
+                ring.append(TraceRecord.from_dict(json.loads(item)))
+            self._shared_ring = ring
+            self._shared_head = items[0] if items else None
+            return ring
+    
+    def query(self, query: TraceQuery) -> Tuple[List[TraceRecord], Optional[str]]:
+        """
+        查询追踪，返回 (记录, 下一页游标)
+        
+        先查环形缓冲区的内存索引；不足一页时继续查比缓冲区最旧记录更早的落盘段。
+        """
+        ring = self._shared_view() if self.shared is not None else self.ring
+        records = ring.query(query)
+        oldest = ring.oldest_ts()
+        if len(records) < query.limit and self.archive_dir is not None:
+            before = query.before
+            if oldest is not None and (before is None or (oldest, "") < before):
+                before = (oldest, "")
+            records += self._query_archive(replace(query, before=before, limit=query.limit - len(records)))
+        cursor = encode_cursor(records[-1].key) if len(records) == query.limit else None
+        return records, cursor
+    
+    def _query_archive(self, query: TraceQuery) -> List[TraceRecord]:
+        """按段索引由新到旧扫描落盘段，凑满一页即停止"""
+        end_ts = query.end_ts
+        if query.before is not None:
+            end_ts = query.before[0] if end_ts is None else min(end_ts, query.before[0])
+        segments = trace_logger.segment_entries(self.archive_dir, query.symbol, query.start_ts, end_ts)
+        segments.sort(key=lambda segment: segment["ts_max"], reverse=True)
+        
+        records: List[TraceRecord] = []
+        for segment in segments:
+            if len(records) == query.limit and segment["ts_max"] < records[-1].ts:
+                break
+            path = os.path.join(self.archive_dir, segment["path"])
+            table = trace_logger.read_segment(path, query.symbol, query.start_ts, end_ts)
+            records = query.select(records + [TraceRecord.from_row(row) for row in table.to_pylist()])
+        return records
+    
+    def _get_archived(self, request_id: str) -> Optional[TraceRecord]:
+        """在落盘段中按 request_id 列过滤查找，最新的段先扫描"""
+        segments = trace_logger.segment_entries(self.archive_dir)
+        segments.sort(key=lambda segment: segment["ts_max"], reverse=True)
+        for segment in segments:
+            path = os.path.join(self.archive_dir, segment["path"])
+            rows = trace_logger.read_segment(path, request_id=request_id).to_pylist()
+            if rows:
+                return TraceRecord.from_row(rows[0])
+        return None
+    
+    def stats(self) -> Dict[str, int]:
+        """获取存储状态"""
+        return {
+            "pending": len(self._pending),
+            "buffered": len(self.ring),
+            "capacity": self.ring.capacity,
+            "stored_total": self.stored,
+            "written_total": self.written,
+            "dropped_total": self.dropped,
+            "sink_errors_total": self.sink_errors,
+            "shared_errors_total": self.shared_errors,
+            "sampled_out_total": self.sampled_out,
+            "retained_total": dict(self.retained),
+        }
+
+
+def _retention_policy(snapshot) -> RetentionPolicy:
+    """由配置快照创建保留策略（SLO 取自当前 Gate 计划）"""
+    retention = (snapshot.config.get("traces") or {}).get("retention") or {}
+    return RetentionPolicy.from_config(retention, snapshot.gate_plan.latency_slo_ms)
+
+
+def _build_trace_store() -> TraceStore:
+    """按配置创建全局追踪存储"""
+    writer = None
+    archive_dir = None  # 仅列式段支持按索引查询
+    if config_manager.get("traces.persist", True):
+        directory = config_manager.get("traces.dir", "logs/traces")
+        if config_manager.get("traces.format", "parquet") == "jsonl":
+            writer = trace_logger.JsonlSink(directory)
+        else:
+            writer = trace_logger.ParquetSegmentSink(
+                directory,
+                segment_rows=config_manager.get("traces.segment_rows", 100000),
+                flush_rows=config_manager.get("traces.flush_rows", 4096),
+                flush_interval_s=config_manager.get("traces.segment_flush_s", 5.0),
+            )
+            archive_dir = directory
+    return TraceStore(
+        capacity=config_manager.get("traces.capacity", 1000),
+        sink=writer.write if writer else None,
+        closer=writer.close if writer else None,
+        patterns=DecisionPatterns(),
+        archive_dir=archive_dir,
+        retention=_retention_policy(config_manager.snapshot),
+        batch_size=config_manager.get("traces.batch_size", 256),
+        flush_interval_s=config_manager.get("traces.flush_interval_s", 1.0),
+        queue_capacity=config_manager.get("traces.queue_capacity", 10000),
+        shared=shared_state,
+    )
+
+
+# 全局追踪存储
+trace_store = _build_trace_store()
+# 配置热加载后替换保留策略，超时判定跟随新的 latency_slo_ms
+config_manager.subscribe(
+    lambda snapshot: setattr(trace_store, "retention", _retention_policy(snapshot))
+)
+
+metrics.registry.register(metrics.Callback(
+    "p1_trace_pending", "Traces waiting for the background writer", "gauge",
+    lambda: {(): len(trace_store._pending)}
+))
+metrics.registry.register(metrics.Callback(
+    "p1_trace_sampled_out_total", "Traces not retained by the sampling policy", "counter",
+    lambda: {(): trace_store.sampled_out}
+))
+metrics.registry.register(metrics.Callback(
+    "p1_trace_retained_total", "Traces retained by the sampling policy, by reason", "counter",
+    lambda: {(reason,): count for reason, count in list(trace_store.retained.items())}, ("reason",)
+))
+metrics.registry.register(metrics.Callback(
+    "p1_trace_dropped_total", "Traces dropped because the writer backlog was full", "counter",
+    lambda: {(): trace_store.dropped}
+))
+
+
+def store_trace(trace: ReasoningTrace) -> None:
+    """存储推理追踪（只入队，压缩、保留策略与落盘由后台线程完成）"""
+    trace_store.put(trace)
 
 
-def get_recent_patterns() -> Dict[str, Any]:
-    """获取最近的决策模式分析"""
-    recent_traces = _global_traces[-100:]  # 最近100条
-    return analyze_decision_patterns(recent_traces)
+def get_recent_patterns(symbol: str = None) -> Dict[str, Any]:
+    """获取 1m/5m/1h 翻滚窗口内的决策模式（增量维护，读取与追踪条数无关）"""
+    return trace_store.patterns.snapshot(time.time(), symbol)
@@ -1,4 +1,331 @@
-"""Persist full decision traces for learner/trainer and audits."""
-def log(trace: dict):
-    # TODO: write to parquet/db
-    pass
+"""Persist full decision traces for learner/trainer and audits.
+
+Traces are appended to rotating Parquet segments. Rows are buffered and
+flushed as row groups sorted by (symbol, ts), so row-group statistics let
+readers skip other symbols. Low-cardinality strings (symbol, side, decision,
+plan version) and reason-chain / gate messages are dictionary-encoded.
+
+Every closed segment is recorded in an append-only index (``segments.jsonl``)
+with its UTC day, time range and per-symbol row counts. A day's traces for one
+symbol can then be read without opening unrelated segments.
+
+pyarrow is imported on first flush or read, not at module import, so the
+service's startup path does not pay for it.
+"""
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+INDEX_FILE = "segments.jsonl"
+
+# Column name -> pyarrow type; "dict" is a dictionary-encoded string.
+_FIELDS = (
+    ("request_id", "string"),
+    ("ts", "float64"),
+    ("symbol", "dict"),
+    ("side_hint", "dict"),
+    ("tf", "dict"),
+    ("decision", "dict"),
+    ("side", "dict"),
+    ("allocation", "float64"),
+    ("plan_version", "dict"),
+    ("config_version", "dict"),
+    ("reason_chain", "list<dict>"),
+    ("duration_ms", "int32"),
+    ("gate_names", "list<dict>"),
+    ("gate_passed", "list<bool>"),
+    ("cache_hit", "bool"),
+    ("error", "string"),
+)
+
+COLUMNS = tuple(name for name, _ in _FIELDS)
+
+_SCALAR_FIELDS = (
+    "request_id", "ts", "symbol", "side_hint", "tf", "decision", "side",
+    "allocation", "plan_version", "config_version", "duration_ms", "cache_hit", "error",
+)
+
+
+_arrow_modules: Optional[Tuple[Any, Any, Any, Any]] = None
+
+
+def _arrow() -> Tuple[Any, Any, Any, Any]:
+    """(pyarrow, pyarrow.compute, pyarrow.parquet, SCHEMA), imported on first use."""
+    global _arrow_modules
+    if _arrow_modules is None:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+        import pyarrow.parquet as pq
+
+        dict_string = pa.dictionary(pa.int32(), pa.string())
+        types = {
+            "string": pa.string(),
+            "float64": pa.float64(),
+            "int32": pa.int32(),
+            "bool": pa.bool_(),
+            "dict": dict_string,
+            "list<dict>": pa.list_(dict_string),
+            "list<bool>": pa.list_(pa.bool_()),
+        }
+        schema = pa.schema([(name, types[kind]) for name, kind in _FIELDS])
+        _arrow_modules = (pa, pc, pq, schema)
+    return _arrow_modules
+
+
+def __getattr__(name: str) -> Any:
+    if name == "SCHEMA":
+        return _arrow()[3]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def utc_day(ts: float) -> str:
+    """Epoch seconds -> 'YYYYMMDD' (UTC)."""
+    return time.strftime("%Y%m%d", time.gmtime(ts))
+
+
+def _as_dict(record: Any) -> Dict[str, Any]:
+    return record.to_dict() if hasattr(record, "to_dict") else record
+
+
+class ParquetSegmentSink:
+    """Append-only, rotating Parquet segment writer with a per-segment index."""
+
+    def __init__(
+        self,
+        directory: str,
+        segment_rows: int = 100_000,
+        flush_rows: int = 4096,
+        flush_interval_s: float = 5.0,
+    ):
+        self.directory = directory
+        self.segment_rows = segment_rows
+        self.flush_rows = flush_rows
+        self.flush_interval_s = flush_interval_s
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._columns: Dict[str, List[Any]] = {}
+        self._reset_buffer()
+        self._writer: Optional["pq.ParquetWriter"] = None
+        self._segment: Optional[Dict[str, Any]] = None
+        self._seq = 0
+
+    def _reset_buffer(self) -> None:
+        self._columns = {name: [] for name in COLUMNS}
+        self._buffered_since: Optional[float] = None
+
+    @property
+    def buffered(self) -> int:
+        return len(self._columns["ts"])
+
+    def write(self, records: Iterable[Any]) -> None:
+        """Buffer a batch; flushes a row group when full or stale."""
+        with self._lock:
+            columns = self._columns
+            for record in records:
+                data = _as_dict(record)
+                for name in _SCALAR_FIELDS:
+                    columns[name].append(data.get(name))
+                columns["reason_chain"].append(list(data.get("reason_chain") or ()))
+                gates = data.get("gates") or ()
+                columns["gate_names"].append([g[0] for g in gates])
+                columns["gate_passed"].append([bool(g[1]) for g in gates])
+            if self._buffered_since is None and self.buffered:
+                self._buffered_since = time.monotonic()
+
+            if self.buffered >= self.flush_rows or (
+                self._buffered_since is not None
+                and time.monotonic() - self._buffered_since >= self.flush_interval_s
+            ):
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write buffered rows as a row group of the open segment."""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if not self.buffered:
+            return
+        pa, pc, _, schema = _arrow()
+        table = pa.table(
+            {name: pa.array(values, type=schema.field(name).type) for name, values in self._columns.items()},
+            schema=schema,
+        )
+        self._reset_buffer()
+
+        # Rotate on UTC day boundaries so every segment belongs to one day.
+        ts_min, ts_max = pc.min_max(table["ts"]).values()
+        first, last = utc_day(ts_min.as_py()), utc_day(ts_max.as_py())
+        if first == last:
+            self._append_locked(first, table)
+            return
+        days = pa.array([utc_day(ts) for ts in table["ts"].to_pylist()])
+        for day in sorted(set(days.to_pylist())):
+            self._append_locked(day, table.filter(pc.equal(days, day)))
+
+    def _append_locked(self, day: str, table: "pa.Table") -> None:
+        pa, pc, _, _ = _arrow()
+        if self._segment is not None and (
+            self._segment["day"] != day or self._segment["rows"] >= self.segment_rows
+        ):
+            self._close_segment_locked()
+        if self._writer is None:
+            self._open_segment_locked(day)
+
+        # Sorting by (symbol, ts) keeps row-group statistics selective per symbol.
+        keys = pa.table({"symbol": pc.cast(table["symbol"], pa.string()), "ts": table["ts"]})
+        table = table.take(pc.sort_indices(keys, sort_keys=[("symbol", "ascending"), ("ts", "ascending")]))
+        self._writer.write_table(table)
+
+        segment = self._segment
+        segment["rows"] += table.num_rows
+        ts_min, ts_max = pc.min_max(table["ts"]).values()
+        segment["ts_min"] = min(segment["ts_min"], ts_min.as_py())
+        segment["ts_max"] = max(segment["ts_max"], ts_max.as_py())
+        counts = pc.value_counts(pc.cast(table["symbol"], pa.string()))
+        for item in counts.to_pylist():
+            symbol = item["values"]
+            segment["symbols"][symbol] = segment["symbols"].get(symbol, 0) + item["counts"]
+
+    def _open_segment_locked(self, day: str) -> None:
+        self._seq += 1
+        name = f"seg-{day}-{time.strftime('%H%M%S', time.gmtime())}-{os.getpid()}-{self._seq:04d}.parquet"
+        path = os.path.join(self.directory, name)
+        _, _, pq, schema = _arrow()
+        self._writer = pq.ParquetWriter(path, schema, compression="zstd", use_dictionary=True)
+        self._segment = {
+            "path": name, "day": day, "rows": 0,
+            "ts_min": float("inf"), "ts_max": float("-inf"), "symbols": {},
+        }
+
+    def _close_segment_locked(self) -> None:
+        if self._writer is None:
+            return
+        self._writer.close()
+        segment = self._segment
+        self._writer = None
+        self._segment = None
+        if segment["rows"]:
+            with open(os.path.join(self.directory, INDEX_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(segment) + "\n")
+
+    def rotate(self) -> None:
+        """Flush and close the open segment so it becomes readable and indexed."""
+        with self._lock:
+            self._flush_locked()
+            self._close_segment_locked()
+
+    def close(self) -> None:
+        self.rotate()
+
+
+def load_index(directory: str) -> List[Dict[str, Any]]:
+    """All closed segments recorded in the index."""
+    path = os.path.join(directory, INDEX_FILE)
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def segment_entries(
+    directory: str, symbol: str = None, start_ts: float = None, end_ts: float = None, day: str = None
+) -> List[Dict[str, Any]]:
+    """Index entries of segments that may contain matching traces."""
+    entries = []
+    for segment in load_index(directory):
+        if day is not None and segment["day"] != day:
+            continue
+        if symbol is not None and symbol not in segment["symbols"]:
+            continue
+        if start_ts is not None and segment["ts_max"] < start_ts:
+            continue
+        if end_ts is not None and segment["ts_min"] > end_ts:
+            continue
+        entries.append(segment)
+    return entries
+
+
+def find_segments(
+    directory: str, symbol: str = None, start_ts: float = None, end_ts: float = None, day: str = None
+) -> List[str]:
+    """Paths of segments that may contain matching traces."""
+    return [
+        os.path.join(directory, segment["path"])
+        for segment in segment_entries(directory, symbol, start_ts, end_ts, day)
+    ]
+
+
+def read_segment(
+    path: str, symbol: str = None, start_ts: float = None, end_ts: float = None, request_id: str = None
+) -> "pa.Table":
+    """Read one segment, pushing symbol/ts/request_id filters down to row groups."""
+    filters = []
+    if request_id is not None:
+        filters.append(("request_id", "=", request_id))
+    if symbol is not None:
+        filters.append(("symbol", "=", symbol))
+    if start_ts is not None:
+        filters.append(("ts", ">=", start_ts))
+    if end_ts is not None:
+        filters.append(("ts", "<=", end_ts))
+    _, _, pq, schema = _arrow()
+    return pq.read_table(path, filters=filters or None, schema=schema)
+
+
+def read_traces(
+    directory: str, symbol: str = None, day: str = None, start_ts: float = None, end_ts: float = None
+) -> "pa.Table":
+    """Read traces, opening only segments the index says can match."""
+    pa, _, _, schema = _arrow()
+    tables = [
+        read_segment(path, symbol, start_ts, end_ts)
+        for path in find_segments(directory, symbol, start_ts, end_ts, day)
+    ]
+    if not tables:
+        return schema.empty_table()
+    return pa.concat_tables(tables).sort_by("ts")
+
+
+class JsonlSink:
+    """Append trace records to one JSON-lines file per UTC day."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def path_for(self, ts: float) -> str:
+        return os.path.join(self.directory, f"traces-{utc_day(ts)}.jsonl")
+
+    def write(self, records: Iterable[Any]) -> None:
+        """Write a batch of TraceRecords (or plain dicts carrying 'ts' epoch seconds)."""
+        by_path: Dict[str, list] = {}
+        for record in records:
+            data = _as_dict(record)
+            by_path.setdefault(self.path_for(data["ts"]), []).append(
+                json.dumps(data, ensure_ascii=False, default=str)
+            )
+        for path, lines in by_path.items():
+            with open(path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+
+    def close(self) -> None:
+        pass
+
+
+_default_sinks: Dict[str, ParquetSegmentSink] = {}
+
+
+def log(trace: dict, directory: str = "logs/traces") -> None:
+    """Persist a single trace dict (must contain 'ts' epoch seconds); buffered."""
+    sink = _default_sinks.get(directory)
+    if sink is None:
+        sink = _default_sinks[directory] = ParquetSegmentSink(directory)
+    sink.write([trace])
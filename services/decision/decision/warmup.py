@@ -0,0 +1,144 @@
+"""启动预热 - 用合成请求走一遍各决策路径
+
+首个真实请求不再承担一次性开销：可选大脑的惰性导入、pydantic 校验器/序列化器、
+numpy 列运算与各线程池的线程创建。pyarrow 仍由后台追踪写入线程在首次落盘时导入，
+不在请求路径上。lifespan 在服务接收请求之前等待 warm_up() 完成，因此不存在
+对外可见的“预热中”状态；预热失败时 /health 返回503。
+
+预热结束后清空合成请求留下的延迟窗口、Prometheus 计数、限流桶与决策缓存，
+避免计入延迟Gate的SLA与业务指标；预热期间不向共享状态发布延迟样本。
+"""
+import asyncio
+import os
+import time
+from typing import Any, Dict, Optional
+
+from loguru import logger
+
+from ..core import metrics
+from ..core.admission import decision_pool
+from ..core.config import config_manager
+from ..core.ratelimit import rate_limiter
+from ..core.utils import perf_monitor
+from ..execution.mpc_exit import decide_exit
+from ..schemas.examples import EXAMPLE_ENTER_BEAR, EXAMPLE_ENTER_BULL, EXAMPLE_ENTER_REJECT_VOL, EXAMPLE_EXIT
+from ..schemas.features import EnterBothRequest, EnterRequest, ExitRequest
+from . import reasoner
+from .cache import decision_cache
+from .trace import ReasoningTrace, TraceRecord
+
+# 与 ConfigManager._get_default_config 保持一致的缺省值
+DEFAULT_WARMUP = {
+    "enabled": True,
+    "rounds": 3,
+}
+
+_IMPORTED_AT = time.time()
+
+
+def process_started_at() -> float:
+    """本进程的启动时间（epoch秒）；预fork的 worker 为 fork 时间。/proc 不可用时取本模块导入时间"""
+    try:
+        with open("/proc/self/stat") as f:
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime_s = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return _IMPORTED_AT
+    return time.time() - uptime_s + start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+class Readiness:
+    """启动就绪状态：cold（未预热）→ ready | failed"""
+
+    def __init__(self):
+        self.state = "cold"
+        self.started_at = process_started_at()
+        self.ready_at: Optional[float] = None
+        self.warmup_ms: Optional[float] = None
+        self.decisions = 0
+        self.error: Optional[str] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    @property
+    def time_to_ready_ms(self) -> Optional[float]:
+        if self.ready_at is None:
+            return None
+        return round((self.ready_at - self.started_at) * 1000, 1)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "warmup_ms": self.warmup_ms,
+            "warmup_decisions": self.decisions,
+            "time_to_ready_ms": self.time_to_ready_ms,
+            "error": self.error,
+        }
+
+
+# 全局就绪状态
+readiness = Readiness()
+
+
+async def _run_paths() -> int:
+    """每条决策路径各走一次（含序列化），返回合成决策数"""
+    enters = [EnterRequest(**example) for example in (EXAMPLE_ENTER_BULL, EXAMPLE_ENTER_BEAR, EXAMPLE_ENTER_REJECT_VOL)]
+    both = EnterBothRequest(**{key: value for key, value in EXAMPLE_ENTER_BULL.items() if key != "side_hint"})
+    exit_request = ExitRequest(**EXAMPLE_EXIT)
+
+    responses = [await reasoner.decide_enter_async(request) for request in enters]
+    responses += await asyncio.gather(
+        *(decision_pool.run(reasoner.decide_enter, request) for request in enters),
+        decision_pool.run(reasoner.decide_enter_both, both),
+        decision_pool.run(decide_exit, exit_request),
+    )
+    batch = await decision_pool.run(reasoner.decide_enter_batch, enters)
+
+    for request, response in zip(enters, responses[:len(enters)], strict=True):
+        trace = ReasoningTrace()
+        trace.add_step("Request_Received", "OK", {"symbol": request.symbol, "side_hint": request.side_hint})
+        trace.add_decision(response)
+        TraceRecord.from_trace(trace).to_dict()
+    for response in responses + batch:
+        response.model_dump_json()
+    return len(responses) + len(batch)
+
+
+def _reset_state() -> None:
+    """清空合成决策留下的进程内状态（预热在接收请求之前，无真实数据可丢）"""
+    perf_monitor.reset()
+    metrics.registry.reset()
+    rate_limiter.reset()
+    decision_cache.clear()
+
+
+async def warm_up(rounds: int = None) -> Dict[str, Any]:
+    """运行预热并更新 readiness；失败不抛出，由 /health 报告"""
+    cfg = {**DEFAULT_WARMUP, **(config_manager.get("warmup") or {})}
+    if not cfg["enabled"]:
+        readiness.state = "ready"
+        readiness.ready_at = time.time()
+        return readiness.stats()
+
+    publisher, perf_monitor.publisher = perf_monitor.publisher, None
+    start = time.perf_counter()
+    try:
+        for _ in range(rounds or cfg["rounds"]):
+            readiness.decisions += await _run_paths()
+    except Exception as e:
+        readiness.state = "failed"
+        readiness.error = str(e)
+        logger.exception(f"❌ Warm-up failed: {e}")
+    else:
+        readiness.state = "ready"
+        readiness.ready_at = time.time()
+    finally:
+        perf_monitor.publisher = publisher
+        _reset_state()
+        readiness.warmup_ms = round((time.perf_counter() - start) * 1000, 1)
+
+    logger.info(f"🔥 Warm-up {readiness.state}: {readiness.stats()}")
+    return readiness.stats()
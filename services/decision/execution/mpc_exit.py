@@ -1,15 +1,15 @@
 """动态退出策略 - MPC Exit"""
-import time
-from typing import Dict, List
+from typing import Any, Dict, List, Mapping
 
 from loguru import logger
 
 from ..core.config import config_manager
+from ..core.utils import elapsed_ms, span, spans_ms, timer
 from ..schemas.features import ExitRequest
 from ..schemas.responses import ExitResponse
 
 
-def analyze_exit_signals(exit_request: ExitRequest, config: Dict) -> Dict[str, float]:
+def analyze_exit_signals(exit_request: ExitRequest, config: Mapping[str, Any]) -> Dict[str, float]:
     """分析退出信号强度"""
     position = exit_request.position
     updates = exit_request.updates
@@ -65,7 +65,7 @@ def compute_exit_urgency(signals: Dict[str, float]) -> float:
     return min(urgency, 1.0)
 
 
-def determine_exit_action(exit_request: ExitRequest, urgency: float, config: Dict) -> tuple:
+def determine_exit_action(exit_request: ExitRequest, urgency: float, config: Mapping[str, Any]) -> tuple:
     """
     确定退出动作
     
@@ -127,63 +127,65 @@ def determine_exit_action(exit_request: ExitRequest, urgency: float, config: Dic
     return "hold", None, ["All signals within acceptable range"]
 
 
-def decide_exit(exit_request: ExitRequest, config: Dict = None) -> ExitResponse:
+def decide_exit(exit_request: ExitRequest, config: Mapping[str, Any] = None) -> ExitResponse:
     """
     主退出决策函数
     
     Args:
         exit_request: 退出请求
-        config: 配置字典，如果为None则使用全局配置
+        config: 退出配置，如果为None则使用当前Gate计划的退出阈值
         
     Returns:
         ExitResponse
     """
-    start_time = time.time()
-    
-    # 获取配置
+    # 获取配置（默认使用编译好的Gate计划中的退出阈值）
+    plan = config_manager.gate_plan
     if config is None:
-        config = config_manager.get_exit_config()
-    
-    try:
-        # 1. 分析退出信号
-        signals = analyze_exit_signals(exit_request, config)
-        
-        # 2. 计算紧急度
-        urgency = compute_exit_urgency(signals)
-        
-        # 3. 确定动作
-        action, reduce_pct, reasons = determine_exit_action(exit_request, urgency, config)
-        
-        # 4. 记录决策过程
-        logger.info(
-            f"Exit decision: {action}"
-            f"{f' ({reduce_pct:.1%})' if reduce_pct else ''}"
-            f" | Urgency: {urgency:.2f}"
-            f" | H(t): {exit_request.updates.h_t:.3f}"
-            f" | P_hit: {exit_request.updates.p_hit:.3f}"
-        )
-        
-        # 5. 构建响应
-        runtime_ms = int((time.time() - start_time) * 1000)
-        
-        return ExitResponse(
-            action=action,
-            reduce_pct=reduce_pct,
-            reason=reasons,
-            runtime_ms=runtime_ms
-        )
-        
-    except Exception as e:
-        logger.error(f"Error in exit decision: {e}")
-        runtime_ms = int((time.time() - start_time) * 1000)
-        
-        # 出错时保守处理：减仓50%
-        return ExitResponse(
-            action="reduce",
-            reduce_pct=0.5,
-            reason=[f"Error in exit logic: {str(e)}", "Conservative reduce as fallback"],
-            runtime_ms=runtime_ms
-        )
+        config = plan.exit
+    
+    with timer() as timing:
+        try:
+            # 1. 分析退出信号
+            with span(timing, "signals"):
+                signals = analyze_exit_signals(exit_request, config)
+            
+            # 2. 计算紧急度
+            with span(timing, "urgency"):
+                urgency = compute_exit_urgency(signals)
+            
+            # 3. 确定动作
+            with span(timing, "action"):
+                action, reduce_pct, reasons = determine_exit_action(exit_request, urgency, config)
+            
+            # 4. 记录决策过程
+            logger.debug(
+                "Exit decision: {action} ({reduce_pct}) | Urgency: {urgency:.2f} | H(t): {h_t:.3f} | P_hit: {p_hit:.3f}",
+                action=action, reduce_pct=reduce_pct, urgency=urgency,
+                h_t=exit_request.updates.h_t, p_hit=exit_request.updates.p_hit
+            )
+            
+            # 5. 构建响应
+            return ExitResponse(
+                action=action,
+                reduce_pct=reduce_pct,
+                reason=reasons,
+                runtime_ms=elapsed_ms(timing),
+                plan_version=plan.version,
+                timings_ms=spans_ms(timing)
+            )
+            
+        except Exception as e:
+            logger.error(f"Error in exit decision: {e}")
+            
+            # 出错时保守处理：减仓50%
+            return ExitResponse(
+                action="reduce",
+                reduce_pct=0.5,
+                reason=[f"Error in exit logic: {str(e)}", "Conservative reduce as fallback"],
+                runtime_ms=elapsed_ms(timing),
+                plan_version=plan.version,
+                timings_ms=spans_ms(timing)
+            )
 
 
 def simulate_exit_scenarios(position_data: Dict, config: Dict = None) -> List[Dict]:
@@ -0,0 +1,251 @@
+"""批量Gate评估 - 以NumPy列运算一次性评估整批入场请求
+
+Vol / Consensus / Liq-Buffer 三个Gate按列向量化计算失败原因位掩码，
+逐条结果为 codes.GateResult，说明文本只在组装拒绝推理链时渲染，
+与标量路径逐字一致。
+
+批内请求按各自 (symbol, tf) 的Gate计划分组，每组做一次列运算。
+"""
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from ..core import metrics
+from ..core.config import config_manager
+from ..core.gate_plan import GatePlan
+from ..schemas.features import EnterRequest
+from . import event_latency
+from .codes import GateId, GateResult, Reason, split
+from .vol import SIGMA_REGIME_MAX, SIGMA_REGIME_MIN, SKEW_NEUTRAL_ABS
+
+
+def build_columns(requests: Sequence[EnterRequest]) -> Dict[str, np.ndarray]:
+    """把请求列表展开为按字段组织的列数组"""
+    n = len(requests)
+
+    def column(getter) -> np.ndarray:
+        return np.fromiter((getter(r) for r in requests), dtype=np.float64, count=n)
+
+    return {
+        "sigma": column(lambda r: r.features.sigma_1m),
+        "skew": column(lambda r: r.features.skew_1m),
+        "is_long": np.fromiter((r.side_hint.lower() in ("long", "bull") for r in requests), dtype=bool, count=n),
+        "C_align": column(lambda r: r.features.C_align),
+        "C_of": column(lambda r: r.features.C_of),
+        "C_vision": column(lambda r: r.features.C_vision),
+        "pine_match": np.fromiter((r.features.pine_match for r in requests), dtype=bool, count=n),
+        "mark": column(lambda r: r.features.market.mark),
+        "liq_price": column(lambda r: r.features.market.liq_price),
+        "spread_bp": column(lambda r: r.features.market.spread_bp),
+        "depth_px": column(lambda r: r.features.market.depth_px),
+        "mae_q999": column(lambda r: r.pgm.mae_q999),
+        "slip_q95": column(lambda r: r.pgm.slip_q95),
+    }
+
+
+def vol_masks(cols: Dict[str, np.ndarray], plan: GatePlan) -> Dict[str, np.ndarray]:
+    """波动率Gate各子检查的掩码（True表示该项触发失败）"""
+    sigma, skew, is_long = cols["sigma"], cols["skew"], cols["is_long"]
+    bull = plan.vol_band("bull")
+    bear = plan.vol_band("bear")
+
+    sigma_min = np.where(is_long, bull.get("sigma_min", 0), bear.get("sigma_min", 0))
+    sigma_max = np.where(is_long, bull.get("sigma_max", float("inf")), bear.get("sigma_max", float("inf")))
+    skew_ok = np.where(is_long, skew >= bull.get("skew_min", 0), skew <= bear.get("skew_max", 0))
+    no_config = np.where(is_long, not bull, not bear)
+
+    return {
+        "too_low": sigma < SIGMA_REGIME_MIN,
+        "too_high": sigma > SIGMA_REGIME_MAX,
+        "neutral": np.abs(skew) < SKEW_NEUTRAL_ABS,
+        "no_config": no_config,
+        "sigma_out": ~((sigma_min <= sigma) & (sigma <= sigma_max)),
+        "skew_out": ~skew_ok,
+    }
+
+
+def consensus_masks(cols: Dict[str, np.ndarray], plan: GatePlan) -> Dict[str, np.ndarray]:
+    """共识Gate各子检查的通过掩码"""
+    return {
+        "align": cols["C_align"] >= plan.C_align_min,
+        "of": cols["C_of"] >= plan.C_of_min,
+        "vision": cols["C_vision"] >= plan.C_vision_min,
+        "pine": cols["pine_match"],
+    }
+
+
+def liq_buffer_columns(cols: Dict[str, np.ndarray], plan: GatePlan) -> Dict[str, np.ndarray]:
+    """
+    流动性缓冲Gate的派生列与通过掩码
+    
+    cols 已带 liq_buffer / risk_budget 列（如脆弱性测试由决策上下文给出）时直接使用。
+    """
+    if "liq_buffer" in cols:
+        liq_buffer, risk_budget = cols["liq_buffer"], cols["risk_budget"]
+    else:
+        # MarketSnapshot 保证 mark > 0
+        liq_buffer = np.abs(cols["mark"] - cols["liq_price"]) / cols["mark"]
+        risk_budget = cols["mae_q999"] + cols["slip_q95"] + plan.epsilon
+
+    return {
+        "liq_buffer": liq_buffer,
+        "risk_budget": risk_budget,
+        "buffer_valid": liq_buffer > 0,
+        "budget_ok": risk_budget <= liq_buffer,
+        "depth_ok": cols["depth_px"] >= plan.min_depth_px,
+        "spread_ok": cols["spread_bp"] <= plan.spread_bp_max,
+    }
+
+
+def gate_failures(cols: Dict[str, np.ndarray], plan: GatePlan) -> Dict[str, np.ndarray]:
+    """
+    各Gate的失败原因位掩码列（int64，0表示通过），附带渲染用的派生列
+
+    Vol Gate 按标量路径的检查顺序短路，只保留第一个失败项。
+    """
+    vol = vol_masks(cols, plan)
+    consensus = consensus_masks(cols, plan)
+    liq = liq_buffer_columns(cols, plan)
+
+    vol_bits = np.select(
+        [vol["too_low"], vol["too_high"], vol["neutral"], vol["no_config"], vol["sigma_out"], vol["skew_out"]],
+        [Reason.VOL_TOO_LOW.bit, Reason.VOL_TOO_HIGH.bit, Reason.SKEW_NEUTRAL.bit,
+         Reason.VOL_NO_CONFIG.bit, Reason.SIGMA_OUT_OF_BAND.bit, Reason.SKEW_OUT_OF_BAND.bit],
+        0
+    ).astype(np.int64)
+    consensus_bits = (
+        np.where(consensus["align"], 0, Reason.ALIGN_LOW.bit)
+        | np.where(consensus["of"], 0, Reason.ORDERFLOW_LOW.bit)
+        | np.where(consensus["vision"], 0, Reason.VISION_LOW.bit)
+        | np.where(consensus["pine"], 0, Reason.PINE_MISMATCH.bit)
+    ).astype(np.int64)
+    liq_bits = (
+        np.where(~liq["buffer_valid"], Reason.BUFFER_INVALID.bit,
+                 np.where(liq["budget_ok"], 0, Reason.BUDGET_EXCEEDED.bit))
+        | np.where(liq["depth_ok"], 0, Reason.DEPTH_LOW.bit)
+        | np.where(liq["spread_ok"], 0, Reason.SPREAD_WIDE.bit)
+    ).astype(np.int64)
+
+    return {
+        "vol": vol_bits,
+        "consensus": consensus_bits,
+        "liq_buffer": liq_bits,
+        "liq_buffer_pct": liq["liq_buffer"],
+        "risk_budget": liq["risk_budget"],
+    }
+
+
+def resolve_plans(requests: Sequence[EnterRequest]) -> List[GatePlan]:
+    """逐条请求的Gate计划（同一配置快照内查表）"""
+    table = config_manager.snapshot.plans
+    return [table.resolve(r.symbol, r.tf) for r in requests]
+
+
+def plan_groups(plans: Sequence[GatePlan]) -> List[Tuple[GatePlan, np.ndarray]]:
+    """按Gate计划分组的行号"""
+    groups: Dict[str, Tuple[GatePlan, List[int]]] = {}
+    for i, plan in enumerate(plans):
+        groups.setdefault(plan.version, (plan, []))[1].append(i)
+    return [(plan, np.asarray(rows, dtype=np.intp)) for plan, rows in groups.values()]
+
+
+def gate_failures_by_plan(cols: Dict[str, np.ndarray], plans: Sequence[GatePlan]) -> Dict[str, np.ndarray]:
+    """逐条计划的 gate_failures：每个计划分组做一次列运算后按行号写回"""
+    groups = plan_groups(plans)
+    if len(groups) == 1:
+        return gate_failures(cols, groups[0][0])
+
+    failures: Dict[str, np.ndarray] = {}
+    for plan, rows in groups:
+        part = gate_failures({name: column[rows] for name, column in cols.items()}, plan)
+        for name, column in part.items():
+            if name not in failures:
+                failures[name] = np.empty(len(plans), dtype=column.dtype)
+            failures[name][rows] = column
+    return failures
+
+
+def _render_params(plan: GatePlan) -> Tuple[Tuple, Tuple, Tuple]:
+    """GateResult 渲染所需的阈值：(bull波段, bear波段, 共识阈值)"""
+    bull, bear = plan.vol_band("bull"), plan.vol_band("bear")
+    return (
+        (bull.get("sigma_min"), bull.get("sigma_max"), bull.get("skew_min")),
+        (bear.get("sigma_min"), bear.get("sigma_max"), bear.get("skew_max")),
+        (plan.C_align_min, plan.C_of_min, plan.C_vision_min),
+    )
+
+
+def event_results(requests: Sequence[EnterRequest]) -> Dict[str, GateResult]:
+    """Event/Latency Gate 只与标的有关，整批按标的各评估一次（限流按该标的条数计）"""
+    return {
+        symbol: event_latency.evaluate(symbol=symbol, cost=count)
+        for symbol, count in Counter(r.symbol for r in requests).items()
+    }
+
+
+def gate_mask(requests: Sequence[EnterRequest], plan: GatePlan = None) -> np.ndarray:
+    """整批请求的Gate失败位掩码（每条一个int64，0表示全部通过）"""
+    plans = [plan] * len(requests) if plan else resolve_plans(requests)
+    failures = gate_failures_by_plan(build_columns(requests), plans)
+    events = event_results(requests)
+    event_bits = np.fromiter((events[r.symbol].failures for r in requests), dtype=np.int64, count=len(requests))
+    return event_bits | failures["vol"] | failures["consensus"] | failures["liq_buffer"]
+
+
+def run_gate_checks_batch(
+    requests: Sequence[EnterRequest], plan: GatePlan = None, plans: Sequence[GatePlan] = None
+) -> List[Tuple[bool, List[GateResult], List[GateResult]]]:
+    """
+    批量运行所有Gate检查
+
+    Args:
+        plan: 整批共用的Gate计划
+        plans: 逐条请求的Gate计划；两者都未给出时按各请求的 (symbol, tf) 查表
+
+    Returns:
+        与 reasoner.run_gate_checks 相同结构的逐条结果列表：
+        [(是否通过所有Gates, 通过的Gate结果, 失败的Gate结果), ...]
+        说明文本由调用方在需要时以 codes.render 生成。
+    """
+    if not requests:
+        return []
+
+    if plans is None:
+        plans = [plan] * len(requests) if plan else resolve_plans(requests)
+    failures = gate_failures_by_plan(build_columns(requests), plans)
+    vol_bits = failures["vol"].tolist()
+    consensus_bits = failures["consensus"].tolist()
+    liq_bits = failures["liq_buffer"].tolist()
+    liq_buffers = failures["liq_buffer_pct"].tolist()
+    risk_budgets = failures["risk_budget"].tolist()
+
+    render_params = {plan.version: _render_params(plan) for plan, _ in plan_groups(plans)}
+    events = event_results(requests)
+
+    results = []
+    for i, request in enumerate(requests):
+        plan = plans[i]
+        bull_band, bear_band, consensus_thresholds = render_params[plan.version]
+        features = request.features
+        market = features.market
+        is_bull = request.side_hint.lower() in ("long", "bull")
+        gate_results = (
+            events[request.symbol],
+            GateResult(GateId.VOL, vol_bits[i], (features.sigma_1m, features.skew_1m, is_bull)
+                       + (bull_band if is_bull else bear_band)),
+            GateResult(GateId.CONSENSUS, consensus_bits[i], (
+                features.C_align, consensus_thresholds[0],
+                features.C_of, consensus_thresholds[1],
+                features.C_vision, consensus_thresholds[2],
+            )),
+            GateResult(GateId.LIQ_BUFFER, liq_bits[i], (
+                risk_budgets[i], liq_buffers[i], market.depth_px, plan.min_depth_px,
+                market.spread_bp, plan.spread_bp_max,
+            )),
+        )
+        all_passed, passed, failed = split(gate_results)
+        metrics.record_gate_outcomes((result.label, result.ok) for result in gate_results)
+        results.append((all_passed, passed, failed))
+
+    return results
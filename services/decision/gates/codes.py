@@ -0,0 +1,240 @@
+"""Gate原因码 - 紧凑的Gate检查结果与延迟渲染
+
+Gate检查只返回 GateResult(gate, failures, values)：
+- gate: GateId
+- failures: 失败子检查的 Reason 位掩码（0 表示通过）
+- values: 渲染说明所需的数值与阈值
+
+说明文本只在组装推理链（API边界）或解释追踪时由 render() 生成，
+与原先各Gate直接返回的字符串逐字一致。批量模式下多个Gate的结果可用
+pack() 合并为一个整数位掩码。
+"""
+from enum import IntEnum
+from typing import Iterable, List, NamedTuple, Sequence, Tuple
+
+
+class GateId(IntEnum):
+    """Gate编号（与检查顺序一致）"""
+    EVENT_LATENCY = 0
+    VOL = 1
+    CONSENSUS = 2
+    LIQ_BUFFER = 3
+
+    @property
+    def label(self) -> str:
+        """指标/追踪标签，与 metrics.gate_label 一致"""
+        return _LABELS[self]
+
+    @property
+    def title(self) -> str:
+        return _TITLES[self]
+
+
+_LABELS = {
+    GateId.EVENT_LATENCY: "event_latency",
+    GateId.VOL: "vol",
+    GateId.CONSENSUS: "consensus",
+    GateId.LIQ_BUFFER: "liq_buffer",
+}
+_TITLES = {
+    GateId.EVENT_LATENCY: "Event & Latency",
+    GateId.VOL: "Vol",
+    GateId.CONSENSUS: "Consensus",
+    GateId.LIQ_BUFFER: "Liq-Buffer",
+}
+
+
+class Reason(IntEnum):
+    """失败原因码，值为在位掩码中的位序号"""
+    # Event & Latency
+    BLACKLIST_EVENT = 0
+    LATENCY_SLA = 1
+    RATE_LIMITED = 2
+    MARKET_CLOSED = 3
+    # Vol（按检查顺序短路，只记录第一个失败项）
+    VOL_TOO_LOW = 8
+    VOL_TOO_HIGH = 9
+    SKEW_NEUTRAL = 10
+    VOL_NO_CONFIG = 11
+    SIGMA_OUT_OF_BAND = 12
+    SKEW_OUT_OF_BAND = 13
+    # Consensus
+    ALIGN_LOW = 16
+    ORDERFLOW_LOW = 17
+    VISION_LOW = 18
+    PINE_MISMATCH = 19
+    # Liq-Buffer
+    BUFFER_INVALID = 24
+    BUDGET_EXCEEDED = 25
+    DEPTH_LOW = 26
+    SPREAD_WIDE = 27
+
+    @property
+    def bit(self) -> int:
+        return 1 << self.value
+
+
+# 各Gate原因码占用的位
+GATE_BITS = {
+    GateId.EVENT_LATENCY: 0xFF,
+    GateId.VOL: 0xFF << 8,
+    GateId.CONSENSUS: 0xFF << 16,
+    GateId.LIQ_BUFFER: 0xFF << 24,
+}
+
+
+class GateResult(NamedTuple):
+    """单个Gate的检查结果"""
+    gate: GateId
+    failures: int
+    values: tuple
+
+    @property
+    def ok(self) -> bool:
+        return self.failures == 0
+
+    @property
+    def label(self) -> str:
+        return _LABELS[self.gate]
+
+    def reasons(self) -> List[Reason]:
+        """失败原因码列表（按位序）"""
+        return unpack(self.failures)
+
+    def render(self) -> str:
+        """渲染为说明文本"""
+        return render(self)
+
+
+def pack(results: Iterable[GateResult]) -> int:
+    """合并多个Gate结果的失败位掩码"""
+    mask = 0
+    for result in results:
+        mask |= result.failures
+    return mask
+
+
+def unpack(mask: int) -> List[Reason]:
+    """位掩码 → 原因码列表"""
+    return [reason for reason in Reason if mask & reason.bit]
+
+
+def failed_gates(mask: int) -> List[GateId]:
+    """位掩码中有失败项的Gate"""
+    return [gate for gate, bits in GATE_BITS.items() if mask & bits]
+
+
+def split(results: Sequence[GateResult]) -> Tuple[bool, List[GateResult], List[GateResult]]:
+    """拆分为 (是否全部通过, 通过的结果, 失败的结果)"""
+    passed = [result for result in results if result.ok]
+    failed = [result for result in results if not result.ok]
+    return not failed, passed, failed
+
+
+# ---- 渲染 ----------------------------------------------------------------
+
+EVENT_PASS_DETAIL = "Blacklist events: CLEAR, System health: OK, Rate limiting: OK, Market hours: OK"
+
+
+def _render_event(result: GateResult) -> str:
+    # values: (blacklist说明, 延迟说明, 限频说明)，仅失败项非空
+    if result.ok:
+        return f"Event & Latency Gate PASS: {EVENT_PASS_DETAIL}"
+    blacklist_msg, latency_msg, rate_msg = result.values
+    failed = []
+    if result.failures & Reason.BLACKLIST_EVENT.bit:
+        failed.append(blacklist_msg)
+    if result.failures & Reason.LATENCY_SLA.bit:
+        failed.append(f"Latency SLA violation: {latency_msg}")
+    if result.failures & Reason.RATE_LIMITED.bit:
+        failed.append(rate_msg)
+    if result.failures & Reason.MARKET_CLOSED.bit:
+        failed.append("Outside market hours")
+    return f"Event & Latency Gate FAIL: {'; '.join(failed)}"
+
+
+def _render_vol(result: GateResult) -> str:
+    # values: (sigma, skew, is_bull, sigma_min, sigma_max, skew_bound)
+    sigma, skew, is_bull, sigma_min, sigma_max, skew_bound = result.values
+    side = "bull" if is_bull else "bear"
+    failures = result.failures
+    if not failures:
+        return f"Vol Gate PASS: {side.title()} vol sweet-spot OK"
+    if failures & Reason.VOL_TOO_LOW.bit:
+        detail = "Volatility too low, market likely stalled"
+    elif failures & Reason.VOL_TOO_HIGH.bit:
+        detail = "Volatility too high, extreme market conditions"
+    elif failures & Reason.SKEW_NEUTRAL.bit:
+        detail = f"Skew absolute value {abs(skew):.2f} < 0.3, too neutral"
+    elif failures & Reason.VOL_NO_CONFIG.bit:
+        detail = "Vol config not found"
+    elif failures & Reason.SIGMA_OUT_OF_BAND.bit:
+        detail = f"Sigma {sigma:.4f} not in {side} range [{sigma_min}, {sigma_max}]"
+    elif is_bull:
+        detail = f"Skew {skew:.2f} < {skew_bound} (bull min)"
+    else:
+        detail = f"Skew {skew:.2f} > {skew_bound} (bear max)"
+    return f"Vol Gate FAIL: {detail}"
+
+
+def _render_consensus(result: GateResult) -> str:
+    # values: (C_align, C_align_min, C_of, C_of_min, C_vision, C_vision_min)
+    c_align, align_min, c_of, of_min, c_vision, vision_min = result.values
+    passed, failed = [], []
+    for reason, name, value, threshold in (
+        (Reason.ALIGN_LOW, "C_align", c_align, align_min),
+        (Reason.ORDERFLOW_LOW, "C_of", c_of, of_min),
+        (Reason.VISION_LOW, "C_vision", c_vision, vision_min),
+    ):
+        if result.failures & reason.bit:
+            failed.append(f"{name}={value:.2f} < {threshold}")
+        else:
+            passed.append(f"{name}={value:.2f} >= {threshold}")
+    if result.failures & Reason.PINE_MISMATCH.bit:
+        failed.append("Pine_match=False")
+    else:
+        passed.append("Pine_match=True")
+
+    if failed:
+        return f"Consensus Gate FAIL: {', '.join(failed)}"
+    return f"Consensus Gate PASS: {', '.join(passed)}"
+
+
+def _render_liq(result: GateResult) -> str:
+    # values: (risk_budget, liq_buffer, depth_px, min_depth_px, spread_bp, spread_bp_max)
+    risk_budget, liq_buffer, depth_px, min_depth, spread_bp, max_spread = result.values
+    failures = result.failures
+    if failures & Reason.BUFFER_INVALID.bit:
+        buffer_msg = "Invalid liquidation buffer (<=0)"
+    elif failures & Reason.BUDGET_EXCEEDED.bit:
+        buffer_msg = f"Risk budget {risk_budget:.4f} > LiqBuffer {liq_buffer:.4f}"
+    else:
+        buffer_msg = f"Risk budget {risk_budget:.4f} ≤ LiqBuffer {liq_buffer:.4f}"
+    if not failures:
+        return f"Liq-Buffer Gate PASS: {buffer_msg}"
+
+    issues = []
+    if failures & (Reason.BUFFER_INVALID.bit | Reason.BUDGET_EXCEEDED.bit):
+        issues.append(buffer_msg)
+    if failures & Reason.DEPTH_LOW.bit:
+        issues.append(f"Depth {depth_px:,.0f} < {min_depth:,.0f}")
+    if failures & Reason.SPREAD_WIDE.bit:
+        issues.append(f"Spread {spread_bp}bp > {max_spread}bp")
+    return f"Liq-Buffer Gate FAIL: {'; '.join(issues)}"
+
+
+_RENDERERS = {
+    GateId.EVENT_LATENCY: _render_event,
+    GateId.VOL: _render_vol,
+    GateId.CONSENSUS: _render_consensus,
+    GateId.LIQ_BUFFER: _render_liq,
+}
+
+
+def render(result: GateResult) -> str:
+    """GateResult → 说明文本"""
+    return _RENDERERS[result.gate](result)
+
+
+def render_all(results: Iterable[GateResult]) -> List[str]:
+    return [render(result) for result in results]
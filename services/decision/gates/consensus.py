@@ -2,13 +2,16 @@
 from typing import Tuple
 
 from ..core.config import config_manager
+from ..core.gate_plan import GatePlan
 from ..schemas.features import Features
+from ..decision.context import DecisionContext
+from .codes import GateId, GateResult, Reason
 
 
-def check_alignment(features: Features) -> Tuple[bool, str]:
+def check_alignment(features: Features, plan: GatePlan = None) -> Tuple[bool, str]:
     """检查多时间框架一致性"""
     c_align = features.C_align
-    threshold = config_manager.get("gates.C_align_min", 0.85)
+    threshold = (plan or config_manager.gate_plan).C_align_min
     
     if c_align >= threshold:
         return True, f"C_align={c_align:.2f} >= {threshold}"
@@ -16,10 +19,10 @@ def check_alignment(features: Features) -> Tuple[bool, str]:
         return False, f"C_align={c_align:.2f} < {threshold}"
 
 
-def check_orderflow(features: Features) -> Tuple[bool, str]:
+def check_orderflow(features: Features, plan: GatePlan = None) -> Tuple[bool, str]:
     """检查订单流一致性"""
     c_of = features.C_of
-    threshold = config_manager.get("gates.C_of_min", 0.80)
+    threshold = (plan or config_manager.gate_plan).C_of_min
     
     if c_of >= threshold:
         return True, f"C_of={c_of:.2f} >= {threshold}"
@@ -27,10 +30,10 @@ def check_orderflow(features: Features) -> Tuple[bool, str]:
         return False, f"C_of={c_of:.2f} < {threshold}"
 
 
-def check_vision(features: Features) -> Tuple[bool, str]:
+def check_vision(features: Features, plan: GatePlan = None) -> Tuple[bool, str]:
     """检查视觉识别一致性"""
     c_vision = features.C_vision
-    threshold = config_manager.get("gates.C_vision_min", 0.75)
+    threshold = (plan or config_manager.gate_plan).C_vision_min
     
     if c_vision >= threshold:
         return True, f"C_vision={c_vision:.2f} >= {threshold}"
@@ -57,7 +60,39 @@ def analyze_consensus_strength(features: Features) -> dict:
     }
 
 
-def passes(features: Features) -> Tuple[bool, str]:
+def evaluate(features: Features, plan: GatePlan = None, ctx: DecisionContext = None) -> GateResult:
+    """
+    共识Gate检查，返回原因码结果（所有子检查都会评估）
+    
+    给定决策上下文时直接读取其阈值余量。
+    values: (C_align, C_align_min, C_of, C_of_min, C_vision, C_vision_min)
+    """
+    if ctx is not None:
+        plan = ctx.plan
+        align_margin, of_margin, vision_margin = ctx.align_margin, ctx.of_margin, ctx.vision_margin
+    else:
+        plan = plan or config_manager.gate_plan
+        align_margin = features.C_align - plan.C_align_min
+        of_margin = features.C_of - plan.C_of_min
+        vision_margin = features.C_vision - plan.C_vision_min
+    
+    failures = 0
+    if align_margin < 0:
+        failures |= Reason.ALIGN_LOW.bit
+    if of_margin < 0:
+        failures |= Reason.ORDERFLOW_LOW.bit
+    if vision_margin < 0:
+        failures |= Reason.VISION_LOW.bit
+    if not features.pine_match:
+        failures |= Reason.PINE_MISMATCH.bit
+    return GateResult(GateId.CONSENSUS, failures, (
+        features.C_align, plan.C_align_min,
+        features.C_of, plan.C_of_min,
+        features.C_vision, plan.C_vision_min,
+    ))
+
+
+def passes(features: Features, plan: GatePlan = None) -> Tuple[bool, str]:
     """
     共识Gate主检查函数
     
@@ -67,42 +102,8 @@ def passes(features: Features) -> Tuple[bool, str]:
     3. C_vision ≥ 0.75（YOLO/DETR tokens → 方向分）
     4. Pine_match = true（TradingView 指标同向）
     """
-    failed_checks = []
-    passed_checks = []
-    
-    # 检查C_align
-    align_ok, align_msg = check_alignment(features)
-    if align_ok:
-        passed_checks.append(align_msg)
-    else:
-        failed_checks.append(align_msg)
-    
-    # 检查C_of
-    of_ok, of_msg = check_orderflow(features)
-    if of_ok:
-        passed_checks.append(of_msg)
-    else:
-        failed_checks.append(of_msg)
-    
-    # 检查C_vision
-    vision_ok, vision_msg = check_vision(features)
-    if vision_ok:
-        passed_checks.append(vision_msg)
-    else:
-        failed_checks.append(vision_msg)
-    
-    # 检查Pine match
-    pine_ok, pine_msg = check_pine_match(features)
-    if pine_ok:
-        passed_checks.append(pine_msg)
-    else:
-        failed_checks.append(pine_msg)
-    
-    # 判断是否通过（所有检查都必须通过）
-    if failed_checks:
-        return False, f"Consensus Gate FAIL: {', '.join(failed_checks)}"
-    else:
-        return True, f"Consensus Gate PASS: {', '.join(passed_checks)}"
+    result = evaluate(features, plan)
+    return result.ok, result.render()
 
 
 def get_consensus_summary(features: Features) -> str:
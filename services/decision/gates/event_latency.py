@@ -1,51 +1,36 @@
 """事件与延迟Gate - 黑名单事件和延迟检查"""
 import time
-from datetime import datetime, timedelta
+from datetime import datetime
 from typing import List, Tuple
 
 from ..core.config import config_manager
+from ..core.event_calendar import parse_ts
+from ..core.ratelimit import rate_limiter
 from ..core.utils import perf_monitor
+from .codes import GateId, GateResult, Reason
 
 
-def check_blacklist_events(current_time: datetime = None) -> Tuple[bool, str]:
+def check_blacklist_events(current_time: datetime = None, symbol: str = None) -> Tuple[bool, str]:
     """
     检查是否在黑名单事件窗口内
     
+    事件窗口（含前后缓冲与循环事件）在配置加载时编译为区间索引，查询为一次二分。
+    
     Args:
-        current_time: 当前时间，如果为None则使用当前UTC时间
+        current_time: 当前时间（datetime 或 epoch秒，无时区按UTC），为None时使用当前时间
+        symbol: 交易标的，仅作用于其他标的的事件不生效
         
     Returns:
         (是否允许, 说明)
     """
-    if current_time is None:
-        current_time = datetime.utcnow()
-    
-    blacklist_events = config_manager.get_blacklist_events()
-    
-    if not blacklist_events:
+    calendar = config_manager.event_calendar
+    if not len(calendar):
         return True, "No blacklist events configured"
     
-    # 检查每个黑名单事件
-    for event in blacklist_events:
-        event_name = event.get("name", "Unknown")
-        event_start = event.get("start_time")
-        event_end = event.get("end_time")
-        
-        if not event_start or not event_end:
-            continue
-        
-        # 解析时间（假设格式为ISO格式）
-        try:
-            start_dt = datetime.fromisoformat(event_start.replace('Z', '+00:00'))
-            end_dt = datetime.fromisoformat(event_end.replace('Z', '+00:00'))
-            
-            # 检查当前时间是否在事件窗口内
-            if start_dt <= current_time <= end_dt:
-                return False, f"In blacklist event window: {event_name} ({event_start} to {event_end})"
-                
-        except Exception as e:
-            # 时间解析错误，记录但不阻止交易
-            continue
+    ts = time.time() if current_time is None else parse_ts(current_time)
+    event = calendar.lookup(ts, symbol)
+    if event is not None:
+        return False, f"In blacklist event window: {event.describe()}"
     
     return True, "Not in any blacklist event window"
 
@@ -60,18 +45,14 @@ def check_latency_sla(operation_name: str = "decision") -> Tuple[bool, str]:
     Returns:
         (是否满足SLA, 说明)
     """
-    sla_ms = config_manager.get_latency_slo()
-    stats = perf_monitor.get_stats(operation_name)
+    sla_ms = config_manager.gate_plan.latency_slo_ms
     
-    if not stats:
-        return True, "No latency data available"
+    # 热路径：阈值计数判断，O(1)；只有违约时才读取分位数用于说明
+    if perf_monitor.check_sla(operation_name, sla_ms):
+        return True, f"P95 latency <= SLA {sla_ms}ms"
     
-    p95_latency = stats.get("p95_ms", 0)
-    
-    if p95_latency <= sla_ms:
-        return True, f"P95 latency {p95_latency:.1f}ms <= SLA {sla_ms}ms"
-    else:
-        return False, f"P95 latency {p95_latency:.1f}ms > SLA {sla_ms}ms"
+    p95_latency = perf_monitor.quantile(operation_name, 0.95)
+    return False, f"P95 latency {p95_latency:.1f}ms > SLA {sla_ms}ms"
 
 
 def validate_system_health() -> Tuple[bool, List[str]]:
@@ -95,14 +76,66 @@ def is_market_hours() -> bool:
     return True
 
 
-def check_rate_limiting() -> Tuple[bool, str]:
-    """检查是否触发频率限制"""
-    # 这里可以实现更复杂的频率限制逻辑
-    # 目前返回简单检查
-    return True, "Rate limiting OK"
+def check_rate_limiting(symbol: str = None, cost: int = 1) -> Tuple[bool, str]:
+    """
+    检查标的是否触发频率限制（rate_limits.symbol.enter 令牌桶）
+    
+    Args:
+        symbol: 交易标的，为None时不限流
+        cost: 本次消耗的令牌数（批量评估时为该标的的条数）
+    """
+    if symbol is None:
+        return True, "Rate limiting OK"
+    
+    wait_s = rate_limiter.acquire("symbol", "enter", symbol, cost)
+    if not wait_s:
+        return True, "Rate limiting OK"
+    
+    rate, burst = rate_limiter.limit("symbol", "enter")
+    return False, f"Rate limited: {symbol} exceeds {rate:g}/s (burst {burst:g}), retry in {wait_s:.2f}s"
+
+
+def evaluate(env_context: dict = None, symbol: str = None, cost: int = 1, rate_limit: bool = True) -> GateResult:
+    """
+    事件与延迟Gate检查，返回原因码结果
+    
+    cost 为该标的本次评估代表的决策数（批量评估时按标的合并）。
+    rate_limit=False 时跳过限频（不扣令牌），用于复核缓存命中。
+    values: (黑名单说明, 延迟说明, 限频说明)，只在对应子检查失败时填充
+    """
+    current_time = None
+    if env_context and "current_time" in env_context:
+        current_time = env_context["current_time"]
+    
+    failures = 0
+    blacklist_msg = latency_msg = rate_msg = None
+    
+    # 1. 黑名单事件
+    blacklist_ok, msg = check_blacklist_events(current_time, symbol)
+    if not blacklist_ok:
+        failures |= Reason.BLACKLIST_EVENT.bit
+        blacklist_msg = msg
+    
+    # 2. 系统健康（延迟SLA）：热路径O(1)，违约时才生成说明
+    sla_ms = config_manager.gate_plan.latency_slo_ms
+    if not perf_monitor.check_sla("decision", sla_ms):
+        failures |= Reason.LATENCY_SLA.bit
+        _, latency_msg = check_latency_sla()
+    
+    # 3. 频率限制
+    rate_ok, msg = check_rate_limiting(symbol, cost) if rate_limit else (True, None)
+    if not rate_ok:
+        failures |= Reason.RATE_LIMITED.bit
+        rate_msg = msg
+    
+    # 4. 市场时间（预留）
+    if not is_market_hours():
+        failures |= Reason.MARKET_CLOSED.bit
+    
+    return GateResult(GateId.EVENT_LATENCY, failures, (blacklist_msg, latency_msg, rate_msg))
 
 
-def passes(env_context: dict = None) -> Tuple[bool, str]:
+def passes(env_context: dict = None, symbol: str = None) -> Tuple[bool, str]:
     """
     事件与延迟Gate主检查函数
     
@@ -114,50 +147,13 @@ def passes(env_context: dict = None) -> Tuple[bool, str]:
     
     Args:
         env_context: 环境上下文，可包含当前时间等信息
+        symbol: 交易标的，用于按标的生效的黑名单事件
         
     Returns:
         (通过状态, 原因说明)
     """
-    failed_checks = []
-    passed_checks = []
-    
-    # 获取当前时间
-    current_time = None
-    if env_context and "current_time" in env_context:
-        current_time = env_context["current_time"]
-    
-    # 1. 检查黑名单事件
-    blacklist_ok, blacklist_msg = check_blacklist_events(current_time)
-    if blacklist_ok:
-        passed_checks.append("Blacklist events: CLEAR")
-    else:
-        failed_checks.append(blacklist_msg)
-    
-    # 2. 检查系统健康状态
-    health_ok, health_issues = validate_system_health()
-    if health_ok:
-        passed_checks.append("System health: OK")
-    else:
-        failed_checks.extend(health_issues)
-    
-    # 3. 检查频率限制
-    rate_ok, rate_msg = check_rate_limiting()
-    if rate_ok:
-        passed_checks.append("Rate limiting: OK")
-    else:
-        failed_checks.append(rate_msg)
-    
-    # 4. 检查市场时间（预留）
-    if not is_market_hours():
-        failed_checks.append("Outside market hours")
-    else:
-        passed_checks.append("Market hours: OK")
-    
-    # 判断是否通过
-    if failed_checks:
-        return False, f"Event & Latency Gate FAIL: {'; '.join(failed_checks)}"
-    else:
-        return True, f"Event & Latency Gate PASS: {', '.join(passed_checks)}"
+    result = evaluate(env_context, symbol)
+    return result.ok, result.render()
 
 
 def get_system_status() -> dict:
@@ -170,6 +166,6 @@ def get_system_status() -> dict:
         "health_issues": health_issues,
         "latency_stats": latency_stats,
         "latency_sla_ms": config_manager.get_latency_slo(),
-        "blacklist_events_count": len(config_manager.get_blacklist_events()),
+        "blacklist_events_count": len(config_manager.event_calendar),
         "market_open": is_market_hours()
     }
@@ -2,8 +2,10 @@
 from typing import Tuple
 
 from ..core.config import config_manager
-from ..core.utils import calculate_liq_buffer
+from ..core.gate_plan import GatePlan
+from ..decision.context import DecisionContext, risk_budget
 from ..schemas.features import Features, PGMMetrics
+from .codes import GateId, GateResult, Reason
 
 
 def calculate_risk_budget(pgm: PGMMetrics, epsilon: float) -> float:
@@ -12,49 +14,42 @@ def calculate_risk_budget(pgm: PGMMetrics, epsilon: float) -> float:
     
     风险预算 = MAE_Q999 + Slip_Q95 + ε
     """
-    return pgm.mae_q999 + pgm.slip_q95 + epsilon
+    return risk_budget(pgm, epsilon)
 
 
-def check_liq_buffer_adequate(features: Features, pgm: PGMMetrics) -> Tuple[bool, str, dict]:
+def _context(features: Features, pgm: PGMMetrics, plan: GatePlan, ctx: DecisionContext) -> DecisionContext:
+    """沿用已计算的决策上下文，缺省时按本次参数计算"""
+    if ctx is not None:
+        return ctx
+    return DecisionContext.from_features(features, pgm, plan or config_manager.gate_plan)
+
+
+def check_liq_buffer_adequate(
+    features: Features, pgm: PGMMetrics, plan: GatePlan = None, ctx: DecisionContext = None
+) -> Tuple[bool, str, dict]:
     """
     检查流动性缓冲是否充足
     
     条件: Q0.999(MAE) + Q0.95(Slip) + ε ≤ LiqBuffer
     """
-    # 获取配置
-    epsilon = config_manager.get("gates.epsilon", 0.0005)
-    
-    # 计算强平缓冲
-    liq_buffer = calculate_liq_buffer(features.market.mark, features.market.liq_price)
-    
-    # 计算风险预算
-    risk_budget = calculate_risk_budget(pgm, epsilon)
-    
-    # 风险指标详情
-    risk_details = {
-        "liq_buffer_pct": liq_buffer,
-        "mae_q999": pgm.mae_q999,
-        "slip_q95": pgm.slip_q95,
-        "epsilon": epsilon,
-        "risk_budget": risk_budget,
-        "safety_margin": liq_buffer - risk_budget,
-        "utilization_pct": risk_budget / liq_buffer if liq_buffer > 0 else float('inf')
-    }
+    ctx = _context(features, pgm, plan, ctx)
+    liq_buffer, budget = ctx.liq_buffer, ctx.risk_budget
+    risk_details = ctx.risk_details()
     
     # 判断是否通过
     if liq_buffer <= 0:
         return False, "Invalid liquidation buffer (<=0)", risk_details
     
-    if risk_budget <= liq_buffer:
-        return True, f"Risk budget {risk_budget:.4f} ≤ LiqBuffer {liq_buffer:.4f}", risk_details
+    if budget <= liq_buffer:
+        return True, f"Risk budget {budget:.4f} ≤ LiqBuffer {liq_buffer:.4f}", risk_details
     else:
-        return False, f"Risk budget {risk_budget:.4f} > LiqBuffer {liq_buffer:.4f}", risk_details
+        return False, f"Risk budget {budget:.4f} > LiqBuffer {liq_buffer:.4f}", risk_details
 
 
-def check_market_depth(features: Features) -> Tuple[bool, str]:
+def check_market_depth(features: Features, plan: GatePlan = None) -> Tuple[bool, str]:
     """检查市场深度是否充足"""
     depth_px = features.market.depth_px
-    min_depth = config_manager.get("gates.min_depth_px", 1000000)
+    min_depth = (plan or config_manager.gate_plan).min_depth_px
     
     if depth_px >= min_depth:
         return True, f"Depth {depth_px:,.0f} >= {min_depth:,.0f}"
@@ -62,10 +57,10 @@ def check_market_depth(features: Features) -> Tuple[bool, str]:
         return False, f"Depth {depth_px:,.0f} < {min_depth:,.0f}"
 
 
-def check_spread(features: Features) -> Tuple[bool, str]:
+def check_spread(features: Features, plan: GatePlan = None) -> Tuple[bool, str]:
     """检查点差是否在可接受范围"""
     spread_bp = features.market.spread_bp
-    max_spread = config_manager.get("gates.spread_bp_max", 5)
+    max_spread = (plan or config_manager.gate_plan).spread_bp_max
     
     if spread_bp <= max_spread:
         return True, f"Spread {spread_bp}bp <= {max_spread}bp"
@@ -73,24 +68,53 @@ def check_spread(features: Features) -> Tuple[bool, str]:
         return False, f"Spread {spread_bp}bp > {max_spread}bp"
 
 
-def validate_market_microstructure(features: Features) -> Tuple[bool, list]:
+def validate_market_microstructure(features: Features, plan: GatePlan = None) -> Tuple[bool, list]:
     """验证市场微结构"""
     issues = []
     
     # 检查深度
-    depth_ok, depth_msg = check_market_depth(features)
+    depth_ok, depth_msg = check_market_depth(features, plan)
     if not depth_ok:
         issues.append(depth_msg)
     
     # 检查点差
-    spread_ok, spread_msg = check_spread(features)
+    spread_ok, spread_msg = check_spread(features, plan)
     if not spread_ok:
         issues.append(spread_msg)
     
     return len(issues) == 0, issues
 
 
-def passes(features: Features, pgm: PGMMetrics) -> Tuple[bool, str, dict]:
+def evaluate(
+    features: Features, pgm: PGMMetrics, plan: GatePlan = None, ctx: DecisionContext = None
+) -> GateResult:
+    """
+    流动性缓冲Gate检查，返回原因码结果
+    
+    强平缓冲、风险预算与深度/点差余量读取自决策上下文。
+    values: (risk_budget, liq_buffer, depth_px, min_depth_px, spread_bp, spread_bp_max)
+    """
+    ctx = _context(features, pgm, plan, ctx)
+    plan = ctx.plan
+    market = features.market
+    
+    failures = 0
+    if ctx.liq_buffer <= 0:
+        failures |= Reason.BUFFER_INVALID.bit
+    elif ctx.risk_budget > ctx.liq_buffer:
+        failures |= Reason.BUDGET_EXCEEDED.bit
+    if ctx.depth_margin < 0:
+        failures |= Reason.DEPTH_LOW.bit
+    if ctx.spread_margin < 0:
+        failures |= Reason.SPREAD_WIDE.bit
+    return GateResult(GateId.LIQ_BUFFER, failures, (
+        ctx.risk_budget, ctx.liq_buffer, market.depth_px, plan.min_depth_px, market.spread_bp, plan.spread_bp_max
+    ))
+
+
+def passes(
+    features: Features, pgm: PGMMetrics, plan: GatePlan = None, ctx: DecisionContext = None
+) -> Tuple[bool, str, dict]:
     """
     流动性缓冲Gate主检查函数
     
@@ -102,28 +126,14 @@ def passes(features: Features, pgm: PGMMetrics) -> Tuple[bool, str, dict]:
     Returns:
         (通过状态, 原因说明, 风险详情)
     """
-    # 1. 检查流动性缓冲
-    buffer_ok, buffer_msg, risk_details = check_liq_buffer_adequate(features, pgm)
-    
-    # 2. 检查市场微结构
-    micro_ok, micro_issues = validate_market_microstructure(features)
-    
-    # 组合结果
-    if buffer_ok and micro_ok:
-        return True, f"Liq-Buffer Gate PASS: {buffer_msg}", risk_details
-    else:
-        issues = []
-        if not buffer_ok:
-            issues.append(buffer_msg)
-        if not micro_ok:
-            issues.extend(micro_issues)
-        
-        return False, f"Liq-Buffer Gate FAIL: {'; '.join(issues)}", risk_details
+    ctx = _context(features, pgm, plan, ctx)
+    result = evaluate(features, pgm, ctx=ctx)
+    return result.ok, result.render(), ctx.risk_details()
 
 
-def get_risk_summary(features: Features, pgm: PGMMetrics) -> dict:
+def get_risk_summary(features: Features, pgm: PGMMetrics, ctx: DecisionContext = None) -> dict:
     """获取风险摘要"""
-    _, _, risk_details = check_liq_buffer_adequate(features, pgm)
+    risk_details = _context(features, pgm, None, ctx).risk_details()
     
     return {
         "liquidation_buffer_pct": risk_details["liq_buffer_pct"] * 100,
@@ -2,11 +2,18 @@
 from typing import Tuple
 
 from ..core.config import config_manager
+from ..core.gate_plan import GatePlan
 from ..core.utils import is_in_vol_sweet_spot
 from ..schemas.features import Features
+from .codes import GateId, GateResult, Reason
 
+# 极端波动率与中性偏度阈值（batch.py 以相同常量做列运算）
+SIGMA_REGIME_MIN = 0.0005
+SIGMA_REGIME_MAX = 0.01
+SKEW_NEUTRAL_ABS = 0.3
 
-def is_in_band(features: Features, side_hint: str = "") -> Tuple[bool, str]:
+
+def is_in_band(features: Features, side_hint: str = "", plan: GatePlan = None) -> Tuple[bool, str]:
     """
     检查是否在波动率甜蜜点
     
@@ -18,7 +25,7 @@ def is_in_band(features: Features, side_hint: str = "") -> Tuple[bool, str]:
     skew = features.skew_1m
     
     # 检查skew绝对值是否太小
-    if abs(skew) < 0.3:
+    if abs(skew) < SKEW_NEUTRAL_ABS:
         return False, f"Skew absolute value {abs(skew):.2f} < 0.3, too neutral"
     
     # 根据skew判断市场偏向，如果有side_hint则使用
@@ -30,7 +37,7 @@ def is_in_band(features: Features, side_hint: str = "") -> Tuple[bool, str]:
         market_side = "bear"
     
     # 获取对应的波动率配置
-    vol_config = config_manager.get_vol_config(market_side)
+    vol_config = (plan or config_manager.gate_plan).vol_band(market_side)
     
     # 检查是否在甜蜜点
     return is_in_vol_sweet_spot(sigma, skew, market_side, vol_config)
@@ -41,34 +48,68 @@ def validate_vol_regime(features: Features) -> Tuple[bool, str]:
     sigma = features.sigma_1m
     
     # 极端波动率检查
-    if sigma < 0.0005:
+    if sigma < SIGMA_REGIME_MIN:
         return False, "Volatility too low, market likely stalled"
     
-    if sigma > 0.01:  # 1%的波动率已经很高
+    if sigma > SIGMA_REGIME_MAX:  # 1%的波动率已经很高
         return False, "Volatility too high, extreme market conditions"
     
     return True, "Volatility regime acceptable"
 
 
-def check_vol_gate(features: Features, side_hint: str = "") -> Tuple[bool, str]:
+def evaluate(features: Features, side_hint: str = "", plan: GatePlan = None) -> GateResult:
+    """
+    波动率Gate检查，返回原因码结果（检查顺序与说明文本同 check_vol_gate，失败即短路）
+    
+    values: (sigma, skew, is_bull, sigma_min, sigma_max, skew_bound)
+    """
+    sigma = features.sigma_1m
+    skew = features.skew_1m
+    
+    if side_hint:
+        market_side = side_hint.lower()
+    elif skew > 0:
+        market_side = "bull"
+    else:
+        market_side = "bear"
+    is_bull = market_side in ("long", "bull")
+    
+    vol_config = (plan or config_manager.gate_plan).vol_band(market_side)
+    sigma_min = vol_config.get("sigma_min")
+    sigma_max = vol_config.get("sigma_max")
+    skew_bound = vol_config.get("skew_min" if is_bull else "skew_max")
+    values = (sigma, skew, is_bull, sigma_min, sigma_max, skew_bound)
+    
+    if sigma < SIGMA_REGIME_MIN:
+        reason = Reason.VOL_TOO_LOW
+    elif sigma > SIGMA_REGIME_MAX:
+        reason = Reason.VOL_TOO_HIGH
+    elif abs(skew) < SKEW_NEUTRAL_ABS:
+        reason = Reason.SKEW_NEUTRAL
+    elif not vol_config:
+        reason = Reason.VOL_NO_CONFIG
+    elif not (vol_config.get("sigma_min", 0) <= sigma <= vol_config.get("sigma_max", float("inf"))):
+        reason = Reason.SIGMA_OUT_OF_BAND
+    elif is_bull and skew < vol_config.get("skew_min", 0):
+        reason = Reason.SKEW_OUT_OF_BAND
+    elif not is_bull and skew > vol_config.get("skew_max", 0):
+        reason = Reason.SKEW_OUT_OF_BAND
+    else:
+        return GateResult(GateId.VOL, 0, values)
+    return GateResult(GateId.VOL, reason.bit, values)
+
+
+def check_vol_gate(features: Features, side_hint: str = "", plan: GatePlan = None) -> Tuple[bool, str]:
     """
     波动率Gate主检查函数
     
     Args:
         features: 市场特征
         side_hint: 方向提示
+        plan: Gate计划，为None时使用当前配置编译的计划
         
     Returns:
         (通过状态, 原因说明)
     """
-    # 1. 基础波动率环境检查
-    regime_ok, regime_msg = validate_vol_regime(features)
-    if not regime_ok:
-        return False, f"Vol Gate FAIL: {regime_msg}"
-    
-    # 2. 甜蜜点检查
-    sweet_spot_ok, sweet_spot_msg = is_in_band(features, side_hint)
-    if not sweet_spot_ok:
-        return False, f"Vol Gate FAIL: {sweet_spot_msg}"
-    
-    return True, f"Vol Gate PASS: {sweet_spot_msg}"
+    result = evaluate(features, side_hint, plan)
+    return result.ok, result.render()
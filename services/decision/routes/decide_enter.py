@@ -1,18 +1,31 @@
 """入场决策API路由"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from loguru import logger
 
-from ..decision.reasoner import decide_enter
+from ..core import metrics
+from ..core.admission import PoolSaturated, decision_pool
+from ..core.ratelimit import rate_limit
+from ..core.utils import publish_timings, span, spans_ms, timer
+from ..decision import cache
+from ..decision.reasoner import (
+    SIDES, decide_enter, decide_enter_async, decide_enter_batch, decide_enter_both, select_hypothesis
+)
 from ..decision.trace import ReasoningTrace, generate_human_readable_reasoning, store_trace
-from ..schemas.features import EnterRequest
-from ..schemas.responses import EnterResponse
+from ..schemas.features import EnterBatchRequest, EnterBothRequest, EnterRequest
+from ..schemas.responses import EnterBatchResponse, EnterBothResponse, EnterResponse
 from ..schemas.examples import EXAMPLE_ENTER_BULL, EXAMPLE_ENTER_BEAR, EXAMPLE_ENTER_REJECT_VOL
 
 router = APIRouter()
 
 
-@router.post("/decide/enter", response_model=EnterResponse)
-async def decide_enter_endpoint(request: EnterRequest) -> EnterResponse:
+@router.post(
+    "/decide/enter", response_model=EnterResponse, dependencies=[Depends(rate_limit("enter"))]
+)
+async def decide_enter_endpoint(
+    request: EnterRequest,
+    http_response: Response,
+    timings: bool = Query(False, description="在响应体中返回各阶段耗时")
+) -> EnterResponse:
     """
     入场决策API
     
@@ -20,9 +33,11 @@ async def decide_enter_endpoint(request: EnterRequest) -> EnterResponse:
     
     决策流程：
     1. Gate检查（Event/Latency, Vol, Consensus, Liq-Buffer）
-    2. CTFG模型推理 
+    2. CTFG / xLSTM 并发推理（各自截止时间），邊界單 LLM 仲裁
     3. 脆弱性测试
     4. 生成决策和推理链
+    
+    各阶段耗时通过 Server-Timing 响应头返回，timings=true 时同时写入响应体。
     """
     # 创建推理追踪
     trace = ReasoningTrace()
@@ -33,10 +48,26 @@ async def decide_enter_endpoint(request: EnterRequest) -> EnterResponse:
     })
     
     try:
-        logger.info(f"Enter decision request: {request.symbol} {request.side_hint} @ {request.ts}")
+        logger.debug(
+            "Enter decision request: {symbol} {side_hint} @ {ts}",
+            symbol=request.symbol, side_hint=request.side_hint, ts=request.ts
+        )
+        
+        # 同一K线内的重复请求直接返回缓存决策
+        cached, cache_key, expires_at = cache.lookup(request)
+        if cached is not None:
+            trace.add_step("Decision_Cache", "HIT")
+            trace.add_decision(cached)
+            store_trace(trace)
+            metrics.record_decision("enter", metrics.enter_outcome(cached))
+            return cached
         
-        # 执行决策
-        response = decide_enter(request)
+        # 执行决策（CTFG/xLSTM并发，邊界單LLM仲裁与脆弱性测试并发）；池满时抛出PoolSaturated
+        async with decision_pool.admit():
+            response = await decide_enter_async(request)
+        
+        cache.remember(cache_key, expires_at, response)
+        metrics.record_decision("enter", metrics.enter_outcome(response))
         
         # 记录决策结果
         trace.add_decision(response)
@@ -44,14 +75,23 @@ async def decide_enter_endpoint(request: EnterRequest) -> EnterResponse:
         # 存储追踪
         store_trace(trace)
         
-        # 生成人类可读的推理说明（用于日志）
-        human_reasoning = generate_human_readable_reasoning(request, response, trace)
-        logger.info(f"Decision completed:\n{human_reasoning}")
+        logger.info(
+            "Enter decision: {symbol} {side_hint} -> {outcome} in {runtime_ms}ms",
+            symbol=request.symbol, side_hint=request.side_hint,
+            outcome=metrics.enter_outcome(response), runtime_ms=response.runtime_ms,
+            request_id=trace.request_id
+        )
+        # 人类可读的推理说明只在DEBUG级别启用时生成（或通过 /traces/{id}/explain 查看）
+        logger.opt(lazy=True).debug(
+            "Decision completed:\n{}", lambda: generate_human_readable_reasoning(request, response, trace)
+        )
         
-        return response
+        return publish_timings(response, http_response.headers, "enter", timings)
         
+    except PoolSaturated:
+        raise
     except Exception as e:
-        logger.error(f"Error in enter decision: {e}")
+        logger.error("Error in enter decision: {error}", error=str(e), request_id=trace.request_id)
         trace.add_step("Error", str(e))
         store_trace(trace)
         
@@ -61,6 +101,154 @@ async def decide_enter_endpoint(request: EnterRequest) -> EnterResponse:
         )
 
 
+@router.post(
+    "/decide/enter/batch", response_model=EnterBatchResponse, dependencies=[Depends(rate_limit("enter_batch"))]
+)
+async def decide_enter_batch_endpoint(
+    request: EnterBatchRequest,
+    http_response: Response,
+    timings: bool = Query(False, description="在响应体中返回各阶段耗时")
+) -> EnterBatchResponse:
+    """
+    批量入场决策API
+    
+    一次提交同一根K线上的N个入场请求，Vol/Consensus/Liq-Buffer Gate
+    以列运算整批评估，返回与 items 顺序一致的逐条决策结果。
+    推理链与逐个调用 /decide/enter 的结果一致。
+    """
+    try:
+        logger.debug("Batch enter decision request: {items} items", items=len(request.items))
+        
+        with timer() as timing:
+            # 先查缓存，只有未命中的条目进入批量决策
+            with span(timing, "cache"):
+                lookups = [cache.lookup(item) for item in request.items]
+            responses = [cached for cached, _, _ in lookups]
+            pending = [i for i, cached in enumerate(responses) if cached is None]
+            
+            if pending:
+                async with decision_pool.admit():
+                    with span(timing, "decide"):
+                        fresh = await decision_pool.run(
+                            decide_enter_batch, [request.items[i] for i in pending]
+                        )
+                for i, response in zip(pending, fresh, strict=True):
+                    _, cache_key, expires_at = lookups[i]
+                    cache.remember(cache_key, expires_at, response)
+                    responses[i] = response
+            
+            batch_timings = spans_ms(timing)
+        
+        # 逐条存储追踪，与单条接口保持一致
+        for item, response in zip(request.items, responses, strict=True):
+            trace = ReasoningTrace()
+            trace.add_step("Request_Received", "OK", {
+                "symbol": item.symbol,
+                "side_hint": item.side_hint,
+                "tf": item.tf,
+                "batch": True
+            })
+            trace.add_decision(response, runtime_ms=timing["duration_ms"])
+            store_trace(trace)
+            metrics.record_decision("enter_batch", metrics.enter_outcome(response))
+        
+        allowed = sum(1 for r in responses if r.allow)
+        logger.info(
+            "Batch decision completed: {allowed}/{items} allowed in {runtime_ms}ms",
+            allowed=allowed, items=len(responses), runtime_ms=timing["duration_ms"]
+        )
+        
+        if not timings:
+            responses = [r.model_copy(update={"timings_ms": None}) for r in responses]
+        
+        batch_response = EnterBatchResponse(
+            results=responses,
+            allowed=allowed,
+            runtime_ms=timing["duration_ms"],
+            timings_ms=batch_timings
+        )
+        return publish_timings(batch_response, http_response.headers, "enter_batch", timings)
+        
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"Error in batch enter decision: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Batch decision processing error: {str(e)}"
+        ) from e
+
+
+@router.post(
+    "/decide/enter/both", response_model=EnterBothResponse, dependencies=[Depends(rate_limit("enter_both"))]
+)
+async def decide_enter_both_endpoint(
+    request: EnterBothRequest,
+    http_response: Response,
+    timings: bool = Query(False, description="在响应体中返回各阶段耗时")
+) -> EnterBothResponse:
+    """
+    双假说入场决策API
+    
+    一份共享特征同时评估 H_long / H_short / H_wait，代替分别以 long、short
+    调用两次 /decide/enter。方向无关的 Event/Latency、Consensus、Liq-Buffer
+    Gate 只评估一次，long / short 字段与对应 side_hint 单独调用的结果一致。
+    """
+    try:
+        logger.debug("Enter-both decision request: {symbol} @ {ts}", symbol=request.symbol, ts=request.ts)
+        
+        side_requests = {side: request.for_side(side) for side in SIDES}
+        lookups = {side: cache.lookup(side_request) for side, side_request in side_requests.items()}
+        
+        if all(cached is not None for cached, _, _ in lookups.values()):
+            # 两个方向都命中缓存
+            response = EnterBothResponse(
+                long=lookups["long"][0],
+                short=lookups["short"][0],
+                hypothesis=select_hypothesis(lookups["long"][0], lookups["short"][0]),
+                runtime_ms=0,
+                plan_version=lookups["long"][0].plan_version
+            )
+        else:
+            async with decision_pool.admit():
+                response = await decision_pool.run(decide_enter_both, request)
+            for side, (_, cache_key, expires_at) in lookups.items():
+                cache.remember(cache_key, expires_at, getattr(response, side))
+        
+        # 每个方向各存一条追踪，与单向接口保持一致
+        for side in SIDES:
+            trace = ReasoningTrace()
+            trace.add_step("Request_Received", "OK", {
+                "symbol": request.symbol,
+                "side_hint": side,
+                "tf": request.tf,
+                "both": True
+            })
+            trace.add_decision(getattr(response, side), runtime_ms=response.runtime_ms)
+            store_trace(trace)
+        
+        metrics.record_decision("enter_both", response.hypothesis)
+        logger.info(
+            "Enter-both decision completed: {symbol} -> {hypothesis} in {runtime_ms}ms",
+            symbol=request.symbol, hypothesis=response.hypothesis, runtime_ms=response.runtime_ms
+        )
+        
+        if not timings:
+            response = response.model_copy(update={
+                side: getattr(response, side).model_copy(update={"timings_ms": None}) for side in SIDES
+            })
+        return publish_timings(response, http_response.headers, "enter_both", timings)
+        
+    except PoolSaturated:
+        raise
+    except Exception as e:
+        logger.error(f"Error in enter-both decision: {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Enter-both decision processing error: {str(e)}"
+        ) from e
+
+
 @router.get("/decide/enter/examples")
 async def get_enter_examples():
     """获取入场决策的示例请求"""
@@ -92,8 +280,9 @@ async def test_enter_scenarios():
             # 创建请求对象
             test_request = EnterRequest(**example_data)
             
-            # 执行决策
-            response = decide_enter(test_request)
+            # 执行决策（同步决策交给决策线程池，不阻塞事件循环）
+            async with decision_pool.admit():
+                response = await decision_pool.run(decide_enter, test_request)
             
             results.append({
                 "scenario": scenario_name,
@@ -107,6 +296,8 @@ async def test_enter_scenarios():
                 }
             })
             
+        except PoolSaturated:
+            raise
         except Exception as e:
             results.append({
                 "scenario": scenario_name,
@@ -1,7 +1,11 @@
 """退出决策API路由"""
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from loguru import logger
 
+from ..core import metrics
+from ..core.admission import PoolSaturated, decision_pool
+from ..core.ratelimit import rate_limit
+from ..core.utils import publish_timings
 from ..execution.mpc_exit import decide_exit, simulate_exit_scenarios
 from ..schemas.features import ExitRequest
 from ..schemas.responses import ExitResponse
@@ -10,8 +14,14 @@ from ..schemas.examples import EXAMPLE_EXIT
 router = APIRouter()
 
 
-@router.post("/decide/exit", response_model=ExitResponse)
-async def decide_exit_endpoint(request: ExitRequest) -> ExitResponse:
+@router.post(
+    "/decide/exit", response_model=ExitResponse, dependencies=[Depends(rate_limit("exit"))]
+)
+async def decide_exit_endpoint(
+    request: ExitRequest,
+    http_response: Response,
+    timings: bool = Query(False, description="在响应体中返回各阶段耗时")
+) -> ExitResponse:
     """
     退出决策API
     
@@ -25,25 +35,28 @@ async def decide_exit_endpoint(request: ExitRequest) -> ExitResponse:
     5. 盈利保护
     """
     try:
-        logger.info(
-            f"Exit decision request: {request.position.side} "
-            f"{request.position.qty} @ {request.position.avg_entry}, "
-            f"UPL: {request.position.upl_pct:.2%}, "
-            f"H(t): {request.updates.h_t:.3f}, "
-            f"P_hit: {request.updates.p_hit:.3f}"
+        logger.debug(
+            "Exit decision request: {side} {qty} @ {avg_entry}, UPL: {upl_pct:.2%}, "
+            "H(t): {h_t:.3f}, P_hit: {p_hit:.3f}",
+            side=request.position.side, qty=request.position.qty,
+            avg_entry=request.position.avg_entry, upl_pct=request.position.upl_pct,
+            h_t=request.updates.h_t, p_hit=request.updates.p_hit
         )
         
-        # 执行退出决策
-        response = decide_exit(request)
+        # 执行退出决策（在决策线程池中执行；池满时抛出PoolSaturated）
+        async with decision_pool.admit():
+            response = await decision_pool.run(decide_exit, request)
         
+        metrics.record_decision("exit", response.action)
         logger.info(
-            f"Exit decision: {response.action}"
-            f"{f' ({response.reduce_pct:.1%})' if response.reduce_pct else ''} "
-            f"in {response.runtime_ms}ms"
+            "Exit decision: {action} ({reduce_pct}) in {runtime_ms}ms",
+            action=response.action, reduce_pct=response.reduce_pct, runtime_ms=response.runtime_ms
         )
         
-        return response
+        return publish_timings(response, http_response.headers, "exit", timings)
         
+    except PoolSaturated:
+        raise
     except Exception as e:
         logger.error(f"Error in exit decision: {e}")
         raise HTTPException(
@@ -73,8 +86,9 @@ async def test_exit_scenarios():
     }
     
     try:
-        # 运行场景模拟
-        results = simulate_exit_scenarios(base_position)
+        # 运行场景模拟（交给决策线程池，不阻塞事件循环）
+        async with decision_pool.admit():
+            results = await decision_pool.run(simulate_exit_scenarios, base_position)
         
         return {
             "test_completed": True,
@@ -82,6 +96,8 @@ async def test_exit_scenarios():
             "results": results
         }
         
+    except PoolSaturated:
+        raise
     except Exception as e:
         logger.error(f"Error in exit scenario testing: {e}")
         raise HTTPException(
@@ -1,23 +1,56 @@
 """健康检查和系统状态路由"""
 from datetime import datetime
-from typing import Dict
+from typing import Any, Dict, Optional
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Response
+from fastapi.responses import PlainTextResponse
 from loguru import logger
 
+from ..core import metrics, prefork
+from ..core.admission import brain_pool, decision_pool
 from ..core.config import config_manager
+from ..core.ratelimit import rate_limiter
+from ..core.shared_state import shared_state
 from ..core.utils import perf_monitor
 from ..gates.event_latency import get_system_status
-from ..decision.trace import get_recent_patterns
+from ..decision.cache import decision_cache
+from ..decision.trace import get_recent_patterns, trace_store
+from ..decision.warmup import readiness
 
 router = APIRouter()
 
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+metrics.registry.register(metrics.Callback(
+    "p1_latency_sla_ok", "1 if decision p95 latency is within latency_slo_ms", "gauge",
+    lambda: {(): int(perf_monitor.check_sla("decision", config_manager.gate_plan.latency_slo_ms))}
+))
+
+metrics.registry.register(metrics.Callback(
+    "p1_config_reloads_total", "Config reload attempts by result", "counter",
+    lambda: {(result,): count for result, count in config_manager.reload_total.items()}, ("result",)
+))
+
+metrics.registry.register(metrics.Callback(
+    "p1_time_to_ready_seconds", "Seconds from process start until warm-up completed", "gauge",
+    lambda: {} if readiness.time_to_ready_ms is None else {(): readiness.time_to_ready_ms / 1000}
+))
+
+metrics.registry.register(metrics.Callback(
+    "p1_process_memory_bytes", "Memory of this worker process by kind (rss, pss, shared, private)", "gauge",
+    lambda: {(kind,): value for kind, value in prefork.memory_usage().items()}, ("kind",)
+))
+
 
 @router.get("/health")
-async def health_check() -> Dict[str, str]:
-    """基础健康检查"""
+async def health_check(response: Response) -> Dict[str, Any]:
+    """基础健康检查；启动预热失败时返回503"""
+    status = "unhealthy" if readiness.state == "failed" else "healthy"
+    if status != "healthy":
+        response.status_code = 503
     return {
-        "status": "healthy",
+        "status": status,
+        "ready": readiness.ready,
         "timestamp": datetime.utcnow().isoformat(),
         "service": "p1-decision-service"
     }
@@ -47,21 +80,47 @@ async def get_detailed_status() -> Dict:
         # 最近决策模式
         decision_patterns = get_recent_patterns()
         
-        # 配置状态
+        # 配置状态（同一快照）
+        snapshot = config_manager.snapshot
         config_status = {
             "config_loaded": True,
-            "gates_config": config_manager.get_gates_config(),
-            "latency_slo_ms": config_manager.get_latency_slo(),
-            "blacklist_events": len(config_manager.get_blacklist_events())
+            "config_version": snapshot.version,
+            "config_source": snapshot.source,
+            "config_loaded_at": datetime.utcfromtimestamp(snapshot.loaded_at).isoformat(),
+            "config_reloads": dict(config_manager.reload_total),
+            "gates_config": snapshot.config.get("gates", {}),
+            "gate_plan_version": snapshot.gate_plan.version,
+            "latency_slo_ms": snapshot.gate_plan.latency_slo_ms,
+            "blacklist_events": len(snapshot.event_calendar)
         }
         
         return {
             "timestamp": datetime.utcnow().isoformat(),
             "overall_health": "healthy" if system_status["system_healthy"] else "degraded",
             "system": system_status,
+            "startup": readiness.stats(),
+            "process": prefork.process_stats(),
+            "admission": decision_pool.stats(),
+            "brain_pool": brain_pool.stats(),
+            "shared_state": shared_state.stats() if shared_state is not None else {"backend": "local"},
+            "decision_cache": decision_cache.stats(),
+            "rate_limits": rate_limiter.stats(),
+            "traces": trace_store.stats(),
             "performance": {
                 "decision_latency": decision_stats,
-                "patterns": decision_patterns
+                "stages": {
+                    kind: perf_monitor.stage_stats(kind)
+                    for kind in ("enter", "enter_batch", "enter_both", "exit")
+                },
+                "decision_latency_by_symbol": {
+                    symbol: perf_monitor.get_stats("decision", symbol)
+                    for symbol in perf_monitor.symbols("decision")
+                },
+                "patterns": decision_patterns,
+                "patterns_by_symbol": {
+                    symbol: get_recent_patterns(symbol)["5m"]
+                    for symbol in trace_store.patterns.symbols()
+                }
             },
             "configuration": config_status,
             "uptime_info": {
@@ -79,57 +138,33 @@ async def get_detailed_status() -> Dict:
         }
 
 
-@router.get("/metrics")
-async def get_metrics() -> Dict:
-    """获取Prometheus格式的指标（简化版）"""
-    try:
-        decision_stats = perf_monitor.get_stats("decision")
-        system_status = get_system_status()
-        patterns = get_recent_patterns()
-        
-        # 模拟Prometheus格式的指标
-        metrics = {
-            "decision_requests_total": patterns.get("total_decisions", 0),
-            "decision_approvals_total": int(patterns.get("total_decisions", 0) * patterns.get("approval_rate", 0)),
-            "decision_latency_seconds": {
-                "avg": decision_stats.get("avg_ms", 0) / 1000,
-                "p50": decision_stats.get("p50_ms", 0) / 1000,
-                "p95": decision_stats.get("p95_ms", 0) / 1000,
-                "p99": decision_stats.get("p99_ms", 0) / 1000
-            },
-            "system_health_status": 1 if system_status["system_healthy"] else 0,
-            "latency_sla_violations": 1 if not perf_monitor.check_sla("decision", config_manager.get_latency_slo()) else 0
-        }
-        
-        # Gate通过率
-        if "gate_pass_rates" in patterns:
-            for gate_name, pass_rate in patterns["gate_pass_rates"].items():
-                metrics[f"gate_{gate_name.lower()}_pass_rate"] = pass_rate
-        
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "metrics": metrics
-        }
-        
-    except Exception as e:
-        logger.error(f"Error getting metrics: {e}")
-        return {
-            "timestamp": datetime.utcnow().isoformat(),
-            "error": str(e)
-        }
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Prometheus 文本格式指标
+    
+    决策结果、Gate通过/失败、阶段耗时直方图在热路径上增量维护；
+    队列深度与缓存命中在抓取时读取，抓取开销只与指标数量有关。
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
 
 
 @router.get("/config")
-async def get_current_config() -> Dict:
-    """获取当前配置（用于调试）"""
+async def get_current_config(symbol: Optional[str] = None, tf: Optional[str] = None) -> Dict:
+    """获取当前配置（用于调试）；给出 symbol/tf 时返回合并覆盖后的阈值"""
+    plan = config_manager.get_gate_plan(symbol.upper() if symbol else None, tf)
     return {
+        "config_version": config_manager.version,
+        "gate_plan_version": plan.version,
         "vol_sweet_spot": {
-            "bull": config_manager.get_vol_config("bull"),
-            "bear": config_manager.get_vol_config("bear")
+            "bull": dict(plan.vol_band("bull")),
+            "bear": dict(plan.vol_band("bear"))
         },
-        "gates": config_manager.get_gates_config(),
+        "gates": plan.gate_thresholds(),
+        "overrides": config_manager.get("overrides", {}),
         "exit": config_manager.get_exit_config(),
         "exec": config_manager.get_exec_config(),
         "latency_slo_ms": config_manager.get_latency_slo(),
-        "blacklist_events": config_manager.get_blacklist_events()
+        "blacklist_events": config_manager.get_blacklist_events(),
+        "event_calendar": config_manager.get("event_calendar", {})
     }
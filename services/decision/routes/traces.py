@@ -0,0 +1,80 @@
+"""决策追踪查询路由"""
+from datetime import datetime, timezone
+from typing import Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from ..decision.trace import TraceQuery, decode_cursor, explain_record, trace_store
+from ..schemas.responses import TraceItem, TraceQueryResponse
+
+router = APIRouter()
+
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    """无时区的时间按UTC处理"""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@router.get("/traces", response_model=TraceQueryResponse)
+def query_traces(
+    symbol: Optional[str] = Query(None, description="交易对"),
+    side: Optional[str] = Query(None, description="方向（请求方向或允许方向）", regex="^(long|short)$"),
+    outcome: Optional[str] = Query(None, description="决策结果", regex="^(allow|deny|error)$"),
+    failed_gate: Optional[str] = Query(None, description="失败的Gate，如 vol / consensus / liq_buffer / fragility"),
+    start: Optional[datetime] = Query(None, description="起始时间(含)"),
+    end: Optional[datetime] = Query(None, description="结束时间(含)"),
+    min_duration_ms: Optional[int] = Query(None, ge=0, description="只返回耗时不低于该值的决策"),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    limit: int = Query(50, ge=1, le=500, description="每页条数")
+) -> TraceQueryResponse:
+    """
+    查询决策追踪
+    
+    先查环形缓冲区的内存索引（按标的/失败Gate），不足一页时继续按段索引查询落盘追踪。
+    结果按时间由新到旧排列，使用 next_cursor 翻页。
+    读取落盘段是阻塞IO，因此定义为同步端点，由线程池执行。
+    """
+    try:
+        before = decode_cursor(cursor) if cursor else None
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from None
+    
+    query = TraceQuery(
+        symbol=symbol,
+        side=side,
+        outcome=outcome,
+        failed_gate=failed_gate,
+        start_ts=_epoch(start),
+        end_ts=_epoch(end),
+        min_duration_ms=min_duration_ms,
+        before=before,
+        limit=limit
+    )
+    records, next_cursor = trace_store.query(query)
+    return TraceQueryResponse(
+        items=[TraceItem(**record.to_dict()) for record in records],
+        next_cursor=next_cursor
+    )
+
+
+@router.get("/traces/{request_id}", response_model=TraceItem)
+def get_trace(request_id: str) -> TraceItem:
+    """按 request_id 获取决策追踪（缓冲区未命中时扫描落盘段，同步端点由线程池执行）"""
+    record = trace_store.get(request_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Trace {request_id} not found")
+    return TraceItem(**record.to_dict())
+
+
+@router.get("/traces/{request_id}/explain", response_class=PlainTextResponse)
+def explain_trace(request_id: str) -> str:
+    """按需生成人类可读的推理说明（请求路径上不再生成）"""
+    record = trace_store.get(request_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail=f"Trace {request_id} not found")
+    return explain_record(record)
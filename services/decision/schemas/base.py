@@ -9,6 +9,10 @@ class BaseResponse(BaseModel):
     """基础响应模型"""
     runtime_ms: int = Field(..., description="执行时间(毫秒)")
     timestamp: datetime = Field(default_factory=datetime.utcnow)
+    plan_version: Optional[str] = Field(None, description="产生该决策的Gate计划版本")
+    timings_ms: Optional[Dict[str, float]] = Field(
+        None, description="各阶段耗时(毫秒)，仅在请求 timings=true 时返回"
+    )
 
 
 class OrderFlow(BaseModel):
@@ -99,6 +99,33 @@ class EnterRequest(BaseModel):
         }
 
 
+class EnterBatchRequest(BaseModel):
+    """批量入场决策请求（同一根K线收盘时扫描多个标的）"""
+    items: List[EnterRequest] = Field(
+        ..., description="入场决策请求列表", min_length=1, max_length=500
+    )
+
+
+class EnterBothRequest(BaseModel):
+    """双假说入场决策请求：同一份特征同时评估 H_long / H_short / H_wait"""
+    symbol: str = Field(..., description="交易标的", regex="^[A-Z]+USDT$")
+    ts: datetime = Field(..., description="时间戳")
+    tf: str = Field(..., description="时间框架", regex="^(1m|5m|15m|1h|4h|1d)$")
+    features: Features = Field(..., description="市场特征（两个方向共享）")
+    pgm: PGMMetrics = Field(..., description="PGM预测指标")
+
+    def for_side(self, side_hint: str) -> EnterRequest:
+        """展开为指定方向的单向入场请求"""
+        return EnterRequest(
+            symbol=self.symbol,
+            side_hint=side_hint,
+            ts=self.ts,
+            tf=self.tf,
+            features=self.features,
+            pgm=self.pgm
+        )
+
+
 class ExitUpdates(BaseModel):
     """退出决策更新数据"""
     p_hit: float = Field(..., description="当前命中概率", ge=0.0, le=1.0)
@@ -1,7 +1,7 @@
 """决策响应模型"""
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, PrivateAttr
 
 from .base import BaseResponse, ExecutionConfig, RiskMetrics
 
@@ -16,6 +16,9 @@ class EnterResponse(BaseResponse):
     exec: Optional[ExecutionConfig] = Field(None, description="执行配置")
     risk: Optional[RiskMetrics] = Field(None, description="风险指标")
     reason_chain: List[str] = Field(default_factory=list, description="决策推理链")
+    cache_hit: bool = Field(False, description="是否命中决策缓存（同一K线内的重复请求）")
+    # 失败Gate的原因码位掩码（codes.pack），不序列化；决策缓存据此判断能否复用
+    _gate_failures: int = PrivateAttr(0)
 
     class Config:
         schema_extra = {
@@ -45,6 +48,21 @@ class EnterResponse(BaseResponse):
         }
 
 
+class EnterBatchResponse(BaseResponse):
+    """批量入场决策响应，results 与请求 items 一一对应"""
+    results: List[EnterResponse] = Field(default_factory=list, description="逐条入场决策结果")
+    allowed: int = Field(0, description="允许入场的条数")
+
+
+class EnterBothResponse(BaseResponse):
+    """双假说入场决策响应"""
+    long: EnterResponse = Field(..., description="H_long 假说的入场决策")
+    short: EnterResponse = Field(..., description="H_short 假说的入场决策")
+    hypothesis: str = Field(
+        ..., description="胜出假说（两个方向都不成立或相互冲突时为wait）", regex="^(long|short|wait)$"
+    )
+
+
 class ExitResponse(BaseResponse):
     """退出决策响应"""
     action: str = Field(
@@ -74,3 +92,28 @@ class ExitResponse(BaseResponse):
                 "timestamp": "2025-09-14T10:30:00Z"
             }
         }
+
+
+class TraceItem(BaseModel):
+    """单条决策追踪"""
+    request_id: str = Field(..., description="追踪ID")
+    ts: float = Field(..., description="决策开始时间(epoch秒, UTC)")
+    symbol: Optional[str] = Field(None, description="交易对")
+    side_hint: Optional[str] = Field(None, description="请求方向")
+    tf: Optional[str] = Field(None, description="时间框架")
+    decision: Optional[str] = Field(None, description="决策结果 ALLOW/DENY/ERROR")
+    side: Optional[str] = Field(None, description="允许入场的方向")
+    allocation: Optional[float] = Field(None, description="分配仓位")
+    plan_version: Optional[str] = Field(None, description="Gate计划版本")
+    config_version: Optional[str] = Field(None, description="配置快照版本")
+    reason_chain: List[str] = Field(default_factory=list, description="决策推理链")
+    duration_ms: Optional[int] = Field(None, description="决策耗时(毫秒)")
+    gates: List[Tuple[str, bool]] = Field(default_factory=list, description="Gate检查结果 (名称, 是否通过)")
+    cache_hit: Optional[bool] = Field(None, description="是否命中决策缓存")
+    error: Optional[str] = Field(None, description="错误信息")
+
+
+class TraceQueryResponse(BaseModel):
+    """追踪查询响应（由新到旧）"""
+    items: List[TraceItem] = Field(default_factory=list, description="匹配的追踪")
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多结果")
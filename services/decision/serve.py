@@ -0,0 +1,22 @@
+"""Decision Service 预fork启动入口
+
+用法：python -m services.decision.serve [--host 0.0.0.0] [--port 8000] [--workers 4]
+"""
+import argparse
+import sys
+
+from .core.config import config_manager
+from .core.prefork import serve
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="P1 Decision Service (pre-fork)")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=config_manager.settings.decision_port)
+    parser.add_argument("--workers", type=int, default=None, help="默认取 prefork.workers")
+    args = parser.parse_args(argv)
+    return serve(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
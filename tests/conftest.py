@@ -0,0 +1,57 @@
+"""共享测试夹具"""
+import pytest
+
+from services.decision.schemas.base import MarketSnapshot, OnChain, OrderFlow, VisionTokens
+from services.decision.schemas.features import Features, PGMMetrics
+
+
+@pytest.fixture
+def bull_features():
+    """牛市特征数据"""
+    return Features(
+        sigma_1m=0.0015,  # 在bull范围内
+        skew_1m=0.65,     # 正向偏度
+        Z_4H=0.8,
+        Z_1H=0.6,
+        Z_15m=0.7,
+        C_align=0.89,     # 高一致性
+        C_of=0.85,
+        C_vision=0.82,
+        pine_match=True,
+        onchain=OnChain(oi_roc=0.12, gas_z=-0.5),
+        OF=OrderFlow(obi=0.67, dCVD=2.1, replenish=0.78),
+        vision_tokens=VisionTokens(tokens={"bull_hammer": 0.85}),
+        market=MarketSnapshot(mark=43250.5, liq_price=41800.0, spread_bp=2, depth_px=2500000)
+    )
+
+
+@pytest.fixture
+def bear_features():
+    """熊市特征数据"""
+    return Features(
+        sigma_1m=0.0018,  # 在bear范围内
+        skew_1m=-0.72,    # 负向偏度
+        Z_4H=-0.9,
+        Z_1H=-0.7,
+        Z_15m=-0.6,
+        C_align=0.88,
+        C_of=0.83,
+        C_vision=0.79,
+        pine_match=True,
+        onchain=OnChain(oi_roc=0.08, gas_z=1.1),
+        OF=OrderFlow(obi=0.31, dCVD=-1.2, replenish=0.67),
+        vision_tokens=VisionTokens(tokens={"bear_engulfing": 0.82}),
+        market=MarketSnapshot(mark=2415.3, liq_price=2458.8, spread_bp=3, depth_px=1200000)
+    )
+
+
+@pytest.fixture
+def good_pgm():
+    """良好的PGM指标"""
+    return PGMMetrics(
+        p_hit=0.79,
+        mae_q999=0.0058,
+        slip_q95=0.0004,
+        t_hit_q50_bars=6,
+        factors=[["Z4H//Z15m", 0.21], ["OF_triad", 0.18]]
+    )
@@ -0,0 +1,160 @@
+"""配置热加载测试"""
+import threading
+import time
+
+import pytest
+import yaml
+from fastapi.testclient import TestClient
+
+from services.decision.app import app
+from services.decision.core.config import ConfigError, ConfigManager, config_manager, validate_config
+from services.decision.core.ratelimit import RateLimiter
+from services.decision.decision.trace import ReasoningTrace, TraceRecord, _retention_policy
+
+
+def write_config(path, C_align_min=0.85, **extra):
+    """写入只含少量字段的配置文件"""
+    config = {"gates": {"C_align_min": C_align_min}, "latency_slo_ms": 70, **extra}
+    path.write_text(yaml.safe_dump(config))
+
+
+@pytest.fixture
+def config_path(tmp_path):
+    path = tmp_path / "config.yaml"
+    write_config(path)
+    return path
+
+
+@pytest.fixture
+def manager(config_path):
+    manager = ConfigManager(config_path=str(config_path))
+    yield manager
+    manager.stop_watching()
+
+
+class TestValidation:
+    """配置校验测试"""
+
+    def test_valid_defaults(self):
+        """测试默认配置通过校验"""
+        validate_config(config_manager._get_default_config())
+
+    @pytest.mark.parametrize("config", [
+        [],
+        {"gates": {"C_align_min": 1.5}},
+        {"gates": {"spread_bp_max": "wide"}},
+        {"vol_sweet_spot": {"bull": {"sigma_min": 0.003, "sigma_max": 0.002}}},
+        {"latency_slo_ms": 0},
+        {"fragility": {"samples": 0}},
+    ])
+    def test_invalid(self, config):
+        """测试不合法的配置被拒绝"""
+        with pytest.raises(ConfigError):
+            validate_config(config)
+
+
+class TestReload:
+    """快照替换测试"""
+
+    def test_swap(self, manager, config_path):
+        """测试重新加载后整体切换快照"""
+        old = manager.snapshot
+        write_config(config_path, C_align_min=0.9)
+
+        assert manager.reload()
+        assert manager.version != old.version
+        assert manager.gate_plan.C_align_min == 0.9
+        assert manager.get("gates.C_align_min") == 0.9
+        assert old.gate_plan.C_align_min == 0.85  # 旧快照不受影响
+
+        assert not manager.reload()  # 内容未变
+        assert manager.reload_total == {"ok": 2, "error": 0}
+
+    @pytest.mark.parametrize("content", ["gates: [unclosed", "gates: {C_align_min: 2}"])
+    def test_rejected_keeps_snapshot(self, manager, config_path, content):
+        """测试解析或校验失败时保留当前快照"""
+        old = manager.snapshot
+        config_path.write_text(content)
+
+        assert not manager.reload()
+        assert manager.snapshot is old
+        assert manager.reload_total["error"] == 1
+
+    def test_missing_file_keeps_snapshot(self, manager, config_path):
+        """测试文件被删除时保留当前快照"""
+        old = manager.snapshot
+        config_path.unlink()
+        assert not manager.reload()
+        assert manager.snapshot is old
+
+    def test_listeners(self, manager, config_path):
+        """测试切换后通知订阅者（限流额度即时生效）"""
+        limiter = RateLimiter({"symbol": {"enter": {"rate_per_s": 0.001, "burst": 1}}})
+        manager.subscribe(lambda snapshot: limiter.configure(snapshot.config.get("rate_limits", {})))
+
+        write_config(config_path, rate_limits={"symbol": {"enter": {"rate_per_s": 0.001, "burst": 5}}})
+        assert manager.reload()
+        assert limiter.limit("symbol", "enter") == (0.001, 5.0)
+
+    def test_retention_follows_slo(self, manager, config_path):
+        """测试追踪保留策略的超时阈值跟随新的 latency_slo_ms"""
+        policies = [_retention_policy(manager.snapshot)]
+        manager.subscribe(lambda snapshot: policies.append(_retention_policy(snapshot)))
+
+        write_config(config_path, latency_slo_ms=200, traces={"retention": {"keep_slow": False}})
+        assert manager.reload()
+        assert policies[0].slo_ms == 70
+        assert policies[-1].slo_ms == 200 and not policies[-1].keep_slow
+
+    def test_readers_see_consistent_snapshot(self, manager, config_path):
+        """测试并发读取时快照内的配置与Gate计划始终一致"""
+        stop = threading.Event()
+        mismatches = []
+
+        def reader():
+            while not stop.is_set():
+                snapshot = manager.snapshot
+                if snapshot.gate_plan.C_align_min != snapshot.config["gates"]["C_align_min"]:
+                    mismatches.append(snapshot.version)
+
+        threads = [threading.Thread(target=reader) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for i in range(50):
+            write_config(config_path, C_align_min=0.80 + i / 1000)
+            manager.reload()
+        stop.set()
+        for thread in threads:
+            thread.join()
+
+        assert not mismatches
+        assert manager.gate_plan.C_align_min == pytest.approx(0.849)
+
+    def test_file_watcher(self, manager, config_path):
+        """测试文件监视线程检测到修改后自动加载"""
+        assert manager.start_watching(poll_interval_s=0.02)
+        write_config(config_path, C_align_min=0.95, latency_slo_ms=80)
+
+        deadline = time.monotonic() + 5
+        while manager.gate_plan.C_align_min != 0.95 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        assert manager.gate_plan.C_align_min == 0.95
+
+
+class TestVersionExposure:
+    """配置版本可见性测试"""
+
+    def test_trace_records_config_version(self):
+        """测试追踪记录创建时的配置版本"""
+        trace = ReasoningTrace()
+        assert trace.config_version == config_manager.version
+        assert trace.get_summary()["config_version"] == config_manager.version
+
+        record = TraceRecord.from_trace(trace)
+        assert record.config_version == config_manager.version
+        assert record.to_dict()["config_version"] == config_manager.version
+
+    def test_api_info(self):
+        """测试 /api/info 返回配置版本"""
+        response = TestClient(app).get("/api/info")
+        assert response.json()["configuration"]["config_version"] == config_manager.version
@@ -1,8 +1,20 @@
 """Decision API测试"""
+import asyncio
+import threading
+import time
+from dataclasses import replace
+from types import MappingProxyType
+
 import pytest
 from fastapi.testclient import TestClient
 from services.decision.app import app
-from services.decision.schemas.examples import EXAMPLE_ENTER_BULL, EXAMPLE_ENTER_BEAR, EXAMPLE_EXIT
+from services.decision.core.config import config_manager
+from services.decision.core.admission import BrainPool, DecisionPool, PoolSaturated, decision_pool
+from services.decision.decision import reasoner
+from services.decision.schemas.features import EnterBothRequest, EnterRequest
+from services.decision.schemas.examples import (
+    EXAMPLE_ENTER_BULL, EXAMPLE_ENTER_BEAR, EXAMPLE_ENTER_REJECT_VOL, EXAMPLE_EXIT
+)
 
 
 @pytest.fixture
@@ -122,6 +134,239 @@ class TestEnterDecisionAPI:
         assert "results" in data
 
 
+class TestEnterBatchAPI:
+    """批量入场决策API测试"""
+    
+    def test_batch_matches_single_reason_chains(self, client):
+        """测试批量结果与逐个调用单条接口的推理链一致"""
+        items = [EXAMPLE_ENTER_BULL, EXAMPLE_ENTER_BEAR, EXAMPLE_ENTER_REJECT_VOL]
+        
+        response = client.post("/decide/enter/batch", json={"items": items})
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert len(data["results"]) == len(items)
+        assert data["allowed"] == sum(1 for r in data["results"] if r["allow"])
+        
+        for item, result in zip(items, data["results"], strict=True):
+            single = client.post("/decide/enter", json=item).json()
+            assert result["allow"] == single["allow"]
+            assert result["side"] == single["side"]
+            assert result["reason_chain"] == single["reason_chain"]
+    
+    def test_batch_empty_rejected(self, client):
+        """测试空批次被校验拒绝"""
+        response = client.post("/decide/enter/batch", json={"items": []})
+        assert response.status_code == 422
+    
+    def test_batch_oversized_rejected(self, client):
+        """测试超过500条的批次被校验拒绝"""
+        response = client.post("/decide/enter/batch", json={"items": [EXAMPLE_ENTER_BULL] * 501})
+        assert response.status_code == 422
+
+
+class TestEnterBothAPI:
+    """双假说入场决策API测试"""
+    
+    @staticmethod
+    def _both_payload(example):
+        """由单向示例构造双假说请求"""
+        return {k: v for k, v in example.items() if k != "side_hint"}
+    
+    @pytest.mark.parametrize("example", [EXAMPLE_ENTER_BULL, EXAMPLE_ENTER_BEAR, EXAMPLE_ENTER_REJECT_VOL])
+    def test_both_matches_single_calls(self, example):
+        """测试两个方向的结果与按side_hint单独决策一致"""
+        request = EnterBothRequest(**self._both_payload(example))
+        both = reasoner.decide_enter_both(request)
+        
+        for side in ("long", "short"):
+            single = reasoner.decide_enter(request.for_side(side))
+            verdict = getattr(both, side)
+            assert verdict.allow == single.allow
+            assert verdict.side == single.side
+            assert verdict.reason_chain == single.reason_chain
+    
+    def test_shared_gates_evaluated_once(self, monkeypatch):
+        """测试方向无关的Gate只评估一次"""
+        calls = {"event": 0, "consensus": 0, "vol": 0}
+        
+        def counting(name, fn):
+            def wrapper(*args, **kwargs):
+                calls[name] += 1
+                return fn(*args, **kwargs)
+            return wrapper
+        
+        monkeypatch.setattr(reasoner.event_latency, "evaluate", counting("event", reasoner.event_latency.evaluate))
+        monkeypatch.setattr(reasoner.consensus, "evaluate", counting("consensus", reasoner.consensus.evaluate))
+        monkeypatch.setattr(reasoner.vol, "evaluate", counting("vol", reasoner.vol.evaluate))
+        
+        reasoner.decide_enter_both(EnterBothRequest(**self._both_payload(EXAMPLE_ENTER_BEAR)))
+        
+        assert calls == {"event": 1, "consensus": 1, "vol": 2}
+    
+    def test_both_endpoint(self, client):
+        """测试双假说接口返回两个方向的决策"""
+        response = client.post("/decide/enter/both", json=self._both_payload(EXAMPLE_ENTER_REJECT_VOL))
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["long"]["allow"] is False
+        assert data["short"]["allow"] is False
+        assert data["hypothesis"] == "wait"
+    
+    def test_select_hypothesis(self):
+        """测试胜出假说选择"""
+        allow_long = reasoner.EnterResponse(allow=True, side="long", runtime_ms=1)
+        allow_short = reasoner.EnterResponse(allow=True, side="short", runtime_ms=1)
+        deny = reasoner.EnterResponse(allow=False, runtime_ms=1)
+        
+        assert reasoner.select_hypothesis(allow_long, deny) == "long"
+        assert reasoner.select_hypothesis(deny, allow_short) == "short"
+        assert reasoner.select_hypothesis(deny, deny) == "wait"
+        # 多头假说被允许但建议方向为空头：不采纳
+        assert reasoner.select_hypothesis(allow_short, deny) == "wait"
+
+
+class TestAsyncBrains:
+    """并发大脑执行与截止时间测试"""
+    
+    def test_async_matches_sync(self):
+        """测试并发路径与同步路径结论一致"""
+        request = EnterRequest(**EXAMPLE_ENTER_BULL)
+        sync_response = reasoner.decide_enter(request)
+        async_response = asyncio.run(reasoner.decide_enter_async(request))
+        
+        assert async_response.allow == sync_response.allow
+        assert async_response.reason_chain == sync_response.reason_chain
+    
+    def test_slow_xlstm_dropped(self, monkeypatch):
+        """测试xLSTM超时被丢弃并记录在推理链中"""
+        def slow_xlstm(**kwargs):
+            time.sleep(0.2)
+            return {"p_up_1pct": 0.9, "t_hit50": 3}
+        
+        monkeypatch.setattr(reasoner, "xlstm_infer_sequence", slow_xlstm)
+        request = EnterRequest(**EXAMPLE_ENTER_BULL)
+        
+        response = asyncio.run(reasoner.decide_enter_async(request))
+        
+        assert any(r.startswith("xLSTM dropped") for r in response.reason_chain)
+        assert not any(r.startswith("xLSTM: p_up_1pct") for r in response.reason_chain)
+        assert response.runtime_ms < 200
+    
+    def test_llm_gets_same_inputs_as_sync(self, monkeypatch):
+        """测试并发路径的LLM仲裁使用CTFG结果与xLSTM上下文（与同步路径相同）"""
+        calls = []
+        # 放宽截止时间，避免负载下CTFG/xLSTM超时影响断言
+        plan = replace(
+            config_manager.gate_plan,
+            brain_deadlines_ms=MappingProxyType({"ctfg": 10_000, "xlstm": 10_000, "llm": 10_000}),
+        )
+        monkeypatch.setattr(config_manager, "get_gate_plan", lambda symbol=None, tf=None: plan)
+        monkeypatch.setattr(reasoner, "_is_borderline", lambda pgm_result: True)
+        monkeypatch.setattr(reasoner, "_arbitrate_llm", lambda *args: calls.append(args))
+        request = EnterRequest(**EXAMPLE_ENTER_BULL)
+        
+        asyncio.run(reasoner.decide_enter_async(request))
+        
+        assert len(calls) == 1
+        _, pgm_result, xlstm_ctx = calls[0]
+        assert pgm_result == reasoner.ctfg_model.predict(request.features)
+        assert xlstm_ctx == reasoner._infer_xlstm(request)
+    
+    def test_brain_pool_does_not_queue(self):
+        """测试大脑线程池占满（含超时未结束的推理）时跳过新调用，结束后释放名额"""
+        pool = BrainPool(max_workers=1)
+        release = threading.Event()
+        
+        async def run():
+            stuck = pool.submit(release.wait, 5)
+            assert pool.submit(time.sleep, 0) is None
+            release.set()
+            await stuck
+            return pool.stats()
+        
+        stats = asyncio.run(run())
+        assert stats["skipped_total"] == 1
+        assert stats["busy"] == 0
+
+
+class TestAdmissionControl:
+    """决策线程池准入控制测试"""
+    
+    def test_pool_rejects_when_full(self):
+        """测试执行中+排队达到上限后拒绝"""
+        pool = DecisionPool(max_workers=1, queue_depth=1, retry_after_s=2)
+        assert pool.try_acquire()
+        assert pool.try_acquire()
+        assert not pool.try_acquire()
+        assert pool.stats()["rejected_total"] == 1
+        
+        pool.release()
+        assert pool.try_acquire()
+    
+    def test_admit_raises_saturated(self):
+        """测试admit在池满时抛出PoolSaturated"""
+        pool = DecisionPool(max_workers=1, queue_depth=0, retry_after_s=3)
+        
+        async def scenario():
+            async with pool.admit():
+                with pytest.raises(PoolSaturated) as exc_info:
+                    async with pool.admit():
+                        pass
+                return exc_info.value
+        
+        exc = asyncio.run(scenario())
+        assert exc.retry_after_s == 3
+        assert pool.in_flight == 0
+    
+    def test_saturated_returns_503(self, client, monkeypatch):
+        """测试池满时接口快速返回503与Retry-After"""
+        monkeypatch.setattr(decision_pool, "try_acquire", lambda: False)
+        
+        for path, payload in [("/decide/enter", EXAMPLE_ENTER_BULL), ("/decide/exit", EXAMPLE_EXIT)]:
+            response = client.post(path, json=payload)
+            assert response.status_code == 503
+            assert response.headers["Retry-After"] == str(decision_pool.retry_after_s)
+
+
+class TestStageTimings:
+    """阶段耗时测试"""
+    
+    def test_server_timing_header(self, client):
+        """测试Server-Timing头包含决策阶段与app总耗时，默认不写入响应体"""
+        response = client.post("/decide/enter", json=EXAMPLE_ENTER_REJECT_VOL)
+        assert response.status_code == 200
+        
+        header = response.headers["server-timing"]
+        assert "gates;dur=" in header
+        assert "total;dur=" in header
+        assert header.split(", ")[-1].startswith("app;dur=")
+        assert response.json()["timings_ms"] is None
+    
+    def test_timings_in_body(self, client):
+        """测试timings=true时响应体返回各阶段耗时"""
+        data = client.post("/decide/enter?timings=true", json=EXAMPLE_ENTER_BULL).json()
+        
+        timings = data["timings_ms"]
+        assert {"gates", "ctfg", "xlstm", "total"} <= set(timings)
+        assert timings["total"] >= timings["gates"]
+    
+    def test_exit_timings(self, client):
+        """测试退出决策的阶段耗时"""
+        response = client.post("/decide/exit?timings=true", json=EXAMPLE_EXIT)
+        
+        assert {"signals", "urgency", "action"} <= set(response.json()["timings_ms"])
+        assert "action;dur=" in response.headers["server-timing"]
+    
+    def test_status_aggregates_stages(self, client):
+        """测试/status聚合各阶段耗时"""
+        client.post("/decide/enter", json=EXAMPLE_ENTER_REJECT_VOL)
+        stages = client.get("/status").json()["performance"]["stages"]
+        
+        assert stages["enter"]["gates"]["count"] >= 1
+
+
 class TestExitDecisionAPI:
     """退出决策API测试"""
     
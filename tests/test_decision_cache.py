@@ -0,0 +1,156 @@
+"""入场决策缓存测试"""
+import copy
+import time
+from dataclasses import replace
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.decision.app import app
+from services.decision.core.config import config_manager
+from services.decision.core.event_calendar import EventCalendar
+from services.decision.decision.cache import DecisionCache, bar_window, decision_cache, is_cacheable
+from services.decision.gates.codes import GateId, GateResult, Reason
+from services.decision.schemas.examples import EXAMPLE_ENTER_BEAR
+from services.decision.schemas.features import EnterRequest
+from services.decision.schemas.responses import EnterResponse
+
+
+@pytest.fixture
+def request_data():
+    """示例入场请求（深拷贝，避免修改共享示例）"""
+    return copy.deepcopy(EXAMPLE_ENTER_BEAR)
+
+
+@pytest.fixture
+def response():
+    """示例决策响应"""
+    return EnterResponse(allow=False, reason_chain=["✗ Gate FAILURE:"], runtime_ms=3, plan_version="gp-test")
+
+
+class TestCacheKey:
+    """缓存键测试"""
+    
+    def test_same_bar_same_key(self, request_data):
+        """测试同一K线内的相同特征生成相同的键"""
+        cache = DecisionCache()
+        request_data["features"]["sigma_1m"] = 0.0018
+        first = EnterRequest(**request_data)
+        request_data["ts"] = "2025-09-14T10:28:12Z"  # 同一根15m K线
+        request_data["features"]["sigma_1m"] = 0.0018000001  # 浮点噪声
+        second = EnterRequest(**request_data)
+        
+        assert cache.make_key(first, "v1") == cache.make_key(second, "v1")
+    
+    def test_key_changes_with_bar_features_and_plan(self, request_data):
+        """测试K线、特征或计划版本变化时键不同"""
+        cache = DecisionCache()
+        base_key, _ = cache.make_key(EnterRequest(**request_data), "v1")
+        
+        next_bar = copy.deepcopy(request_data)
+        next_bar["ts"] = "2025-09-14T10:45:00Z"
+        moved = copy.deepcopy(request_data)
+        moved["features"]["C_align"] = 0.70
+        
+        assert cache.make_key(EnterRequest(**next_bar), "v1")[0] != base_key
+        assert cache.make_key(EnterRequest(**moved), "v1")[0] != base_key
+        assert cache.make_key(EnterRequest(**request_data), "v2")[0] != base_key
+    
+    def test_bar_window(self, request_data):
+        """测试K线开盘/收盘时间"""
+        bar_open, bar_close = bar_window(EnterRequest(**request_data))
+        assert datetime.fromtimestamp(bar_open, timezone.utc).minute == 15
+        assert bar_close - bar_open == 900
+
+
+class TestCacheStore:
+    """缓存存取测试"""
+    
+    def test_expires_at_bar_close(self, response):
+        """测试条目在K线收盘时过期"""
+        cache = DecisionCache()
+        cache.put("k", response, expires_at=1000, now=900)
+        
+        assert cache.get("k", now=999) is response
+        assert cache.get("k", now=1000) is None
+        assert cache.stats()["entries"] == 0
+    
+    def test_closed_bar_not_cached(self, response):
+        """测试已收盘K线的决策不写入"""
+        cache = DecisionCache()
+        cache.put("k", response, expires_at=1000, now=1000)
+        assert cache.get("k", now=500) is None
+    
+    def test_lru_eviction(self, response):
+        """测试超出容量时淘汰最久未使用的条目"""
+        cache = DecisionCache(max_entries=2)
+        cache.put("a", response, expires_at=1000, now=0)
+        cache.put("b", response, expires_at=1000, now=0)
+        cache.get("a", now=1)
+        cache.put("c", response, expires_at=1000, now=1)
+        
+        assert cache.get("a", now=2) is response
+        assert cache.get("b", now=2) is None
+        assert cache.get("c", now=2) is response
+    
+    def test_failed_revalidation_counts_as_miss(self, response):
+        """测试命中复核不通过时按未命中计，条目保留"""
+        cache = DecisionCache()
+        cache.put("k", response, expires_at=1000, now=0)
+        
+        assert cache.get("k", now=1, valid=lambda _: False) is None
+        assert cache.get("k", now=2, valid=lambda _: True) is response
+        assert (cache.hits, cache.misses) == (1, 1)
+    
+    def test_event_latency_deny_not_cacheable(self, response):
+        """测试被事件与延迟Gate拒绝的决策不缓存，其他Gate的拒绝可缓存"""
+        vol_fail = GateResult(GateId.VOL, Reason.VOL_TOO_LOW.bit, ())
+        response._gate_failures = vol_fail.failures
+        assert is_cacheable(response)
+        
+        for reason in (Reason.BLACKLIST_EVENT, Reason.LATENCY_SLA, Reason.RATE_LIMITED):
+            response._gate_failures = vol_fail.failures | reason.bit
+            assert not is_cacheable(response)
+            assert not is_cacheable(response.model_copy(update={"cache_hit": True}))
+
+
+class TestCachedEndpoint:
+    """入场接口缓存命中测试"""
+    
+    def test_repeat_request_hits_cache(self, request_data):
+        """测试同一K线内的重复请求命中缓存"""
+        decision_cache.clear()
+        client = TestClient(app)
+        request_data["ts"] = datetime.now(timezone.utc).isoformat()
+        
+        first = client.post("/decide/enter", json=request_data).json()
+        second = client.post("/decide/enter", json=request_data).json()
+        
+        assert first["cache_hit"] is False
+        assert second["cache_hit"] is True
+        assert second["reason_chain"] == first["reason_chain"]
+    
+    def test_hit_rechecks_blacklist(self, request_data, monkeypatch):
+        """测试黑名单窗口开始后不再返回此前缓存的决策"""
+        decision_cache.clear()
+        client = TestClient(app)
+        request_data["ts"] = datetime.now(timezone.utc).isoformat()
+        first = client.post("/decide/enter", json=request_data).json()
+        
+        now = time.time()
+        calendar = EventCalendar(
+            events=[{"name": "CPI", "start_time": now - 60, "end_time": now + 600, "symbols": [request_data["symbol"]]}],
+            now=now
+        )
+        snapshot = config_manager.snapshot
+        monkeypatch.setattr(config_manager, "_snapshot", replace(snapshot, event_calendar=calendar))
+        blocked = client.post("/decide/enter", json=request_data).json()
+        assert blocked["cache_hit"] is False
+        assert blocked["allow"] is False
+        assert any("In blacklist event window: CPI" in reason for reason in blocked["reason_chain"])
+        
+        monkeypatch.setattr(config_manager, "_snapshot", snapshot)
+        again = client.post("/decide/enter", json=request_data).json()
+        assert again["cache_hit"] is True
+        assert again["reason_chain"] == first["reason_chain"]
@@ -0,0 +1,85 @@
+"""决策上下文测试"""
+import pytest
+
+from services.decision.core.config import config_manager
+from services.decision.decision import reasoner
+from services.decision.decision.context import DecisionContext
+from services.decision.gates import consensus, liq_buffer
+from services.decision.schemas.examples import EXAMPLE_ENTER_BEAR, EXAMPLE_ENTER_BULL
+from services.decision.schemas.features import EnterBothRequest, EnterRequest
+
+
+@pytest.fixture
+def plan():
+    """当前Gate计划"""
+    return config_manager.gate_plan
+
+
+@pytest.fixture
+def request_bull():
+    return EnterRequest(**EXAMPLE_ENTER_BULL)
+
+
+class TestDecisionContext:
+    """派生量计算测试"""
+
+    def test_derived_values(self, request_bull, plan):
+        """测试派生量与各模块原有公式一致"""
+        ctx = DecisionContext.build(request_bull, plan)
+        market = request_bull.features.market
+        pgm = request_bull.pgm
+
+        assert ctx.liq_buffer == pytest.approx(abs(market.mark - market.liq_price) / market.mark)
+        assert ctx.risk_budget == pytest.approx(pgm.mae_q999 + pgm.slip_q95 + plan.epsilon)
+        assert ctx.depth_margin == market.depth_px - plan.min_depth_px
+        assert ctx.risk_metrics().lhs_pct == ctx.risk_budget
+
+    def test_risk_details_match_gate(self, request_bull, plan):
+        """测试风险详情与流动性Gate的结果一致"""
+        ctx = DecisionContext.build(request_bull, plan)
+        _, _, details = liq_buffer.check_liq_buffer_adequate(request_bull.features, request_bull.pgm, plan)
+        assert ctx.risk_details() == details
+
+    def test_with_pgm_only_updates_budget(self, request_bull, plan):
+        """测试换用模型PGM时只重算风险预算"""
+        ctx = DecisionContext.build(request_bull, plan)
+        assert ctx.with_pgm(request_bull.pgm) is ctx
+
+        pgm = request_bull.pgm.model_copy(update={"mae_q999": 0.01})
+        updated = ctx.with_pgm(pgm)
+        assert updated.risk_budget == pytest.approx(0.01 + pgm.slip_q95 + plan.epsilon)
+        assert updated.liq_buffer == ctx.liq_buffer
+        assert updated.avg_z == ctx.avg_z
+
+    @pytest.mark.parametrize("overrides", [{}, {"C_align": 0.5, "C_vision": 0.1}])
+    def test_gates_with_context_match(self, request_bull, plan, overrides):
+        """测试Gate读取上下文与独立计算结果一致"""
+        features = request_bull.features.model_copy(update=overrides)
+        request = request_bull.model_copy(update={"features": features})
+        ctx = DecisionContext.build(request, plan)
+
+        assert consensus.evaluate(features, plan, ctx) == consensus.evaluate(features, plan)
+        assert liq_buffer.evaluate(features, request.pgm, plan, ctx) == liq_buffer.evaluate(features, request.pgm, plan)
+
+
+class TestContextReuse:
+    """上下文复用测试"""
+
+    def test_built_once_per_request(self, monkeypatch):
+        """测试单次决策只计算一次上下文"""
+        calls = []
+        original = DecisionContext.from_features.__func__
+
+        def counting(cls, *args):
+            calls.append(args)
+            return original(cls, *args)
+
+        monkeypatch.setattr(DecisionContext, "from_features", classmethod(counting))
+
+        reasoner.decide_enter(EnterRequest(**EXAMPLE_ENTER_BULL))
+        assert len(calls) == 1
+
+        calls.clear()
+        payload = {key: value for key, value in EXAMPLE_ENTER_BEAR.items() if key != "side_hint"}
+        reasoner.decide_enter_both(EnterBothRequest(**payload))
+        assert len(calls) == 1
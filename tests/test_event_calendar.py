@@ -0,0 +1,154 @@
+"""黑名单事件日历测试"""
+import random
+import time
+from dataclasses import replace
+
+from services.decision.core.config import config_manager
+from services.decision.core.event_calendar import EventCalendar, IntervalIndex, format_ts, parse_ts
+from services.decision.gates import event_latency
+
+T0 = parse_ts("2025-09-14T00:00:00Z")  # 周日
+
+
+def at(clock: str) -> float:
+    """2025-09-14 当天的UTC时刻"""
+    return parse_ts(f"2025-09-14T{clock}Z")
+
+
+class TestEventCalendar:
+    """区间索引与事件展开测试"""
+
+    def test_one_off_with_buffers(self):
+        """测试一次性事件含前后缓冲，结束时刻本身仍在窗口内"""
+        calendar = EventCalendar(
+            events=[{"name": "ETF", "start_time": "2025-09-14T10:00:00Z", "end_time": "2025-09-14T11:00:00Z"}],
+            pre_buffer_min=15, post_buffer_min=30, now=T0
+        )
+        assert calendar.lookup(at("09:44:59")) is None
+        assert calendar.lookup(at("09:45:00")).name == "ETF"
+        assert calendar.lookup(at("11:00:00")).name == "ETF"
+        assert calendar.lookup(at("11:30:00")).name == "ETF"
+        assert calendar.lookup(at("11:30:01")) is None
+
+    def test_per_event_buffer_override(self):
+        """测试单个事件覆盖全局缓冲"""
+        calendar = EventCalendar(
+            events=[{"name": "CPI", "start_time": "2025-09-14T12:30:00Z", "end_time": "2025-09-14T12:30:00Z",
+                     "pre_buffer_min": 5}],
+            pre_buffer_min=60, now=T0
+        )
+        assert calendar.lookup(at("12:20:00")) is None
+        assert calendar.lookup(at("12:26:00")).name == "CPI"
+
+    def test_symbol_scope(self):
+        """测试按标的生效的事件"""
+        calendar = EventCalendar(
+            events=[
+                {"name": "ETH upgrade", "start_time": "2025-09-14T10:00:00Z", "end_time": "2025-09-14T12:00:00Z",
+                 "symbols": ["ETHUSDT"]},
+                {"name": "Global", "start_time": "2025-09-14T20:00:00Z", "end_time": "2025-09-14T21:00:00Z"},
+            ],
+            now=T0
+        )
+        assert calendar.lookup(at("11:00:00"), "ETHUSDT").name == "ETH upgrade"
+        assert calendar.lookup(at("11:00:00"), "BTCUSDT") is None
+        assert calendar.lookup(at("11:00:00")) is None
+        assert calendar.lookup(at("20:30:00"), "ETHUSDT").name == "Global"
+        assert calendar.lookup(at("20:30:00"), "SOLUSDT").name == "Global"
+
+    def test_recurring_every_hours(self):
+        """测试固定周期的循环事件（资金费率结算）"""
+        calendar = EventCalendar(
+            recurring=[{"name": "Funding", "every_hours": 8, "anchor": "2025-01-01T00:00:00Z",
+                        "pre_buffer_min": 2, "post_buffer_min": 2}],
+            now=T0
+        )
+        assert calendar.lookup(at("07:59:00")).name == "Funding"
+        assert calendar.lookup(at("16:01:00")).name == "Funding"
+        assert calendar.lookup(at("12:00:00")) is None
+
+    def test_recurring_dates_and_weekdays(self):
+        """测试按日期列表与星期展开的循环事件"""
+        calendar = EventCalendar(
+            recurring=[
+                {"name": "FOMC", "dates": ["2025-09-17"], "time": "18:00", "duration_min": 60},
+                {"name": "Weekly close", "weekdays": ["sun"], "time": "23:50", "duration_min": 10},
+            ],
+            now=T0
+        )
+        assert calendar.lookup(parse_ts("2025-09-17T18:30:00Z")).name == "FOMC"
+        assert calendar.lookup(parse_ts("2025-09-16T18:30:00Z")) is None
+        assert calendar.lookup(at("23:55:00")).name == "Weekly close"
+        assert calendar.lookup(parse_ts("2025-09-21T23:55:00Z")).name == "Weekly close"
+
+    def test_recurring_reexpands_beyond_horizon(self):
+        """测试查询超出展开范围时重新展开"""
+        calendar = EventCalendar(
+            recurring=[{"name": "Funding", "every_hours": 8, "duration_min": 1}],
+            horizon_days=1, now=T0
+        )
+        later = T0 + 100 * 86400
+        assert calendar.lookup(later).name == "Funding"
+        assert calendar.lookup(later + 4 * 3600) is None
+
+    def test_calendar_file_import(self, tmp_path):
+        """测试批量导入CSV日历文件"""
+        path = tmp_path / "calendar.csv"
+        rows = ["name,start_time,end_time,symbols"]
+        for i in range(2000):
+            start = T0 + i * 3600
+            rows.append(f"E{i},{format_ts(start)},{format_ts(start + 600)},BTCUSDT;ETHUSDT")
+        path.write_text("\n".join(rows) + "\n")
+
+        calendar = EventCalendar.from_config({"event_calendar": {"file": str(path)}}, now=T0)
+        assert len(calendar) == 2000
+        assert calendar.lookup(T0 + 1500 * 3600 + 60, "ETHUSDT").name == "E1500"
+        assert calendar.lookup(T0 + 1500 * 3600 + 60, "SOLUSDT") is None
+
+
+class TestIntervalIndex:
+    """重叠窗口扫描测试"""
+
+    def test_matches_linear_scan(self):
+        """测试区间索引与逐个窗口线性扫描结果一致"""
+        rng = random.Random(7)
+        specs = []
+        for i in range(300):
+            start = T0 + rng.uniform(0, 86400)
+            specs.append({"name": f"E{i}", "start_time": start, "end_time": start + rng.uniform(0, 7200)})
+        calendar = EventCalendar(events=specs, now=T0)
+        windows = calendar._fixed
+
+        for _ in range(2000):
+            ts = T0 + rng.uniform(-3600, 90000)
+            covering = [w for w in windows if w.start <= ts < w.end]
+            found = calendar.lookup(ts)
+            assert (found is None) == (not covering)
+            if found is not None:
+                assert found in [w.event for w in covering]
+
+    def test_empty(self):
+        """测试空索引"""
+        assert IntervalIndex([]).lookup(T0) is None
+
+
+class TestBlacklistGate:
+    """事件Gate接入测试"""
+
+    def test_gate_uses_calendar(self, monkeypatch):
+        """测试事件Gate按标的查询编译后的日历"""
+        now = time.time()
+        calendar = EventCalendar(
+            events=[{"name": "Listing", "start_time": now - 60, "end_time": now + 600, "symbols": ["BTCUSDT"]}],
+            now=now
+        )
+        monkeypatch.setattr(config_manager, "_snapshot", replace(config_manager.snapshot, event_calendar=calendar))
+
+        passed, msg = event_latency.check_blacklist_events(symbol="BTCUSDT")
+        assert not passed
+        assert msg.startswith("In blacklist event window: Listing (")
+        assert event_latency.check_blacklist_events(symbol="ETHUSDT") == (True, "Not in any blacklist event window")
+
+        result = event_latency.evaluate(symbol="BTCUSDT")
+        assert not result.ok
+        assert "Event & Latency Gate FAIL: In blacklist event window: Listing" in result.render()
@@ -0,0 +1,95 @@
+"""蒙特卡洛脆弱性测试"""
+import copy
+
+import numpy as np
+import pytest
+
+from services.decision.core.config import config_manager
+from services.decision.decision import reasoner
+from services.decision.decision.context import DecisionContext
+from services.decision.decision.fragility import FragilityEngine
+from services.decision.schemas.examples import EXAMPLE_ENTER_BULL
+from services.decision.schemas.features import EnterRequest
+
+
+@pytest.fixture
+def plan():
+    """当前Gate计划"""
+    return config_manager.gate_plan
+
+
+@pytest.fixture
+def robust_request():
+    """远离所有阈值的多头请求"""
+    data = copy.deepcopy(EXAMPLE_ENTER_BULL)
+    data["features"].update({"sigma_1m": 0.0017, "skew_1m": 1.5, "C_align": 0.98, "C_of": 0.98, "C_vision": 0.98})
+    data["features"]["market"]["depth_px"] = 10_000_000
+    data["pgm"]["p_hit"] = 0.95
+    return EnterRequest(**data)
+
+
+@pytest.fixture
+def fragile_request():
+    """共识指标贴近阈值的多头请求"""
+    data = copy.deepcopy(EXAMPLE_ENTER_BULL)
+    data["features"].update({"sigma_1m": 0.0017, "skew_1m": 1.5, "C_align": 0.855, "C_of": 0.805})
+    data["features"]["market"]["depth_px"] = 10_000_000
+    data["pgm"]["p_hit"] = 0.95
+    return EnterRequest(**data)
+
+
+class TestFragilityEngine:
+    """脆弱性引擎测试"""
+
+    def test_robust_request_passes(self, robust_request, plan):
+        """测试稳健请求通过且翻盘率低"""
+        report = FragilityEngine().evaluate(robust_request, robust_request.pgm, plan)
+
+        assert report.ok
+        assert report.flip_rate <= plan.fragility["flip_rate_max"]
+        assert report.message.startswith("Fragility test PASSED")
+
+    def test_fragile_request_flips(self, fragile_request, plan):
+        """测试贴近阈值的请求翻盘率超限，主因为共识"""
+        report = FragilityEngine().evaluate(fragile_request, fragile_request.pgm, plan)
+
+        assert not report.ok
+        assert report.flip_rate > plan.fragility["flip_rate_max"]
+        assert max(report.causes, key=report.causes.get) == "consensus"
+        assert "flip rate" in report.message
+
+    def test_base_p_hit_below_min(self, robust_request, plan):
+        """测试原始p_hit低于门槛直接判定为脆弱"""
+        pgm = robust_request.pgm.model_copy(update={"p_hit": 0.70})
+        report = FragilityEngine().evaluate(robust_request, pgm, plan)
+
+        assert not report.ok
+        assert "base decision fails p_hit" in report.message
+
+    def test_deterministic(self, fragile_request, plan):
+        """测试固定种子下结果可复现"""
+        engine = FragilityEngine()
+        first = engine.evaluate(fragile_request, fragile_request.pgm, plan)
+        second = engine.evaluate(fragile_request, fragile_request.pgm, plan)
+
+        assert first == second
+
+    def test_sample_count_from_plan(self, robust_request, plan):
+        """测试样本数K取自计划配置，与引擎实例无关"""
+        report = FragilityEngine().evaluate(robust_request, robust_request.pgm, plan)
+
+        assert report.samples == plan.fragility["samples"]
+        assert FragilityEngine().evaluate(robust_request, robust_request.pgm, plan) == report
+
+    def test_unperturbed_row_matches_scalar_gates(self, robust_request, plan):
+        """测试未扰动样本的向量化评估与标量Gate一致"""
+        engine = FragilityEngine()
+        ctx = DecisionContext.build(robust_request, plan)
+        cols = engine.perturb(robust_request, robust_request.pgm, ctx, 16)
+        failures = engine.outcomes(robust_request, cols, ctx)
+        gates_passed, _, _ = reasoner.run_gate_checks(robust_request, plan)
+
+        assert gates_passed
+        assert not any(mask[0] for mask in failures.values())
+        assert cols["sigma"][0] == robust_request.features.sigma_1m
+        assert np.all(cols["pine_match"])
@@ -0,0 +1,67 @@
+"""Gate原因码测试"""
+import pytest
+
+from services.decision.gates import codes, consensus, liq_buffer, vol
+from services.decision.gates.codes import GateId, GateResult, Reason
+
+
+class TestReasonCodes:
+    """原因码与位掩码测试"""
+
+    def test_pack_unpack_roundtrip(self):
+        """测试位掩码合并与拆分"""
+        results = [
+            GateResult(GateId.VOL, Reason.VOL_TOO_HIGH.bit, ()),
+            GateResult(GateId.LIQ_BUFFER, Reason.DEPTH_LOW.bit | Reason.SPREAD_WIDE.bit, ()),
+        ]
+        mask = codes.pack(results)
+        assert codes.unpack(mask) == [Reason.VOL_TOO_HIGH, Reason.DEPTH_LOW, Reason.SPREAD_WIDE]
+        assert codes.failed_gates(mask) == [GateId.VOL, GateId.LIQ_BUFFER]
+
+    def test_reason_bits_within_gate(self):
+        """测试每个原因码落在所属Gate的位段内"""
+        for reason in Reason:
+            gates = codes.failed_gates(reason.bit)
+            assert len(gates) == 1
+
+    def test_labels(self):
+        """测试标签与指标标签一致"""
+        assert [gate.label for gate in GateId] == ["event_latency", "vol", "consensus", "liq_buffer"]
+
+    def test_split(self):
+        """测试按是否通过拆分结果"""
+        ok = GateResult(GateId.CONSENSUS, 0, ())
+        bad = GateResult(GateId.VOL, Reason.SKEW_NEUTRAL.bit, ())
+        assert codes.split([ok, bad]) == (False, [ok], [bad])
+        assert codes.split([ok]) == (True, [ok], [])
+
+
+class TestRendering:
+    """延迟渲染测试"""
+
+    @pytest.mark.parametrize("side,overrides", [
+        ("long", {}),
+        ("long", {"sigma_1m": 0.0001}),
+        ("long", {"sigma_1m": 0.005}),
+        ("long", {"skew_1m": 0.1}),
+    ])
+    def test_vol_render_matches_wrapper(self, bull_features, side, overrides):
+        """测试Vol Gate渲染与兼容接口的说明一致"""
+        features = bull_features.model_copy(update=overrides)
+        result = vol.evaluate(features, side)
+        assert (result.ok, result.render()) == vol.check_vol_gate(features, side)
+
+    def test_consensus_failure_codes(self, bull_features):
+        """测试共识Gate失败项对应原因码"""
+        features = bull_features.model_copy(update={"C_align": 0.1, "pine_match": False})
+        result = consensus.evaluate(features)
+        assert result.reasons() == [Reason.ALIGN_LOW, Reason.PINE_MISMATCH]
+        assert result.render() == consensus.passes(features)[1]
+
+    def test_liq_buffer_failure_codes(self, bear_features, good_pgm):
+        """测试流动性Gate深度不足的原因码"""
+        features = bear_features.model_copy(deep=True)
+        features.market.depth_px = 500000
+        result = liq_buffer.evaluate(features, good_pgm)
+        assert Reason.DEPTH_LOW in result.reasons()
+        assert result.render() == liq_buffer.passes(features, good_pgm)[1]
@@ -1,60 +1,10 @@
 """Gate逻辑测试"""
+from dataclasses import FrozenInstanceError
+
 import pytest
-from services.decision.schemas.features import Features, PGMMetrics
-from services.decision.schemas.base import OnChain, OrderFlow, VisionTokens, MarketSnapshot
-from services.decision.gates import vol, consensus, liq_buffer, event_latency
-
-
-@pytest.fixture
-def bull_features():
-    """牛市特征数据"""
-    return Features(
-        sigma_1m=0.0015,  # 在bull范围内
-        skew_1m=0.65,     # 正向偏度
-        Z_4H=0.8,
-        Z_1H=0.6,
-        Z_15m=0.7,
-        C_align=0.89,     # 高一致性
-        C_of=0.85,
-        C_vision=0.82,
-        pine_match=True,
-        onchain=OnChain(oi_roc=0.12, gas_z=-0.5),
-        OF=OrderFlow(obi=0.67, dCVD=2.1, replenish=0.78),
-        vision_tokens=VisionTokens(tokens={"bull_hammer": 0.85}),
-        market=MarketSnapshot(mark=43250.5, liq_price=41800.0, spread_bp=2, depth_px=2500000)
-    )
-
-
-@pytest.fixture
-def bear_features():
-    """熊市特征数据"""
-    return Features(
-        sigma_1m=0.0018,  # 在bear范围内
-        skew_1m=-0.72,    # 负向偏度
-        Z_4H=-0.9,
-        Z_1H=-0.7,
-        Z_15m=-0.6,
-        C_align=0.88,
-        C_of=0.83,
-        C_vision=0.79,
-        pine_match=True,
-        onchain=OnChain(oi_roc=0.08, gas_z=1.1),
-        OF=OrderFlow(obi=0.31, dCVD=-1.2, replenish=0.67),
-        vision_tokens=VisionTokens(tokens={"bear_engulfing": 0.82}),
-        market=MarketSnapshot(mark=2415.3, liq_price=2458.8, spread_bp=3, depth_px=1200000)
-    )
-
-
-@pytest.fixture
-def good_pgm():
-    """良好的PGM指标"""
-    return PGMMetrics(
-        p_hit=0.79,
-        mae_q999=0.0058,
-        slip_q95=0.0004,
-        t_hit_q50_bars=6,
-        factors=[["Z4H//Z15m", 0.21], ["OF_triad", 0.18]]
-    )
+from services.decision.schemas.features import EnterRequest
+from services.decision.gates import vol, consensus, liq_buffer, event_latency, batch, codes
+from services.decision.core.gate_plan import compile_gate_plan
 
 
 class TestVolGate:
@@ -154,6 +104,110 @@ class TestEventLatencyGate:
         assert "No blacklist events" in msg
 
 
+class TestGatePlan:
+    """Gate计划编译测试"""
+    
+    def test_plan_matches_config(self):
+        """测试编译后的阈值与配置一致"""
+        plan = compile_gate_plan({"gates": {"C_align_min": 0.9}, "exit": {"hazard_thresh": 0.25}})
+        assert plan.C_align_min == 0.9
+        assert plan.C_of_min == 0.80  # 缺省值
+        assert plan.exit["hazard_thresh"] == 0.25
+        assert plan.vol_band("long") == {}
+    
+    def test_plan_is_immutable(self):
+        """测试计划不可修改"""
+        plan = compile_gate_plan({"vol_sweet_spot": {"bull": {"sigma_min": 0.001}}})
+        with pytest.raises(FrozenInstanceError):
+            plan.C_align_min = 0.1
+        with pytest.raises(TypeError):
+            plan.vol_band("bull")["sigma_min"] = 0.5
+    
+    def test_plan_version_tracks_content(self):
+        """测试版本号随配置内容变化"""
+        base = compile_gate_plan({"gates": {"C_align_min": 0.85}})
+        same = compile_gate_plan({"gates": {"C_align_min": 0.85}})
+        changed = compile_gate_plan({"gates": {"C_align_min": 0.86}})
+        assert base.version == same.version
+        assert base.version != changed.version
+    
+    def test_gate_uses_explicit_plan(self, bull_features):
+        """测试Gate读取传入的计划"""
+        strict = compile_gate_plan({"gates": {"C_align_min": 0.95}})
+        passed, msg = consensus.passes(bull_features, strict)
+        assert not passed
+        assert "C_align=0.89 < 0.95" in msg
+
+
+class TestBatchGates:
+    """批量Gate评估测试"""
+    
+    @staticmethod
+    def _scalar_gate_checks(request):
+        """与 reasoner.run_gate_checks 相同顺序的标量Gate结果"""
+        return codes.split([
+            event_latency.evaluate(),
+            vol.evaluate(request.features, request.side_hint),
+            consensus.evaluate(request.features),
+            liq_buffer.evaluate(request.features, request.pgm),
+        ])
+    
+    @staticmethod
+    def _messages(outcome):
+        """(是否通过, 通过说明, 失败说明)"""
+        ok, passed, failed = outcome
+        return ok, codes.render_all(passed), codes.render_all(failed)
+    
+    def test_batch_matches_scalar(self, bull_features, bear_features, good_pgm):
+        """测试批量结果与逐条标量检查完全一致"""
+        variants = [
+            ("long", bull_features, {}),
+            ("short", bear_features, {}),
+            ("long", bull_features, {"sigma_1m": 0.005}),
+            ("long", bull_features, {"sigma_1m": 0.0001}),
+            ("short", bear_features, {"skew_1m": 0.1}),
+            ("short", bear_features, {"skew_1m": -0.4}),
+            ("long", bull_features, {"C_align": 0.70, "pine_match": False}),
+            ("short", bear_features, {"C_of": 0.5, "C_vision": 0.5}),
+        ]
+        requests = []
+        for side, features, overrides in variants:
+            requests.append(EnterRequest(
+                symbol="BTCUSDT",
+                side_hint=side,
+                ts="2025-09-14T10:25:00Z",
+                tf="15m",
+                features=features.model_copy(update=overrides),
+                pgm=good_pgm
+            ))
+        
+        # 深度不足 + 风险预算超标
+        thin = bear_features.model_copy(deep=True)
+        thin.market.depth_px = 500000
+        thin.market.spread_bp = 9
+        requests.append(EnterRequest(
+            symbol="ETHUSDT", side_hint="short", ts="2025-09-14T10:25:00Z", tf="15m",
+            features=thin, pgm=good_pgm.model_copy(update={"mae_q999": 0.03})
+        ))
+        
+        results = batch.run_gate_checks_batch(requests)
+        
+        assert len(results) == len(requests)
+        for request, result in zip(requests, results, strict=True):
+            scalar = self._scalar_gate_checks(request)
+            assert self._messages(result) == self._messages(scalar)
+            assert codes.pack(result[2]) == codes.pack(scalar[2])
+        
+        # 原因码掩码与逐条结果一致
+        masks = batch.gate_mask(requests)
+        for request, mask in zip(requests, masks, strict=True):
+            assert int(mask) == codes.pack(self._scalar_gate_checks(request)[2])
+    
+    def test_batch_empty(self):
+        """测试空批次"""
+        assert batch.run_gate_checks_batch([]) == []
+
+
 @pytest.mark.integration
 class TestGateIntegration:
     """Gate集成测试"""
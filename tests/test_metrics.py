@@ -0,0 +1,72 @@
+"""Prometheus指标测试"""
+import pytest
+from fastapi.testclient import TestClient
+
+from services.decision.app import app
+from services.decision.core.metrics import Counter, Histogram, Registry, gate_label
+from services.decision.schemas.examples import EXAMPLE_ENTER_REJECT_VOL, EXAMPLE_EXIT
+
+
+@pytest.fixture
+def client():
+    """测试客户端"""
+    return TestClient(app)
+
+
+class TestMetricTypes:
+    """指标类型与文本格式测试"""
+
+    def test_counter_render(self):
+        """测试计数器按标签累加并导出"""
+        registry = Registry()
+        counter = registry.register(Counter("x_total", "Test counter", ("kind",)))
+        counter.inc(kind="a")
+        counter.inc(2, kind="a")
+        counter.inc(kind='b"q')
+
+        text = registry.render()
+        assert "# TYPE x_total counter" in text
+        assert 'x_total{kind="a"} 3' in text
+        assert 'x_total{kind="b\\"q"} 1' in text
+
+    def test_histogram_cumulative_buckets(self):
+        """测试直方图导出累积桶、sum与count"""
+        registry = Registry()
+        histogram = registry.register(Histogram("lat_seconds", "Test histogram", buckets=(0.01, 0.1)))
+        for value in (0.005, 0.05, 0.05, 3.0):
+            histogram.observe(value)
+
+        text = registry.render()
+        assert 'lat_seconds_bucket{le="0.01"} 1' in text
+        assert 'lat_seconds_bucket{le="0.1"} 3' in text
+        assert 'lat_seconds_bucket{le="+Inf"} 4' in text
+        assert "lat_seconds_count 4" in text
+        assert "lat_seconds_sum 3.105" in text
+
+    def test_gate_label(self):
+        """测试Gate说明转换为标签"""
+        assert gate_label("Vol Gate FAIL: Volatility too high") == "vol"
+        assert gate_label("Liq-Buffer Gate PASS: ok") == "liq_buffer"
+        assert gate_label("Event & Latency Gate PASS: ok") == "event_latency"
+
+
+class TestMetricsEndpoint:
+    """/metrics 端点测试"""
+
+    def test_exposition(self, client):
+        """测试决策后导出结果、Gate、阶段耗时、缓存与队列指标"""
+        client.post("/decide/enter", json=EXAMPLE_ENTER_REJECT_VOL)
+        client.post("/decide/exit", json=EXAMPLE_EXIT)
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+        text = response.text
+        assert 'p1_decisions_total{kind="enter",outcome="deny"}' in text
+        assert 'p1_decisions_total{kind="exit",outcome="reduce"}' in text
+        assert 'p1_gate_checks_total{gate="vol",result="fail"}' in text
+        assert 'p1_stage_latency_seconds_bucket{kind="enter",stage="gates",le="+Inf"}' in text
+        assert 'p1_decision_cache_lookups_total{result="miss"}' in text
+        assert "p1_admission_in_flight 0" in text
+        assert "p1_latency_sla_ok" in text
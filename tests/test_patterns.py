@@ -0,0 +1,95 @@
+"""决策模式在线统计测试"""
+import pytest
+
+from services.decision.decision.patterns import DecisionPatterns, TumblingWindow
+from services.decision.decision.trace import TraceRecord, TraceStore, analyze_decision_patterns
+from tests.test_trace_store import make_trace
+
+T0 = 1718000040.0  # 5m/1h窗口内，1m窗口起点
+
+
+def make_record(ts: float, symbol: str = "BTCUSDT", allow: bool = False, duration_ms: int = 10) -> TraceRecord:
+    """构造指定时间戳与耗时的追踪记录"""
+    record = TraceRecord.from_trace(make_trace(symbol=symbol, allow=allow))
+    record.ts = ts
+    record.duration_ms = duration_ms
+    return record
+
+
+class TestTumblingWindow:
+    """翻滚窗口测试"""
+
+    def test_rollover_keeps_previous(self):
+        """测试进入下一窗口后上一窗口保留为完整窗口"""
+        window = TumblingWindow(60)
+        window.add(make_record(T0, allow=True), T0)
+        window.add(make_record(T0 + 30), T0 + 30)
+        window.add(make_record(T0 + 61), T0 + 61)
+
+        snapshot = window.snapshot(T0 + 70)
+        assert snapshot["current"]["total_decisions"] == 1
+        assert snapshot["previous"]["total_decisions"] == 2
+        assert snapshot["previous"]["approval_rate"] == pytest.approx(0.5)
+
+    def test_gap_clears_previous(self):
+        """测试跨越多个窗口后上一窗口为空"""
+        window = TumblingWindow(60)
+        window.add(make_record(T0), T0)
+
+        snapshot = window.snapshot(T0 + 300)
+        assert snapshot["current"] == {}
+        assert snapshot["previous"] == {}
+
+    def test_late_record_goes_to_previous(self):
+        """测试迟到一个窗口以内的记录计入上一窗口"""
+        window = TumblingWindow(60)
+        window.add(make_record(T0), T0)
+        window.add(make_record(T0 + 65), T0 + 65)
+        window.add(make_record(T0 + 5), T0 + 5)
+
+        assert window.snapshot(T0 + 70)["previous"]["total_decisions"] == 2
+
+
+class TestDecisionPatterns:
+    """按标的与窗口统计测试"""
+
+    def test_matches_batch_analysis(self):
+        """测试窗口统计与逐条分析结果一致"""
+        records = [
+            make_record(T0 + i, allow=i % 2 == 0, duration_ms=i + 1) for i in range(40)
+        ]
+        patterns = DecisionPatterns()
+        for record in records:
+            patterns.observe(record)
+
+        online = patterns.snapshot(T0 + 50)["1m"]["current"]
+        batch = analyze_decision_patterns(records)
+        assert online["total_decisions"] == batch["total_decisions"]
+        assert online["approval_rate"] == pytest.approx(batch["approval_rate"])
+        assert online["gate_pass_rates"] == pytest.approx(batch["gate_pass_rates"])
+        assert online["avg_processing_time_ms"] == pytest.approx(batch["avg_processing_time_ms"])
+        assert online["performance_percentiles"]["p50_ms"] == pytest.approx(20, rel=0.05)
+
+    def test_per_symbol(self):
+        """测试按标的分别统计"""
+        patterns = DecisionPatterns()
+        patterns.observe(make_record(T0, "BTCUSDT", allow=True))
+        patterns.observe(make_record(T0, "ETHUSDT"))
+        patterns.observe(make_record(T0 + 1, "ETHUSDT"))
+
+        assert patterns.symbols() == ["BTCUSDT", "ETHUSDT"]
+        assert patterns.snapshot(T0 + 2)["5m"]["current"]["total_decisions"] == 3
+        assert patterns.snapshot(T0 + 2, "ETHUSDT")["1h"]["current"]["approval_rate"] == 0
+        assert patterns.snapshot(T0 + 2, "SOLUSDT") == {"1m": {}, "5m": {}, "1h": {}}
+
+    def test_store_updates_patterns(self):
+        """测试追踪存储入库时更新统计"""
+        store = TraceStore(patterns=DecisionPatterns())
+        for allow in (True, False, True):
+            store.put(make_trace(allow=allow))
+        store.close()
+
+        record = store.recent(1)[0]
+        current = store.patterns.snapshot(record.ts)["1m"]["current"]
+        assert current["total_decisions"] == 3
+        assert current["approval_rate"] == pytest.approx(2 / 3)
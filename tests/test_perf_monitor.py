@@ -0,0 +1,142 @@
+"""流式分位数与性能监控测试"""
+import threading
+
+import numpy as np
+import pytest
+
+from services.decision.core.utils import PerformanceMonitor, StreamingHistogram, WindowedHistogram
+
+
+@pytest.fixture
+def latencies():
+    """对数正态分布的延迟样本(毫秒)"""
+    return np.random.default_rng(7).lognormal(mean=3.0, sigma=0.6, size=5000)
+
+
+class TestStreamingHistogram:
+    """HDR风格直方图测试"""
+
+    def test_quantiles_match_numpy(self, latencies):
+        """测试分位数与精确值的相对误差在精度范围内"""
+        histogram = StreamingHistogram()
+        for value in latencies:
+            histogram.record(value)
+
+        for q in (0.5, 0.95, 0.99):
+            exact = np.percentile(latencies, q * 100)
+            assert histogram.quantile(q) == pytest.approx(exact, rel=0.02)
+        assert histogram.count == len(latencies)
+        assert histogram.max == pytest.approx(latencies.max())
+
+    def test_constant_memory(self):
+        """测试桶数量固定，超出量程的值计入最后一个桶"""
+        histogram = StreamingHistogram(max_value_ms=1000)
+        n_buckets = histogram.n_buckets
+        histogram.record(5000)
+
+        assert histogram.n_buckets == n_buckets
+        assert histogram.counts[-1] == 1
+
+    def test_count_above_tracks_new_samples(self):
+        """测试阈值计数随写入更新"""
+        histogram = StreamingHistogram()
+        for value in (10, 50, 80, 120):
+            histogram.record(value)
+
+        assert histogram.count_above(70) == 2
+        histogram.record(75)
+        histogram.record(20)
+        assert histogram.count_above(70) == 3
+
+    def test_subtract_restores_counts(self):
+        """测试合并后扣除恢复原状"""
+        a, b = StreamingHistogram(), StreamingHistogram()
+        for value in (1, 2, 3):
+            a.record(value)
+        b.record(100)
+
+        a.add(b)
+        assert a.count == 4
+        a.subtract(b)
+        assert a.count == 3
+        assert a.quantile(1.0) <= 3.1
+
+
+class TestWindowedHistogram:
+    """滑动窗口测试"""
+
+    def test_old_slots_expire(self):
+        """测试超出窗口的样本被滑出"""
+        window = WindowedHistogram(window_s=60, slots=6)
+        window.record(500, now=0)
+        window.record(10, now=30)
+
+        assert window.view(now=59).count == 2
+        assert window.view(now=65).count == 1
+        assert window.view(now=65).quantile(0.99) < 11
+        assert window.view(now=200).count == 0
+
+
+class TestPerformanceMonitor:
+    """性能监控器测试"""
+
+    def test_stats_per_stage_and_symbol(self):
+        """测试按阶段与标的分别统计"""
+        monitor = PerformanceMonitor()
+        for value in range(1, 101):
+            monitor.record("decision", value, "BTCUSDT")
+        monitor.record("decision", 500, "ETHUSDT")
+
+        assert monitor.get_stats("decision")["count"] == 101
+        assert monitor.get_stats("decision", "BTCUSDT")["p95_ms"] == pytest.approx(95, rel=0.02)
+        assert monitor.get_stats("decision", "ETHUSDT")["max_ms"] == 500
+        assert sorted(monitor.symbols("decision")) == ["BTCUSDT", "ETHUSDT"]
+        assert monitor.get_stats("unknown") == {}
+
+    def test_check_sla(self):
+        """测试SLA判断与p95一致"""
+        monitor = PerformanceMonitor()
+        for value in range(1, 101):
+            monitor.record("decision", value)
+
+        assert monitor.check_sla("decision", 96)
+        assert not monitor.check_sla("decision", 90)
+        # 登记阈值后新样本也计入
+        for _ in range(20):
+            monitor.record("decision", 200)
+        assert not monitor.check_sla("decision", 96)
+        assert monitor.check_sla("unknown", 1)
+
+    def test_threshold_registered_once(self, monkeypatch):
+        """测试SLA阈值只登记一次，之后新建的窗口创建时即登记"""
+        monitor = PerformanceMonitor()
+        monitor.record("decision", 10)
+        monitor.check_sla("decision", 70)
+
+        calls = []
+        monkeypatch.setattr(WindowedHistogram, "watch", lambda self, threshold: calls.append(threshold))
+        for _ in range(10):
+            monitor.check_sla("decision", 70)
+        assert calls == []
+
+        monitor.record("exit", 100, "BTCUSDT")
+        assert calls == [70, 70]
+        assert not monitor.check_sla("exit", 70, "BTCUSDT")
+
+    def test_concurrent_record(self):
+        """测试多线程写入与读取时样本不丢失"""
+        monitor = PerformanceMonitor()
+
+        def worker():
+            for i in range(2000):
+                monitor.record("decision", i % 100, "BTCUSDT")
+                monitor.check_sla("decision", 50)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert monitor.get_stats("decision")["count"] == 8 * 2000
+        assert monitor.get_stats("decision", "BTCUSDT")["count"] == 8 * 2000
+
@@ -0,0 +1,146 @@
+"""按标的/时间框架覆盖Gate阈值的测试"""
+import pytest
+
+from services.decision.core.config import ConfigError, build_snapshot, config_manager, validate_config
+from services.decision.core.gate_plan import compile_plan_table, resolve_overrides
+from services.decision.decision import reasoner
+from services.decision.gates import batch, codes, consensus, event_latency, liq_buffer, vol
+from services.decision.schemas.examples import EXAMPLE_ENTER_BULL
+from services.decision.schemas.features import EnterRequest
+
+CONFIG = {
+    "vol_sweet_spot": {
+        "bull": {"sigma_min": 0.0012, "sigma_max": 0.0022, "skew_min": 0.5},
+        "bear": {"sigma_min": 0.0015, "sigma_max": 0.0028, "skew_max": -0.5},
+    },
+    "gates": {"C_align_min": 0.85, "min_depth_px": 1000000, "spread_bp_max": 5},
+    "overrides": {
+        "timeframes": {
+            "1m": {"gates": {"spread_bp_max": 3}},
+        },
+        "symbols": {
+            "BTCUSDT": {
+                "gates": {"min_depth_px": 5000000},
+                "vol_sweet_spot": {"bull": {"sigma_min": 0.0008}},
+            },
+            "pepeusdt": {
+                "gates": {"min_depth_px": 200000, "spread_bp_max": 8},
+                "timeframes": {"1m": {"gates": {"spread_bp_max": 12}}},
+            },
+            "SOLUSDT": {"gates": {"min_depth_px": 1000000}},
+        },
+    },
+}
+
+
+@pytest.fixture
+def table():
+    return compile_plan_table(CONFIG)
+
+
+@pytest.fixture
+def overridden(monkeypatch):
+    """全局配置管理器使用带覆盖的快照"""
+    snapshot = build_snapshot({**config_manager.snapshot.config, **CONFIG}, "test")
+    monkeypatch.setattr(config_manager, "_snapshot", snapshot)
+    return snapshot
+
+
+class TestPlanTable:
+    """覆盖合并与查表测试"""
+
+    def test_precedence(self, table):
+        """测试 全局 → 时间框架 → 标的 → 标的×时间框架 的覆盖顺序"""
+        assert table.resolve("ETHUSDT", "15m") is table.default
+        assert table.resolve("ETHUSDT", "1m").spread_bp_max == 3
+        assert table.resolve("BTCUSDT", "15m").min_depth_px == 5000000
+        assert table.resolve("BTCUSDT", "1m").spread_bp_max == 3
+        assert table.resolve("BTCUSDT", "1m").min_depth_px == 5000000
+        assert table.resolve("PEPEUSDT", "15m").spread_bp_max == 8
+        assert table.resolve("PEPEUSDT", "1m").spread_bp_max == 12
+        assert table.resolve(None, None) is table.default
+
+    def test_flat_table(self, table):
+        """测试编译时展开全部 (标的|*, 时间框架|*) 组合，查表无需回退"""
+        assert len(table) == (3 + 1) * (1 + 1) - 1
+        assert table._plans[("BTCUSDT", "1m")].spread_bp_max == 3
+        assert table._plans[("*", "1m")] is table.resolve("DOGEUSDT", "1m")
+        assert table.resolve("DOGEUSDT", "4h") is table.default
+
+    def test_partial_band_merges(self, table):
+        """测试只覆盖波段的部分字段"""
+        band = table.resolve("BTCUSDT", "15m").vol_band("long")
+        assert dict(band) == {"sigma_min": 0.0008, "sigma_max": 0.0022, "skew_min": 0.5}
+        assert table.resolve("BTCUSDT", "15m").vol_band("bear") == table.default.vol_band("bear")
+
+    def test_identical_plans_shared(self, table):
+        """测试阈值与全局相同的覆盖共用全局计划"""
+        assert table.resolve("SOLUSDT", "15m") is table.default
+        assert table.resolve("SOLUSDT", "1m") is table.resolve("ETHUSDT", "1m")
+
+    def test_matches_merge(self, table):
+        """测试查表结果与直接合并配置后编译一致"""
+        for symbol, tf in [("BTCUSDT", "1m"), ("PEPEUSDT", "1m"), ("ETHUSDT", "1m")]:
+            expected = compile_plan_table(resolve_overrides(CONFIG, symbol, tf)).default
+            assert table.resolve(symbol, tf).version == expected.version
+
+
+class TestOverrideValidation:
+    """覆盖校验测试"""
+
+    def test_valid(self):
+        validate_config(CONFIG)
+
+    @pytest.mark.parametrize("overrides", [
+        {"symbols": {"BTCUSDT": {"exit": {"hazard_thresh": 0.1}}}},
+        {"timeframes": {"1m": {"timeframes": {}}}},
+        {"symbols": {"BTCUSDT": {"gates": {"C_align_min": 1.2}}}},
+        {"symbols": {"BTCUSDT": {"vol_sweet_spot": {"bull": {"sigma_min": 0.01}}}}},
+        {"symbols": ["BTCUSDT"]},
+    ])
+    def test_invalid(self, overrides):
+        """测试未知配置段、越界阈值与合并后无效的波段被拒绝"""
+        with pytest.raises(ConfigError):
+            validate_config({**CONFIG, "overrides": overrides})
+
+
+class TestOverridesInDecisions:
+    """决策路径使用覆盖后的计划"""
+
+    def test_batch_mixed_plans_match_scalar(self, overridden, bull_features, good_pgm):
+        """测试批内不同计划的请求与逐条按各自计划评估一致"""
+        requests = [
+            EnterRequest(symbol=symbol, side_hint="long", ts="2025-09-14T10:25:00Z", tf=tf,
+                         features=bull_features, pgm=good_pgm)
+            for symbol, tf in [("BTCUSDT", "15m"), ("ETHUSDT", "15m"), ("PEPEUSDT", "1m"), ("ETHUSDT", "1m")]
+        ]
+        results = batch.run_gate_checks_batch(requests)
+
+        for request, (_, _, failed) in zip(requests, results, strict=True):
+            plan = config_manager.get_gate_plan(request.symbol, request.tf)
+            scalar = codes.split([
+                event_latency.evaluate(),
+                vol.evaluate(request.features, request.side_hint, plan),
+                consensus.evaluate(request.features, plan),
+                liq_buffer.evaluate(request.features, request.pgm, plan),
+            ])
+            assert codes.render_all(failed) == codes.render_all(scalar[2])
+            assert codes.pack(failed) == codes.pack(scalar[2])
+
+        # BTCUSDT 的深度要求更高
+        assert codes.pack(results[0][2]) != codes.pack(results[1][2])
+        assert list(batch.gate_mask(requests)) == [codes.pack(failed) for _, _, failed in results]
+
+    def test_decision_records_symbol_plan(self, overridden):
+        """测试入场决策使用并记录该标的的计划版本"""
+        request = EnterRequest(**{**EXAMPLE_ENTER_BULL, "symbol": "BTCUSDT"})
+        response = reasoner.decide_enter(request)
+        assert response.plan_version == config_manager.get_gate_plan("BTCUSDT", request.tf).version
+        assert response.plan_version != config_manager.gate_plan.version
+
+    def test_vol_config(self, overridden):
+        """测试 get_vol_config 返回合并后的波段"""
+        assert config_manager.get_vol_config("long", "BTCUSDT", "15m")["sigma_min"] == 0.0008
+        assert config_manager.get_vol_config("long")["sigma_min"] == 0.0012
+        assert dict(config_manager.get_vol_config("sideways", "BTCUSDT")) == {}
+
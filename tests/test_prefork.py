@@ -0,0 +1,123 @@
+"""预fork模式测试"""
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from services.decision.app import app
+from services.decision.core import prefork
+from services.decision.core.prefork import WeightStore, memory_usage
+
+requires_fork = pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 os.fork")
+
+
+@pytest.fixture
+def weights_dir(tmp_path):
+    np.save(tmp_path / "W1.npy", np.arange(12, dtype=np.float32).reshape(3, 4))
+    (tmp_path / "ctfg").mkdir()
+    np.save(tmp_path / "ctfg" / "bias.npy", np.ones(4))
+    (tmp_path / "README.txt").write_text("not a weight")
+    return tmp_path
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class TestWeightStore:
+    """只读内存映射权重测试"""
+
+    def test_load_dir(self, weights_dir):
+        """测试按相对路径命名并以只读映射载入"""
+        store = WeightStore()
+        assert store.load_dir(str(weights_dir)) == 2
+        assert store.names() == ["W1", "ctfg/bias"]
+
+        array = store.get("W1")
+        assert isinstance(array, np.memmap)
+        assert array[2, 3] == 11
+        with pytest.raises(ValueError):
+            array[0, 0] = 1.0
+        assert store.stats() == {"arrays": 2, "bytes": 12 * 4 + 4 * 8}
+
+    def test_add_spills_to_mapping(self):
+        """测试进程内权重转为只读映射"""
+        store = WeightStore()
+        array = store.add("quantile/coef", np.linspace(0, 1, 5))
+        assert isinstance(array, np.memmap)
+        assert not array.flags.writeable
+        assert "quantile/coef" in store
+        np.testing.assert_allclose(array, np.linspace(0, 1, 5))
+
+    @requires_fork
+    def test_shared_after_fork(self, weights_dir, monkeypatch):
+        """测试 fork 后的子进程直接使用主进程映射的权重"""
+        store = WeightStore()
+        monkeypatch.setattr(prefork, "weight_store", store)
+        monkeypatch.setattr(prefork, "preloaded", False)
+        prefork.preload({**prefork.DEFAULT_PREFORK, "weights_dir": str(weights_dir), "gc_freeze": False})
+
+        pid = os.fork()
+        if pid == 0:
+            ok = prefork.preloaded and prefork.weight_store.get("W1").sum() == 66
+            os._exit(0 if ok else 1)
+        _, status = os.waitpid(pid, 0)
+        assert os.waitstatus_to_exitcode(status) == 0
+
+
+class TestMemoryReport:
+    """worker 内存报告测试"""
+
+    def test_memory_usage(self):
+        usage = memory_usage()
+        assert usage["rss"] > 0
+        if "pss" in usage:
+            assert 0 < usage["pss"] <= usage["rss"]
+            assert usage["shared"] + usage["private"] == usage["rss"]
+
+    def test_status_and_metrics(self):
+        """测试 /status 与 /metrics 报告本 worker 内存"""
+        client = TestClient(app)
+        process = client.get("/status").json()["process"]
+        assert process["pid"] == os.getpid()
+        assert process["memory_bytes"]["rss"] > 0
+        assert 'p1_process_memory_bytes{kind="rss"}' in client.get("/metrics").text
+
+
+@requires_fork
+class TestServe:
+    """预fork主进程端到端测试"""
+
+    def test_workers_serve_and_stop(self):
+        """测试 worker 在继承的端口上服务，主进程收到SIGTERM后全部退出"""
+        port = free_port()
+        master = subprocess.Popen(
+            [sys.executable, "-m", "services.decision.serve", "--host", "127.0.0.1",
+             "--port", str(port), "--workers", "2"],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            pids = set()
+            deadline = time.monotonic() + 30
+            while len(pids) < 2 and time.monotonic() < deadline:
+                try:
+                    process = httpx.get(f"http://127.0.0.1:{port}/status", timeout=2).json()["process"]
+                except httpx.HTTPError:
+                    time.sleep(0.2)
+                    continue
+                assert process["preloaded"]
+                pids.add(process["pid"])
+            assert master.pid not in pids
+            assert pids
+        finally:
+            master.send_signal(signal.SIGTERM)
+            assert master.wait(timeout=30) == 0
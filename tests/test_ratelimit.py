@@ -0,0 +1,132 @@
+"""令牌桶限流测试"""
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.decision.app import app
+from services.decision.core import ratelimit
+from services.decision.core.ratelimit import RateLimiter, TokenBucket
+from services.decision.gates import event_latency
+from services.decision.schemas.examples import EXAMPLE_ENTER_BULL, EXAMPLE_EXIT
+
+
+@pytest.fixture
+def limiter(monkeypatch):
+    """替换全局限流器为小额度的独立实例"""
+    limiter = RateLimiter({
+        "client": {"enter": {"rate_per_s": 0.001, "burst": 2}, "exit": {"rate_per_s": 0.001, "burst": 5}},
+        "symbol": {"enter": {"rate_per_s": 0.001, "burst": 3}},
+    })
+    monkeypatch.setattr(ratelimit, "rate_limiter", limiter)
+    monkeypatch.setattr(event_latency, "rate_limiter", limiter)
+    return limiter
+
+
+class TestTokenBucket:
+    """令牌桶测试"""
+
+    def test_refill(self):
+        """测试按速率补充且不超过容量"""
+        bucket = TokenBucket(rate=10, burst=2, now=0.0)
+        assert bucket.acquire(now=0.0) == 0
+        assert bucket.acquire(now=0.0) == 0
+        assert bucket.acquire(now=0.0) == pytest.approx(0.1)
+        assert bucket.acquire(now=0.1) == 0
+        assert bucket.acquire(cost=2, now=100.0) == 0  # 补满也只有 burst 个
+
+    def test_concurrent_acquire(self):
+        """测试并发取令牌不超发"""
+        bucket = TokenBucket(rate=0.001, burst=100)
+        granted = []
+
+        def worker():
+            for _ in range(50):
+                if bucket.acquire() == 0:
+                    granted.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(granted) == 100
+
+
+class TestRateLimiter:
+    """限流器测试"""
+
+    def test_endpoints_independent(self, limiter):
+        """测试各接口额度独立，入场耗尽不影响退出"""
+        assert limiter.acquire("client", "enter", "c1") == 0
+        assert limiter.acquire("client", "enter", "c1") == 0
+        assert limiter.acquire("client", "enter", "c1") > 0
+        assert limiter.acquire("client", "enter", "c2") == 0
+        assert limiter.acquire("client", "exit", "c1") == 0
+        assert limiter.stats()["limited_total"] == {"client:enter": 1}
+
+    def test_unconfigured_and_disabled(self):
+        """测试未配置的接口与关闭限流时总是放行"""
+        limiter = RateLimiter({"client": {"enter": None}})
+        assert all(limiter.acquire("client", "enter", "c1") == 0 for _ in range(1000))
+        disabled = RateLimiter({"enabled": False})
+        assert all(disabled.acquire("client", "enter", "c1") == 0 for _ in range(1000))
+
+    def test_partial_config_merges(self):
+        """测试只覆盖部分接口/字段时其余额度保留缺省值"""
+        limiter = RateLimiter({"client": {"enter": {"burst": 7}}, "symbol": {}})
+        assert limiter.limit("client", "enter") == (50.0, 7.0)
+        assert limiter.limit("client", "exit") == (100.0, 200.0)
+        assert limiter.limit("symbol", "enter") == (20.0, 100.0)
+
+    def test_concurrent_limited_total(self):
+        """测试并发拒绝时 limited_total 计数不丢失"""
+        limiter = RateLimiter({"client": {"enter": {"rate_per_s": 0.001, "burst": 1}}})
+        limiter.acquire("client", "enter", "c1")
+
+        def worker():
+            for _ in range(500):
+                limiter.acquire("client", "enter", "c1")
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert limiter.limited_total[("client", "enter")] == 8 * 500
+
+    def test_max_keys(self):
+        """测试桶数量有上限"""
+        limiter = RateLimiter({"max_keys": 10})
+        for i in range(100):
+            limiter.acquire("client", "enter", f"c{i}")
+        assert limiter.stats()["buckets"] <= 10
+
+
+class TestRateLimitGate:
+    """Gate与HTTP入口测试"""
+
+    def test_gate_rejects_symbol_burst(self, limiter):
+        """测试标的超出额度时Event Gate拒绝"""
+        for _ in range(3):
+            assert event_latency.evaluate(symbol="BTCUSDT").ok
+        result = event_latency.evaluate(symbol="BTCUSDT")
+        assert not result.ok
+        assert "Rate limited: BTCUSDT exceeds" in result.render()
+        assert event_latency.evaluate(symbol="ETHUSDT").ok
+
+    def test_http_429(self, limiter):
+        """测试客户端超出额度时返回429，退出决策不受影响"""
+        client = TestClient(app)
+        statuses = [
+            client.post("/decide/enter", json=EXAMPLE_ENTER_BULL, headers={"X-Client-Id": "bot"}).status_code
+            for _ in range(3)
+        ]
+        assert statuses[:2] == [200, 200]
+        assert statuses[2] == 429
+
+        response = client.post("/decide/enter", json=EXAMPLE_ENTER_BULL, headers={"X-Client-Id": "bot"})
+        assert int(response.headers["Retry-After"]) >= 1
+
+        assert client.post("/decide/exit", json=EXAMPLE_EXIT, headers={"X-Client-Id": "bot"}).status_code != 429
+        assert client.post("/decide/enter", json=EXAMPLE_ENTER_BULL, headers={"X-Client-Id": "other"}).status_code == 200
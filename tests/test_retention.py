@@ -0,0 +1,86 @@
+"""追踪保留策略测试"""
+import pytest
+
+from services.decision.decision.patterns import DecisionPatterns
+from services.decision.decision.retention import RetentionPolicy
+from services.decision.decision.trace import TraceRecord, TraceStore
+from tests.test_trace_store import make_trace
+
+
+def make_record(i: int = 0, decision: str = "DENY", duration_ms: int = 5, reason_chain=(), error=None):
+    """构造追踪记录"""
+    return TraceRecord(
+        request_id=f"req_{i}", ts=1718000000.0 + i, symbol="BTCUSDT", decision=decision,
+        duration_ms=duration_ms, reason_chain=tuple(reason_chain), gates=(), error=error,
+    )
+
+
+@pytest.fixture
+def policy():
+    """不采样普通拒绝的策略"""
+    return RetentionPolicy(reject_sample_rate=0.0, slo_ms=70)
+
+
+class TestRetentionPolicy:
+    """保留判断测试"""
+
+    def test_always_kept(self, policy):
+        """测试允许、出错、超时、邊界單与脆弱性失败总是保留"""
+        assert policy.reason(make_record(decision="ALLOW")) == "allowed"
+        assert policy.reason(make_record(decision="ERROR", error="boom")) == "error"
+        assert policy.reason(make_record(duration_ms=120)) == "slow"
+        assert policy.reason(make_record(reason_chain=["LLM_arb: meta=-, c_llm=0.70"])) == "borderline"
+        assert policy.reason(make_record(reason_chain=["LLM dropped: missed 20ms deadline"])) == "borderline"
+        assert policy.reason(make_record(reason_chain=["FRAGILITY FAIL: flip rate 0.40"])) == "fragility"
+
+    def test_plain_reject_dropped(self, policy):
+        """测试采样率为0时普通拒绝被丢弃"""
+        assert policy.reason(make_record(reason_chain=["Vol Gate FAIL: Volatility too high"])) is None
+
+    def test_sample_rate(self):
+        """测试普通拒绝按比例采样且结果可复现"""
+        policy = RetentionPolicy(reject_sample_rate=0.25)
+        kept = [policy.reason(make_record(i)) for i in range(4000)]
+        rate = sum(reason == "sampled" for reason in kept) / len(kept)
+
+        assert rate == pytest.approx(0.25, abs=0.03)
+        assert [policy.reason(make_record(i)) for i in range(4000)] == kept
+
+    def test_disabled_categories(self):
+        """测试关闭类别后按普通拒绝处理"""
+        policy = RetentionPolicy(keep_allowed=False, reject_sample_rate=0.0)
+        assert policy.reason(make_record(decision="ALLOW")) is None
+
+
+class TestStoreRetention:
+    """追踪存储应用保留策略测试"""
+
+    def test_sampled_out_still_counted(self):
+        """测试被丢弃的追踪不入缓冲区与落盘，但计入窗口统计"""
+        written = []
+        store = TraceStore(
+            sink=written.extend, patterns=DecisionPatterns(),
+            retention=RetentionPolicy(reject_sample_rate=0.0, slo_ms=10_000)
+        )
+        for allow in (True, False, False):
+            store.put(make_trace(allow=allow))
+        store.close()
+
+        assert len(store.recent()) == 1 and len(written) == 1
+        assert store.sampled_out == 2
+        assert store.stats()["retained_total"] == {"allowed": 1}
+        ts = store.recent(1)[0].ts
+        assert store.patterns.snapshot(ts)["1m"]["current"]["total_decisions"] == 3
+
+    def test_slow_batch_decision_kept(self):
+        """测试批量决策按决策耗时判定超时保留"""
+        store = TraceStore(
+            sink=[].extend, patterns=DecisionPatterns(),
+            retention=RetentionPolicy(reject_sample_rate=0.0, slo_ms=70)
+        )
+        trace = make_trace(allow=False)
+        trace.runtime_ms = 120
+        store.put(trace)
+        store.close()
+
+        assert store.stats()["retained_total"] == {"slow": 1}
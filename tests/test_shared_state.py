@@ -0,0 +1,175 @@
+"""多worker共享状态测试
+
+两个 SharedState 实例共用一个 MemoryBackend，各自带独立的 PerformanceMonitor
+与指标注册表，模拟两个 worker 进程。
+"""
+import time
+
+import pytest
+
+from services.decision.core import metrics
+from services.decision.core.shared_state import MemoryBackend, SharedState
+from services.decision.core.utils import PerformanceMonitor
+from services.decision.decision.trace import TraceQuery, TraceRecord, TraceStore
+from tests.test_trace_store import make_trace
+
+
+class Worker:
+    """一个模拟 worker：独立的监控器、注册表与同步器"""
+
+    def __init__(self, backend: MemoryBackend, name: str):
+        self.monitor = PerformanceMonitor(window_s=60, slots=6)
+        self.registry = metrics.Registry()
+        self.decisions = self.registry.register(metrics.Counter("decisions_total", "test", ("outcome",)))
+        self.latency = self.registry.register(metrics.Histogram("latency_seconds", "test", ("stage",)))
+        self.state = SharedState(backend, self.monitor, self.registry, trace_capacity=5, worker_id=name)
+        self.monitor.publisher = self.state.observe_latency
+
+
+@pytest.fixture
+def workers():
+    backend = MemoryBackend()
+    return Worker(backend, "w1"), Worker(backend, "w2")
+
+
+def sync_all(workers):
+    """先全部推送，再全部拉取"""
+    for worker in workers:
+        worker.state.sync()
+    for worker in workers:
+        worker.state.sync()
+
+
+class TestSharedMetrics:
+    """计数器与直方图合并测试"""
+
+    def test_counters_merge(self, workers):
+        """测试各 worker 的计数器合并，重复同步不重复累加"""
+        a, b = workers
+        a.decisions.inc(3, outcome="allow")
+        b.decisions.inc(2, outcome="allow")
+        b.decisions.inc(outcome="deny")
+        sync_all(workers)
+        sync_all(workers)
+
+        for worker in workers:
+            assert worker.decisions.shared == {("allow",): 5, ("deny",): 1}
+            assert 'decisions_total{outcome="allow"} 5' in worker.registry.render()
+        assert a.decisions.value(outcome="allow") == 3  # 本进程值不变
+
+    def test_histogram_merge(self, workers):
+        """测试 Prometheus 直方图合并"""
+        a, b = workers
+        a.latency.observe(0.001, stage="gates")
+        b.latency.observe(0.2, stage="gates")
+        sync_all(workers)
+
+        rendered = a.registry.render()
+        assert 'latency_seconds_count{stage="gates"} 2' in rendered
+        assert 'latency_seconds_bucket{stage="gates",le="0.001"} 1' in rendered
+
+
+class TestSharedLatency:
+    """延迟直方图合并测试"""
+
+    def test_sla_uses_all_workers(self, workers):
+        """测试延迟Gate的SLA判断基于全部 worker 的样本"""
+        a, b = workers
+        for _ in range(90):
+            a.monitor.record("decision", 5.0, symbol="BTCUSDT")
+        for _ in range(10):
+            b.monitor.record("decision", 200.0, symbol="ETHUSDT")
+        assert a.monitor.check_sla("decision", 70)  # 同步前只看本进程
+
+        sync_all(workers)
+        for worker in workers:
+            stats = worker.monitor.get_stats("decision")
+            assert stats["count"] == 100
+            assert stats["max_ms"] == 200.0
+            assert not worker.monitor.check_sla("decision", 70)
+            assert sorted(worker.monitor.symbols("decision")) == ["BTCUSDT", "ETHUSDT"]
+        assert a.monitor.get_stats("decision", "ETHUSDT")["count"] == 10
+
+    def test_window_expiry(self, workers):
+        """测试滑出窗口的时间片不再计入"""
+        a, _ = workers
+        now = time.time()
+        a.state.observe_latency("decision", 5.0, now=now - 120)
+        a.state.observe_latency("decision", 7.0, now=now)
+        a.state.sync(now=now)
+        assert a.monitor.get_stats("decision")["count"] == 1
+
+    def test_backend_failure_keeps_view(self, workers, monkeypatch):
+        """测试后端不可用时保留上次的合并视图"""
+        a, _ = workers
+        a.monitor.record("decision", 5.0)
+        assert a.state.sync_safely()
+
+        def unavailable(*args, **kwargs):
+            raise ConnectionError("backend down")
+
+        monkeypatch.setattr(a.state.backend, "read", unavailable)
+        a.monitor.record("decision", 6.0)
+        assert not a.state.sync_safely()
+        assert a.state.sync_errors == 1
+        assert a.monitor.get_stats("decision")["count"] == 1
+
+
+class TestSharedTraces:
+    """共享追踪环测试"""
+
+    def test_query_across_workers(self, workers):
+        """测试任一 worker 可查询全部 worker 的追踪"""
+        a, b = workers
+        store_a = TraceStore(capacity=10, shared=a.state)
+        store_b = TraceStore(capacity=10, shared=b.state)
+        trace = make_trace("BTCUSDT", allow=True)
+        store_a.put(trace)
+        store_b.put(make_trace("ETHUSDT"))
+        store_a.close()
+        store_b.close()
+
+        records, _ = store_b.query(TraceQuery(symbol="BTCUSDT"))
+        assert [record.request_id for record in records] == [trace.request_id]
+        assert records[0].gates == (("Vol", True),)
+        assert store_b.get(trace.request_id).decision == "ALLOW"
+
+        records, _ = store_a.query(TraceQuery())
+        assert len(records) == 2
+
+    def test_capacity(self, workers):
+        """测试共享追踪环只保留最近 trace_capacity 条"""
+        a, _ = workers
+        store = TraceStore(capacity=10, shared=a.state)
+        for _ in range(8):
+            store.put(make_trace())
+        store.close()
+        assert len(a.state.trace_rows()) == 5
+
+    def test_shared_view_parses_new_items_only(self, workers, monkeypatch):
+        """测试共享追踪环的本地副本只解析新推入的条目，裁掉的条目同步淘汰"""
+        a, b = workers
+        reader = TraceStore(capacity=10, shared=b.state)
+        writer = TraceStore(capacity=10, shared=a.state)
+        for _ in range(3):
+            writer.put(make_trace("BTCUSDT"))
+        writer.drain()
+        first = reader._shared_view()
+        assert len(first) == 3
+
+        parsed = []
+        from_dict = TraceRecord.from_dict
+        monkeypatch.setattr(TraceRecord, "from_dict", lambda data: parsed.append(data) or from_dict(data))
+        newest = make_trace("ETHUSDT")
+        for trace in [make_trace("BTCUSDT") for _ in range(3)] + [newest]:
+            writer.put(trace)
+        writer.drain()
+
+        view = reader._shared_view()
+        assert view is first
+        assert len(parsed) == 4
+        assert len(view) == 5
+        assert [r.request_id for r in view.recent()] == [row["request_id"] for row in reversed(a.state.trace_rows())]
+        assert reader.get(newest.request_id).symbol == "ETHUSDT"
+        assert reader._shared_view() is first and len(parsed) == 4
+
@@ -0,0 +1,85 @@
+"""启动路径测试：惰性导入、预热与就绪检查"""
+import asyncio
+import json
+import subprocess
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.decision.app import app
+from services.decision.core.utils import perf_monitor
+from services.decision.decision import reasoner, warmup
+from services.decision.decision.warmup import Readiness, warm_up
+from services.decision.routes import health
+from scripts import bench_startup
+
+# 不应在导入应用时加载的重型或可选模块
+LAZY_MODULES = (
+    "pyarrow", "pgmpy", "scipy", "pandas",
+    "services.decision.brains.xlstm", "services.decision.brains.llm_reasoner",
+)
+
+
+@pytest.fixture
+def readiness(monkeypatch):
+    """独立的就绪状态（warmup 与 health 两个模块共用）"""
+    state = Readiness()
+    monkeypatch.setattr(warmup, "readiness", state)
+    monkeypatch.setattr(health, "readiness", state)
+    return state
+
+
+class TestLazyImports:
+    """最小导入路径测试"""
+
+    def test_app_import_skips_heavy_modules(self):
+        """测试导入应用不加载 pyarrow/pgmpy/scipy 与可选大脑"""
+        code = (
+            "import json, sys; import services.decision.app; "
+            f"print(json.dumps([m for m in {LAZY_MODULES!r} if m in sys.modules]))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+        assert json.loads(output.strip().splitlines()[-1]) == []
+
+
+class TestWarmUp:
+    """启动预热测试"""
+
+    def test_warm_up_runs_every_path(self, readiness):
+        """测试预热完成后就绪，并清空合成决策的延迟样本"""
+        stats = asyncio.run(warm_up(rounds=1))
+        assert stats["state"] == "ready"
+        assert stats["warmup_decisions"] == 3 + 3 + 1 + 1 + 3  # 异步单条、同步单条、双假说、退出、批量
+        assert readiness.time_to_ready_ms > 0
+        assert perf_monitor.get_stats("decision") == {}
+        assert "services.decision.brains.xlstm" in sys.modules
+
+    def test_failure_reported(self, readiness, monkeypatch):
+        """测试预热失败时 /health 返回503"""
+        async def broken(request):
+            raise RuntimeError("model not loaded")
+
+        monkeypatch.setattr(reasoner, "decide_enter_async", broken)
+        assert asyncio.run(warm_up(rounds=1))["state"] == "failed"
+
+        response = TestClient(app).get("/health")
+        assert response.status_code == 503
+        assert response.json()["status"] == "unhealthy"
+
+    def test_health_after_warm_up(self, readiness):
+        """测试预热成功后 /health 返回200"""
+        asyncio.run(warm_up(rounds=1))
+        response = TestClient(app).get("/health")
+        assert response.status_code == 200
+        assert response.json()["ready"]
+
+
+class TestStartupBenchmark:
+    """首个决策耗时基准测试"""
+
+    def test_time_to_first_decision(self):
+        """测试基准脚本测得就绪与首个决策时间"""
+        sample = bench_startup.measure_once(bench_startup.bench_env(warmup=True))
+        assert 0 < sample["ready_ms"] <= sample["first_decision_ms"]
+        assert sample["first_latency_ms"] > 0
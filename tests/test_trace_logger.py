@@ -0,0 +1,133 @@
+"""列式追踪日志测试"""
+import os
+
+import pyarrow.parquet as pq
+import pytest
+
+from services.decision.decision.trace import TraceRecord, TraceStore
+from services.decision.decision.trace_logger import (
+    INDEX_FILE, ParquetSegmentSink, find_segments, load_index, read_traces
+)
+from tests.test_trace_store import make_trace
+
+DAY1 = 1718000000.0  # 2024-06-10 06:13:20 UTC
+DAY2 = DAY1 + 86400
+
+
+def make_row(i: int, symbol: str, ts: float) -> dict:
+    """构造一条追踪字典"""
+    return {
+        "request_id": f"req_{i}", "ts": ts, "symbol": symbol, "side_hint": "long", "tf": "15m",
+        "decision": "DENY", "side": None, "allocation": 0.0, "plan_version": "gp-test",
+        "reason_chain": ["Vol Gate FAIL: Volatility too high"], "duration_ms": 2,
+        "gates": [["Vol", False], ["Liq", True]], "cache_hit": False, "error": None,
+    }
+
+
+@pytest.fixture
+def sink(tmp_path):
+    """小段小行组的写入器"""
+    return ParquetSegmentSink(str(tmp_path), segment_rows=50, flush_rows=20, flush_interval_s=60)
+
+
+class TestParquetSegmentSink:
+    """分段写入测试"""
+
+    def test_rows_buffered_until_flush(self, sink, tmp_path):
+        """测试未满行组时不写文件"""
+        sink.write([make_row(i, "BTCUSDT", DAY1 + i) for i in range(5)])
+
+        assert sink.buffered == 5
+        assert load_index(str(tmp_path)) == []
+        sink.close()
+        assert sink.buffered == 0
+        assert load_index(str(tmp_path))[0]["rows"] == 5
+
+    def test_rotation_and_index(self, sink, tmp_path):
+        """测试按行数轮转段文件并记录索引"""
+        rows = [make_row(i, "BTCUSDT" if i % 2 else "ETHUSDT", DAY1 + i) for i in range(120)]
+        for start in range(0, 120, 10):
+            sink.write(rows[start:start + 10])
+        sink.close()
+
+        index = load_index(str(tmp_path))
+        assert sum(seg["rows"] for seg in index) == 120
+        assert len(index) >= 2
+        assert all(seg["day"] == "20240610" for seg in index)
+        assert sum(seg["symbols"]["BTCUSDT"] for seg in index) == 60
+        assert index[0]["ts_min"] == DAY1
+
+    def test_day_boundary_splits_segments(self, sink, tmp_path):
+        """测试跨UTC日的行写入不同段"""
+        sink.write([make_row(0, "BTCUSDT", DAY1), make_row(1, "BTCUSDT", DAY2)])
+        sink.close()
+
+        days = sorted(seg["day"] for seg in load_index(str(tmp_path)))
+        assert days == ["20240610", "20240611"]
+
+    def test_dictionary_encoded_columns(self, sink, tmp_path):
+        """测试低基数字符串列按字典编码存储"""
+        sink.write([make_row(i, "BTCUSDT", DAY1 + i) for i in range(30)])
+        sink.close()
+
+        path = find_segments(str(tmp_path))[0]
+        column = pq.ParquetFile(path).metadata.row_group(0).column(2)
+        assert column.path_in_schema == "symbol"
+        assert any("DICTIONARY" in str(enc) for enc in column.encodings)
+
+    def test_accepts_trace_records(self, sink, tmp_path):
+        """测试直接写入TraceRecord"""
+        record = TraceRecord.from_trace(make_trace(allow=True))
+        sink.write([record])
+        sink.close()
+
+        table = read_traces(str(tmp_path), symbol="BTCUSDT")
+        row = table.to_pylist()[0]
+        assert row["decision"] == "ALLOW"
+        assert row["reason_chain"] == ["r1", "r2"]
+        assert row["gate_names"] == ["Vol"] and row["gate_passed"] == [True]
+
+
+class TestReadTraces:
+    """按标的与时间查询测试"""
+
+    def test_symbol_day_query(self, sink, tmp_path):
+        """测试只读取包含目标标的与日期的段"""
+        sink.write([make_row(i, "ETHUSDT", DAY1 + i) for i in range(20)])
+        sink.rotate()
+        sink.write([make_row(100 + i, "BTCUSDT", DAY1 + 100 + i) for i in range(10)])
+        sink.write([make_row(200, "BTCUSDT", DAY2)])
+        sink.close()
+
+        assert len(find_segments(str(tmp_path), symbol="BTCUSDT", day="20240610")) == 1
+        table = read_traces(str(tmp_path), symbol="BTCUSDT", day="20240610")
+        assert table.num_rows == 10
+        assert set(table.column("symbol").to_pylist()) == {"BTCUSDT"}
+        assert table.column("ts").to_pylist() == sorted(table.column("ts").to_pylist())
+
+    def test_time_range_query(self, sink, tmp_path):
+        """测试按时间范围过滤"""
+        sink.write([make_row(i, "BTCUSDT", DAY1 + i) for i in range(40)])
+        sink.close()
+
+        table = read_traces(str(tmp_path), start_ts=DAY1 + 10, end_ts=DAY1 + 19)
+        assert table.num_rows == 10
+
+    def test_empty_directory(self, tmp_path):
+        """测试无段文件时返回空表"""
+        assert read_traces(str(tmp_path), symbol="BTCUSDT").num_rows == 0
+
+
+class TestStoreIntegration:
+    """追踪存储关闭时封段测试"""
+
+    def test_close_seals_segment(self, tmp_path):
+        """测试关闭追踪存储后段文件写入索引"""
+        sink = ParquetSegmentSink(str(tmp_path), flush_rows=1000)
+        store = TraceStore(sink=sink.write, closer=sink.close)
+        for _ in range(3):
+            store.put(make_trace())
+        store.close()
+
+        assert os.path.exists(os.path.join(str(tmp_path), INDEX_FILE))
+        assert read_traces(str(tmp_path), symbol="BTCUSDT").num_rows == 3
@@ -0,0 +1,186 @@
+"""追踪查询测试"""
+import pytest
+from fastapi.testclient import TestClient
+
+from services.decision.app import app
+from services.decision.decision.trace import (
+    ReasoningTrace, TraceQuery, TraceRecord, TraceRing, TraceStore, decode_cursor, explain_record, trace_store
+)
+from services.decision.decision.trace_logger import ParquetSegmentSink
+from services.decision.schemas.examples import EXAMPLE_ENTER_REJECT_VOL
+
+T0 = 1718000000.0
+
+
+def make_record(i: int, symbol: str = "BTCUSDT", decision: str = "DENY", failed: str = "vol",
+                duration_ms: int = 5) -> TraceRecord:
+    """构造第i条追踪记录（ts递增）"""
+    return TraceRecord(
+        request_id=f"req_{i}", ts=T0 + i, symbol=symbol, side_hint="long", tf="15m",
+        decision=decision, reason_chain=(), duration_ms=duration_ms,
+        gates=((failed, False),) if failed else (), cache_hit=False,
+    )
+
+
+@pytest.fixture
+def client():
+    """测试客户端"""
+    return TestClient(app)
+
+
+class TestTraceIds:
+    """追踪ID测试"""
+
+    def test_unique_within_second(self):
+        """测试同一秒内创建的追踪ID不重复"""
+        ids = {ReasoningTrace().request_id for _ in range(100)}
+        assert len(ids) == 100
+
+    def test_failed_gates_from_reason_chain(self):
+        """测试从推理链提取失败Gate"""
+        trace = ReasoningTrace()
+        trace.add_step("Final_Decision", "DENY", {"reason_chain": [
+            "✗ Gate FAILURE:", "Vol Gate FAIL: Volatility too high", "FRAGILITY FAIL: flip rate 0.4"
+        ]})
+        record = TraceRecord.from_trace(trace)
+        assert record.failed_gates == ["vol", "fragility"]
+
+
+class TestTraceRingIndex:
+    """环形缓冲区索引测试"""
+
+    def test_eviction_updates_index(self):
+        """测试覆盖最旧记录时同步淘汰索引"""
+        ring = TraceRing(capacity=3)
+        for i, symbol in enumerate(["BTCUSDT", "ETHUSDT", "BTCUSDT", "SOLUSDT"]):
+            ring.append(make_record(i, symbol))
+
+        assert ring.get("req_0") is None
+        assert ring.get("req_3").symbol == "SOLUSDT"
+        assert [r.request_id for r in ring.query(TraceQuery(symbol="BTCUSDT"))] == ["req_2"]
+        assert "BTCUSDT" in ring._by_symbol and len(ring._by_symbol["BTCUSDT"]) == 1
+        assert ring.oldest_ts() == T0 + 1
+
+    def test_filters(self):
+        """测试按方向、结果、失败Gate与耗时过滤"""
+        ring = TraceRing(capacity=100)
+        ring.append(make_record(0, decision="ALLOW", failed=None, duration_ms=80))
+        ring.append(make_record(1, failed="liq_buffer"))
+        ring.append(make_record(2, failed="vol", duration_ms=90))
+
+        def ids(query):
+            return [r.request_id for r in ring.query(query)]
+
+        assert ids(TraceQuery(outcome="allow")) == ["req_0"]
+        assert ids(TraceQuery(failed_gate="vol")) == ["req_2"]
+        assert ids(TraceQuery(min_duration_ms=70)) == ["req_2", "req_0"]
+        assert ids(TraceQuery(side="short")) == []
+        assert ids(TraceQuery(start_ts=T0 + 1, end_ts=T0 + 1)) == ["req_1"]
+
+
+class TestTraceStoreQuery:
+    """游标分页与落盘查询测试"""
+
+    def test_cursor_pagination(self):
+        """测试游标翻页不重不漏"""
+        store = TraceStore(capacity=100)
+        for i in range(25):
+            store.ring.append(make_record(i))
+
+        seen, cursor = [], None
+        while True:
+            before = decode_cursor(cursor) if cursor else None
+            records, cursor = store.query(TraceQuery(before=before, limit=10))
+            seen += [r.request_id for r in records]
+            if cursor is None:
+                break
+        assert seen == [f"req_{i}" for i in range(24, -1, -1)]
+
+    def test_falls_back_to_segments(self, tmp_path):
+        """测试缓冲区不足一页时继续查询更早的落盘段"""
+        sink = ParquetSegmentSink(str(tmp_path))
+        store = TraceStore(capacity=5, sink=sink.write, closer=sink.close, archive_dir=str(tmp_path))
+        records = [make_record(i, "ETHUSDT" if i % 2 else "BTCUSDT") for i in range(20)]
+        for record in records:
+            store.ring.append(record)
+        sink.write(records)
+        sink.close()
+
+        page, cursor = store.query(TraceQuery(symbol="BTCUSDT", limit=6))
+        assert [r.request_id for r in page] == ["req_18", "req_16", "req_14", "req_12", "req_10", "req_8"]
+        assert page[-1].gates == (("vol", False),)
+
+        page, cursor = store.query(TraceQuery(symbol="BTCUSDT", limit=6, before=decode_cursor(cursor)))
+        assert [r.request_id for r in page] == ["req_6", "req_4", "req_2", "req_0"]
+        assert cursor is None
+
+    def test_get_falls_back_to_segments(self, tmp_path):
+        """测试已被缓冲区淘汰的追踪按 request_id 从落盘段查到"""
+        sink = ParquetSegmentSink(str(tmp_path), segment_rows=4)
+        store = TraceStore(capacity=5, sink=sink.write, closer=sink.close, archive_dir=str(tmp_path))
+        records = [make_record(i) for i in range(20)]
+        for record in records:
+            store.ring.append(record)
+        sink.write(records)
+        sink.close()
+
+        assert store.ring.get("req_3") is None
+        assert store.get("req_3").ts == T0 + 3
+        assert store.get("req_19") is store.ring.get("req_19")
+        assert store.get("req_missing") is None
+
+
+class TestTracesAPI:
+    """/traces 端点测试"""
+
+    def test_query_after_decision(self, client, monkeypatch):
+        """测试决策后可按标的与失败Gate查询到追踪"""
+        monkeypatch.setattr(trace_store, "retention", None)
+        client.post("/decide/enter", json=EXAMPLE_ENTER_REJECT_VOL)
+        trace_store.drain()
+
+        response = client.get("/traces", params={
+            "symbol": EXAMPLE_ENTER_REJECT_VOL["symbol"], "outcome": "deny", "failed_gate": "vol", "limit": 1
+        })
+        assert response.status_code == 200
+        items = response.json()["items"]
+        assert len(items) == 1
+        assert items[0]["decision"] == "DENY"
+
+        detail = client.get(f"/traces/{items[0]['request_id']}")
+        assert detail.status_code == 200
+        assert detail.json()["symbol"] == EXAMPLE_ENTER_REJECT_VOL["symbol"]
+
+    def test_invalid_cursor_and_missing_trace(self, client):
+        """测试非法游标返回400，未知追踪返回404"""
+        assert client.get("/traces", params={"cursor": "not-a-cursor"}).status_code == 400
+        assert client.get("/traces/req_missing").status_code == 404
+
+
+class TestExplain:
+    """按需生成推理说明测试"""
+
+    def test_explain_record(self):
+        """测试由追踪记录生成说明"""
+        record = make_record(0, decision="ALLOW", failed=None)
+        record.side, record.allocation = "long", 0.05
+        record.reason_chain = ("✓ All Gates PASSED", "Fragility OK")
+        text = explain_record(record)
+
+        assert "**APPROVED** - LONG" in text
+        assert "5.0% of equity" in text
+        assert "1. ✓ ✓ All Gates PASSED" in text
+
+    def test_explain_endpoint(self, client, monkeypatch):
+        """测试 /traces/{id}/explain 返回纯文本说明"""
+        monkeypatch.setattr(trace_store, "retention", None)
+        client.post("/decide/enter", json=EXAMPLE_ENTER_REJECT_VOL)
+        trace_store.drain()
+        request_id = trace_store.recent(1)[0].request_id
+
+        response = client.get(f"/traces/{request_id}/explain")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "REJECTED" in response.text
+        assert "vol: FAIL" in response.text
+        assert client.get("/traces/req_missing/explain").status_code == 404
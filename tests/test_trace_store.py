@@ -0,0 +1,137 @@
+"""追踪存储测试"""
+import json
+
+import pytest
+
+from services.decision.decision.trace import (
+    ReasoningTrace, TraceRecord, TraceRing, TraceStore, analyze_decision_patterns
+)
+from services.decision.decision.trace_logger import JsonlSink
+from services.decision.schemas.responses import EnterResponse
+
+
+def make_trace(symbol: str = "BTCUSDT", allow: bool = False) -> ReasoningTrace:
+    """构造一条完整的推理追踪"""
+    trace = ReasoningTrace()
+    trace.add_step("Request_Received", "OK", {"symbol": symbol, "side_hint": "long", "tf": "15m"})
+    trace.add_gate_check("Vol", allow, "Vol Gate")
+    trace.add_decision(EnterResponse(
+        allow=allow, side="long" if allow else None, reason_chain=["r1", "r2"],
+        runtime_ms=3, plan_version="gp-test"
+    ))
+    return trace
+
+
+class TestTraceRecord:
+    """紧凑追踪记录测试"""
+    
+    def test_from_trace(self):
+        """测试由推理追踪压缩生成记录"""
+        record = TraceRecord.from_trace(make_trace(allow=True))
+        
+        assert record.symbol == "BTCUSDT"
+        assert record.decision == "ALLOW"
+        assert record.side == "long"
+        assert record.reason_chain == ("r1", "r2")
+        assert record.gates == (("Vol", True),)
+        assert record.plan_version == "gp-test"
+        assert not hasattr(record, "__dict__")
+    
+    def test_duration_uses_decision_runtime(self):
+        """测试决策完成后才创建的追踪以决策耗时计，而非追踪存续时间"""
+        trace = ReasoningTrace()
+        trace.add_step("Request_Received", "OK", {"symbol": "BTCUSDT", "batch": True})
+        trace.add_decision(EnterResponse(allow=False, runtime_ms=3), runtime_ms=150)
+        
+        assert TraceRecord.from_trace(trace).duration_ms == 150
+        assert trace.get_summary()["duration_ms"] == 150
+    
+    def test_to_dict_is_json_serializable(self):
+        """测试记录可直接序列化"""
+        data = TraceRecord.from_trace(make_trace()).to_dict()
+        assert json.loads(json.dumps(data))["decision"] == "DENY"
+
+
+class TestTraceRing:
+    """环形缓冲区测试"""
+    
+    def test_overwrites_oldest(self):
+        """测试满后覆盖最旧的记录，按时间顺序返回"""
+        ring = TraceRing(capacity=3)
+        for i in range(5):
+            ring.append(TraceRecord(request_id=str(i)))
+        
+        assert len(ring) == 3
+        assert [r.request_id for r in ring.recent()] == ["2", "3", "4"]
+        assert [r.request_id for r in ring.recent(2)] == ["3", "4"]
+
+
+class TestTraceStore:
+    """追踪存储测试"""
+    
+    def test_put_only_enqueues(self):
+        """测试put只入队，drain后才进入环形缓冲区"""
+        store = TraceStore(flush_interval_s=3600)
+        store.put(make_trace())
+        
+        assert store.stats()["pending"] == 1
+        assert len(store.recent()) == 0
+        assert store.drain() == 1
+        assert len(store.recent()) == 1
+        store.close()
+    
+    def test_background_writer_persists_batches(self, tmp_path):
+        """测试后台线程分批写入JSONL"""
+        sink = JsonlSink(str(tmp_path))
+        batches = []
+        
+        def recording_sink(records):
+            batches.append(len(records))
+            sink.write(records)
+        
+        store = TraceStore(sink=recording_sink, batch_size=2, flush_interval_s=0.01)
+        for i in range(5):
+            store.put(make_trace(symbol=f"S{i}USDT"))
+        store.close()
+        
+        lines = [json.loads(line) for f in tmp_path.iterdir() for line in f.read_text().splitlines()]
+        assert sorted(line["symbol"] for line in lines) == [f"S{i}USDT" for i in range(5)]
+        assert max(batches) <= 2
+        assert store.stats()["written_total"] == 5
+    
+    def test_backlog_drops_oldest(self):
+        """测试积压超限时丢弃最旧的追踪"""
+        store = TraceStore(queue_capacity=2, flush_interval_s=3600)
+        for i in range(3):
+            store.put(make_trace(symbol=f"S{i}USDT"))
+        store.drain()
+        
+        assert store.dropped == 1
+        assert [r.symbol for r in store.recent()] == ["S1USDT", "S2USDT"]
+        store.close()
+    
+    def test_sink_error_does_not_raise(self):
+        """测试落盘失败不影响环形缓冲区"""
+        def failing_sink(records):
+            raise OSError("disk full")
+        
+        store = TraceStore(sink=failing_sink, flush_interval_s=3600)
+        store.put(make_trace())
+        store.drain()
+        
+        assert store.sink_errors == 1
+        assert len(store.recent()) == 1
+        store.close()
+
+
+class TestDecisionPatterns:
+    """决策模式分析测试"""
+    
+    def test_analyze_records(self):
+        """测试基于记录的决策模式分析"""
+        records = [TraceRecord.from_trace(make_trace(allow=a)) for a in (True, False, False, True)]
+        patterns = analyze_decision_patterns(records)
+        
+        assert patterns["total_decisions"] == 4
+        assert patterns["approval_rate"] == pytest.approx(0.5)
+        assert patterns["gate_pass_rates"]["Vol"] == pytest.approx(0.5)